@@ -1,11 +1,30 @@
 #!/usr/bin/env python
-from pycbc.waveform import *
-from pycbc.types import *
-from pycbc.psd import *
-from pycbc.filter import *
 import argparse
+import logging
+import os
 
-parser = argparse.ArgumentParser()
+import numpy as np
+
+from glue.ligolw import ligolw
+from glue.ligolw import lsctables
+from glue.ligolw import utils as ligolw_utils
+
+from gwnr.analysis.optimal_snr import (
+    OptimalSNRCalculator,
+    injection_arrays,
+    write_snrs_to_table,
+)
+
+
+@lsctables.use_in
+class LIGOLWContentHandler(ligolw.LIGOLWContentHandler):
+    pass
+
+
+parser = argparse.ArgumentParser(
+    description="""Computes optimal SNRs of one signal, or of all injections
+    in a SimInspiral table (writing them into its columns)."""
+)
 parser.add_argument("--m1", type=float)
 parser.add_argument("--m2", type=float)
 parser.add_argument("--s1z", default=0.0, type=float)
@@ -23,62 +42,105 @@ parser.add_argument(
 parser.add_argument("--f-lower", type=float)
 parser.add_argument("--approx", default="SEOBNRv2", type=str)
 parser.add_argument("--delta-t", default=1.0 / 4096.0, type=float)
-parser.add_argument("--delta-f", default=1.0 / 128.0, type=float)
+parser.add_argument(
+    "--delta-f",
+    default=None,
+    type=float,
+    help="""Frequency spacing. Default: set by the duration of each signal
+    (this used to default to 1/128 Hz; pass --delta-f 0.0078125 for the old
+    behaviour)""",
+)
+parser.add_argument("--psd", default="aLIGOZeroDetHighPower", type=str)
+
+parser.add_argument(
+    "--injection-file",
+    type=str,
+    help="XML file with a SimInspiral table. If given, SNRs of all its injections are computed",
+)
+parser.add_argument(
+    "--output-file",
+    type=str,
+    help="""XML file to write the injections with their SNRs to. Required
+    with --injection-file, and must differ from it""",
+)
+parser.add_argument(
+    "--ifo-psds",
+    nargs="+",
+    default=["H1:aLIGOZeroDetHighPower", "L1:aLIGOZeroDetHighPower"],
+    help="Detectors and their PSDs (pycbc PSD model or noise curve), as IFO:PSD",
+)
+parser.add_argument(
+    "--snr-columns",
+    nargs="+",
+    default=["H1:alpha1", "L1:alpha2", "network:alpha3"],
+    help="SimInspiral columns the SNR of each detector (or network) is written to, as IFO:COLUMN",
+)
+parser.add_argument("--num-processes", default=1, type=int)
+parser.add_argument(
+    "--block-size", default=64, type=int, help="Signals generated and reduced together"
+)
+parser.add_argument("--verbose", action="store_true")
 
 args = parser.parse_args()
+if args.injection_file is not None:
+    if args.output_file is None:
+        parser.error("--output-file is required with --injection-file")
+    if os.path.abspath(args.output_file) == os.path.abspath(args.injection_file):
+        parser.error("--output-file must not overwrite --injection-file")
+
+if args.verbose:
+    logging.basicConfig(level=logging.INFO)
 
 # INITIALIZE
 approx = args.approx
 f_lower = args.f_lower
-dt = args.delta_t
-df = args.delta_f
-time_length = int(1.0 / df)
-sample_rate = int(1.0 / dt)
-N = time_length * sample_rate
-n = N / 2 + 1
+sample_rate = int(1.0 / args.delta_t)
 
-m1 = args.m1
-m2 = args.m2
-s1z = args.s1z
-s2z = args.s2z
-dist = args.dist
-incl = args.incl
-
-# GET WAVEFORM
-if approx in td_approximants():
-    hp, hc = get_td_waveform(
+if args.injection_file is None:
+    # ONE SIGNAL, seen overhead by a detector that only measures h+
+    calc = OptimalSNRCalculator(
+        {"H1": args.psd},
+        f_lower,
+        sample_rate=sample_rate,
+        delta_f=args.delta_f,
         approximant=approx,
-        mass1=m1,
-        mass2=m2,
-        spin1z=s1z,
-        spin2z=s2z,
-        distance=dist,
-        inclination=incl,
-        f_lower=f_lower,
-        delta_t=dt,
     )
-    time_length = len(hp) * dt
-    df = 1.0 / time_length
-    n = len(hp) / 2 + 1
-    # print len(hp), time_length, df, n, time_length * sample_rate / 2 + 1
-elif approx in fd_approximants():
-    hp, hc = get_fd_waveform(
+    params = {
+        "mass1": np.array([args.m1]),
+        "mass2": np.array([args.m2]),
+        "spin1z": np.array([args.s1z]),
+        "spin2z": np.array([args.s2z]),
+        "distance": np.array([args.dist]),
+        "inclination": np.array([args.incl]),
+        "f_lower": np.array([f_lower]),
+    }
+    products = calc.inner_products(params)
+    opt_snr = np.sqrt(products[0, 0, 0])
+
+    print("Optimal SNR = %f" % (opt_snr))
+else:
+    # ALL INJECTIONS, in every detector
+    psds = dict(s.split(":", 1) for s in args.ifo_psds)
+    columns = dict(s.split(":", 1) for s in args.snr_columns)
+    calc = OptimalSNRCalculator(
+        psds,
+        f_lower,
+        sample_rate=sample_rate,
+        delta_f=args.delta_f,
         approximant=approx,
-        mass1=m1,
-        mass2=m2,
-        spin1z=s1z,
-        spin2z=s2z,
-        distance=dist,
-        inclination=incl,
-        f_lower=f_lower,
-        delta_f=df,
+        num_processes=args.num_processes,
+        block_size=args.block_size,
+    )
+    indoc = ligolw_utils.load_filename(
+        args.injection_file, contenthandler=LIGOLWContentHandler, verbose=args.verbose
+    )
+    sim_table = lsctables.SimInspiralTable.get_table(indoc)
+    params = injection_arrays(sim_table)
+    snrs = calc.snrs(params)
+    write_snrs_to_table(sim_table, snrs, columns)
+    ligolw_utils.write_filename(indoc, args.output_file, verbose=args.verbose)
+    logging.info(
+        "Network SNRs of {} injections: median {:.2f}, max {:.2f}".format(
+            len(sim_table), np.median(snrs["network"]), np.max(snrs["network"])
+        )
     )
-
-# GET PSD
-psd = from_string("aLIGOZeroDetHighPower", n, df, f_lower)
-
-# COMPUTE OPTIMAL SNR
-h = hp  # REPLACE WITH h = Fplus * hp + Fcross * hc
-opt_snr = sigma(h, psd=psd, low_frequency_cutoff=f_lower)
-
-print("Optimal SNR = %f" % (opt_snr))
@@ -6,17 +6,15 @@ import sys
 import os
 import lalsimulation as ls
 import lal
+from multiprocessing import Pool
 from optparse import OptionParser
-import romspline
-from pycbc.waveform import amplitude_from_polarizations, phase_from_polarizations
-from pycbc.types import TimeSeries
 from pycbc.pnutils import eta_mass1_to_mass2
 from numpy.random import uniform
 import time
 
+from gwnr.waveform.compression import CompressedModesFile, compress_modes
+
 __itime = time.time()
-sys.path.append("/home/prayush/src//")
-sys.path.append("/home/prayush/src/romspline/")
 
 __author__ = "Prayush Kumar <prkumar@cita.utoronto.ca>"
 PROGRAM_NAME = os.path.abspath(sys.argv[0])
@@ -126,6 +124,24 @@ parser.add_option(
     "--output-type", help="Output type: (0) HDF5 or (1) ASCII", type=int, default=0
 )
 
+parser.add_option(
+    "--output-file",
+    help="""HDF5 file that compressed modes of all waves are written to
+                    (default: <output-dir-prefix>/CompressedModes.h5)""",
+    type=str,
+    default=None,
+)
+parser.add_option(
+    "-j",
+    "--num-processes",
+    help="No of processes generating and compressing waves",
+    type=int,
+    default=1,
+)
+parser.add_option(
+    "--seed", help="Seed of the random parameter draws", type=int, default=None
+)
+
 parser.add_option(
     "--num-write-verbose",
     help="No of waves to generate before prompting the user",
@@ -143,6 +159,7 @@ parser.add_option(
 options, argv = parser.parse_args()
 print("Restricting to aligned spins..: ", options.aligned_spin)
 
+np.random.seed(options.seed)
 num_waves = options.num
 num_write = 30 + int(uniform(0, 70))  # RANDOM PRESET \in [50, 100]
 output_dir = options.output_dir_prefix  # + '_%06d' % int( uniform() * 1e7 )
@@ -190,301 +207,220 @@ else:
     pass
 
 num_write_verbose = options.num_write_verbose
+
+output_file = options.output_file
+if output_file is None:
+    output_file = os.path.join(output_dir, "CompressedModes.h5")
 # }}}
 
 #########################################
 ############# FUNCTIONS #################
 #########################################
 
+param_names = ["m1", "m2", "s1x", "s1y", "s1z", "s2x", "s2y", "s2z", "f_lower", "f_samp"]
+
 
-def compress_modes_to_splines(
-    hLM,
-    total_mass,
-    to_amp_phase=True,
-    to_modes=False,
-    tol_one=1e-5,
-    tol_two=1e-5,
-    func_one=np.array,
-    subsamp_fac_one_low=4,
-    subsamp_fac_one_high=2,
-    func_two=np.log,
-    subsamp_fac_two_low=4,
-    subsamp_fac_two_high=1,
-    verbose=False,
-):
+def sample_parameters(num_waves):
+    """
+    Draws masses and spins of all waves at once. Spin directions are
+    isotropic, magnitudes uniform, unless spins are aligned.
+    """
+    # {{{
+    eta = uniform(eta_min, eta_max, num_waves)
+    q = m2_min / np.array([eta_mass1_to_mass2(e, m2_min) for e in eta])
+    params = {"m1": q * m2_min, "m2": np.full(num_waves, m2_min)}
+    for tag, zmin, zmax in [
+        ("1", spin1z_min, spin1z_max),
+        ("2", spin2z_min, spin2z_max),
+    ]:
+        direction = uniform(-1, 1, (num_waves, 3))
+        direction /= np.linalg.norm(direction, axis=1)[:, None]
+        spin = direction * uniform(spin_mag_min, spin_mag_max, num_waves)[:, None]
+        if options.aligned_spin:
+            spin[:, :2] = 0
+            spin[:, 2] = uniform(zmin, zmax, num_waves)
+        for jdx, comp in enumerate("xyz"):
+            params["s" + tag + comp] = spin[:, jdx]
+    return [dict((k, float(v[idx])) for k, v in params.items()) for idx in range(num_waves)]
+    # }}}
+
+
+def generate_modes(params):
     """
-    Compresses modes provided in hLM according to total mass,
-    by either first converting to amplitude and phase OR using
-    the modes directly.
-    Users can subsample the time-series and apply a function to
-    them before using romspline compression. These functions can
-    decrease run time drastically.
-
-    [DEFAULTS are sensible for raw modes.]
+    Generates SEOBNRv3 modes (with m > 0). Returns the sampling rate, the
+    time samples in seconds, and {(l, m): complex array}.
     """
     # {{{
-    #################################
-    t_arr = TimeSeries(
-        hLM.tdata.data * total_mass * lal.MTSUN_SI, delta_t=hLM.mode.deltaT
+    for f_samp in [1.0 / filter_dt, 2.0 / filter_dt]:
+        try:
+            (
+                hplus,
+                hcross,
+                dynHi,
+                hlmPTS,
+                hlmPTSHi,
+                hIMRlmJTSHi,
+                hLM,
+                attachP,
+            ) = ls.SimIMRSpinEOBWaveformAll(
+                phiref,
+                1.0 / f_samp,
+                params["m1"] * lal.MSUN_SI,
+                params["m2"] * lal.MSUN_SI,
+                f_low,
+                distance,
+                inclination,
+                params["s1x"],
+                params["s1y"],
+                params["s1z"],
+                params["s2x"],
+                params["s2y"],
+                params["s2z"],
+                precessing_eob_version,
+            )
+            break
+        except Exception:
+            if f_samp != 1.0 / filter_dt:
+                raise
+    # All modes share one time grid
+    times = np.array(hLM.tdata.data) * (params["m1"] + params["m2"]) * lal.MTSUN_SI
+    modes = {}
+    while hLM is not None:
+        if hLM.m > 0:
+            modes[(hLM.l, hLM.m)] = np.array(hLM.mode.data.data)
+            delta_t = hLM.mode.deltaT
+        hLM = hLM.next
+    return f_samp, delta_t, times, modes
+    # }}}
+
+
+def generate_and_compress(args):
+    """
+    Generates one wave and compresses its modes (or keeps them raw).
+    Runs in a worker process.
+    """
+    # {{{
+    idx, params = args
+    __t0 = time.time()
+    f_samp, delta_t, times, modes = generate_modes(params)
+    params["f_lower"] = f_low
+    params["f_samp"] = f_samp
+    file_name = "BBH_f%.1f_f%.1f_m%.6f_m%.6f_sA%.6f_%.6f_%.6f__sB%.6f_%.6f_%.6f" % (
+        f_low,
+        f_samp / subsamp_n,
+        params["m1"],
+        params["m2"],
+        params["s1x"],
+        params["s1y"],
+        params["s1z"],
+        params["s2x"],
+        params["s2y"],
+        params["s2z"],
     )
-    h_real = TimeSeries(hLM.mode.data.data.real, delta_t=hLM.mode.deltaT)
-    h_imag = TimeSeries(hLM.mode.data.data.imag, delta_t=hLM.mode.deltaT)
-    ampLM = amplitude_from_polarizations(h_real, h_imag)
-    val, idx = ampLM.abs_max_loc()
-    #################################
-    if to_amp_phase and not to_modes:
-        if verbose:
-            print("Converting to amplitude and phase")
-        #################################
-        if verbose:
-            __t0 = time.time()
-        phsLM = phase_from_polarizations(h_real, h_imag) + np.pi
-        phsLM_min = phsLM.min()
-        #################
-        t_amp_subsampled = np.append(
-            t_arr.data[0 : idx - 500 : subsamp_fac_one_low],
-            t_arr.data[idx - 500 : -1 : subsamp_fac_one_high],
-        )
-        amp_subsampled = np.append(
-            ampLM.data[0 : idx - 500 : subsamp_fac_one_low],
-            ampLM.data[idx - 500 : -1 : subsamp_fac_one_high],
-        )
-        funcamp = func_one(amp_subsampled)
-        #
-        if verbose:
-            print(" took %.2f seconds.." % (time.time() - __t0))
-            __t0 = time.time()
-            print("RomSpline compressing amplitude")
-
-        funcamp_subsampled_spline = romspline.ReducedOrderSpline(
-            t_amp_subsampled, funcamp, tol=tol_one
-        )
-        #################
-        t_phs_subsampled = np.append(
-            t_arr.data[0 : idx - 500 : subsamp_fac_two_low],
-            t_arr.data[idx - 500 : -1 : subsamp_fac_two_high],
-        )
-        phs_subsampled = np.append(
-            phsLM.data[0 : idx - 500 : subsamp_fac_two_low],
-            phsLM.data[idx - 500 : -1 : subsamp_fac_two_high],
-        )
-        funcphs = func_two(phs_subsampled - phsLM_min)
-        #
-        if verbose:
-            print(" took %.2f seconds.." % (time.time() - __t0))
-            __t0 = time.time()
-            print("RomSpline compressing phase")
-        #
-        funcphs_subsampled_spline = romspline.ReducedOrderSpline(
-            t_phs_subsampled, funcphs, tol=tol_two
-        )
-        if verbose:
-            print(" took %.2f seconds.." % (time.time() - __t0))
-        ################
-        return (
-            funcamp_subsampled_spline,
-            funcphs_subsampled_spline,
-            phsLM_min,
-            t_arr.min(),
-            t_arr.max(),
-        )
-        #################################
-    elif to_modes and not to_amp_phase:
-        if verbose:
-            print("Using mode real/imaginary parts directly")
-        #################################
-        if verbose:
-            __t0 = time.time()
-        t_h_real_subsampled = np.append(
-            t_arr.data[0 : idx - 500 : subsamp_fac_one_low],
-            t_arr.data[idx - 500 : -1 : subsamp_fac_one_high],
-        )
-        h_real_subsampled = np.append(
-            h_real.data[0 : idx - 500 : subsamp_fac_one_low],
-            h_real.data[idx - 500 : -1 : subsamp_fac_one_high],
-        )
-        if verbose:
-            print(" took %.2f seconds.." % (time.time() - __t0))
-            __t0 = time.time()
-            print("RomSpline compressing real part of mode")
-        func_hreal_subsampled_spline = romspline.ReducedOrderSpline(
-            t_h_real_subsampled, h_real_subsampled, tol=tol_one
-        )
-        #
-        t_h_imag_subsampled = np.append(
-            t_arr.data[0 : idx - 500 : subsamp_fac_two_low],
-            t_arr.data[idx - 500 : -1 : subsamp_fac_two_high],
-        )
-        h_imag_subsampled = np.append(
-            h_imag.data[0 : idx - 500 : subsamp_fac_two_low],
-            h_imag.data[idx - 500 : -1 : subsamp_fac_two_high],
-        )
-        if verbose:
-            print(" took %.2f seconds.." % (time.time() - __t0))
-            __t0 = time.time()
-            print("RomSpline compressing imaginary part of mode")
-        func_himag_subsampled_spline = romspline.ReducedOrderSpline(
-            t_h_imag_subsampled, h_imag_subsampled, tol=tol_two
-        )
-        if verbose:
-            print(" took %.2f seconds.." % (time.time() - __t0))
-        #
-        return (
-            func_hreal_subsampled_spline,
-            func_himag_subsampled_spline,
-            t_arr.min(),
-            t_arr.max(),
+    if options.verbose and idx % num_write_verbose == 0:
+        print("\t wave %d generated in %.2f seconds" % (idx + 1, time.time() - __t0))
+    if compress_none:
+        return idx, file_name, params, (delta_t, modes, [times.min(), times.max()])
+    compressed = compress_modes(
+        times,
+        modes,
+        representation="amp_phase" if to_amp_phase else "modes",
+        tol=sptol,
+        deg=spdeg,
+        subsamp_low=subsamp_n,
+        subsamp_high=1,
+    )
+    if options.verbose and idx % num_write_verbose == 0:
+        print(
+            "\t wave %d generated and compressed in %.2f seconds"
+            % (idx + 1, time.time() - __t0)
         )
-        #################################
-    elif not to_modes and not to_amp_phase:
-        if verbose:
-            print("Using mode real/imaginary parts RAW (NOT COMPRESSING)")
-        #################################
-        if verbose:
-            __t0 = time.time()
-        if verbose:
-            print(" took %.2f seconds.." % (time.time() - __t0))
-        #
-        return h_real, h_imag, t_arr.min(), t_arr.max()
-        #################################
-    else:
-        IOError("CANNOT compress BOTH of amp/phase OR modes (CAN WRITE RAW though)")
-    #################################
+    return idx, file_name, params, compressed
+    # }}}
 
 
-# }}}
-
-
-def write_compressed_modes_to_HDF5(waves):
+def raw_modes_array(delta_t, modes, subsamp_n=1, amp_phase=False):
     """
-    Write mode time-series to disk as ASCII. Very specific inputs.
+    Columns of time, and real/imag parts (or amplitude/phase) of each mode,
+    and the header string naming them.
     """
     # {{{
-    for file_name, mode_array, splines, tminmax in waves.values():
-        # Write data to HDF5 file by passing a group descriptor
-        fp = h5py.File(file_name + ".h5", "w")
-        for jdx, mode_lm in enumerate(mode_array):
-            el, em = mode_lm
-            spline_real, spline_imag = splines[jdx]
-            group = fp.create_group("Re_Y_l%d_m%d" % (el, em))
-            spline_real.write(group)
-            group = fp.create_group("Im_Y_l%d_m%d" % (el, em))
-            spline_imag.write(group)
-        fp.create_dataset("TimeRangeInSeconds", data=tminmax)
-        fp.close()
-    return
-
-
-# }}}
+    mode_array = sorted(modes)
+    data = np.array([modes[lm] for lm in mode_array])
+    if amp_phase:
+        phase = np.unwrap(np.arctan2(data.imag, data.real), axis=1)
+        one, two = np.abs(data), phase - phase[:, :1] + np.pi
+        names = ["Amp", "Phase"]
+    else:
+        one, two = data.real, data.imag
+        names = ["Re", "Im"]
+    columns = np.empty((data.shape[1], 1 + 2 * len(mode_array)))
+    columns[:, 0] = np.arange(data.shape[1]) * delta_t
+    columns[:, 1::2] = one.T
+    columns[:, 2::2] = two.T
+    header_string = "[1] Time"
+    for jdx, (el, em) in enumerate(mode_array):
+        header_string += "\n[%d] %s[h%d%d]" % (2 * jdx + 2, names[0], el, em)
+        header_string += "\n[%d] %s[h%d%d]" % (2 * jdx + 3, names[1], el, em)
+    # Downsample data
+    return columns[::subsamp_n, :], header_string
+    # }}}
 
 
-def write_raw_modes_to_HDF5(waves, subsamp_n=1, modes=True):
+def write_raw_modes_to_HDF5(waves, subsamp_n=1, amp_phase=False):
     """
-    Write mode time-series to disk as ASCII. Very specific inputs.
+    Write mode time-series to disk as HDF5, one file per wave.
     """
     # {{{
-    for file_name, mode_array, splines, tminmax in waves.values():
-        # Write data to HDF5 file by passing a group descriptor
-        fp = h5py.File(file_name + ".h5", "w")
-        # Header
-        header_string = "[1] Time"
-        for jdx, mode_lm in enumerate(mode_array):
-            el, em = mode_lm
-            spline_real, spline_imag = splines[jdx]
-            if modes:
-                header_string += "\n[%d] Re[h%d%d]" % (2 * jdx + 2, el, em)
-                header_string += "\n[%d] Im[h%d%d]" % (2 * jdx + 3, el, em)
-            else:
-                # If compression was not desired, check if raw amp/phase are to
-                # be written instead of the raw modes
-                ampLM = amplitude_from_polarizations(spline_real, spline_imag)
-                phsLM = phase_from_polarizations(spline_real, spline_imag) + np.pi
-                spline_real, spline_imag = ampLM, phsLM
-                header_string += "\n[%d] Amp[h%d%d]" % (2 * jdx + 2, el, em)
-                header_string += "\n[%d] Phase[h%d%d]" % (2 * jdx + 3, el, em)
-            #
-            if jdx == 0:
-                data_array = np.array(
-                    list(
-                        zip(
-                            spline_real.sample_times.data,
-                            spline_real.data,
-                            spline_imag.data,
-                        )
-                    )
-                )
-            elif jdx > 0:
-                tmp_data_array = np.array(list(zip(spline_real.data, spline_imag.data)))
-                data_array = np.append(data_array, tmp_data_array, axis=1)
-        # Downsample data
-        data_array = data_array[::subsamp_n, :]
-        fp.create_dataset("AllModes", data=data_array)
-        fp.create_dataset("TimeRangeInSeconds", data=tminmax)
-        fp.create_dataset("ModesKey", data=header_string)
-        fp.close()
+    for file_name, (delta_t, modes, tminmax) in waves:
+        data_array, header_string = raw_modes_array(
+            delta_t, modes, subsamp_n=subsamp_n, amp_phase=amp_phase
+        )
+        with h5py.File(file_name + ".h5", "w") as fp:
+            fp.create_dataset("AllModes", data=data_array)
+            fp.create_dataset("TimeRangeInSeconds", data=tminmax)
+            fp.create_dataset("ModesKey", data=header_string)
     return
+    # }}}
 
 
-# }}}
-
-
-def write_raw_modes_to_ASCII(waves, subsamp_n=1, modes=True):
+def write_raw_modes_to_ASCII(waves, subsamp_n=1, amp_phase=False):
     """
-    Write mode time-series to disk as ASCII. Very specific inputs.
+    Write mode time-series to disk as ASCII, one file per wave.
     """
     # {{{
-    for file_name, mode_array, splines, tminmax in waves.values():
-        # Header
-        header_string = "[1] Time"
-        for jdx, mode_lm in enumerate(mode_array):
-            el, em = mode_lm
-            spline_real, spline_imag = splines[jdx]
-            if modes:
-                header_string += "\n[%d] Re[h%d%d]" % (2 * jdx + 2, el, em)
-                header_string += "\n[%d] Im[h%d%d]" % (2 * jdx + 3, el, em)
-            else:
-                # If compression was not desired, check if raw amp/phase are to
-                # be written instead of the raw modes
-                ampLM = amplitude_from_polarizations(spline_real, spline_imag)
-                phsLM = phase_from_polarizations(spline_real, spline_imag) + np.pi
-                spline_real, spline_imag = ampLM, phsLM
-                header_string += "\n[%d] Amp[h%d%d]" % (2 * jdx + 2, el, em)
-                header_string += "\n[%d] Phase[h%d%d]" % (2 * jdx + 3, el, em)
-            #
-            if jdx == 0:
-                data_array = np.array(
-                    list(
-                        zip(
-                            spline_real.sample_times.data,
-                            spline_real.data,
-                            spline_imag.data,
-                        )
-                    )
-                )
-            elif jdx > 0:
-                tmp_data_array = np.array(list(zip(spline_real.data, spline_imag.data)))
-                data_array = np.append(data_array, tmp_data_array, axis=1)
-        # Downsample data
-        data_array = data_array[::subsamp_n, :]
-        ##
-        # Write to file
-        ##
-        nrow, ncol = np.shape(data_array)
-        file_format = ""
-        for j in range(ncol):
-            file_format += "%.16e\t"
-        # Write
-        if not os.path.exists(file_name):
-            np.savetxt(
-                file_name + ".txt.gz", data_array, fmt=file_format, header=header_string
-            )
-        else:
-            print("Warning: FILE NOT WRITTEN FOR ", file_name, header_string)
+    for file_name, (delta_t, modes, tminmax) in waves:
+        if os.path.exists(file_name + ".txt.gz"):
+            print("Warning: FILE NOT WRITTEN FOR ", file_name)
             continue
+        data_array, header_string = raw_modes_array(
+            delta_t, modes, subsamp_n=subsamp_n, amp_phase=amp_phase
+        )
+        np.savetxt(
+            file_name + ".txt.gz", data_array, fmt="%.16e", delimiter="\t", header=header_string
+        )
     return
+    # }}}
 
 
-# }}}
+def write_waves(waves, store):
+    """Writes a batch of waves, as (file_name, params, data) tuples"""
+    # {{{
+    if compress_none:
+        raw = [(output_dir + "/" + name, data) for name, _, data in waves]
+        if "ASCII" in output_mode:
+            write_raw_modes_to_ASCII(raw, subsamp_n=subsamp_n, amp_phase=write_amp_phase)
+        elif "HDF" in output_mode:
+            write_raw_modes_to_HDF5(raw, subsamp_n=subsamp_n, amp_phase=write_amp_phase)
+        else:
+            write_raw_modes_to_HDF5(raw, subsamp_n=subsamp_n, amp_phase=write_amp_phase)
+            write_raw_modes_to_ASCII(raw, subsamp_n=subsamp_n, amp_phase=write_amp_phase)
+    else:
+        store.append_many(waves)
+        store.fp.flush()
+    return
+    # }}}
+
 
 #########################################
 ############# MAIN    # #################
@@ -511,195 +447,41 @@ spin_mag_max = options.spin_mag_max
 
 ##
 # GENERATE AND WRITE WAVES
-# -> Compress using RomSpline
+# -> Compress using RomSpline, in a pool of processes
 # -> Either real/imag modes or amplitude/phase
+# -> Compressed modes of all waves go to one HDF5 file
 ##
-m2 = m2_min
-waves = {}
+store = None
+if not compress_none:
+    store = CompressedModesFile(
+        output_file,
+        "a",
+        representation="amp_phase" if to_amp_phase else "modes",
+        param_names=param_names,
+    )
 
-for idx in range(num_waves):
-    __t1 = time.time()
+tasks = list(enumerate(sample_parameters(num_waves)))
+waves = []
+pool = Pool(options.num_processes) if options.num_processes > 1 else None
+results = (
+    pool.imap(generate_and_compress, tasks, chunksize=1)
+    if pool is not None
+    else map(generate_and_compress, tasks)
+)
+for idx, file_name, params, data in results:
+    waves.append((file_name, params, data))
     # WRITE DATA GENERATED SO FAR
-    if idx != 0 and (idx % num_write == 0):
-        if compress_none:
-            if "ASCII" in output_mode:
-                write_raw_modes_to_ASCII(
-                    waves, subsamp_n=subsamp_n, modes=write_amp_phase
-                )
-            elif "HDF" in output_mode:
-                write_raw_modes_to_HDF5(
-                    waves, subsamp_n=subsamp_n, modes=write_amp_phase
-                )
-            else:
-                write_raw_modes_to_ASCII(
-                    waves, subsamp_n=subsamp_n, modes=write_amp_phase
-                )
-                write_raw_modes_to_HDF5(
-                    waves, subsamp_n=subsamp_n, modes=write_amp_phase
-                )
-        else:
-            write_compressed_modes_to_HDF5(waves)
-        del waves
-        waves = {}
-    if options.verbose and idx % num_write_verbose == 0:
-        print("Generating wave %d" % (idx + 1))
-    ##
-    # Generate SEOBNRv3 modes
-    #
-    # Sample masses
-    # q   = (uniform() * (q_max - q_min)) + q_min
-    eta = (uniform() * (eta_max - eta_min)) + eta_min
-    q = m2 / eta_mass1_to_mass2(eta, m2)
-    m1 = q * m2
-    #
-    # Sample spin A
-    _t1, _t2, _t3 = uniform(-1, 1), uniform(-1, 1), uniform(-1, 1)
-    _abst = (_t1**2 + _t2**2 + _t3**2) ** 0.5
-    _s1m = uniform(spin_mag_min, spin_mag_max)
-    s1x = _s1m * (_t1 / _abst)
-    s1y = _s1m * (_t2 / _abst)
-    s1z = _s1m * (_t3 / _abst)
-    if options.aligned_spin:
-        s1z = uniform(spin1z_min, spin1z_max)
-        s1x = s1y = 0
-    # Sample spin B
-    _t1, _t2, _t3 = uniform(-1, 1), uniform(-1, 1), uniform(-1, 1)
-    _abst = (_t1**2 + _t2**2 + _t3**2) ** 0.5
-    _s2m = uniform(spin_mag_min, spin_mag_max)
-    s2x = _s2m * (_t1 / _abst)
-    s2y = _s2m * (_t2 / _abst)
-    s2z = _s2m * (_t3 / _abst)
-    if options.aligned_spin:
-        s2z = uniform(spin2z_min, spin2z_max)
-        s2x = s2y = 0
-    #
-    # Generate Waveform
-    __t0 = time.time()
-    try:
-        (
-            hplus,
-            hcross,
-            dynHi,
-            hlmPTS,
-            hlmPTSHi,
-            hIMRlmJTSHi,
-            hLM,
-            attachP,
-        ) = ls.SimIMRSpinEOBWaveformAll(
-            phiref,
-            filter_dt,
-            m1 * lal.MSUN_SI,
-            m2 * lal.MSUN_SI,
-            f_low,
-            distance,
-            inclination,
-            s1x,
-            s1y,
-            s1z,
-            s2x,
-            s2y,
-            s2z,
-            precessing_eob_version,
-        )
-        f_samp = 1.0 / filter_dt
-    except BaseException:
-        (
-            hplus,
-            hcross,
-            dynHi,
-            hlmPTS,
-            hlmPTSHi,
-            hIMRlmJTSHi,
-            hLM,
-            attachP,
-        ) = ls.SimIMRSpinEOBWaveformAll(
-            phiref,
-            filter_dt / 2.0,
-            m1 * lal.MSUN_SI,
-            m2 * lal.MSUN_SI,
-            f_low,
-            distance,
-            inclination,
-            s1x,
-            s1y,
-            s1z,
-            s2x,
-            s2y,
-            s2z,
-            precessing_eob_version,
-        )
-        f_samp = 2.0 / filter_dt
-    if options.verbose:
-        print("\t waveform generated in %.2f seconds" % (time.time() - __t0))
-    ###
-    # Store data to be saved for the modes
-    #
-    # Name of file
-    file_name = "BBH_f%.1f_f%.1f_m%.6f_m%.6f_sA%.6f_%.6f_%.6f__sB%.6f_%.6f_%.6f" % (
-        f_low,
-        f_samp / subsamp_n,
-        m1,
-        m2,
-        s1x,
-        s1y,
-        s1z,
-        s2x,
-        s2y,
-        s2z,
-    )
-    file_name = output_dir + "/" + file_name
-    orig_hLM = hLM
-    #
-    # Header
-    header_string = "[1] Time"
-    time_array = np.array(hLM.tdata.data)
-    #
-    # COMPRESS ALL modes
-    splines = []
-    mode_array = []
-    jdx = 0
-    for j in range(5):
-        el, em = hLM.l, hLM.m
-        if em <= 0:
-            hLM = hLM.__next__
-            continue
-        if options.verbose and (idx % num_write_verbose) == 0:
-            print("\tCompressing (%d,%d) mode.." % (el, em))
-        mode_array.append([el, em])
-        spline_real, spline_imag, t0, t1 = compress_modes_to_splines(
-            hLM,
-            m1 + m2,
-            to_amp_phase=to_amp_phase,
-            to_modes=to_modes,
-            func_one=np.array,
-            func_two=np.array,
-            tol_one=sptol,
-            tol_two=sptol,
-            subsamp_fac_one_low=subsamp_n,
-            subsamp_fac_two_low=subsamp_n,
-            subsamp_fac_one_high=1,
-            subsamp_fac_two_high=1,
-            verbose=True,
-        )
-        #
-        splines.append([spline_real, spline_imag])
-        jdx += 1
-        hLM = hLM.__next__
-    # Collect data
-    waves[idx] = [file_name, mode_array, splines, [t0, t1]]
-    if options.verbose:
-        print("Wave generation+compression done in %.2f seconds" % (time.time() - __t1))
+    if len(waves) == num_write:
+        write_waves(waves, store)
+        waves = []
 
 # WRITE THE LAST BATCH
-if compress_none:
-    if "ASCII" in output_mode:
-        write_raw_modes_to_ASCII(waves, subsamp_n=subsamp_n, modes=write_amp_phase)
-    elif "HDF" in output_mode:
-        write_raw_modes_to_HDF5(waves, subsamp_n=subsamp_n, modes=write_amp_phase)
-    else:
-        write_raw_modes_to_HDF5(waves, subsamp_n=subsamp_n, modes=write_amp_phase)
-        write_raw_modes_to_ASCII(waves, subsamp_n=subsamp_n, modes=write_amp_phase)
-else:
-    write_compressed_modes_to_HDF5(waves)
+if len(waves):
+    write_waves(waves, store)
+if pool is not None:
+    pool.close()
+    pool.join()
+if store is not None:
+    store.close()
 
 print("\n\nAll done in %.3f seconds!" % (time.time() - __itime))
@@ -22,6 +22,11 @@ from glue.ligolw import lsctables
 from glue.ligolw import utils as ligolw_utils
 from glue.ligolw.utils import process as ligolw_process
 
+from gwnr.analysis.bank_reduction import (
+    GreedyMatchCover,
+    read_match_files_as_adjacency,
+)
+
 # ctx = CUDAScheme()
 
 __author__ = "Prayush Kumar <prayush@astro.cornell.edu>"
@@ -68,6 +73,12 @@ parser.add_argument(
 
 # Physics related inputs
 parser.add_argument("--minimal-match", dest="mm", default=0.97, type=float)
+parser.add_argument(
+    "--match-column",
+    default=-1,
+    type=int,
+    help="Column of the match files that holds the match value",
+)
 parser.add_argument(
     "--elimination-dir",
     metavar="STRING",
@@ -75,6 +86,20 @@ parser.add_argument(
     default="testpoints_eliminated/",
 )
 
+# Checkpointing
+parser.add_argument(
+    "--checkpoint-file",
+    metavar="FILE",
+    default=None,
+    help="Save the selection state to (and resume it from) this .npz file",
+)
+parser.add_argument(
+    "--checkpoint-interval",
+    default=1000,
+    type=int,
+    help="Number of selections between checkpoints",
+)
+
 # Miscellaneous
 parser.add_argument(
     "-V",
@@ -114,45 +139,6 @@ def is_eliminated(wav):
     return False
 
 
-def parse_match_file(
-    mfile_name, mvals_for_each_bank_point={}, mvals_for_each_test_point={}
-):
-    if not os.path.exists(mfile_name):
-        raise IOError("Provided file {} not found.".format(mfile_name))
-    with open(mfile_name, "r") as mfile:
-        for line in mfile.readlines():
-            line = line.split()
-            btag, ptag = line[:2]
-            if btag not in mvals_for_each_bank_point:
-                mvals_for_each_bank_point[btag] = {}
-            if ptag not in mvals_for_each_bank_point[btag]:
-                mvals_for_each_bank_point[btag][ptag] = line[-1]
-            if ptag not in mvals_for_each_test_point:
-                mvals_for_each_test_point[ptag] = {}
-            if btag not in mvals_for_each_test_point[ptag]:
-                mvals_for_each_test_point[ptag][btag] = line[-1]
-    return mvals_for_each_bank_point, mvals_for_each_test_point
-
-
-def get_all_matches_against_point(p, mvals_dict):
-    mkeys = mvals_dict[p].keys()
-    ##TESTME
-    # remove matches with points that have been removed from mvals_dict
-    mkeys = [k for k in mkeys if k in mvals_dict]
-    return np.array([mvals_dict[p][k] for k in mkeys], dtype=np.float128), mkeys
-
-
-def get_all_G_values(mvals_dict):
-    g_values = {}
-    g_points = {}
-    for p in mvals_dict:
-        mvals, mpoints = get_all_matches_against_point(p, mvals_dict)
-        high_mval_indices = np.where(mvals > options.mm)[0]
-        g_points[p] = [mpoints[i] for i in high_mval_indices]
-        g_values[p] = len(high_mval_indices)
-    return g_values, g_points
-
-
 #########################################################################
 #################### Opening input/output files/tables ##################
 #########################################################################
@@ -246,96 +232,29 @@ sys.stdout.flush()
 mfile_names = glob.glob(options.match_file_name_glob)
 logging.info("Total number of match files = {}".format(len(mfile_names)))
 ## 2)
-mvals_for_each_test_point = {}
-for mfile_name in mfile_names:
-    _, mvals_for_each_test_point = parse_match_file(
-        mfile_name, {}, mvals_for_each_test_point
+# Only pairs with match > [MM] are kept, as a sparse adjacency matrix
+proposal_tags, adjacency = read_match_files_as_adjacency(
+    mfile_names, options.mm, match_column=options.match_column
+)
+logging.info(
+    "Read {} proposal points with {} pairs above match {}".format(
+        len(proposal_tags), adjacency.nnz, options.mm
     )
-# remove self-matches
-for k in mvals_for_each_test_point:
-    if k in mvals_for_each_test_point[k]:
-        mvals_for_each_test_point[k].pop(k)
-## 6)
-## 3)
-best_testpoints = []
-gvals, gpoints = get_all_G_values(mvals_for_each_test_point)
-if len(gvals.values()) > 0:
-    max_gval = np.max(gvals.values())
-else:
-    max_gval = -1
+)
+## 3) - 6)
+cover = GreedyMatchCover(adjacency, tags=proposal_tags)
+if options.checkpoint_file is not None and os.path.exists(options.checkpoint_file):
+    logging.info("Resuming selection from {}".format(options.checkpoint_file))
+    cover.load_checkpoint(options.checkpoint_file)
 if options.verbose:
-    logging.info(
-        "Init:  G values of {} proposal points compued: {}".format(
-            len(mvals_for_each_test_point), gvals.values()
-        )
-    )
-
-while max_gval > 0:
-    ## 4)
-    test_points_for_each_gval = {v: k for k, v in gvals.iteritems()}
-    test_point_with_max_gval = test_points_for_each_gval[max_gval]
-    best_testpoints.append(test_point_with_max_gval)
-    if options.verbose:
-        logging.info(
-            "\t maximum G value is {} for {}".format(max_gval, test_point_with_max_gval)
-        )
-        logging.info(
-            "\t\t its G-points include: {}".format(gpoints[test_point_with_max_gval])
-        )
-    ## 5)
-    ## TESTME
-    _test = True
-    if not _test:
-        if test_point_with_max_gval in mvals_for_each_test_point:
-            mvals_for_each_test_point.pop(test_point_with_max_gval)
-        for p in gpoints[test_point_with_max_gval]:
-            if p in mvals_for_each_test_point:
-                mvals_for_each_test_point.pop(p)
-            else:
-                logging.info("point {} to be removed not found!!".format(p))
-        if options.verbose:
-            logging.info(
-                "\t\t removed {} points.".format(
-                    1 + len(gpoints[test_point_with_max_gval])
-                )
-            )
-    ##
-    ## 3)
-    ## TESTME
-    # How about we try and remove things from gvals instead of
-    # recomputing gvals
-    if _test:
-        # First remove all points that have been eliminated above
-        points_to_be_removed = set(gpoints[test_point_with_max_gval])
-        points_to_be_removed.add(test_point_with_max_gval)
-        for p in points_to_be_removed:
-            if p in mvals_for_each_test_point:
-                mvals_for_each_test_point.pop(p)
-            else:
-                logging.info("point {} to be removed not found-1Of3!!".format(p))
-            if p in gvals:
-                gvals.pop(p)
-            else:
-                logging.info("point {} to be removed not found-2Of3!!".format(p))
-            if p in gpoints:
-                gpoints.pop(p)
-            else:
-                logging.info("point {} to be removed not found-3Of3!!".format(p))
-        if options.verbose:
-            logging.info("\t\t removed {} points.".format(len(points_to_be_removed)))
-        for p in gvals:
-            # correct the list of G-points
-            gpoints[p] = list(set(gpoints[p]) - points_to_be_removed)
-            # correct the remaining points G-values
-            gvals[p] = len(gpoints[p])
-        if options.verbose:
-            logging.info("\t\t corrected G-values and G-points")
-        if options.debug:
-            logging.info("-- new gvals (total {}): {}".format(len(gvals), gvals))
-    if not _test:
-        gvals, gpoints = get_all_G_values(mvals_for_each_test_point)
-    ##
-    max_gval = np.max(gvals.values())
+    logging.info("Init:  maximum G value is {}".format(cover.max_gval()))
+cover.run(
+    checkpoint_file=options.checkpoint_file,
+    checkpoint_interval=options.checkpoint_interval,
+    verbose=options.verbose,
+)
+best_testpoints = cover.selected_tags()
+remaining_testpoints = cover.remaining_tags()
 ####
 ## 7)
 for p in best_testpoints:
@@ -351,10 +270,10 @@ logging.info(
 )
 logging.info(
     "Number of other surviving proposal points with G=0 = {}".format(
-        len(mvals_for_each_test_point.keys())
+        len(remaining_testpoints)
     )
 )
-for p in mvals_for_each_test_point:
+for p in remaining_testpoints:
     new_inspiral_table.append(prop_table_tag_dict[p])
 
 ##########################################################
@@ -19,6 +19,7 @@ import argparse
 
 import gwnr.stats as SU
 import gwnr.analysis as DA
+from gwnr.waveform.parameters import table_to_arrays
 
 from pycbc.pnutils import *
 from glue import gpstime
@@ -481,37 +482,10 @@ def get_new_sample_point():
     return p
 
 
-def within_mchirp_window(bank, sim, w):
-    # {{{
-    if hasattr(bank, "mchirp"):
-        bmchirp = bank.mchirp
-    elif hasattr(bank, "mass1") and hasattr(bank, "mass2"):
-        bmchirp, eta = mass1_mass2_to_mchirp_eta(bank.mass1, bank.mass2)
-    elif hasattr(bank, "mtotal") and hasattr(bank, "eta"):
-        bmchirp = bank.mtotal * (bank.eta**0.6)
-
-    if hasattr(sim, "mchirp"):
-        smchirp = sim.mchirp
-    elif hasattr(sim, "mass1") and hasattr(sim, "mass2"):
-        smchirp, eta = mass1_mass2_to_mchirp_eta(sim.mass1, sim.mass2)
-    elif hasattr(sim, "mtotal") and hasattr(sim, "eta"):
-        smchirp = sim.mtotal * (sim.eta**0.6)
-
-    if abs(smchirp - bmchirp) < (w * min(smchirp, bmchirp)):
-        return True
-    return False
-    # }}}
-
-
-def within_ecc_window(bank, sim, w):
-    if np.abs(sim.alpha - bank.alpha) < w:
-        return True
-    return False
-
-
-def reject_new_sample_point(new_point, points_table, in_mchirp_window, ecc_window=0.0):
+def reject_new_sample_point(new_point, points, in_mchirp_window, ecc_window=0.0):
     """This function takes in a new proposed point, and finds its mchirp distance
-    with all points in the points_table. If all of these distances are >
+    with all points, given as a dict of "mchirp" and "alpha" arrays (see
+    gwnr.waveform.parameters.table_to_arrays). If all of these distances are >
     in_mchirp_window, it returns True, else returns False.
     Which implies that if the new proposed point should be rejected from the set,
     it returns True, and False if that point should be kept."""
@@ -520,13 +494,33 @@ def reject_new_sample_point(new_point, points_table, in_mchirp_window, ecc_windo
     else:
         mchirp_window = 0.0
 
-    for point in points_table:
-        if within_mchirp_window(new_point, point, mchirp_window) and within_ecc_window(
-            new_point, point, ecc_window
-        ):
-            return True
+    mchirps, eccs = points["mchirp"], points["alpha"]
+    within_mchirp_window = np.abs(mchirps - new_point.mchirp) < (
+        mchirp_window * np.minimum(mchirps, new_point.mchirp)
+    )
+    within_ecc_window = np.abs(eccs - new_point.alpha) < ecc_window
+    return bool(np.any(within_mchirp_window & within_ecc_window))
+
+
+class GrowingPoints(object):
+    """mchirp and alpha of chosen points, in arrays that grow as points are
+    appended"""
+
+    def __init__(self, size):
+        self._mchirp = np.empty(size)
+        self._alpha = np.empty(size)
+        self.num = 0
+
+    def append(self, point):
+        if self.num == len(self._mchirp):
+            self._mchirp = np.append(self._mchirp, np.empty(max(self.num, 1)))
+            self._alpha = np.append(self._alpha, np.empty(max(self.num, 1)))
+        self._mchirp[self.num] = point.mchirp
+        self._alpha[self.num] = point.alpha
+        self.num += 1
 
-    return False
+    def __getitem__(self, key):
+        return {"mchirp": self._mchirp, "alpha": self._alpha}[key][: self.num]
 
 
 # }}}
@@ -549,6 +543,9 @@ else:
         old_points_table = lsctables.SimInspiralTable.get_table(indoc)
     except:
         raise IOError("Please provide the old bank as a SimInspiralTable")
+old_points = None
+if len(old_points_table) > 0:
+    old_points = table_to_arrays(old_points_table, columns=["alpha"])
 
 ######## Creating the new points file ############
 # {{{
@@ -608,7 +605,8 @@ new_points_table = lsctables.New(
 new_points_doc.childNodes[0].appendChild(new_points_table)
 
 # {{{
-num_new_points = np.int(options.num_new_points)
+num_new_points = int(options.num_new_points)
+new_points = GrowingPoints(num_new_points)
 
 break_now = False
 cnt = 0
@@ -619,17 +617,18 @@ while cnt < num_new_points:
     if cnt == 0:
         new_point = get_new_sample_point()
         new_points_table.append(new_point)
+        new_points.append(new_point)
         cnt += 1
         continue
 
     k = 0
     new_point = get_new_sample_point()
     while reject_new_sample_point(
-        new_point, new_points_table, options.mchirp_window, options.ecc_window
+        new_point, new_points, options.mchirp_window, options.ecc_window
     ) or (
-        len(old_points_table) > 0
+        old_points is not None
         and reject_new_sample_point(
-            new_point, old_points_table, options.mchirp_window, options.ecc_window
+            new_point, old_points, options.mchirp_window, options.ecc_window
         )
     ):
         if options.verbose and k % (num_new_points / 50) == 0:
@@ -642,6 +641,7 @@ while cnt < num_new_points:
             break  # Max out at 1,000,000 attempts to find a point!
 
     new_points_table.append(new_point)
+    new_points.append(new_point)
     cnt += 1
     if break_now:
         logging.info(
@@ -27,6 +27,9 @@ import sys
 import os
 import subprocess as cmd
 import imp
+from multiprocessing import cpu_count
+
+from gwnr.utils.instrumentation import instrumentation_from_environment
 
 sys.path.append("/home/prayush/src/UseNRinDA/scripts/setupCCEruns/")
 sys.path.append("/home/p/pfeiffer/prayush/src/UseNRinDA/scripts/setupCCEruns/")
@@ -54,6 +57,9 @@ if sys.argv[1] == "-h":
      subdirectories with names Lev?
 
 #3- Lev name, i.e. Lev3 Lev4 Lev5 etc
+
+Set $GWNR_INSTRUMENTATION_FILE to write per-stage timings
+and peak memory usage of this job as JSON.
 """
     )
     exit()
@@ -68,6 +74,8 @@ levdirs = sys.argv[3:]
 if not isinstance(levdirs, list):
     levdirs = [levdirs]
 
+instr, instr_file = instrumentation_from_environment(name=sys.argv[0])
+
 # Initialize container class for each Lev of the simulation
 crun = {}
 for ld in levdirs:
@@ -87,34 +95,52 @@ for ld in levdirs:
 
 # Combine different segments of CCE
 for ld in levdirs:
-    crun[ld].combine_output()
+    with instr.timer("combine_output"):
+        crun[ld].combine_output(
+            output_format="HDF5", uniform_sample=True, num_processes=cpu_count()
+        )
 
-# Integrate Psi4 to Hlm, and Write to HDF5
+# Integrate Psi4 to Hlm (all modes at once), and Write to HDF5, replacing
+# strain from earlier runs of this script, as the output was joined again
 for ld in levdirs:
-    crun[ld].integrate_psi4_to_hlm(
-        resample=True, lmax=8, m0_time_domain=True, outputtype="HDF"
-    )
+    with instr.timer("integrate_psi4_to_hlm"):
+        CC.integrate_cce_runs_to_hlm(
+            [crun[ld]],
+            quantity="Psi4",
+            outdir=crun[ld].outdir,
+            lmax=8,
+            replace=True,
+        )
+instr.sample_memory("after_integration")
 
 # Write Psi4 to HDF5
 for ld in levdirs:
     ld_outdir = os.path.join(outdir, ld)
-    ld_joineddir = os.path.join(outdir, ld, crun[ld].datafile.replace("h5", "joined"))
-    crun[ld].write_to_hdf5(
-        prefix="Psi4_scri",
-        postfix="_uform.asc",
-        outdir=ld_outdir,
-        joineddir=ld_joineddir,
-        filename="rPsi4_CcePITT_Asymptotic_GeometricUnits.h5",
-    )
+    # Modes joined into one HDF5 file by combine_output
+    ld_joineddir = os.path.join(outdir, ld, crun[ld].prefix + ".joined.h5")
+    with instr.timer("write_psi4_hdf5"):
+        crun[ld].write_to_hdf5(
+            prefix="Psi4_scri",
+            postfix="_uform.asc",
+            outdir=ld_outdir,
+            joineddir=ld_joineddir,
+            filename="rPsi4_CcePITT_Asymptotic_GeometricUnits.h5",
+        )
 
 # Write News to HDF5
 for ld in levdirs:
     ld_outdir = os.path.join(outdir, ld)
-    ld_joineddir = os.path.join(outdir, ld, crun[ld].datafile.replace("h5", "joined"))
-    crun[ld].write_to_hdf5(
-        prefix="NewsB_scri",
-        postfix="_uform.asc",
-        outdir=ld_outdir,
-        joineddir=ld_joineddir,
-        filename="rNewsB_CcePITT_Asymptotic_GeometricUnits.h5",
-    )
+    # Modes joined into one HDF5 file by combine_output
+    ld_joineddir = os.path.join(outdir, ld, crun[ld].prefix + ".joined.h5")
+    with instr.timer("write_news_hdf5"):
+        crun[ld].write_to_hdf5(
+            prefix="NewsB_scri",
+            postfix="_uform.asc",
+            outdir=ld_outdir,
+            joineddir=ld_joineddir,
+            filename="rNewsB_CcePITT_Asymptotic_GeometricUnits.h5",
+        )
+
+instr.increment("levs_processed", len(levdirs))
+instr.sample_memory("end_of_job")
+instr.write_summary(instr_file)
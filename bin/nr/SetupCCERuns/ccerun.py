@@ -24,11 +24,13 @@
 
 import os
 import sys
+import logging
 import numpy as np
 from numpy import *
 import time
 import subprocess as cmd
 import glob
+from multiprocessing import Pool
 import h5py
 import matplotlib as plt  # FIXM
 from matplotlib import use
@@ -324,6 +326,373 @@ def blendTimeSeries(hp0, hc0, mm, sample, time, t_opt):
     # }}}
 
 
+#########################################################################
+# Joining and resampling of CCE output segments
+#########################################################################
+
+
+def read_cce_segment(fnam, chunk_bytes=64 * 1024 * 1024, ncols=None):
+    """
+    Reads one (t, re, im) output file of a CCE run segment.
+
+    The file is read in binary chunks of `chunk_bytes`. Chunks are parsed
+    with np.loadtxt, and only chunks that fail to parse are filtered line by
+    line. Runs that die unsafely can leave partially flushed lines, or
+    unprintable characters, trailing at the end of their output. Such lines
+    are dropped, as are lines with a different number of columns than the
+    first good one.
+
+    Returns a 2D array with one row per sample (possibly with zero rows).
+    """
+    # {{{
+    chunks = []
+    remainder = b""
+    with open(fnam, "rb") as fin:
+        while True:
+            block = fin.read(chunk_bytes)
+            if not block:
+                lines = remainder
+                remainder = b""
+            else:
+                block = remainder + block
+                cut = block.rfind(b"\n") + 1
+                lines, remainder = block[:cut], block[cut:]
+            if lines:
+                text = lines.decode("ascii", errors="replace").splitlines()
+                try:
+                    data = np.loadtxt(text, ndmin=2)
+                    if data.size and ncols is not None and data.shape[1] != ncols:
+                        raise ValueError
+                except ValueError:
+                    rows = []
+                    for line in text:
+                        try:
+                            row = [float(x) for x in line.split()]
+                        except ValueError:
+                            continue
+                        if len(row) == 0:
+                            continue
+                        if ncols is None:
+                            ncols = len(row)
+                        if len(row) == ncols:
+                            rows.append(row)
+                    data = np.array(rows, dtype=np.float64).reshape(-1, ncols or 0)
+                if data.size:
+                    if ncols is None:
+                        ncols = data.shape[1]
+                    chunks.append(data)
+            if not block:
+                break
+    if len(chunks) == 0:
+        return np.zeros((0, ncols or 3))
+    return np.concatenate(chunks)
+    # }}}
+
+
+def join_cce_segments(segments):
+    """
+    Joins chronologically ordered, overlapping segments of CCE output.
+    From each segment only samples later than the end of what has been
+    joined so far are kept.
+    """
+    # {{{
+    segments = [sd for sd in segments if len(sd)]
+    if len(segments) == 0:
+        raise IOError("No data found in any segment")
+    pieces = [segments[0]]
+    t_last = segments[0][-1, 0]
+    for sd in segments[1:]:
+        startidx = np.searchsorted(sd[:, 0], t_last, side="right")
+        if startidx >= len(sd):
+            continue
+        pieces.append(sd[startidx:])
+        t_last = sd[-1, 0]
+    return np.concatenate(pieces)
+    # }}}
+
+
+def uniformly_sample_cce_data(data):
+    """
+    Linearly interpolates (t, re, im) data onto a uniform time grid, with the
+    step set by the first two samples.
+    """
+    # {{{
+    if len(data) < 2:
+        raise IOError(
+            "Need at least two samples to uniformly sample, got %d" % len(data)
+        )
+    dt = data[1, 0] - data[0, 0]
+    if dt <= 0:
+        raise IOError("First two samples are not increasing in time")
+    timeout = np.arange(data[:, 0].min(), data[:, 0].max(), dt)
+    out = np.empty((len(timeout), 3))
+    out[:, 0] = timeout
+    out[:, 1] = np.interp(timeout, data[:, 0], data[:, 1])
+    out[:, 2] = np.interp(timeout, data[:, 0], data[:, 2])
+    return out
+    # }}}
+
+
+def uniform_filename(fnam):
+    return fnam.split(".asc")[0] + "_uform.asc"
+
+
+def _join_one_cce_file(args):
+    subdirs, fnam, uniform_sample = args
+    try:
+        joined = join_cce_segments(
+            [read_cce_segment(os.path.join(sdir, fnam)) for sdir in subdirs]
+        )
+        uniform = uniformly_sample_cce_data(joined) if uniform_sample else None
+    except IOError as exc:
+        raise IOError("%s: %s" % (fnam, exc))
+    return fnam, joined, uniform
+
+
+def _write_cce_dataset(fout, name, data):
+    if len(data) == 0:
+        raise IOError("No samples to write to %s" % name)
+    if name in fout:
+        del fout[name]
+    chunk_rows = int(np.minimum(len(data), 65536))
+    fout.create_dataset(name, data=data, chunks=(chunk_rows, data.shape[1]))
+
+
+#########################################################################
+# Batched integration of Psi4 / News modes to strain
+#########################################################################
+
+
+def cce_mode_list(lmax=8):
+    """List of (l, m) for 2 <= l <= lmax, in the order used for mode arrays"""
+    return [(l, m) for l in range(2, lmax + 1) for m in range(-l, l + 1)]
+
+
+def cce_mode_filename(quantity, l, m, postfix="_uform.asc"):
+    if m < 0:
+        mstr = "m%02d" % abs(m)
+    else:
+        mstr = "p%02d" % abs(m)
+    return ("%s_scri.L%02dM" % (quantity, l)) + mstr + postfix
+
+
+def ffi_integrate(modes, delta_t, cutoff_frequencies, order=2):
+    """
+    Fixed-frequency integration (http://arxiv.org/abs/1006.1632) of uniformly
+    sampled complex modes along their last axis.
+
+      modes              : complex array of shape (..., N)
+      delta_t            : float-Time step
+      cutoff_frequencies : float or array broadcastable to modes.shape[:-1]-
+                           Frequencies below which 1/f is frozen
+      order              : int-Number of time integrations
+    """
+    # {{{
+    modes = np.asarray(modes, dtype=np.complex128)
+    nsamples = np.shape(modes)[-1]
+    freqs = np.fft.fftfreq(nsamples, d=delta_t)
+    cutoffs = np.abs(np.asarray(cutoff_frequencies, dtype=np.float64))[..., None]
+    # Below the cut-off, replace f by the cut-off (keeping the sign of f)
+    fsign = np.where(freqs < 0, -1.0, 1.0)
+    ffixed = np.where(np.abs(freqs) > cutoffs, freqs, fsign * cutoffs)
+    integrated = np.fft.fft(modes, axis=-1) / (2.0j * np.pi * ffixed) ** order
+    return np.fft.ifft(integrated, axis=-1)
+    # }}}
+
+
+def remove_polynomial_drift(times, modes, drift_order=1):
+    """Subtracts the least-squares polynomial in time from each mode"""
+    # {{{
+    if drift_order < 0:
+        return modes
+    shape = np.shape(modes)
+    tnorm = (times - times[0]) / (times[-1] - times[0])
+    vander = np.vander(tnorm, drift_order + 1)
+    flat = np.reshape(modes, (-1, shape[-1])).T
+    coeffs = np.linalg.lstsq(vander, flat, rcond=None)[0]
+    return np.reshape((flat - np.dot(vander, coeffs)).T, shape)
+    # }}}
+
+
+def td_integrate(times, modes, order=2, drift_order=1):
+    """
+    Cumulative trapezoidal integration in time of complex modes along their
+    last axis, removing a polynomial drift of degree `drift_order` after
+    each integration.
+    """
+    # {{{
+    modes = np.asarray(modes, dtype=np.complex128)
+    dt = np.diff(times)
+    for _ in range(order):
+        increments = 0.5 * (modes[..., 1:] + modes[..., :-1]) * dt
+        integrated = np.zeros_like(modes)
+        integrated[..., 1:] = np.cumsum(increments, axis=-1)
+        modes = remove_polynomial_drift(times, integrated, drift_order)
+    return modes
+    # }}}
+
+
+def integrate_modes_to_strain(
+    times,
+    modes,
+    mode_list,
+    order=2,
+    ffifreq=0.005,
+    m0_time_domain=True,
+    drift_order=1,
+):
+    """
+    Integrates a batch of Psi4 (order=2) or News (order=1) modes to strain.
+
+      times      : array-Uniformly spaced sample times, of length N
+      modes      : complex array-Shape (..., len(mode_list), N), e.g.
+                   (radii x modes x samples)
+      mode_list  : list-(l, m) of each mode along the second last axis
+      ffifreq    : float-FFI cut-off angular frequency for m=2 modes. For
+                   other modes it is scaled by |m|/2
+      m0_time_domain : bool-Whether to integrate m=0 modes in time domain,
+                   with polynomial drift removal
+    """
+    # {{{
+    modes = np.asarray(modes, dtype=np.complex128)
+    if np.shape(modes)[-2] != len(mode_list):
+        raise IOError("Need one (l, m) for each mode in the batch")
+    ms = np.array([m for _, m in mode_list])
+    f0 = ffifreq / (2 * np.pi)
+    # The cut-off is only used for m = 0 modes when integrating them in FD
+    cutoffs = np.where(ms == 0, f0, f0 * np.abs(ms) * 0.5)
+    cutoffs = np.broadcast_to(cutoffs, np.shape(modes)[:-1])
+    strain = ffi_integrate(modes, times[1] - times[0], cutoffs, order=order)
+    if m0_time_domain and np.any(ms == 0):
+        strain[..., ms == 0, :] = td_integrate(
+            times, modes[..., ms == 0, :], order=order, drift_order=drift_order
+        )
+    return strain
+    # }}}
+
+
+def read_cce_modes(joined, quantity="Psi4", lmax=8):
+    """
+    Reads uniformly sampled modes written by cce_run.combine_output.
+
+      joined : string-Either the joined directory (prefix.joined), or the
+               joined HDF5 file (prefix.joined.h5)
+
+    Returns sample times, complex modes of shape (modes x samples) with the
+    NumRel convention (2 x complex conjugate), and the list of (l, m).
+    """
+    # {{{
+    mode_list = cce_mode_list(lmax)
+    columns = []
+    if joined.endswith(".h5"):
+        with h5py.File(joined, "r") as fin:
+            for l, m in mode_list:
+                uform = cce_mode_filename(quantity, l, m)
+                if uform in fin:
+                    columns.append(fin[uform][()])
+                else:
+                    columns.append(
+                        uniformly_sample_cce_data(
+                            fin[cce_mode_filename(quantity, l, m, ".asc")][()]
+                        )
+                    )
+    else:
+        for l, m in mode_list:
+            columns.append(
+                read_cce_segment(
+                    os.path.join(joined, cce_mode_filename(quantity, l, m))
+                )
+            )
+    nsamples = int(np.min([len(c) for c in columns]))
+    times = columns[0][:nsamples, 0]
+    modes = np.array([c[:nsamples, 1] + 1.0j * c[:nsamples, 2] for c in columns])
+    # To be consistent with NumRel, multiply by 2 and conjugate
+    return times, 2 * np.conjugate(modes), mode_list
+    # }}}
+
+
+def _integrate_one_cce_joined(args):
+    joined, quantity, lmax, kwargs = args
+    times, modes, mode_list = read_cce_modes(joined, quantity=quantity, lmax=lmax)
+    order = 2 if quantity == "Psi4" else 1
+    strain = integrate_modes_to_strain(times, modes, mode_list, order=order, **kwargs)
+    return times, strain, mode_list
+
+
+def integrate_cce_runs_to_hlm(
+    runs,
+    quantity="Psi4",
+    filename=None,
+    outdir=".",
+    lmax=8,
+    ffifreq=0.005,
+    m0_time_domain=True,
+    drift_order=1,
+    num_processes=1,
+    replace=False,
+):
+    """
+    Integrates Psi4 or News modes of several CCE runs (e.g. all extraction
+    radii at one Lev) to strain, in parallel across runs, and writes all
+    strain modes to one HDF5 file. Each run gets a group named as in
+    cce_run.write_to_hdf5 (e.g. CceR0100.dir), holding one (t, re, im)
+    dataset Y_l?_m?.dat per mode.
+
+      runs     : list-cce_run objects, whose output has been joined
+      quantity : string-'Psi4' or 'News'
+      filename : string-Output HDF5 file, relative to outdir
+      replace  : bool-Whether to overwrite groups of runs already in the
+                 file. Otherwise these runs are skipped, keeping the strain
+                 written before
+    """
+    # {{{
+    if quantity not in ["Psi4", "News"]:
+        raise IOError("quantity must be either 'Psi4' or 'News'")
+    if filename is None:
+        filename = "rhOverM_From%s_CcePITT_Asymptotic_GeometricUnits.h5" % quantity
+    kwargs = dict(
+        ffifreq=ffifreq, m0_time_domain=m0_time_domain, drift_order=drift_order
+    )
+    # News output files are named NewsB_scri.*
+    file_quantity = {"Psi4": "Psi4", "News": "NewsB"}[quantity]
+    args = []
+    for run in runs:
+        joined = os.path.join(run.outdir, run.prefix + ".joined.h5")
+        if not os.path.exists(joined):
+            joined = os.path.join(run.outdir, run.prefix + ".joined")
+        args.append((joined, file_quantity, lmax, kwargs))
+    if num_processes > 1 and len(args) > 1:
+        pool = Pool(num_processes)
+        try:
+            results = pool.map(_integrate_one_cce_joined, args)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_integrate_one_cce_joined(a) for a in args]
+    #
+    with h5py.File(os.path.join(outdir, filename), "a") as fout:
+        for run, (times, strain, mode_list) in zip(runs, results):
+            grpname = run.datafile.split("/")[-1].replace("h5", "dir")
+            if grpname in fout:
+                if not replace:
+                    logging.warning(
+                        "%s exists in %s, skipping (pass replace=True to"
+                        " overwrite it)" % (grpname, filename)
+                    )
+                    continue
+                del fout[grpname]
+            grp = fout.create_group(grpname)
+            for idx, (l, m) in enumerate(mode_list):
+                _write_cce_dataset(
+                    grp,
+                    "Y_l%d_m%d.dat" % (l, m),
+                    np.column_stack([times, strain[idx].real, strain[idx].imag]),
+                )
+    return results
+    # }}}
+
+
 ###############################################################################
 # #############################################################################
 ###############################################################################
@@ -1121,15 +1490,41 @@ if r.is_to_be_continued_2(): r.setup_rerun(submit=True)
 
     #
 
-    def combine_output(self, subdirs=None, redo=True):
+    def combine_output(
+        self,
+        subdirs=None,
+        redo=True,
+        output_format="ASCII",
+        uniform_sample=False,
+        num_processes=1,
+    ):
+        """
+        Join the output files of all segments of this CCE run.
+
+          subdirs       : list-Segment directories, default: all of prefix-?
+          redo          : bool-Whether to re-join files that exist already
+          output_format : string-'ASCII' writes one file per mode in
+                          prefix.joined/, 'HDF5' writes one dataset per mode
+                          (named as the ASCII file would be) to
+                          prefix.joined.h5, 'BOTH' writes both
+          uniform_sample: bool-Also write uniformly re-sampled modes
+                          (*_uform.asc), as uniformly_sample_output does
+          num_processes : int-Number of files to join in parallel
+        """
         # {{{
         self.redo = redo
         pwd = cmd.getoutput("pwd")
         os.chdir(self.outdir)
+        write_ascii = output_format.upper() in ["ASCII", "BOTH"]
+        write_hdf5 = output_format.upper() in ["HDF5", "HDF", "BOTH"]
+        if not write_ascii and not write_hdf5:
+            os.chdir(pwd)
+            raise IOError("output_format must be 'ASCII', 'HDF5' or 'BOTH'")
         # Check if the output directory already exists. Assume output does as well
         # if the directory does
         outdir = "./" + self.prefix + ".joined"
-        if os.path.exists(outdir):
+        outh5name = self.prefix + ".joined.h5"
+        if os.path.exists(outdir) or (write_hdf5 and os.path.exists(outh5name)):
             print(
                 "output for %s has been joined already.!" % cmd.getoutput("pwd"),
                 file=sys.stderr,
@@ -1137,97 +1532,73 @@ if r.is_to_be_continued_2(): r.setup_rerun(submit=True)
             if not self.redo:
                 os.chdir(pwd)
                 return
-        else:
+        if write_ascii and not os.path.exists(outdir):
             os.mkdir(outdir)
-        idir = "."
-        #
-        # Begin
         #
         # Get the list of output dirs
         #
         # Override if subdirectories provided
         if subdirs is None:
             subdirs = self.get_all_subdirs()
-        if int(subdirs[0][-1]) == 0:
-            subdirs = subdirs[1:]
         if subdirs is None or len(subdirs) == 0:
+            os.chdir(pwd)
             raise IOError("No directories of the form %s-?. Wrong tag?" % self.prefix)
-        # subdirs.sort()
-        # Append the most recent portion of the run
-        # if os.path.exists(idir+'/highResCce'): subdirs.append(idir+'/highResCce')
+        if int(subdirs[0][-1]) == 0:
+            subdirs = subdirs[1:]
         if self.verbose:
             print("directories used: ", subdirs, file=sys.stderr)
         #
-        # Join files of each tag
-        #
+        # Assume all dirs in subdirs have the same files satisfying the ftags
+        file_names = []
         for ftag in self.filetags:
-            #
-            # Assume all dirs in subdirs have the same files satisfying the
-            # ftag
             tmp_files = glob.glob(subdirs[0] + "/" + ftag)
-            file_names = [dd.split("/")[-1] for dd in tmp_files]
-            if self.verbose:
-                print("files found: ", file_names, file=sys.stderr)
-            if self.verbose:
-                print("total: %d" % len(file_names), file=sys.stderr)
-            for fnam in file_names:
-                outfnam = outdir + "/" + fnam
-                if (
-                    os.path.exists(outfnam)
-                    and os.path.getsize(outfnam)
-                    and not self.redo
-                ):
-                    print("\nNOT Joining: ", fnam, " in ", subdirs, file=sys.stderr)
-                    continue
-                if self.verbose:
-                    print("\nJoining: ", fnam, " in ", subdirs, file=sys.stderr)
-                # Following convoluted way of reading data is for runs which die unsafely
-                # and might have partially flushed lines trailing as unprintable characters
-                # at the end of the data file.
-                # As subsequent segments are substantially overlapping,
-                # actual data will not be lost by ignoring these trailing
-                # lines.
-                data = []
-                for sdir in subdirs:
-                    try:
-                        tmp_data = np.loadtxt(open(sdir + "/" + fnam))
-                        # It may happen that the output file has only ONE line,
-                        # handle that!
-                        if len(np.shape(tmp_data)) < 2:
-                            tmp_data = np.array([tmp_data])
-                        data.append(tmp_data)
-                    except BaseException:
-                        fin = open(sdir + "/" + fnam).readlines()
-                        tmp_data = []
-                        for line in fin:
-                            try:
-                                tmp_data.append(np.float128(line.split()))
-                            except BaseException:
-                                continue
-                        if not len(tmp_data):
-                            data.append(np.array(tmp_data))
-                #
-                # Assume the data is in chronological order in the files
-                tarr, rearr, imarr = [data[0][:, 0], data[0][:, 1], data[0][:, 2]]
-                for dd in data[1:]:
-                    tmp_t = dd[:, 0]
-                    try:
-                        tmp_startidx = np.where(tmp_t > tarr[-1])[0][0]
-                    except IndexError:
-                        continue
-                    tarr = np.append(tarr, dd[tmp_startidx:, 0])
-                    rearr = np.append(rearr, dd[tmp_startidx:, 1])
-                    imarr = np.append(imarr, dd[tmp_startidx:, 2])
-                #
-                # Write the joined data to disk
-                #
+            file_names.extend([dd.split("/")[-1] for dd in tmp_files])
+        if self.verbose:
+            print("files found: ", file_names, file=sys.stderr)
+            print("total: %d" % len(file_names), file=sys.stderr)
+        if write_ascii and not self.redo:
+            file_names = [
+                fnam
+                for fnam in file_names
+                if not (
+                    os.path.exists(outdir + "/" + fnam)
+                    and os.path.getsize(outdir + "/" + fnam)
+                )
+            ]
+        #
+        # Join files in parallel, and write them out as they arrive
+        #
+        args = [(subdirs, fnam, uniform_sample) for fnam in file_names]
+        pool = None
+        if num_processes > 1 and len(args) > 1:
+            pool = Pool(num_processes)
+            results = pool.imap_unordered(_join_one_cce_file, args)
+        else:
+            results = map(_join_one_cce_file, args)
+        fout = h5py.File(outh5name, "a") if write_hdf5 else None
+        try:
+            for fnam, joined, uniform in results:
                 if self.verbose:
-                    print("Writing to: %s" % (outdir + "/" + fnam), file=sys.stderr)
-                fout = open(outfnam, "w")
-                for i in range(len(tarr)):
-                    fout.write("%.16e\t%.16e\t%.16e\n" % (tarr[i], rearr[i], imarr[i]))
+                    print("Joined: ", fnam, " in ", subdirs, file=sys.stderr)
+                if write_ascii:
+                    np.savetxt(outdir + "/" + fnam, joined, fmt="%.16e", delimiter="\t")
+                    if uniform is not None:
+                        np.savetxt(
+                            outdir + "/" + uniform_filename(fnam),
+                            uniform,
+                            fmt="%.16e",
+                            delimiter="\t",
+                        )
+                if write_hdf5:
+                    _write_cce_dataset(fout, fnam, joined)
+                    if uniform is not None:
+                        _write_cce_dataset(fout, uniform_filename(fnam), uniform)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+            if fout is not None:
                 fout.close()
-            #
         os.chdir(pwd)
         return
         # }}}
@@ -1257,25 +1628,14 @@ if r.is_to_be_continued_2(): r.setup_rerun(submit=True)
         for ftag in self.filetags:
             fnames = glob.glob(ftag)
             for fnam in fnames:
-                fin = open(fnam, "r")
-                pdt = np.loadtxt(fin)
-                fin.close()
-                #
-                dt = pdt[1, 0] - pdt[0, 0]
-                pdtreali = interp1d(pdt[:, 0], pdt[:, 1])
-                pdtimagi = interp1d(pdt[:, 0], pdt[:, 2])
-                #
-                timeout = arange(pdt[:, 0].min(), pdt[:, 0].max(), dt)
-                prealout = pdtreali(timeout)
-                pimagout = pdtimagi(timeout)
-                #
-                fout = open(fnam.split(".asc")[0] + "_uform.asc", "w")
-                for i in range(len(timeout)):
-                    fout.write(
-                        "%.16e\t%.16e\t%.16e\n" % (timeout[i], prealout[i], pimagout[i])
-                    )
-                #
-                fout.close()
+                if fnam.endswith("_uform.asc"):
+                    continue
+                np.savetxt(
+                    uniform_filename(fnam),
+                    uniformly_sample_cce_data(read_cce_segment(fnam)),
+                    fmt="%.16e",
+                    delimiter="\t",
+                )
                 #
                 if self.verbose:
                     print("Uniformly sampled %s" % fnam, file=sys.stderr)
@@ -1749,6 +2109,11 @@ if r.is_to_be_continued_2(): r.setup_rerun(submit=True)
             raise IOError("Replacing dataset is not supported yet!")
         #
         fin.create_group(grpname)
+        # Modes joined by combine_output(output_format='HDF5') are read from
+        # the joined HDF5 file instead of individual ASCII files
+        joinedfin = None
+        if joineddir is not None and joineddir.endswith(".h5"):
+            joinedfin = h5py.File(joineddir, "r")
         for l in range(2, lmax + 1):
             for m in range(-l, l + 1):
                 #
@@ -1763,9 +2128,15 @@ if r.is_to_be_continued_2(): r.setup_rerun(submit=True)
                 fname = fname + (".L%02dM" % l) + mstr + postfix
                 #
                 datasetname = "Y_l%d_m%d.dat" % (l, m)
-                fin[grpname].create_dataset(datasetname, data=np.loadtxt(fname))
+                if joinedfin is not None:
+                    data = joinedfin[os.path.basename(fname)][()]
+                else:
+                    data = np.loadtxt(fname)
+                fin[grpname].create_dataset(datasetname, data=data)
                 print("Written dataset ", datasetname)
         #
+        if joinedfin is not None:
+            joinedfin.close()
         fin.flush()
         fin.close()
         os.chdir(pwd)
@@ -1899,10 +2270,15 @@ class psi4_waveforms:
         fin = h5py.File(fnam, "r")
         if self.verbose:
             print("Reading Psi4 data from ", fnam)
+        # Groups are named R0100.dir, or CceR0100.dir by cce_run.write_to_hdf5
+        # and integrate_cce_runs_to_hlm
+        grpname = "R%04d.dir" % R
+        if grpname not in fin:
+            grpname = "CceR%04d.dir" % R
         for l in arange(2, self.lmax + 1):
             self.waveforms[l] = {}
             for m in arange(-l, l + 1):
-                data = fin["R%04d.dir" % R]["Y_l%d_m%d.dat" % (l, m)]
+                data = fin[grpname]["Y_l%d_m%d.dat" % (l, m)]
                 hp = TimeSeries(data[:, 1], delta_t=data[1, 0] - data[0, 0])
                 hc = TimeSeries(data[:, 2], delta_t=data[1, 0] - data[0, 0])
                 self.waveforms[l][m] = [hp, hc]
@@ -2248,6 +2624,59 @@ class nr_run_cce:
 
     #
 
+    def overlap_matrix(self, waveforms, pairs, m_upper=100.0, m_delta=5.0):
+        # Overlaps between all given (name1, name2) pairs of waveforms,
+        # with each waveform tapered and Fourier transformed once per mass.
+        # Returns masses, and overlaps with shape (pairs x masses x tapers)
+        # {{{
+        from gwnr.nr.analysis.filter import overlap_matrix_vs_totalmass
+
+        return overlap_matrix_vs_totalmass(
+            waveforms,
+            pairs,
+            self.psd,
+            m_upper=m_upper,
+            m_delta=m_delta,
+            blend_func=blend,
+            verbose=self.verbose,
+        )
+        # }}}
+
+    #
+
+    def write_overlap_matrix(
+        self, fout, matrixfile, groupname, pairs, masses, overlaps, legacy_names
+    ):
+        # Writes one [mass, overlaps..] dataset per pair to the open file
+        # fout, and the full pair x mass x taper array to matrixfile
+        # {{{
+        from gwnr.nr.analysis.filter import (
+            legacy_overlaps_from_matrix,
+            write_overlap_matrix_hdf5,
+        )
+
+        for ip, (group, dsetname) in enumerate(legacy_names):
+            if group not in list(fout.keys()):
+                fout.create_group(group)
+            if self.verbose:
+                print("Creating dataset ", group, dsetname)
+            fout[group].create_dataset(
+                dsetname, data=legacy_overlaps_from_matrix(masses, overlaps[ip])
+            )
+        if matrixfile is not None:
+            write_overlap_matrix_hdf5(
+                matrixfile,
+                groupname,
+                [("/".join(n1), "/".join(n2)) for n1, n2 in pairs],
+                masses,
+                overlaps,
+                attrs={"run": self.outdir},
+            )
+        return
+        # }}}
+
+    #
+
     def calculate_mismatch_between_levs_hdf5(
         self,
         wavefilename="rhOverM_CcePITT_Asymptotic_GeometricUnits.h5",
@@ -2256,23 +2685,21 @@ class nr_run_cce:
         catalogfile=None,
         m_upper=100.0,
         m_delta=5.0,
+        matrixfile="OverlapsLevsMatrix.h5",
     ):
         # {{{
         cmd.getoutput("mkdir -p %s/%s" % (self.outdir, outdir))
-        fout = h5py.File(self.outdir + "/" + outdir + "/" + outputfile, "a")
         #
         # Get the waveforms for different levs
         self.read_waveforms_from_hdf5_files(wavefilename=wavefilename)
         # Get PSD
-        sample_rate, time_length = self.sample_rate, self.time_length
-        N = sample_rate * time_length
         self.psd = self.get_psd()
         #
         ccefiles = list(self.wavefiles[self.levs[0]].keys())
-        # ccefiles = list(np.sort( self.ccefiles[self.levs[0]] )[num_runs:])
         # Obtain the waveform files for given CceR, at Lev3,4,5
         # In pairs, compare Lev3,4,5
         self.levs.sort()
+        waveforms, pairs, legacy_names = {}, [], []
         for ccef in ccefiles:
             # choose a pair of levs
             for i1 in range(len(self.levs)):
@@ -2286,28 +2713,30 @@ class nr_run_cce:
                             ccef, " waveforms not found in both %s and %s" % (ld1, ld2)
                         )
                         continue
-                    # Create a group in output file for this ccefile
-                    if ccef not in list(fout.keys()):
-                        fout.create_group(ccef)
-                    # Compute matches
-                    if self.verbose:
-                        print(
-                            "\n\nOverlaps for %s Between %s and %s" % (ccef, ld1, ld2),
-                            file=sys.stderr,
-                        )
-                    overlaps = overlaps_vs_totalmass(
-                        self.hwaveforms[ld1][ccef],
-                        self.hwaveforms[ld2][ccef],
-                        psd=self.psd,
-                        m_upper=m_upper,
-                        m_delta=m_delta,
-                    )
-                    # Add matches and masses as a dataset to the group
-                    dsetname = ld1 + "_" + ld2 + ".dat"
-                    fout[ccef].create_dataset(dsetname, data=overlaps)
+                    waveforms[(ld1, ccef)] = self.hwaveforms[ld1][ccef]
+                    waveforms[(ld2, ccef)] = self.hwaveforms[ld2][ccef]
+                    pairs.append(((ld1, ccef), (ld2, ccef)))
+                    legacy_names.append((ccef, ld1 + "_" + ld2 + ".dat"))
+        if len(pairs) == 0:
+            return
         #
-        fout.flush()
-        fout.close()
+        # Compute all matches together
+        masses, overlaps = self.overlap_matrix(
+            waveforms, pairs, m_upper=m_upper, m_delta=m_delta
+        )
+        # Add matches and masses as a dataset to the group of each ccefile
+        with h5py.File(self.outdir + "/" + outdir + "/" + outputfile, "a") as fout:
+            self.write_overlap_matrix(
+                fout,
+                None
+                if matrixfile is None
+                else self.outdir + "/" + outdir + "/" + matrixfile,
+                "Levs",
+                pairs,
+                masses,
+                overlaps,
+                legacy_names,
+            )
         return
         # }}}
 
@@ -2321,23 +2750,21 @@ class nr_run_cce:
         catalogfile=None,
         m_upper=100.0,
         m_delta=5.0,
+        matrixfile="OverlapsExtractionRadiiMatrix.h5",
     ):
         # {{{
         cmd.getoutput("mkdir -p %s/%s" % (self.outdir, outdir))
-        fout = h5py.File(self.outdir + "/" + outdir + "/" + outputfile, "a")
         #
         # Get the waveforms for different levs
         self.read_waveforms_from_hdf5_files(wavefilename=wavefilename)
         # Get PSD
-        sample_rate, time_length = self.sample_rate, self.time_length
-        N = sample_rate * time_length
         self.psd = self.get_psd()
         #
         ccefiles = list(self.wavefiles[self.levs[0]].keys())
-        # ccefiles = list(np.sort( self.ccefiles[self.levs[0]] )[num_runs:])
         # Obtain the waveform files for given CceR, at Lev3,4,5
         # In pairs, compare Lev3,4,5
         self.levs.sort()
+        waveforms, pairs, legacy_names = {}, [], []
         for ld in self.levs:
             # choose a pair of levs
             for i1 in range(len(ccefiles)):
@@ -2351,39 +2778,30 @@ class nr_run_cce:
                             "%s and %s waveforms not found in %s" % (ccef1, ccef2, ld)
                         )
                         continue
-                    # Create a group in output file for this ccefile
-                    if ld + ".dir" not in list(fout.keys()):
-                        fout.create_group(ld + ".dir")
-                    # Compute matches
-                    if self.verbose:
-                        print(
-                            "Overlaps for %s Between %s and %s" % (ld, ccef1, ccef2),
-                            file=sys.stderr,
-                        )
-                    overlaps = overlaps_vs_totalmass(
-                        self.hwaveforms[ld][ccef1],
-                        self.hwaveforms[ld][ccef2],
-                        psd=self.psd,
-                        m_upper=m_upper,
-                        m_delta=m_delta,
-                    )
-                    # Add matches and masses as a dataset to the group
-                    dsetname = ccef1 + "_" + ccef2 + ".dat"
-                    if self.verbose:
-                        print("Creating dataset ", dsetname)
-                    if self.verbose:
-                        print(
-                            "keys: ",
-                            list(fout.keys()),
-                            ld,
-                            list(fout[ld + ".dir"].keys()),
-                        )
-                    # if self.verbose: print "overlaps", overlaps,
-                    # np.shape(overlaps)
-                    fout[ld + ".dir"].create_dataset(dsetname, data=overlaps)
+                    waveforms[(ld, ccef1)] = self.hwaveforms[ld][ccef1]
+                    waveforms[(ld, ccef2)] = self.hwaveforms[ld][ccef2]
+                    pairs.append(((ld, ccef1), (ld, ccef2)))
+                    legacy_names.append((ld + ".dir", ccef1 + "_" + ccef2 + ".dat"))
+        if len(pairs) == 0:
+            return
         #
-        fout.flush()
-        fout.close()
+        # Compute all matches together
+        masses, overlaps = self.overlap_matrix(
+            waveforms, pairs, m_upper=m_upper, m_delta=m_delta
+        )
+        # Add matches and masses as a dataset to the group of each lev
+        with h5py.File(self.outdir + "/" + outdir + "/" + outputfile, "a") as fout:
+            self.write_overlap_matrix(
+                fout,
+                None
+                if matrixfile is None
+                else self.outdir + "/" + outdir + "/" + matrixfile,
+                "ExtractionRadii",
+                pairs,
+                masses,
+                overlaps,
+                legacy_names,
+            )
         return
         # }}}
 
@@ -2520,10 +2938,10 @@ class nr_run_cce:
         catalogfile=None,
         m_upper=100.0,
         m_delta=5.0,
+        matrixfile="OverlapsExtrapolatedMatrix.h5",
     ):
         # {{{
         cmd.getoutput("mkdir -p %s/%s" % (self.outdir, outdir))
-        fout = h5py.File(self.outdir + "/" + outdir + "/" + outputfile, "a")
         #
         # Get the Cce waveforms for different levs
         print("Reading Cce waveforms")
@@ -2560,6 +2978,7 @@ class nr_run_cce:
         print(Levs, "\n", ccefiles, "\n", CceRindices, "\n", ExtrapOrders)
         # At each Lev, compare waveforms at all cce radii with extrapolation
         # orders
+        waveforms, pairs, legacy_names = {}, [], []
         for lev in Levs:
             print("At ", lev)
             if lev not in list(self.hwaveforms.keys()) or lev not in list(
@@ -2567,13 +2986,12 @@ class nr_run_cce:
             ):
                 print("No waveforms at %s in either the Cce or Extrapolated set" % lev)
                 continue
-            if lev + ".dir" not in list(fout.keys()):
-                fout.create_group(lev + ".dir")
             for ccef in ccefiles:
                 print("For ", ccef)
                 if ccef not in list(self.hwaveforms[lev].keys()):
                     print(ccef, " waveform not found for %s" % lev)
-                hp0 = self.hwaveforms[lev][ccef]
+                    continue
+                waveforms[(lev, ccef)] = self.hwaveforms[lev][ccef]
                 for extrap_order in ExtrapOrders:
                     # Safegaurd for N-1 orders. New convention is
                     # OutermostExtrapolation
@@ -2581,19 +2999,36 @@ class nr_run_cce:
                         print("Skipping ", extrap_order, " at ", lev)
                         continue
                     #
-                    print("At ", extrap_order)
                     if extrap_order not in list(self.extrap_hwaveforms[lev].keys()):
                         print("%s waveform not found at %s" % (extrap_order, lev))
-                    hp1 = self.extrap_hwaveforms[lev][extrap_order]
-                    overlaps = overlaps_vs_totalmass(
-                        hp0, hp1, psd=self.psd, m_upper=m_upper, m_delta=m_delta
+                        continue
+                    waveforms[(lev, extrap_order)] = self.extrap_hwaveforms[lev][
+                        extrap_order
+                    ]
+                    pairs.append(((lev, ccef), (lev, extrap_order)))
+                    legacy_names.append(
+                        (lev + ".dir", ccef + "_" + extrap_order + ".dat")
                     )
-                    # Add matches and masses as a dataset to the group
-                    dsetname = ccef + "_" + extrap_order + ".dat"
-                    fout[lev + ".dir"].create_dataset(dsetname, data=overlaps)
+        if len(pairs) == 0:
+            return
         #
-        fout.flush()
-        fout.close()
+        # Compute all matches together
+        masses, overlaps = self.overlap_matrix(
+            waveforms, pairs, m_upper=m_upper, m_delta=m_delta
+        )
+        # Add matches and masses as a dataset to the group of each lev
+        with h5py.File(self.outdir + "/" + outdir + "/" + outputfile, "a") as fout:
+            self.write_overlap_matrix(
+                fout,
+                None
+                if matrixfile is None
+                else self.outdir + "/" + outdir + "/" + matrixfile,
+                "Extrapolated",
+                pairs,
+                masses,
+                overlaps,
+                legacy_names,
+            )
         return
         # }}}
 
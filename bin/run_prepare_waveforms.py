@@ -23,89 +23,104 @@ SOFTWARE.
 
 A script to use PrepareSXSWaveforms class.
 
-"""
-from gwnrtools.gwnr.waveform import PrepareSXSWaveform
-
-sims1 = ["ICTSEccParallel01", "ICTSEccParallel02", "ICTSEccParallel03"]
-
-sims2 = ["EccPrecDiff001", "EccPrecDiff002", "EccPrecDiff004"]
-
-sims3 = [
-    "EccContPrecDiff001",
-    "EccContPrecDiff003",
-    "EccContPrecDiff004",
-    "EccContPrecDiff005",
-    "EccContPrecDiff006",
-    "EccContPrecDiff007" "EccContPrecDiff008",
-]
-
-
-sims4 = ["eccprecrun4b"]
-
-prefix_dir = "/mnt/pfs/vaishak.p/sims/SpEC/gcc/"
-
-sims1_dir = prefix_dir + "/bfi/ICTSEccParallel"
-
-levs = [2, 3]
-eccs = [0]
-
-
-# def print_job_info(sim):
-
-for lev in levs:
-    for sim in sims1:
-        print(sim, lev)
-
-        try:
-            wfp = PrepareSXSWaveform(sim_name=sim, sim_dir=sims1_dir, lev=lev)
-
-            wfp.prepare_waveform()
+Prepares the waveforms of many simulations (and Levs) through a pool of
+processes. Stages whose inputs are unchanged since the last run are
+skipped, so that rerunning after a change in a few simulations only
+redoes the work that depends on it.
 
-        except Exception as excep:
-            excep("Failed")
+Example:
 
-    sims2_dir = prefix_dir + "/bfi/EccPrecDiff"
+    run_prepare_waveforms.py --num-processes 8 --levs 2 3 \\
+        --sims /mnt/pfs/vaishak.p/sims/SpEC/gcc/bfi/ICTSEccParallel/ICTSEccParallel0{1,2,3}
 
-    for sim in sims2:
-        print(sim, lev)
-
-        try:
-            wfp = PrepareSXSWaveform(
-                sim_name=sim,
-                sim_dir=sims2_dir,
-            )
-
-            wfp.prepare_waveform()
-
-        except Exception as excep:
-            excep("Failed")
-
-    sims3_dir = prefix_dir + "/bfi/EccContPrecDiff"
-
-    for sim in sims3:
-        print(sim, lev)
-
-        try:
-            wfp = PrepareSXSWaveform(
-                sim_name=sim,
-                sim_dir=sims3_dir,
-            )
-            wfp.prepare_waveform()
-
-        except Exception as excep:
-            excep("Failed")
-
-    sims3_dir = prefix_dir
-
-    for sim in sims4:
-        print(sim, lev)
-
-        try:
-            wfp = PrepareSXSWaveform(
-                sim_name=sim,
-                sim_dir=sims3_dir,
+"""
+import argparse
+import json
+import os
+
+from gwnr.waveform.prepare_waveforms import prepare_sxs_waveforms
+
+parser = argparse.ArgumentParser(
+    description="Join, extrapolate and CoM-correct SXS waveforms"
+)
+parser.add_argument(
+    "--sims",
+    nargs="+",
+    required=True,
+    help="Full paths of simulation directories, i.e. <sim_dir>/<sim_name>",
+)
+parser.add_argument("--levs", nargs="+", type=int, default=[2])
+parser.add_argument("--eccs", nargs="+", type=int, default=[0])
+parser.add_argument(
+    "--out-dir",
+    default=os.getcwd(),
+    help="Directory in which each <sim_name>_waveforms_Ecc<ecc>_Lev<lev> is made",
+)
+parser.add_argument(
+    "--extrapolation-orders", nargs="+", type=int, default=[-1, 2, 3, 4, 5, 6]
+)
+parser.add_argument("--ch-mass", type=float, default=1.0)
+parser.add_argument(
+    "--num-processes",
+    type=int,
+    default=1,
+    help="Number of simulations prepared at the same time",
+)
+parser.add_argument(
+    "--force", action="store_true", help="Rerun all stages, even if unchanged"
+)
+parser.add_argument(
+    "--serial-stages",
+    action="store_true",
+    help="Do not join horizons concurrently with the waveform stages",
+)
+parser.add_argument(
+    "--timing-file", help="JSON file to write the status and timing of each job to"
+)
+parser.add_argument("--verbose", action="store_true")
+args = parser.parse_args()
+
+if not os.path.isdir(args.out_dir):
+    os.makedirs(args.out_dir)
+
+jobs = []
+
+for lev in args.levs:
+    for ecc in args.eccs:
+        for sim in args.sims:
+            sim = os.path.abspath(sim.rstrip("/"))
+            sim_name = os.path.basename(sim)
+            jobs.append(
+                dict(
+                    sim_name=sim_name,
+                    sim_dir=os.path.dirname(sim),
+                    out_dir=os.path.join(
+                        args.out_dir, f"{sim_name}_waveforms_Ecc{ecc}_Lev{lev}"
+                    ),
+                    lev=lev,
+                    ecc=ecc,
+                )
             )
-            wfp.prepare_waveform()
 
-        except Exception as excep:
-            excep("Failed")
+results = prepare_sxs_waveforms(
+    jobs,
+    num_processes=args.num_processes,
+    verbose=args.verbose,
+    ch_mass=args.ch_mass,
+    extrapolation_orders=args.extrapolation_orders,
+    force=args.force,
+    parallel_stages=not args.serial_stages,
+)
+
+for result in results:
+    print(
+        f"{result['sim_name']} Lev{result['lev']} Ecc{result['ecc']}: "
+        f"{result['status']} ({result['seconds']:.1f}s)"
+    )
+
+if args.timing_file:
+    with open(args.timing_file, "w") as fp:
+        json.dump(results, fp, indent=1)
+
+if any(result["status"] == "failed" for result in results):
+    raise SystemExit(1)
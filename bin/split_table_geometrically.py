@@ -19,6 +19,8 @@ from glue.ligolw import lsctables
 from glue.ligolw import utils as ligolw_utils
 from glue.ligolw.utils import process as ligolw_process
 
+from gwnr.waveform.parameters import table_to_arrays
+
 PROGRAM_NAME = os.path.abspath(sys.argv[0])
 __author__ = "Prayush Kumar <prayush@astro.cornell.edu>"
 
@@ -111,7 +113,9 @@ mc_min = options.mchirp_min
 mc_max = options.mchirp_max
 mc_win = options.mchirp_window
 
-mchirps_in_bank = np.array([p.mchirp for p in template_bank_table])
+mchirps_in_bank = table_to_arrays(template_bank_table, columns=["mchirp"], derived=False)[
+    "mchirp"
+]
 if mc_min > np.min(mchirps_in_bank) or mc_max < np.max(mchirps_in_bank):
     raise IOError("Provided bank has mchirps outside the provided range!")
 
@@ -137,6 +141,13 @@ else:
 if options.verbose:
     logging.info("Mchirp bin edges chosen are: {}".format(mc_bins_edges))
     sys.stdout.flush()
+
+# Templates of bin i have mc_bins_edges[i] <= mchirp < mc_bins_edges[i + 1]
+bin_of_template = np.searchsorted(mc_bins_edges, mchirps_in_bank, side="right") - 1
+templates_by_bin = np.argsort(bin_of_template, kind="stable")
+bin_bounds = np.searchsorted(
+    bin_of_template[templates_by_bin], np.arange(len(mc_bins_edges))
+)
 for i in range(len(mc_bins_edges) - 1):
     # create a blank xml document and add points that fall within the i'th bin
     outdoc = ligolw.Document()
@@ -150,10 +161,10 @@ for i in range(len(mc_bins_edges) - 1):
         outdoc, PROGRAM_NAME, options.__dict__, comment=options.comment
     ).process_id
 
-    for p in template_bank_table:
-        if p.mchirp >= mc_bins_edges[i] and p.mchirp < mc_bins_edges[i + 1]:
-            p.process_id = out_proc_id
-            new_inspiral_table.append(p)
+    for idx in templates_by_bin[bin_bounds[i] : bin_bounds[i + 1]]:
+        p = template_bank_table[idx]
+        p.process_id = out_proc_id
+        new_inspiral_table.append(p)
 
     if options.verbose:
         logging.info(
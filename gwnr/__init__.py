@@ -17,13 +17,40 @@ gwnr is a toolkit for gravitational-wave physics
 """
 from __future__ import absolute_import
 
-from . import analysis, cosmo, data, graph, nr, utils, waveform, workflow
+import importlib
 
-try:
-    from . import stats
-except:
-    pass
-from gwnr.utils import *
+# Subpackages are imported on first attribute access (PEP 562), so that
+# e.g. `import gwnr.data` does not pull in pycbc, lal or matplotlib.
+_SUBPACKAGES = (
+    "analysis",
+    "cosmo",
+    "data",
+    "graph",
+    "nr",
+    "stats",
+    "utils",
+    "waveform",
+    "workflow",
+)
+
+
+def __getattr__(name):
+    if name in _SUBPACKAGES:
+        module = importlib.import_module("." + name, __name__)
+        globals()[name] = module
+        return module
+    # Functions from gwnr.utils used to be re-exported here
+    if not name.startswith("__"):
+        utils = __getattr__("utils")
+        try:
+            return getattr(utils, name)
+        except AttributeError:
+            pass
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBPACKAGES))
 
 
 def get_version_information():
@@ -1,6 +1,9 @@
 from __future__ import absolute_import
 
+from .bank_reduction import *
+from .event_data import *
 from .filter import *
 from .gw_transient_catalog import *
+from .optimal_snr import *
 from .psd import *
 from .utils import *
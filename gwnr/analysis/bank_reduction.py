@@ -0,0 +1,274 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# =============================================================================
+#
+#                                   Preamble
+#
+# =============================================================================
+#
+"""Greedy reduction of proposal (test) points using their pairwise matches"""
+
+from __future__ import absolute_import, print_function
+
+import heapq
+import logging
+import os
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+__all__ = ["read_match_files_as_adjacency", "GreedyMatchCover"]
+
+
+def read_match_files_as_adjacency(
+    mfile_names, minimal_match, match_column=-1, remove_self_matches=True
+):
+    """
+    Reads pairwise match files and keeps only pairs with match above
+    `minimal_match`, as a sparse (CSR) adjacency matrix.
+
+    Each line of a match file is "bank_tag proposal_tag ... match ...",
+    with the match in column `match_column`. Rows of the adjacency matrix
+    are proposal tags (in the order they are first read), and its columns
+    are the same points. Bank tags that never appear as proposal tags are
+    dropped. If a pair is listed more than once, it is kept if any of its
+    matches is above `minimal_match`.
+
+    Parameters
+    ----------
+    mfile_names : list
+        names of match files
+    minimal_match : float
+        pairs with match strictly above this are neighbours
+    match_column : int
+        column that holds the match value
+    remove_self_matches : bool
+        drop pairs of a point with itself
+
+    Returns
+    -------
+    tags : list of proposal tags, one for each row / column
+    adjacency : scipy.sparse.csr_matrix of bool, shape (N, N)
+    """
+    # {{{
+    index_of_tag = {}
+    all_tags = []
+    is_row = []
+    rows, cols = [], []
+
+    def tag_index(tag):
+        idx = index_of_tag.get(tag)
+        if idx is None:
+            idx = len(all_tags)
+            index_of_tag[tag] = idx
+            all_tags.append(tag)
+            is_row.append(False)
+        return idx
+
+    for mfile_name in mfile_names:
+        if not os.path.exists(mfile_name):
+            raise IOError("Provided file {} not found.".format(mfile_name))
+        with open(mfile_name, "r") as mfile:
+            for line in mfile:
+                line = line.split()
+                if len(line) < 2:
+                    continue
+                btag, ptag = line[:2]
+                pidx = tag_index(ptag)
+                is_row[pidx] = True
+                if float(line[match_column]) > minimal_match:
+                    bidx = tag_index(btag)
+                    if remove_self_matches and bidx == pidx:
+                        continue
+                    rows.append(pidx)
+                    cols.append(bidx)
+
+    # Relabel so that only proposal points remain, in the order first read
+    is_row = np.array(is_row, dtype=bool)
+    new_index = -np.ones(len(all_tags), dtype=np.int64)
+    new_index[is_row] = np.arange(np.count_nonzero(is_row))
+    tags = [t for t, r in zip(all_tags, is_row) if r]
+
+    rows = new_index[np.array(rows, dtype=np.int64)]
+    cols = new_index[np.array(cols, dtype=np.int64)]
+    keep = cols >= 0
+    adjacency = csr_matrix(
+        (np.ones(np.count_nonzero(keep), dtype=bool), (rows[keep], cols[keep])),
+        shape=(len(tags), len(tags)),
+    )
+    # Duplicate pairs are summed by csr_matrix, which is a logical OR here
+    adjacency.sum_duplicates()
+    return tags, adjacency
+    # }}}
+
+
+class GreedyMatchCover(object):
+    """
+    Greedy selection of points that cover their neighbours.
+
+    Each point's G value is the number of remaining points it has a match
+    above threshold with. At every iteration, the point with the largest G
+    value is selected, and it and its neighbours are removed. This stops
+    when no remaining point has G > 0.
+
+    Removed points only change the G values of points that have them as
+    neighbours. These are found from the transposed adjacency matrix, and
+    the largest G value is tracked with a lazily updated max-heap. Each
+    iteration therefore costs O(k log N) for k removed neighbours, instead
+    of O(N k).
+
+    Usage:
+    ------
+        tags, adj = read_match_files_as_adjacency(files, 0.97)
+        cover = GreedyMatchCover(adj, tags=tags)
+        cover.run(checkpoint_file="cover.npz")
+        best, others = cover.selected_tags(), cover.remaining_tags()
+    """
+
+    def __init__(self, adjacency, tags=None):
+        adjacency = csr_matrix(adjacency, dtype=bool)
+        if adjacency.shape[0] != adjacency.shape[1]:
+            raise IOError("Adjacency matrix must be square")
+        adjacency.sum_duplicates()
+        adjacency.eliminate_zeros()
+        self.num_points = adjacency.shape[0]
+        if tags is not None and len(tags) != self.num_points:
+            raise IOError("Need one tag for each row of the adjacency matrix")
+        self.tags = tags
+
+        self.indptr = adjacency.indptr
+        self.indices = adjacency.indices
+        transposed = adjacency.T.tocsr()
+        self.rev_indptr = transposed.indptr
+        self.rev_indices = transposed.indices
+
+        self.alive = np.ones(self.num_points, dtype=bool)
+        self.gvals = np.diff(self.indptr).astype(np.int64)
+        self.selected = []
+        self._build_heap()
+
+    def _build_heap(self):
+        idx = np.where(self.alive & (self.gvals > 0))[0]
+        self._heap = list(zip((-self.gvals[idx]).tolist(), idx.tolist()))
+        heapq.heapify(self._heap)
+
+    def max_gval(self):
+        """Largest G value among remaining points, discarding stale entries"""
+        while self._heap:
+            neg_g, idx = self._heap[0]
+            if self.alive[idx] and -neg_g == self.gvals[idx]:
+                return -neg_g
+            heapq.heappop(self._heap)
+        return 0
+
+    def step(self):
+        """
+        Selects the point with largest G value, and removes it and its
+        neighbours. Returns the index of the selected point and the
+        indices of removed neighbours, or None if no point has G > 0.
+        """
+        # {{{
+        if self.max_gval() <= 0:
+            return None
+        _, best = heapq.heappop(self._heap)
+
+        neighbours = self.indices[self.indptr[best] : self.indptr[best + 1]]
+        neighbours = neighbours[self.alive[neighbours]]
+        removed = np.append(neighbours, best)
+        self.alive[removed] = False
+        self.selected.append(int(best))
+
+        # Only points that had a removed point as neighbour lose G value
+        affected = np.concatenate(
+            [self.rev_indices[self.rev_indptr[r] : self.rev_indptr[r + 1]] for r in removed]
+        )
+        affected = affected[self.alive[affected]]
+        if len(affected) > 0:
+            np.subtract.at(self.gvals, affected, 1)
+            for idx in np.unique(affected).tolist():
+                if self.gvals[idx] > 0:
+                    heapq.heappush(self._heap, (-int(self.gvals[idx]), idx))
+        return best, neighbours
+        # }}}
+
+    def run(
+        self,
+        max_iterations=None,
+        checkpoint_file=None,
+        checkpoint_interval=1000,
+        verbose=False,
+    ):
+        """
+        Iterates `step` until no point has G > 0 (or for `max_iterations`).
+        If `checkpoint_file` is given, the state is saved to it every
+        `checkpoint_interval` iterations, and at the end.
+        Returns the list of selected point indices.
+        """
+        num_iterations = 0
+        while max_iterations is None or num_iterations < max_iterations:
+            result = self.step()
+            if result is None:
+                break
+            num_iterations += 1
+            if verbose:
+                best, neighbours = result
+                logging.info(
+                    "\t selected {} and removed {} points".format(
+                        self.tags[best] if self.tags is not None else best,
+                        1 + len(neighbours),
+                    )
+                )
+            if checkpoint_file is not None and num_iterations % checkpoint_interval == 0:
+                self.save_checkpoint(checkpoint_file)
+        if checkpoint_file is not None:
+            self.save_checkpoint(checkpoint_file)
+        return self.selected
+
+    def save_checkpoint(self, filename):
+        """Saves the selection state to a numpy .npz file"""
+        tmp_filename = filename + ".tmp.npz"
+        np.savez(
+            tmp_filename,
+            alive=self.alive,
+            gvals=self.gvals,
+            selected=np.array(self.selected, dtype=np.int64),
+        )
+        os.rename(tmp_filename, filename)
+
+    def load_checkpoint(self, filename):
+        """Restores the selection state saved by `save_checkpoint`"""
+        with np.load(filename) as ckpt:
+            if len(ckpt["alive"]) != self.num_points:
+                raise IOError(
+                    "Checkpoint {} is for {} points, not {}".format(
+                        filename, len(ckpt["alive"]), self.num_points
+                    )
+                )
+            self.alive = ckpt["alive"].copy()
+            self.gvals = ckpt["gvals"].copy()
+            self.selected = ckpt["selected"].tolist()
+        self._build_heap()
+
+    def remaining(self):
+        """Indices of points neither selected nor removed (all have G = 0)"""
+        return np.where(self.alive)[0]
+
+    def selected_tags(self):
+        return [self.tags[i] for i in self.selected]
+
+    def remaining_tags(self):
+        return [self.tags[i] for i in self.remaining()]
@@ -0,0 +1,368 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# =============================================================================
+#
+#                                   Preamble
+#
+# =============================================================================
+#
+"""Content-addressed local store for GW event strain frames and PSDs"""
+
+from __future__ import absolute_import, print_function
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from urllib.parse import urlparse
+from urllib.request import urlopen
+
+__all__ = [
+    "EVENT_DATA_STORE_VAR",
+    "EVENT_DATA_SOURCE_VAR",
+    "HTTPDataSource",
+    "MirrorHTTPDataSource",
+    "LocalDirectoryDataSource",
+    "get_data_source",
+    "EventDataStore",
+    "default_event_data_store",
+]
+
+# Environment variables that set the store directory and the data source
+EVENT_DATA_STORE_VAR = "GWNR_EVENT_DATA_STORE"
+EVENT_DATA_SOURCE_VAR = "GWNR_EVENT_DATA_SOURCE"
+
+_CHUNK_SIZE = 1 << 20
+
+
+# {{{ Data sources
+class HTTPDataSource(object):
+    """Fetches files from their original URLs"""
+
+    def __init__(self, timeout=300):
+        self.timeout = timeout
+
+    def resolve(self, url):
+        return url
+
+    def open(self, url):
+        """Returns a readable binary file-like object for `url`"""
+        return urlopen(self.resolve(url), timeout=self.timeout)
+
+    def __repr__(self):
+        return "{}()".format(self.__class__.__name__)
+
+
+class MirrorHTTPDataSource(HTTPDataSource):
+    """
+    Fetches files from an HTTP mirror (e.g. a local stand-in server in an
+    air-gapped cluster), that serves each file at
+    <base_url>/<path of original URL>.
+    """
+
+    def __init__(self, base_url, timeout=300):
+        super(MirrorHTTPDataSource, self).__init__(timeout=timeout)
+        self.base_url = base_url.rstrip("/")
+
+    def resolve(self, url):
+        return self.base_url + urlparse(url).path
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__, self.base_url)
+
+
+class LocalDirectoryDataSource(object):
+    """
+    Fetches files from a local directory, in which each file is either at
+    the path of its original URL, or directly under the directory with
+    the same name.
+    """
+
+    def __init__(self, root):
+        if not os.path.isdir(root):
+            raise IOError("Data source directory {} not found".format(root))
+        self.root = root
+
+    def resolve(self, url):
+        path = urlparse(url).path.lstrip("/")
+        for candidate in [path, os.path.basename(path)]:
+            filename = os.path.join(self.root, candidate)
+            if os.path.isfile(filename):
+                return filename
+        raise IOError("{} not found in data source {}".format(url, self.root))
+
+    def open(self, url):
+        return open(self.resolve(url), "rb")
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__, self.root)
+
+
+def get_data_source(source=None):
+    """
+    Returns a data source object from its description:
+    - None / "" / "remote": the original URLs (HTTPDataSource)
+    - a URL starting with http:// or https://: an HTTP mirror
+    - a directory path (or file://<path>): a local directory
+    Objects with an `open(url)` method are returned as-is.
+    """
+    if source is None or source == "" or source == "remote":
+        return HTTPDataSource()
+    if hasattr(source, "open"):
+        return source
+    if source.startswith(("http://", "https://")):
+        return MirrorHTTPDataSource(source)
+    if source.startswith("file://"):
+        source = source[len("file://") :]
+    return LocalDirectoryDataSource(source)
+
+
+# }}}
+
+
+class EventDataStore(object):
+    """
+    Local, content-addressed store for event data files (strain frames,
+    PSDs) identified by their URLs.
+
+    Each file is fetched once from the data source, while computing its
+    SHA-256 checksum, and kept as <root>/objects/<sha[:2]>/<sha>. The
+    manifest <root>/manifest.json maps each URL to its checksum, size and
+    file name. Later requests for the same URL are served from the store
+    (after checking the size, or the full checksum with `verify=True`),
+    and are copied (or, on request, hard-linked) to wherever they are
+    needed.
+
+    The data source is pluggable (see `get_data_source`), so that the
+    store can be filled from a local directory or an HTTP mirror where the
+    original servers are not reachable.
+
+    Usage:
+    ------
+        store = EventDataStore("/data/event_store", source="/mnt/gwosc_mirror")
+        store.fetch_many(urls, num_workers=8)
+        store.export(urls[0], "event/data/H-H1_GWOSC.gwf")
+    """
+
+    def __init__(self, root, source=None, num_workers=8, verify=False):
+        self.root = root
+        self.source = get_data_source(source)
+        self.num_workers = num_workers
+        self.verify = verify
+        self.manifest_file = os.path.join(root, "manifest.json")
+        self._lock = threading.Lock()
+        self._url_locks = {}
+        for dir_name in ["objects", "tmp"]:
+            dir_name = os.path.join(self.root, dir_name)
+            if not os.path.exists(dir_name):
+                os.makedirs(dir_name)
+        self.manifest = self.read_manifest()
+
+    # {{{ Manifest
+    def read_manifest(self):
+        if not os.path.exists(self.manifest_file):
+            return {}
+        with open(self.manifest_file, "r") as fp:
+            return json.load(fp)
+
+    def write_manifest(self):
+        """Merges our entries into the manifest on disk, and rewrites it"""
+        with self._lock:
+            manifest = self.read_manifest()
+            manifest.update(self.manifest)
+            self.manifest = manifest
+            tmp_file = "{}.{}.tmp".format(self.manifest_file, os.getpid())
+            with open(tmp_file, "w") as fp:
+                json.dump(manifest, fp, indent=1, sort_keys=True)
+            os.rename(tmp_file, self.manifest_file)
+
+    def object_path(self, sha256):
+        return os.path.join(self.root, "objects", sha256[:2], sha256)
+
+    # }}}
+
+    # {{{ Fetching
+    @staticmethod
+    def file_checksum(filename):
+        sha = hashlib.sha256()
+        with open(filename, "rb") as fp:
+            for chunk in iter(lambda: fp.read(_CHUNK_SIZE), b""):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    def is_stored(self, url, sha256=None, verify=None):
+        """Whether `url` is in the store, intact, and (if given) has checksum
+        `sha256`"""
+        entry = self.manifest.get(url)
+        if entry is None or (sha256 is not None and entry["sha256"] != sha256):
+            return False
+        filename = self.object_path(entry["sha256"])
+        if not os.path.exists(filename) or os.path.getsize(filename) != entry["size"]:
+            return False
+        if verify or (verify is None and self.verify):
+            return self.file_checksum(filename) == entry["sha256"]
+        return True
+
+    def _download(self, url, sha256=None):
+        name = os.path.basename(urlparse(url).path)
+        tmp_file = os.path.join(
+            self.root,
+            "tmp",
+            "{}.{}.{}".format(name, os.getpid(), threading.current_thread().ident),
+        )
+        sha = hashlib.sha256()
+        size = 0
+        itime = time.time()
+        try:
+            with self.source.open(url) as src, open(tmp_file, "wb") as dst:
+                for chunk in iter(lambda: src.read(_CHUNK_SIZE), b""):
+                    sha.update(chunk)
+                    dst.write(chunk)
+                    size += len(chunk)
+            checksum = sha.hexdigest()
+            if sha256 is not None and checksum != sha256:
+                raise IOError(
+                    "Checksum mismatch for {}: expected {}, got {}".format(
+                        url, sha256, checksum
+                    )
+                )
+            filename = self.object_path(checksum)
+            if not os.path.exists(os.path.dirname(filename)):
+                os.makedirs(os.path.dirname(filename))
+            os.rename(tmp_file, filename)
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+        logging.info(
+            "Fetched {} ({:.1f} MB) from {} in {:.1f}s".format(
+                url, size / 1e6, self.source, time.time() - itime
+            )
+        )
+        with self._lock:
+            self.manifest[url] = {
+                "sha256": checksum,
+                "size": size,
+                "name": name,
+                "fetched": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+        return filename
+
+    def fetch(self, url, sha256=None, write_manifest=True):
+        """
+        Returns the path to the stored copy of `url`, fetching it from the
+        data source first if needed. If `sha256` is given, the file must
+        have this checksum.
+        """
+        # {{{
+        with self._lock:
+            url_lock = self._url_locks.setdefault(url, threading.Lock())
+        with url_lock:
+            if not self.is_stored(url, sha256=sha256):
+                # Another process may have fetched it meanwhile
+                with self._lock:
+                    self.manifest.update(self.read_manifest())
+            if self.is_stored(url, sha256=sha256):
+                return self.object_path(self.manifest[url]["sha256"])
+            filename = self._download(url, sha256=sha256)
+        if write_manifest:
+            self.write_manifest()
+        return filename
+        # }}}
+
+    def fetch_many(self, urls, num_workers=None):
+        """
+        Fetches all `urls` (a list, or a dict of url -> sha256)
+        concurrently with `num_workers` threads. Returns a dict of
+        url -> path to stored copy.
+        """
+        # {{{
+        if isinstance(urls, dict):
+            checksums = urls
+        else:
+            checksums = dict((url, None) for url in urls)
+        if num_workers is None:
+            num_workers = self.num_workers
+        num_workers = max(1, min(num_workers, len(checksums)))
+
+        def _fetch(url):
+            return url, self.fetch(url, sha256=checksums[url], write_manifest=False)
+
+        try:
+            with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                filenames = dict(executor.map(_fetch, list(checksums)))
+        finally:
+            self.write_manifest()
+        return filenames
+        # }}}
+
+    def export(self, url, destination, sha256=None, link=False):
+        """
+        Puts a copy of `url` at `destination` (fetching it if needed).
+        Returns `destination`.
+
+        With `link`, a hard link to the stored object is made where
+        possible, which saves space and time, but any in-place write to
+        `destination` then also changes the stored copy. Such changes that
+        keep the file size are only caught by `verify_all`, or by stores
+        with `verify=True`.
+        """
+        filename = self.fetch(url, sha256=sha256)
+        dest_dir = os.path.dirname(destination)
+        if dest_dir and not os.path.exists(dest_dir):
+            os.makedirs(dest_dir)
+        if os.path.lexists(destination):
+            os.remove(destination)
+        if link:
+            try:
+                os.link(filename, destination)
+                return destination
+            except OSError:
+                pass
+        shutil.copyfile(filename, destination)
+        return destination
+
+    # }}}
+
+    def verify_all(self):
+        """Re-computes checksums of all stored files. Returns the URLs
+        whose stored copies are missing or corrupt."""
+        return [url for url in self.manifest if not self.is_stored(url, verify=True)]
+
+
+_default_store = None
+
+
+def default_event_data_store():
+    """
+    Process-wide `EventDataStore`, at $GWNR_EVENT_DATA_STORE (default
+    ~/.cache/gwnr/event_data), fetching from $GWNR_EVENT_DATA_SOURCE (see
+    `get_data_source`; default is the original URLs).
+    """
+    global _default_store
+    if _default_store is None:
+        root = os.environ.get(EVENT_DATA_STORE_VAR, "") or os.path.join(
+            os.path.expanduser("~"), ".cache", "gwnr", "event_data"
+        )
+        _default_store = EventDataStore(
+            root, source=os.environ.get(EVENT_DATA_SOURCE_VAR, None)
+        )
+    return _default_store
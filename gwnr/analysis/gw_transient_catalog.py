@@ -13,9 +13,19 @@
 # You should have received a copy of the GNU General Public License along
 # with this program; if not, write to the Free Software Foundation, Inc.,
 # 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+import json
+import os
 import subprocess
 import pycbc.catalog
 
+from gwnr.analysis.event_data import default_event_data_store
+
+# Environment variable pointing to a local catalog JSON file, or a directory
+# of <source>.json files (see `load_catalog`)
+EVENT_CATALOG_VAR = "GWNR_EVENT_CATALOG"
+
+_catalogs = {}
+
 gwtc1_psd_url_template = (
     "https://dcc.ligo.org/public/0158/P1900011/001/GWTC1_{0}_PSDs.dat"
 )
@@ -30,6 +40,82 @@ def get_psd_url(source, name):
     return fname
 
 
+def load_catalog(source="gwtc-1", catalog_file=None):
+    """
+    Events of the GW catalog `source`, as {name: event data}.
+
+    They are read from `catalog_file` (default: $GWNR_EVENT_CATALOG) if it
+    is set. This is either a JSON file in the format of the GWOSC event API
+    ({"events": {name: {...}}}, as written by `save_catalog`), or a
+    directory that holds one such file per catalog, named <source>.json.
+    Otherwise they are fetched from GWOSC through pycbc.catalog. Catalogs
+    are read once per process.
+    """
+    # {{{
+    if catalog_file is None:
+        catalog_file = os.environ.get(EVENT_CATALOG_VAR, "") or None
+    key = (source, catalog_file)
+    if key in _catalogs:
+        return _catalogs[key]
+
+    if catalog_file is None:
+        from pycbc.catalog.catalog import get_source
+
+        events = get_source(source)
+    else:
+        if os.path.isdir(catalog_file):
+            from pycbc.catalog.catalog import _aliases
+
+            for name in [source, _aliases.get(source, source)]:
+                filename = os.path.join(catalog_file, name + ".json")
+                if os.path.isfile(filename):
+                    break
+            else:
+                raise IOError(
+                    "No catalog file for {} in {}".format(source, catalog_file)
+                )
+        elif os.path.isfile(catalog_file):
+            filename = catalog_file
+        else:
+            raise IOError("Catalog file {} not found".format(catalog_file))
+        with open(filename, "r") as fp:
+            events = json.load(fp)
+        events = events.get("events", events)
+    _catalogs[key] = events
+    return events
+    # }}}
+
+
+def save_catalog(filename, source="gwtc-1"):
+    """
+    Fetches the GW catalog `source` from GWOSC and writes it to `filename`,
+    for use as a local catalog (see `load_catalog`) where GWOSC is not
+    reachable.
+    """
+    from pycbc.catalog.catalog import get_source
+
+    events = get_source(source)
+    dir_name = os.path.dirname(filename)
+    if dir_name:
+        mkdir(dir_name)
+    tmp_file = "{}.{}.tmp".format(filename, os.getpid())
+    with open(tmp_file, "w") as fp:
+        json.dump({"events": events}, fp, indent=1, sort_keys=True)
+    os.rename(tmp_file, filename)
+    return filename
+
+
+def find_event(name, source="gwtc-1", catalog_file=None):
+    """Catalog data of event `name` (full or common name)"""
+    events = load_catalog(source, catalog_file=catalog_file)
+    if name in events:
+        return events[name]
+    for event in events.values():
+        if event.get("commonName", "").upper() == name.upper():
+            return event
+    raise ValueError("Did not find merger matching name: {}".format(name))
+
+
 def mkdir(dir_name):
     try:
         subprocess.call(["mkdir", "-p", dir_name])
@@ -47,9 +133,40 @@ def rmfile(filename):
 class Merger(pycbc.catalog.Merger):
     """Informaton about a specific compact binary merger"""
 
-    def __init__(self, name, source="gwtc-1", **kwargs):
-        super(Merger, self).__init__(name, source, **kwargs)
+    def __init__(self, name, source="gwtc-1", data_store=None, catalog_file=None):
+        # Same attributes as pycbc.catalog.Merger, with the event looked up
+        # through `load_catalog`, which may read a local catalog
+        self.data = find_event(name, source=source, catalog_file=catalog_file)
+        for key in self.data:
+            setattr(self, "_raw_" + key, self.data[key])
+        for key in pycbc.catalog._aliases:
+            if pycbc.catalog._aliases[key] in self.data:
+                setattr(self, key, self.data[pycbc.catalog._aliases[key]])
+        self.common_name = self.data["commonName"]
+        self.time = self.data["GPS"]
+        self.frame = "source"
+
         self.psd_url = get_psd_url(source, name)
+        self.data_store = data_store
+
+    def get_data_store(self):
+        """Local store that event data is fetched through. Defaults to
+        gwnr.analysis.default_event_data_store()"""
+        if self.data_store is None:
+            self.data_store = default_event_data_store()
+        return self.data_store
+
+    def data_urls(self, duration=32, sample_rate=4096, ifos=None, psds=False):
+        """URLs of frame files (and optionally the PSD file) for the event"""
+        if ifos is None:
+            ifos = self.operating_ifos()
+        urls = [
+            self.frame_data_url(ifo, duration=duration, sample_rate=sample_rate)
+            for ifo in ifos
+        ]
+        if psds:
+            urls.append(self.psd_url)
+        return urls
 
     def operating_ifos(self, ignore_ifos=["G1"]):
         ifos = self.data["files"]["OperatingIFOs"].split()
@@ -98,6 +215,9 @@ class Merger(pycbc.catalog.Merger):
         sample_rate: int
             Sampling rate at which data is to be downloaded. E.g. 4096, 16384
 
+        The file is fetched through the local event data store (see
+        `get_data_store`), so it is only downloaded once.
+
         Returns
         -------
         filename: str
@@ -105,8 +225,6 @@ class Merger(pycbc.catalog.Merger):
             the event.
         """
         import os
-        import subprocess
-        from astropy.utils.data import download_file
 
         length = "{}sec".format(duration)
         if sample_rate == 4096:
@@ -121,7 +239,6 @@ class Merger(pycbc.catalog.Merger):
             )
 
         url = self.frame_data_url(ifo, duration=duration, sample_rate=sample_rate)
-        filename = download_file(url, cache=False)
         local_filename = self.frame_data_name(
             ifo, duration=duration, sample_rate=sample_rate
         )
@@ -130,9 +247,7 @@ class Merger(pycbc.catalog.Merger):
             mkdir(save_dir)
             local_filename = os.path.join(save_dir, local_filename)
 
-        subprocess.call("mv {0} {1}".format(filename, local_filename).split())
-
-        return local_filename
+        return self.get_data_store().export(url, local_filename)
 
     def channel_name(self, ifo, sample_rate):
         """Get the channel name in data
@@ -184,12 +299,9 @@ class Merger(pycbc.catalog.Merger):
         """
         import os
         import numpy
-        from astropy.utils.data import download_file
         from gwnr.analysis.psd import resample_and_extrapolate_psd
 
-        filename = download_file(self.psd_url, cache=False)
-        all_psds = numpy.loadtxt(filename)
-        rmfile(filename)
+        all_psds = numpy.loadtxt(self.get_data_store().fetch(self.psd_url))
 
         # extract frequency samples
         freq_vals = all_psds[:, 0]
@@ -226,10 +338,30 @@ class Merger(pycbc.catalog.Merger):
 
 
 class Catalog(pycbc.catalog.Catalog):
-    def __init__(self, **kwargs):
-        super(Catalog, self).__init__(**kwargs)
+    """Set of mergers in a GW catalog, read through `load_catalog`"""
+
+    def __init__(self, source="gwtc-1", catalog_file=None, data_store=None):
+        self.data = load_catalog(source, catalog_file=catalog_file)
+        self.mergers = dict(
+            (
+                name,
+                Merger(
+                    name,
+                    source=source,
+                    data_store=data_store,
+                    catalog_file=catalog_file,
+                ),
+            )
+            for name in self.data
+        )
+        self.names = self.mergers.keys()
 
 
-# Names of available events
-c = pycbc.catalog.Catalog()
-catalog_events = c.names
+def __getattr__(name):
+    # The default catalog and names of its events are only read when used,
+    # so that importing this module needs no network access
+    if name in ["c", "catalog_events"]:
+        catalog = Catalog()
+        globals()["c"], globals()["catalog_events"] = catalog, catalog.names
+        return globals()[name]
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
@@ -0,0 +1,435 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# =============================================================================
+#
+#                                   Preamble
+#
+# =============================================================================
+#
+"""Optimal SNRs of many injections, computed in groups that share a PSD"""
+
+from __future__ import absolute_import, print_function
+
+import logging
+from multiprocessing import Pool
+
+import numpy as np
+
+from gwnr.data.noise_curves import noise_curve_psd
+
+__all__ = [
+    "INJECTION_COLUMNS",
+    "injection_arrays",
+    "psd_array",
+    "optimal_snr_weights",
+    "signal_seglen",
+    "approximant_name",
+    "OptimalSNRCalculator",
+    "write_snrs_to_table",
+]
+
+# SimInspiral columns read for each injection, and their names here
+INJECTION_COLUMNS = {
+    "mass1": "mass1",
+    "mass2": "mass2",
+    "spin1x": "spin1x",
+    "spin1y": "spin1y",
+    "spin1z": "spin1z",
+    "spin2x": "spin2x",
+    "spin2y": "spin2y",
+    "spin2z": "spin2z",
+    "distance": "distance",
+    "inclination": "inclination",
+    "coa_phase": "coa_phase",
+    "f_lower": "f_lower",
+    "ra": "longitude",
+    "dec": "latitude",
+    "polarization": "polarization",
+}
+
+# Inner products kept for each injection and PSD: <hp,hp>, <hc,hc>, Re<hp,hc>
+_HPHP, _HCHC, _HPHC = range(3)
+
+_weights_cache = {}
+
+
+def injection_arrays(table):
+    """
+    Reads the columns of a SimInspiral table needed to generate its
+    signals into a dict of numpy arrays (see INJECTION_COLUMNS), with
+    "end_time" (GPS seconds) and "approximant" added.
+    """
+    # {{{
+    params = dict(
+        (name, np.array([getattr(row, column) for row in table], dtype=np.float64))
+        for name, column in INJECTION_COLUMNS.items()
+    )
+    params["end_time"] = np.array(
+        [row.geocent_end_time + 1.0e-9 * row.geocent_end_time_ns for row in table],
+        dtype=np.float64,
+    )
+    params["approximant"] = np.array([str(row.waveform) for row in table])
+    return params
+    # }}}
+
+
+def psd_array(name, delta_f, length, f_lower):
+    """
+    PSD `name` on the grid k * delta_f, k = 0 ... length - 1. Names of
+    pycbc analytic PSDs are evaluated with pycbc.psd.from_string, and all
+    others are read through the noise curve store (as ASDs).
+    """
+    import pycbc.psd
+
+    if name in pycbc.psd.get_psd_model_list():
+        return pycbc.psd.from_string(name, length, delta_f, f_lower).numpy()
+    return np.asarray(noise_curve_psd(name, delta_f, length, f_lower=f_lower))
+
+
+def optimal_snr_weights(name, delta_f, length, f_lower, f_upper=None):
+    """
+    Weights w_k = 4 delta_f / S_n(f_k) over the integration range of
+    pycbc.filter.sigma (f_lower <= f < f_upper, or up to the Nyquist
+    frequency), and zero elsewhere, so that sigma^2 = sum_k w_k |h_k|^2.
+    Cached (per process) by PSD and grid.
+    """
+    # {{{
+    key = (name, float(delta_f), int(length), float(f_lower), f_upper)
+    weights = _weights_cache.get(key)
+    if weights is not None:
+        return weights
+    psd = psd_array(name, delta_f, length, f_lower)
+    kmin = int(f_lower / delta_f)
+    kmax = length - 1 if f_upper is None else min(int(f_upper / delta_f), length - 1)
+    weights = np.zeros(length)
+    band = psd[kmin:kmax]
+    good = band > 0
+    weights[kmin:kmax][good] = 4.0 * delta_f / band[good]
+    weights.setflags(write=False)
+    _weights_cache[key] = weights
+    return weights
+    # }}}
+
+
+def signal_seglen(mass1, mass2, spin1z, spin2z, f_lower, min_seglen=4.0):
+    """
+    Segment lengths (powers of two, in seconds) that contain the
+    inspiral, merger and ringdown of each signal, using the same bounds
+    lalsimulation uses to condition time-domain waveforms.
+    """
+    # {{{
+    import lal
+    import lalsimulation as lalsim
+
+    mass1, mass2, spin1z, spin2z, f_lower = np.broadcast_arrays(
+        *[np.asarray(x, dtype=np.float64) for x in [mass1, mass2, spin1z, spin2z, f_lower]]
+    )
+    durations = np.empty(mass1.shape)
+    for idx in np.ndindex(mass1.shape):
+        m1, m2 = mass1[idx] * lal.MSUN_SI, mass2[idx] * lal.MSUN_SI
+        chi = max(abs(spin1z[idx]), abs(spin2z[idx]))
+        durations[idx] = (
+            lalsim.SimInspiralChirpTimeBound(f_lower[idx], m1, m2, spin1z[idx], spin2z[idx])
+            + lalsim.SimInspiralMergeTimeBound(m1, m2)
+            + lalsim.SimInspiralRingdownTimeBound(m1 + m2, chi)
+        )
+    seglen = 2.0 ** np.ceil(np.log2(np.maximum(1.1 * durations, 1.0e-3)))
+    return np.maximum(seglen, min_seglen)
+    # }}}
+
+
+def approximant_name(name):
+    """
+    Approximant name without the PN-order suffix that SimInspiral tables
+    carry (e.g. "SEOBNRv4pseudoFourPN" -> "SEOBNRv4"), as parsed by
+    lalsimulation. Names lalsimulation does not know are returned as-is.
+    """
+    import lalsimulation as lalsim
+
+    try:
+        return lalsim.GetStringFromApproximant(lalsim.GetApproximantFromString(name))
+    except (RuntimeError, ValueError):
+        return name
+
+
+def _fd_polarizations(params, delta_f, length, sample_rate, default_approximant):
+    """
+    Frequency-domain hp, hc of one signal on the grid k * delta_f,
+    k = 0 ... length - 1. Time-domain signals are zero-padded to
+    2 * (length - 1) samples before the FFT. Longer ones are cut to that
+    many samples around the merger (at t = 0), keeping most of them
+    before it. The common time shift this introduces does not change any
+    inner product.
+    """
+    # {{{
+    from pycbc.waveform import get_fd_waveform, get_td_waveform, td_approximants
+
+    approximant = approximant_name(params.pop("approximant", "") or default_approximant)
+    for name in ["ra", "dec", "polarization", "end_time"]:
+        params.pop(name, None)
+    if approximant in td_approximants():
+        hp, hc = get_td_waveform(
+            approximant=approximant, delta_t=1.0 / sample_rate, **params
+        )
+        num_samples = 2 * (length - 1)
+        start, end = 0, len(hp)
+        if len(hp) > num_samples:
+            # Signals conditioned from the frequency domain are padded after
+            # the merger, so the window is placed by the merger time
+            merger = int(round(-float(hp.start_time) * sample_rate))
+            end = min(len(hp), max(num_samples, merger + num_samples // 8))
+            start = end - num_samples
+        retval = []
+        for h in [hp, hc]:
+            retval.append(np.fft.rfft(h.numpy()[start:end], n=num_samples) / sample_rate)
+        return retval
+    hp, hc = get_fd_waveform(approximant=approximant, delta_f=delta_f, **params)
+    retval = []
+    for h in [hp, hc]:
+        h = h.numpy()[:length]
+        retval.append(np.append(h, np.zeros(length - len(h), dtype=h.dtype)))
+    return retval
+    # }}}
+
+
+def _block_inner_products(args):
+    """
+    Generates a block of signals that share (delta_f, length), stacks
+    them, and computes their inner products with one weighted reduction
+    for each PSD. Runs in a worker process.
+
+    Returns (indices, array of shape (num_signals, num_psds, 3))
+    """
+    # {{{
+    (indices, params, delta_f, length, psd_names, f_lower, f_upper,
+     sample_rate, approximant) = args
+    hp = np.zeros((len(indices), length), dtype=np.complex128)
+    hc = np.zeros((len(indices), length), dtype=np.complex128)
+    for jdx, p in enumerate(params):
+        hp[jdx], hc[jdx] = _fd_polarizations(p, delta_f, length, sample_rate, approximant)
+
+    # |hp|^2, |hc|^2 and Re(hp hc*) of all signals, reduced against all PSDs
+    power = np.stack(
+        [
+            hp.real ** 2 + hp.imag ** 2,
+            hc.real ** 2 + hc.imag ** 2,
+            hp.real * hc.real + hp.imag * hc.imag,
+        ],
+        axis=1,
+    )
+    weights = np.stack(
+        [optimal_snr_weights(name, delta_f, length, f_lower, f_upper) for name in psd_names],
+        axis=1,
+    )
+    return indices, np.einsum("ijk,kp->ipj", power, weights)
+    # }}}
+
+
+class OptimalSNRCalculator(object):
+    """
+    Optimal SNRs of many injections, in one or more detectors.
+
+    Injections are grouped by their frequency grid (delta_f, length),
+    where delta_f is fixed or set by the duration of each signal (see
+    `signal_seglen`). Blocks of each group are generated in a process
+    pool, and the norms of all signals in a block are computed against
+    every PSD with one weighted reduction, reusing one weighting array
+    per (grid, PSD). For each injection and PSD, the inner products
+    <hp,hp>, <hc,hc> and Re<hp,hc> are kept, so that the SNR in any
+    detector,
+        rho^2 = F+^2 <hp,hp> + Fx^2 <hc,hc> + 2 F+ Fx Re<hp,hc>,
+    and the network SNR follow from antenna factors alone, without
+    generating the signals again.
+
+    Usage:
+    ------
+        calc = OptimalSNRCalculator({"H1": "aLIGOZeroDetHighPower",
+                                     "L1": "aLIGOZeroDetHighPower"},
+                                    f_lower=15., num_processes=8)
+        params = injection_arrays(sim_table)
+        snrs = calc.snrs(params)
+        write_snrs_to_table(sim_table, snrs, {"H1": "alpha1", "L1": "alpha2",
+                                              "network": "alpha3"})
+    """
+
+    def __init__(
+        self,
+        psds,
+        f_lower,
+        f_upper=None,
+        sample_rate=4096,
+        delta_f=None,
+        min_seglen=4.0,
+        approximant="SEOBNRv4",
+        num_processes=1,
+        block_size=64,
+    ):
+        if isinstance(psds, str):
+            psds = {"H1": psds}
+        self.psds = dict(psds)
+        self.psd_names = sorted(set(self.psds.values()))
+        self.f_lower = f_lower
+        self.f_upper = f_upper
+        self.sample_rate = sample_rate
+        self.delta_f = delta_f
+        self.min_seglen = min_seglen
+        self.approximant = approximant
+        self.num_processes = num_processes
+        self.block_size = block_size
+
+    #
+
+    def grids(self, params):
+        """(delta_f, length) of each injection, as two arrays"""
+        num_signals = len(params["mass1"])
+        f_lower = params.get("f_lower", np.full(num_signals, self.f_lower))
+        f_lower = np.where(f_lower > 0, f_lower, self.f_lower)
+        if self.delta_f is not None:
+            delta_f = np.full(num_signals, float(self.delta_f))
+        else:
+            delta_f = 1.0 / signal_seglen(
+                params["mass1"],
+                params["mass2"],
+                params.get("spin1z", np.zeros(num_signals)),
+                params.get("spin2z", np.zeros(num_signals)),
+                f_lower,
+                min_seglen=self.min_seglen,
+            )
+        length = np.round(0.5 * self.sample_rate / delta_f).astype(np.int64) + 1
+        return delta_f, length
+
+    def _tasks(self, params):
+        delta_f, length = self.grids(params)
+        keys = sorted(set(zip(delta_f.tolist(), length.tolist())))
+        for grid_delta_f, grid_length in keys:
+            members = np.where((delta_f == grid_delta_f) & (length == grid_length))[0]
+            logging.info(
+                "{} signals with delta_f = {}, length = {}".format(
+                    len(members), grid_delta_f, grid_length
+                )
+            )
+            for start in range(0, len(members), self.block_size):
+                indices = members[start : start + self.block_size]
+                block = []
+                for idx in indices:
+                    p = dict((k, np.asarray(v)[idx].item()) for k, v in params.items())
+                    if not p.get("f_lower", 0) > 0:
+                        p["f_lower"] = self.f_lower
+                    block.append(p)
+                yield (
+                    indices,
+                    block,
+                    grid_delta_f,
+                    grid_length,
+                    self.psd_names,
+                    self.f_lower,
+                    self.f_upper,
+                    self.sample_rate,
+                    self.approximant,
+                )
+
+    def inner_products(self, params):
+        """
+        <hp,hp>, <hc,hc> and Re<hp,hc> of every injection (a dict of
+        arrays, see `injection_arrays`) against every PSD in
+        `self.psd_names`, as an array of shape (num_signals, num_psds, 3)
+        """
+        # {{{
+        num_signals = len(params["mass1"])
+        products = np.zeros((num_signals, len(self.psd_names), 3))
+        if self.num_processes > 1:
+            pool = Pool(self.num_processes)
+            results = pool.imap_unordered(_block_inner_products, self._tasks(params))
+        else:
+            pool = None
+            results = (_block_inner_products(task) for task in self._tasks(params))
+        try:
+            for indices, block_products in results:
+                products[indices] = block_products
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        return products
+        # }}}
+
+    #
+
+    def antenna_factors(self, params, ifo):
+        """F+, Fx of detector `ifo` for all injections"""
+        from pycbc.detector import Detector
+
+        return Detector(ifo).antenna_pattern(
+            params["ra"], params["dec"], params["polarization"], params["end_time"]
+        )
+
+    def detector_snrs(self, params, products):
+        """
+        Optimal SNRs in each detector, from the inner products returned by
+        `inner_products`. Returns {ifo: array}.
+        """
+        # {{{
+        snrs = {}
+        for ifo, psd_name in self.psds.items():
+            fplus, fcross = self.antenna_factors(params, ifo)
+            prods = products[:, self.psd_names.index(psd_name), :]
+            sigmasq = (
+                fplus ** 2 * prods[:, _HPHP]
+                + fcross ** 2 * prods[:, _HCHC]
+                + 2.0 * fplus * fcross * prods[:, _HPHC]
+            )
+            snrs[ifo] = np.sqrt(np.maximum(sigmasq, 0))
+        return snrs
+        # }}}
+
+    def snrs(self, params, products=None):
+        """
+        Optimal SNRs in each detector, and their quadrature sum under the
+        key "network". Signals are generated only if `products` (see
+        `inner_products`) are not given.
+        """
+        if products is None:
+            products = self.inner_products(params)
+        snrs = self.detector_snrs(params, products)
+        snrs["network"] = np.sqrt(sum(snr ** 2 for snr in snrs.values()))
+        return snrs
+
+
+def write_snrs_to_table(table, snrs, columns):
+    """
+    Writes SNRs into columns of a SimInspiral table.
+
+    Inputs:
+    -------
+    table : ligolw SimInspiral table, with rows in the order of `snrs`
+    snrs : {key: array}, as returned by `OptimalSNRCalculator.snrs`
+    columns : {key: column name}, e.g. {"H1": "alpha1", "network": "alpha3"}
+    """
+    # {{{
+    for key, column in columns.items():
+        if key not in snrs:
+            raise IOError("No SNRs for {}, only {}".format(key, list(snrs)))
+        if column not in table.columnnames:
+            raise IOError("Table has no column {}".format(column))
+        if len(snrs[key]) != len(table):
+            raise IOError(
+                "{} SNRs for a table of {} rows".format(len(snrs[key]), len(table))
+            )
+        for row, snr in zip(table, snrs[key].tolist()):
+            setattr(row, column, snr)
+    return table
+    # }}}
@@ -26,6 +26,8 @@ import numpy
 import scipy
 from pycbc.types import FrequencySeries
 
+from gwnr.data.noise_curves import default_noise_curve_store
+
 
 def resample_and_extrapolate_psd(
     freq_vals,
@@ -33,7 +35,7 @@ def resample_and_extrapolate_psd(
     delta_f,
     f_max,
     precision=None,
-    interpolation_func=scipy.interpolate.interp1d,
+    interpolation_func=None,
 ):
     """Resamples given psd(f) data to a uniform grid with spacing
     equal to delta_f provided. Also extrapolates the same to
@@ -46,6 +48,10 @@ def resample_and_extrapolate_psd(
             Frequency values and corresponding PSD values
         delta_f: float
             Desired sampling interval in frequency
+        interpolation_func: callable
+            Builds an interpolant from (freq_vals, psd_vals), e.g.
+            scipy.interpolate.interp1d. Defaults to linear interpolation
+            with numpy.interp, which needs no interpolant object.
 
         Returns
         -------
@@ -58,6 +64,18 @@ def resample_and_extrapolate_psd(
         len(freq_vals), len(psd_vals)
     )
 
+    if interpolation_func is None:
+        freq_vals = numpy.asarray(freq_vals)
+        psd_vals = numpy.asarray(psd_vals)
+        n = int(numpy.round(f_max / delta_f))
+        # numpy.interp holds the end values outside of the data range
+        interpolated_psd = FrequencySeries(
+            numpy.interp(numpy.arange(n) * delta_f, freq_vals, psd_vals),
+            delta_f=delta_f,
+            dtype=precision,
+        )
+        return interpolated_psd
+
     psd_interp = interpolation_func(freq_vals, psd_vals)
 
     n = int(numpy.round(f_max / delta_f))
@@ -78,3 +96,62 @@ def resample_and_extrapolate_psd(
     data_f_max_mask = interpolated_freq_vals > data_f_max
     interpolated_psd.data[data_f_max_mask] = psd_vals[-1]
     return interpolated_psd
+
+
+def psd_from_cli(
+    opt,
+    length,
+    delta_f,
+    low_frequency_cutoff,
+    strain=None,
+    dyn_range_factor=1,
+    precision=None,
+):
+    """Drop-in replacement for pycbc.psd.from_cli, that reads ASCII
+    --psd-file / --asd-file curves through the binary noise-curve store
+    (see gwnr.data.NoiseCurveStore) instead of re-parsing and
+    re-interpolating the text file in every job. All other PSD options
+    are passed on to pycbc.psd.from_cli.
+    """
+    # {{{
+    import pycbc.psd
+
+    store = default_noise_curve_store()
+    is_asd = bool(getattr(opt, "asd_file", None))
+    psd_file = getattr(opt, "asd_file", None) or getattr(opt, "psd_file", None)
+    use_store = (
+        psd_file
+        and psd_file.endswith((".dat", ".txt"))
+        and not getattr(opt, "psd_model", None)
+        and not getattr(opt, "psd_estimation", None)
+        and not getattr(opt, "psd_inverse_length", None)
+        and not getattr(opt, "psd_output", None)
+    )
+    # pycbc shortens the PSD if the curve ends below the Nyquist frequency
+    if use_store and (length - 1) * delta_f > store.table(psd_file, is_asd)[0][-1]:
+        use_store = False
+    if not use_store:
+        return pycbc.psd.from_cli(
+            opt,
+            length,
+            delta_f,
+            low_frequency_cutoff,
+            strain=strain,
+            dyn_range_factor=dyn_range_factor,
+            precision=precision,
+        )
+
+    psd = store.frequency_series(
+        psd_file, delta_f, length, f_lower=low_frequency_cutoff, is_asd=is_asd
+    )
+    # Set values < flow to the value at flow, as pycbc.psd.from_cli does
+    kmin = int(low_frequency_cutoff / delta_f)
+    if kmin > 0:
+        psd.data[0:kmin] = psd.data[kmin]
+    psd *= dyn_range_factor ** 2
+    if precision == "single":
+        psd = psd.astype(numpy.float32)
+    elif precision == "double":
+        psd = psd.astype(numpy.float64)
+    return psd
+    # }}}
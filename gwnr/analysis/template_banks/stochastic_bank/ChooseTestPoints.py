@@ -20,6 +20,8 @@ from glue.ligolw import utils as ligolw_utils
 from glue.ligolw.utils import process as ligolw_process
 from glue import git_version
 
+from gwnr.waveform.parameters import eta_to_q
+
 __author__ = "Prayush Kumar <prkumar@cita.utoronto.ca>"
 PROGRAM_NAME = os.path.abspath(sys.argv[0])
 
@@ -158,11 +160,6 @@ else:
     npoints = np.int(options.npoints)
 
 
-def eta_to_q(eta):
-    q = (1.0 + sqrt(1.0 - 4.0 * eta)) / (2.0 * eta) - 1.0
-    return q
-
-
 # Create a blank xml document and add the process id
 outdoc = ligolw.Document()
 outdoc.appendChild(ligolw.LIGO_LW())
@@ -12,6 +12,7 @@ from numpy import loadtxt, histogram2d
 import pylab
 from pylab import sqrt
 import qm
+from gwnr.waveform.parameters import eta_to_q
 import numpy
 from numpy import meshgrid, linspace
 
@@ -50,11 +51,6 @@ parser.add_option("-n", dest="num", help="num of inj", type=int)
 options, argv_frame_files = parser.parse_args()
 
 
-def eta_to_q(eta):
-    q = (1.0 + sqrt(1.0 - 4.0 * eta)) / (2.0 * eta) - 1.0
-    return q
-
-
 pltid = 0
 
 mass1 = []
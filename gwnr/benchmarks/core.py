@@ -0,0 +1,357 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# =============================================================================
+#
+#                                   Preamble
+#
+# =============================================================================
+#
+"""Benchmarks of core matching, alignment, hybridization and NR data paths"""
+
+from __future__ import absolute_import, print_function
+
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from .synthetic import (
+    MTSUN_SI,
+    analytic_chirp_modes,
+    analytic_chirp_timeseries,
+    write_synthetic_nr_hdf5,
+)
+
+__all__ = [
+    "CORE_BENCHMARKS",
+    "time_function",
+    "run_core_benchmarks",
+]
+
+
+def time_function(func, repeat=3, setup=None):
+    """
+    Times calls to `func()`, and measures their peak memory allocation.
+
+    Parameters
+    ----------
+    func : callable
+        Function of no arguments to benchmark
+    repeat : int
+        No of timed calls
+    setup : callable, optional
+        Called (untimed) before each call to `func`
+
+    Returns
+    -------
+    dict with minimum and median wall times (s), and the peak memory (MB)
+    allocated during one additional call, as traced by `tracemalloc`
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    times = sorted(times)
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "wall_time_min": times[0],
+        "wall_time_median": times[len(times) // 2],
+        "peak_memory_mb": peak / 1.0e6,
+    }
+
+
+######################################################################
+# Individual benchmarks. Each takes a size parameter, a repeat count and
+# a scratch directory, and returns a dict of measured quantities.
+######################################################################
+def bench_calculate_faithfulness(duration, repeat=3, workdir=None):
+    """Match between two synthetic chirps of `duration` seconds"""
+    from gwnr.analysis import calculate_faithfulness
+
+    sample_rate = 4096
+    hp1, _ = analytic_chirp_timeseries(20.0, 1.0, sample_rate, duration)
+    hp2, _ = analytic_chirp_timeseries(20.2, 1.1, sample_rate, duration)
+
+    def run():
+        calculate_faithfulness(
+            10.0,
+            10.0,
+            signal_h=hp1,
+            tmplt_h=hp2,
+            aligned_spin_tmplt_only=False,
+            sample_rate=sample_rate,
+            signal_duration=duration,
+            verbose=False,
+        )
+
+    res = time_function(run, repeat=repeat)
+    res["throughput_matches_per_sec"] = 1.0 / res["wall_time_min"]
+    return res
+
+
+def bench_calculate_fitting_factor(swarm_size, repeat=1, workdir=None):
+    """Fitting factor of a synthetic chirp against TaylorF2 templates"""
+    from gwnr.analysis import calculate_fitting_factor
+
+    sample_rate, duration = 2048, 16
+    hp, _ = analytic_chirp_timeseries(20.0, 1.0, sample_rate, duration)
+
+    def run():
+        calculate_fitting_factor(
+            10.0,
+            10.0,
+            "TaylorF2",
+            signal_h=hp,
+            sample_rate=sample_rate,
+            signal_duration=duration,
+            pso_swarm_size=swarm_size,
+            num_retries=1,
+            verbose=False,
+        )
+
+    res = time_function(run, repeat=repeat)
+    res["throughput_calls_per_sec"] = 1.0 / res["wall_time_min"]
+    return res
+
+
+def bench_align_waveforms_optimally(duration, repeat=3, workdir=None):
+    """Optimal time/phase alignment of a synthetic chirp with a shifted copy"""
+    from pycbc.types import TimeSeries
+    from gwnr.waveform import align_waveforms_optimally
+
+    sample_rate = 4096
+    hp1, hc1 = analytic_chirp_timeseries(20.0, 1.0, sample_rate, duration)
+    shift = int(0.01 * sample_rate)
+    cphi, sphi = np.cos(0.7), np.sin(0.7)
+    hp2 = TimeSeries(
+        np.roll(cphi * hp1.numpy() - sphi * hc1.numpy(), shift),
+        delta_t=hp1.delta_t,
+    )
+    hc2 = TimeSeries(
+        np.roll(sphi * hp1.numpy() + cphi * hc1.numpy(), shift),
+        delta_t=hp1.delta_t,
+    )
+
+    def run():
+        align_waveforms_optimally(
+            hp1, hc1, hp2, hc2, low_frequency_cutoff=15.0, verify=False
+        )
+
+    res = time_function(run, repeat=repeat)
+    res["throughput_alignments_per_sec"] = 1.0 / res["wall_time_min"]
+    return res
+
+
+def bench_hybridize_modes(num_samples, repeat=3, workdir=None):
+    """Hybridization of synthetic (2,2), (3,3), (4,4) inspiral/merger modes"""
+    from gwnr.waveform.hybridize import hybridize_modes, compute_frequency
+
+    delta_t = 1.0 / 4096
+    mchirp = 50.0 * 0.25**0.6 * MTSUN_SI
+    times = np.arange(num_samples) * delta_t
+    insp = analytic_chirp_modes(times, mchirp, t_peak=times[-1] - 0.05)
+    # Merger-ringdown modes start later, and carry a phase offset
+    start = num_samples // 2
+    merger = {lm: insp[lm][start:] * np.exp(1j * lm[1] * 0.3) for lm in insp}
+    frq22 = compute_frequency(np.unwrap(-np.angle(insp[(2, 2)])), delta_t)
+    frq_attach = frq22[int(0.8 * num_samples)]
+    frq_orb = frq22 / 2.0
+
+    def run():
+        hybridize_modes(
+            insp,
+            merger,
+            frq_orb,
+            frq_attach,
+            frq_width=0.05 * frq_attach,
+            delta_t=delta_t,
+            modes_to_hybridize=[(2, 2), (3, 3), (4, 4)],
+            verbose=False,
+        )
+
+    res = time_function(run, repeat=repeat)
+    res["throughput_samples_per_sec"] = num_samples / res["wall_time_min"]
+    return res
+
+
+def _synthetic_nr_file(num_samples, workdir):
+    fname = os.path.join(
+        workdir, "{}_rhOverM_Asymptotic_GeometricUnits.h5".format(num_samples)
+    )
+    if not os.path.exists(fname):
+        write_synthetic_nr_hdf5(fname, num_samples=num_samples)
+    return fname
+
+
+def bench_nr_data_loading(num_samples, repeat=3, workdir=None):
+    """Reading all l<=4 modes from a synthetic SXS-like HDF5 file"""
+    from gwnr.nr.types import nr_data
+
+    fname = _synthetic_nr_file(num_samples, workdir)
+
+    def run():
+        nr_data(fname, wavetype="Extrapolated", ex_order=3)
+
+    res = time_function(run, repeat=repeat)
+    res["throughput_samples_per_sec"] = num_samples / res["wall_time_min"]
+    return res
+
+
+def bench_nr_strain_polarizations(num_samples, repeat=3, workdir=None):
+    """Reading a synthetic NR file and computing its polarizations"""
+    from gwnr.nr.types import nr_strain
+
+    fname = _synthetic_nr_file(num_samples, workdir)
+
+    def run():
+        nr = nr_strain(
+            fname,
+            wavetype="Extrapolated",
+            ex_order=3,
+            totalmass=60.0,
+            sample_rate=4096,
+            time_length=32,
+        )
+        nr.get_polarizations(inclination=0.3, phi=0.1)
+
+    res = time_function(run, repeat=repeat)
+    res["throughput_waveforms_per_sec"] = 1.0 / res["wall_time_min"]
+    return res
+
+
+def bench_banksim_pairs(num_waveforms, repeat=1, workdir=None):
+    """
+    The inner loop of `gwnr_banksim`: norms and matches of all pairs
+    between `num_waveforms` templates and as many signals, with waveforms
+    generated once and held in memory.
+    """
+    import pycbc.psd
+    from pycbc.filter import make_frequency_series, match, sigma
+
+    sample_rate, duration, f_min = 4096, 16, 15.0
+    n = duration * sample_rate // 2 + 1
+    psd = pycbc.psd.from_string("aLIGOZeroDetHighPower", n, 1.0 / duration, f_min)
+    masses = np.linspace(15.0, 25.0, 2 * num_waveforms)
+    waves = [
+        make_frequency_series(
+            analytic_chirp_timeseries(mt, 1.0, sample_rate, duration)[0]
+        )
+        for mt in masses
+    ]
+    bank, sims = waves[:num_waveforms], waves[num_waveforms:]
+
+    def run():
+        for stilde in bank:
+            for htilde in sims:
+                sigma(stilde, psd=psd, low_frequency_cutoff=f_min)
+                sigma(htilde, psd=psd, low_frequency_cutoff=f_min)
+                match(stilde, htilde, psd=psd, low_frequency_cutoff=f_min)
+
+    res = time_function(run, repeat=repeat)
+    res["throughput_pairs_per_sec"] = num_waveforms**2 / res["wall_time_min"]
+    return res
+
+
+# Benchmark name -> (function, default sizes)
+CORE_BENCHMARKS = {
+    "calculate_faithfulness": (bench_calculate_faithfulness, [4, 16, 64]),
+    "calculate_fitting_factor": (bench_calculate_fitting_factor, [10, 40]),
+    "align_waveforms_optimally": (bench_align_waveforms_optimally, [4, 16]),
+    "hybridize_modes": (bench_hybridize_modes, [2**14, 2**17]),
+    "nr_data_loading": (bench_nr_data_loading, [10000, 100000]),
+    "nr_strain_polarizations": (bench_nr_strain_polarizations, [10000, 50000]),
+    "banksim_pairs": (bench_banksim_pairs, [4, 16]),
+}
+
+
+def run_core_benchmarks(
+    names=None, sizes=None, repeat=3, workdir=None, verbose=False
+):
+    """
+    Runs a set of core benchmarks over a range of sizes.
+
+    Parameters
+    ----------
+    names : list, optional
+        Benchmarks to run, out of `CORE_BENCHMARKS`. Default: all
+    sizes : list, optional
+        Size parameters to use for every benchmark. Default: each
+        benchmark's own default sizes
+    repeat : int
+        No of timed calls per benchmark and size
+    workdir : str, optional
+        Directory for synthetic data files. Default: a temporary
+        directory that is removed afterwards
+
+    Returns
+    -------
+    dict mapping "<name>:<size>" to dicts of measured quantities. Failing
+    benchmarks record their error message instead.
+    """
+    if names is None:
+        names = sorted(CORE_BENCHMARKS)
+    cleanup = workdir is None
+    if cleanup:
+        workdir = tempfile.mkdtemp(prefix="gwnr_benchmarks_")
+    results = {}
+    try:
+        for name in names:
+            if name not in CORE_BENCHMARKS:
+                raise KeyError(
+                    "Unknown benchmark {}. Use one of {}".format(
+                        name, sorted(CORE_BENCHMARKS)
+                    )
+                )
+            func, default_sizes = CORE_BENCHMARKS[name]
+            for size in sizes or default_sizes:
+                key = "{}:{}".format(name, size)
+                try:
+                    res = func(size, repeat=repeat, workdir=workdir)
+                    res["size"] = size
+                except Exception as exc:
+                    res = {
+                        "size": size,
+                        "error": "{}: {}".format(type(exc).__name__, exc),
+                    }
+                results[key] = res
+                if verbose:
+                    if "error" in res:
+                        print("{:<40s} FAILED: {}".format(key, res["error"]))
+                    else:
+                        print(
+                            "{:<40s} {:10.4f} s {:10.2f} MB".format(
+                                key, res["wall_time_min"], res["peak_memory_mb"]
+                            )
+                        )
+    finally:
+        if cleanup:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
@@ -0,0 +1,144 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# =============================================================================
+#
+#                                   Preamble
+#
+# =============================================================================
+#
+"""Import-time benchmarks for gwnr entry points"""
+
+from __future__ import absolute_import, print_function
+
+import json
+import subprocess
+import sys
+
+__all__ = [
+    "DEFAULT_IMPORT_ENTRY_POINTS",
+    "HEAVY_MODULES",
+    "measure_import_time",
+    "run_import_benchmarks",
+]
+
+DEFAULT_IMPORT_ENTRY_POINTS = [
+    "gwnr",
+    "gwnr.data",
+    "gwnr.utils",
+    "gwnr.cosmo",
+    "gwnr.analysis",
+    "gwnr.waveform",
+    "gwnr.nr",
+    "gwnr.stats",
+    "gwnr.graph",
+    "gwnr.workflow",
+]
+
+HEAVY_MODULES = [
+    "pycbc",
+    "lal",
+    "lalsimulation",
+    "matplotlib",
+    "statsmodels",
+    "h5py",
+    "glue",
+    "scipy",
+    "pandas",
+]
+
+# Runs in a fresh interpreter, so that nothing is cached in sys.modules
+_IMPORT_PROBE = """
+import json, sys, time
+_n0 = len(sys.modules)
+_t0 = time.perf_counter()
+try:
+    import {module}
+    _error = None
+except Exception as _exc:
+    _error = "{{}}: {{}}".format(type(_exc).__name__, _exc)
+_t1 = time.perf_counter()
+print(json.dumps({{
+    "wall_time": _t1 - _t0,
+    "num_modules": len(sys.modules) - _n0,
+    "heavy_modules": sorted(
+        m for m in {heavy!r} if m in sys.modules
+    ),
+    "error": _error,
+}}))
+"""
+
+
+def measure_import_time(module, repeat=5, python=sys.executable):
+    """
+    Measures the time taken to import `module` in a fresh interpreter.
+
+    Parameters
+    ----------
+    module : str
+        Dotted name of the module to import
+    repeat : int
+        No of fresh interpreters to time the import in
+
+    Returns
+    -------
+    dict with the minimum and median wall time (s) over repeats, the number
+    of modules added to `sys.modules`, which of `HEAVY_MODULES` got loaded,
+    and the import error message (if any)
+    """
+    probe = _IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.check_output([python, "-c", probe])
+        runs.append(json.loads(out.decode("utf-8").strip().splitlines()[-1]))
+    times = sorted(r["wall_time"] for r in runs)
+    # An import that fails in any interpreter is reported as failing
+    errors = [r["error"] for r in runs if r["error"]]
+    return {
+        "wall_time_min": times[0],
+        "wall_time_median": times[len(times) // 2],
+        "num_modules": runs[-1]["num_modules"],
+        "num_heavy_modules": len(runs[-1]["heavy_modules"]),
+        "heavy_modules": runs[-1]["heavy_modules"],
+        "error": errors[0] if errors else None,
+    }
+
+
+def run_import_benchmarks(entry_points=None, repeat=5, verbose=False):
+    """
+    Measures import time for a list of entry points.
+
+    Returns
+    -------
+    dict mapping "import:<module>" to the output of `measure_import_time`
+    """
+    if entry_points is None:
+        entry_points = DEFAULT_IMPORT_ENTRY_POINTS
+    results = {}
+    for module in entry_points:
+        res = measure_import_time(module, repeat=repeat)
+        results["import:{}".format(module)] = res
+        if verbose:
+            print(
+                "import {:<20s} {:8.3f} s {:6d} modules  heavy: {}{}".format(
+                    module,
+                    res["wall_time_min"],
+                    res["num_modules"],
+                    ",".join(res["heavy_modules"]) or "-",
+                    "  [{}]".format(res["error"]) if res["error"] else "",
+                )
+            )
+    return results
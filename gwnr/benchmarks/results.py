@@ -0,0 +1,155 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# =============================================================================
+#
+#                                   Preamble
+#
+# =============================================================================
+#
+"""Reading, writing and comparing benchmark results"""
+
+from __future__ import absolute_import, print_function
+
+import json
+import platform
+import socket
+import sys
+import time
+
+__all__ = [
+    "benchmark_metadata",
+    "write_benchmark_results",
+    "read_benchmark_results",
+    "compare_benchmark_results",
+]
+
+# Quantities that parametrize a benchmark, rather than being measured by it
+_UNMEASURED = ("size",)
+
+
+def benchmark_metadata():
+    """Returns a dict describing the host and software the benchmarks ran on"""
+    try:
+        import numpy
+
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    try:
+        from gwnr import __version__ as gwnr_version
+    except ImportError:
+        gwnr_version = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()),
+        "hostname": socket.gethostname(),
+        "platform": platform.platform(),
+        "python": sys.version.split()[0],
+        "numpy": numpy_version,
+        "gwnr": gwnr_version,
+    }
+
+
+def write_benchmark_results(results, filename, metadata=None):
+    """
+    Writes benchmark results to a JSON file.
+
+    Parameters
+    ----------
+    results : dict
+        Maps benchmark names to dicts of measured quantities
+    filename : str
+        Output JSON file
+    metadata : dict, optional
+        Host / software information. Default: `benchmark_metadata()`
+    """
+    if metadata is None:
+        metadata = benchmark_metadata()
+    with open(filename, "w") as fout:
+        json.dump({"metadata": metadata, "results": results}, fout, indent=2)
+
+
+def read_benchmark_results(filename):
+    """Reads results written by `write_benchmark_results`"""
+    with open(filename, "r") as fin:
+        return json.load(fin)["results"]
+
+
+def compare_benchmark_results(
+    baseline, current, tolerance=0.2, higher_is_better=("throughput",)
+):
+    """
+    Compares two sets of benchmark results and flags regressions.
+
+    Every numeric quantity common to both result sets is compared, except
+    the benchmark size (which is a parameter, not a measurement). Quantities
+    whose name contains one of `higher_is_better` (e.g. throughputs) regress
+    when they drop by more than `tolerance` (fractional); all others (times,
+    memory, module counts) regress when they grow by more than `tolerance`.
+
+    A benchmark that fails in the current run but not in the baseline, or
+    that is missing from the current run, is a regression too.
+
+    Parameters
+    ----------
+    baseline, current : dict or str
+        Results dicts, or names of JSON files to read them from
+
+    Returns
+    -------
+    rows : list of tuples
+        (benchmark, quantity, baseline value, current value, fractional
+        change, is_regression) for each compared quantity. The change from
+        a zero baseline to a non-zero value is +/- infinity. Failing
+        benchmarks give a row with quantity "error" and the error messages
+        as values, and missing ones a row with quantity "missing"; the
+        change is None for both
+    """
+    if not isinstance(baseline, dict):
+        baseline = read_benchmark_results(baseline)
+    if not isinstance(current, dict):
+        current = read_benchmark_results(current)
+
+    rows = []
+    for name in sorted(baseline):
+        if name not in current:
+            rows.append((name, "missing", None, None, None, True))
+            continue
+        old_error = baseline[name].get("error")
+        new_error = current[name].get("error")
+        if new_error:
+            rows.append((name, "error", old_error, new_error, None, not old_error))
+        for qty in sorted(set(baseline[name]) & set(current[name])):
+            if qty in _UNMEASURED:
+                continue
+            old, new = baseline[name][qty], current[name][qty]
+            if isinstance(old, bool) or not isinstance(old, (int, float)):
+                continue
+            if isinstance(new, bool) or not isinstance(new, (int, float)):
+                continue
+            if old != 0:
+                change = (new - old) / abs(old)
+            elif new != 0:
+                # Anything from nothing is an infinite change
+                change = float("inf") if new > 0 else -float("inf")
+            else:
+                change = 0.0
+            if any(h in qty for h in higher_is_better):
+                regressed = change < -tolerance
+            else:
+                regressed = change > tolerance
+            rows.append((name, qty, old, new, change, regressed))
+    return rows
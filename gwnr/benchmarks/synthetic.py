@@ -0,0 +1,195 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# =============================================================================
+#
+#                                   Preamble
+#
+# =============================================================================
+#
+"""Synthetic (analytic) waveforms and NR data files for offline benchmarks"""
+
+from __future__ import absolute_import, print_function
+
+import numpy as np
+
+__all__ = [
+    "MTSUN_SI",
+    "analytic_chirp_modes",
+    "analytic_chirp_polarizations",
+    "analytic_chirp_timeseries",
+    "write_synthetic_nr_hdf5",
+]
+
+# Geometrized solar mass in seconds (as lal.MTSUN_SI), so that synthetic data
+# can be made without importing lal
+MTSUN_SI = 4.925490947641267e-06
+
+
+def analytic_chirp_modes(
+    times,
+    mchirp,
+    t_peak=0.0,
+    f_peak=None,
+    tau_ringdown=None,
+    modes=[(2, 2), (3, 3), (4, 4)],
+    include_conjugate_modes=True,
+):
+    """
+    Leading-order (Newtonian) chirp, smoothly capped at a peak frequency and
+    followed by an exponentially damped ringdown.
+
+    The orbital phase Phi is integrated from the Newtonian GW frequency
+    f(tau) = (5 / (256 tau))^(3/8) / (pi Mc^(5/8)), with tau the time to
+    coalescence, and the (l, m) modes follow the convention
+    h_lm = A_lm exp(-i m Phi), with A_lm ~ f^(2/3) before the peak.
+
+    Parameters
+    ----------
+    times : array
+        Sample times. Units are arbitrary, but must match `mchirp`
+        (e.g. seconds, or total masses for dimensionless NR-like data)
+    mchirp : float
+        Chirp mass, in units of time
+    t_peak : float
+        Time of peak amplitude
+    f_peak : float, optional
+        GW frequency at the peak. Default: frequency at 5 Mc before t_peak,
+        i.e. ~0.04 / Mc
+    tau_ringdown : float, optional
+        Damping time of the ringdown. Default: 2 / f_peak
+
+    Returns
+    -------
+    modes : dict
+        Dictionary indexed by (l, m) with complex-valued mode arrays
+    """
+    times = np.asarray(times, dtype=float)
+    tau_min = 5.0 * mchirp
+    if f_peak is None:
+        f_peak = (5.0 / 256.0 / tau_min) ** 0.375 / np.pi / mchirp**0.625
+    else:
+        tau_min = 5.0 / 256.0 / (np.pi * f_peak * mchirp**0.625) ** (8.0 / 3.0)
+    if tau_ringdown is None:
+        tau_ringdown = 2.0 / f_peak
+
+    tau = np.maximum(t_peak - times, tau_min)
+    f_gw = (5.0 / 256.0 / tau) ** 0.375 / np.pi / mchirp**0.625
+    amp = (np.pi * mchirp * f_gw) ** (2.0 / 3.0)
+    post_peak = times > t_peak
+    amp[post_peak] *= np.exp(-(times[post_peak] - t_peak) / tau_ringdown)
+
+    # Orbital phase, from trapezoidal integration of orbital frequency
+    orb_phase = np.zeros(len(times))
+    orb_phase[1:] = np.cumsum(np.pi * 0.5 * (f_gw[1:] + f_gw[:-1]) * np.diff(times))
+
+    out = {}
+    for el, em in modes:
+        amp_lm = amp * (1.0 if (el, em) == (2, 2) else 0.1 ** (el - 1))
+        out[(el, em)] = amp_lm * np.exp(-1j * em * orb_phase)
+        if include_conjugate_modes:
+            out[(el, -em)] = (-1) ** el * np.conj(out[(el, em)])
+    return out
+
+
+def analytic_chirp_polarizations(
+    total_mass, mass_ratio=1.0, sample_rate=4096, duration=16, f_lower=15.0
+):
+    """
+    Plus and cross polarizations (as numpy arrays) of a Newtonian chirp for a
+    binary of given total mass (solar masses) and mass ratio (>= 1), sampled
+    for `duration` seconds with the peak amplitude near the end.
+
+    The chirp starts where its GW frequency equals `f_lower`, or at the start
+    of the segment if it would be longer than `duration`.
+    """
+    eta = mass_ratio / (1.0 + mass_ratio) ** 2
+    mchirp = total_mass * eta**0.6 * MTSUN_SI
+    delta_t = 1.0 / sample_rate
+    times = np.arange(int(duration * sample_rate)) * delta_t
+    t_peak = times[-1] - 0.1 * duration
+    # Time to coalescence from f_lower
+    tau_lower = 5.0 / 256.0 / (np.pi * f_lower * mchirp**0.625) ** (8.0 / 3.0)
+    h = analytic_chirp_modes(
+        times, mchirp, t_peak=t_peak, modes=[(2, 2)], include_conjugate_modes=False
+    )[(2, 2)]
+    h[times < t_peak - tau_lower] = 0.0
+    # Scale to a typical strain amplitude
+    h *= 1.0e-21 / np.max(np.abs(h))
+    return h.real, -1 * h.imag
+
+
+def analytic_chirp_timeseries(
+    total_mass, mass_ratio=1.0, sample_rate=4096, duration=16, f_lower=15.0
+):
+    """As `analytic_chirp_polarizations`, but returns pycbc TimeSeries"""
+    from pycbc.types import TimeSeries
+
+    hp, hc = analytic_chirp_polarizations(
+        total_mass,
+        mass_ratio=mass_ratio,
+        sample_rate=sample_rate,
+        duration=duration,
+        f_lower=f_lower,
+    )
+    return (
+        TimeSeries(hp, delta_t=1.0 / sample_rate),
+        TimeSeries(hc, delta_t=1.0 / sample_rate),
+    )
+
+
+def write_synthetic_nr_hdf5(
+    filename,
+    num_samples=20000,
+    delta_t=0.5,
+    mass_ratio=1.0,
+    modeLmax=4,
+    group_names=["Extrapolated_N2.dir", "Extrapolated_N3.dir", "Extrapolated_N4.dir"],
+):
+    """
+    Writes an HDF5 file that mimics the layout of SXS waveform files
+    (e.g. rhOverM_Asymptotic_GeometricUnits.h5), with analytic chirp modes.
+
+    Each group in `group_names` holds one dataset "Y_l{l}_m{m}.dat" per mode,
+    with columns (time, real, imaginary) in units of total mass.
+
+    Parameters
+    ----------
+    filename : str
+        Output file. To be read with wavetype="Auto" it should contain
+        "_Asymptotic_GeometricUnits" in its name
+    num_samples : int
+        No of time samples per mode
+    delta_t : float
+        Time step, in units of total mass
+    """
+    import h5py
+
+    eta = mass_ratio / (1.0 + mass_ratio) ** 2
+    mchirp = eta**0.6
+    times = np.arange(num_samples) * delta_t
+    t_peak = times[-1] - 100.0
+    modes = [(el, em) for el in range(2, modeLmax + 1) for em in range(1, el + 1)]
+    hlm = analytic_chirp_modes(times, mchirp, t_peak=t_peak, modes=modes)
+    with h5py.File(filename, "w") as fout:
+        for grp_name in group_names:
+            grp = fout.create_group(grp_name)
+            for (el, em), h in hlm.items():
+                grp.create_dataset(
+                    "Y_l{}_m{}.dat".format(el, em),
+                    data=np.column_stack([times - t_peak, h.real, h.imag]),
+                )
+    return filename
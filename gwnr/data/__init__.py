@@ -16,3 +16,4 @@
 from __future__ import absolute_import
 
 from .data import *
+from .noise_curves import *
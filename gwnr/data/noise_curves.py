@@ -0,0 +1,343 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# =============================================================================
+#
+#                                   Preamble
+#
+# =============================================================================
+#
+"""Binary, memory-mapped store of GW detector noise curves"""
+
+from __future__ import absolute_import
+
+import hashlib
+import logging
+import os
+
+import numpy as np
+
+from .data import gw_noise_curve_file, available_gw_noise_curves
+
+__all__ = [
+    "NOISE_CURVE_CACHE_VAR",
+    "noise_curve_cache_dir",
+    "NoiseCurveStore",
+    "default_noise_curve_store",
+    "register_noise_curve",
+    "noise_curve_psd",
+]
+
+# Environment variable that sets the directory for converted noise curves
+NOISE_CURVE_CACHE_VAR = "GWNR_NOISE_CURVE_CACHE"
+
+# Rows of the interpolation table stored for each curve
+_TABLE_FREQ, _TABLE_PSD, _TABLE_LOGF, _TABLE_LOGPSD, _TABLE_SLOPE = range(5)
+
+
+def noise_curve_cache_dir():
+    """Directory in which converted noise curves are kept. This is
+    $GWNR_NOISE_CURVE_CACHE if set, else ~/.cache/gwnr/noise_curves.
+    """
+    cache_dir = os.environ.get(NOISE_CURVE_CACHE_VAR, "")
+    if not cache_dir:
+        cache_dir = os.path.join(
+            os.path.expanduser("~"), ".cache", "gwnr", "noise_curves"
+        )
+    return cache_dir
+
+
+class NoiseCurveStore(object):
+    """
+    Noise curves converted once from ASCII to memory-mapped binary tables.
+
+    Each ASCII curve (two columns: frequency, and ASD or PSD) is parsed
+    the first time it is used, and written to the cache directory as a
+    (5, N) numpy array holding frequencies, PSD values, their logarithms
+    and the slope of each log-log segment. Later uses (including from
+    other processes) memory-map this file instead of re-parsing the
+    text. A converted file is tied to the size and modification time of
+    its source, so edited curves are converted again.
+
+    PSDs on a uniform frequency grid are evaluated from these tables by
+    log-log interpolation, and are cached by the grid signature
+    (curve, delta_f, length, f_lower). With `persist_grids`, these are
+    also written to the cache directory, so that jobs that share a grid
+    only interpolate once.
+
+    Curves are looked up by the name of a file in gwnr/data/gw_noise_curves
+    (with or without its .txt extension), by names given to
+    `register`, or by path to any local ASCII file.
+
+    Usage:
+    ------
+        store = NoiseCurveStore()
+        psd = store.psd("aligo", delta_f=1./16, length=32769, f_lower=15.)
+        store.register("my_h1", "/path/to/h1_psd.txt", is_asd=False)
+        psd = store.psd("my_h1", 1./16, 32769, 15.)
+    """
+
+    def __init__(self, cache_dir=None, persist_grids=False, max_cached_grids=64):
+        if cache_dir is None:
+            cache_dir = noise_curve_cache_dir()
+        self.cache_dir = cache_dir
+        self.persist_grids = persist_grids
+        self.max_cached_grids = max_cached_grids
+        self._registered = {}
+        self._tables = {}
+        self._grids = {}
+
+    # {{{ Curve lookup and conversion
+    def register(self, name, filename, is_asd=True):
+        """Adds a local ASCII noise curve to the store, under `name`"""
+        if not os.path.exists(filename):
+            raise IOError("Noise curve file {} not found".format(filename))
+        self._registered[name] = (os.path.abspath(filename), bool(is_asd))
+        for cache in [self._tables, self._grids]:
+            for key in [k for k in cache if k[0] == name]:
+                cache.pop(key)
+
+    def available(self):
+        """Names of noise curves known to the store"""
+        builtin = [os.path.splitext(f)[0] for f in available_gw_noise_curves()]
+        return sorted(set(builtin) | set(self._registered))
+
+    def source(self, name, is_asd=True):
+        """Returns (path to ASCII file, is_asd) for the noise curve `name`"""
+        if name in self._registered:
+            return self._registered[name]
+        for candidate in [name, name + ".txt"]:
+            builtin = gw_noise_curve_file(candidate)
+            if os.path.isfile(builtin):
+                return builtin, is_asd
+        if os.path.isfile(name):
+            return os.path.abspath(name), is_asd
+        raise IOError(
+            "Noise curve {} is neither a file nor one of {}".format(
+                name, self.available()
+            )
+        )
+
+    def table_filename(self, filename, is_asd=True):
+        """Name of the converted binary file for an ASCII noise curve"""
+        stat = os.stat(filename)
+        signature = "{}|{}|{}|{}".format(
+            os.path.abspath(filename), stat.st_size, stat.st_mtime, bool(is_asd)
+        )
+        tag = hashlib.sha1(signature.encode("utf-8")).hexdigest()[:16]
+        stem = os.path.splitext(os.path.basename(filename))[0]
+        return os.path.join(self.cache_dir, "{}-{}.npy".format(stem, tag))
+
+    @staticmethod
+    def read_ascii_curve(filename, is_asd=True):
+        """
+        Reads an ASCII noise curve and returns its interpolation table, a
+        (5, N) array with rows: frequency, PSD, log(frequency), log(PSD),
+        and the slope of log(PSD) vs log(frequency) on each segment.
+        Entries at zero frequency are dropped, as they have no logarithm.
+        """
+        data = np.loadtxt(filename, ndmin=2)
+        if data.shape[1] < 2:
+            raise IOError("Noise curve {} needs two columns".format(filename))
+        if (data[:, :2] < 0).any() or not np.isfinite(data[:, :2]).all():
+            raise IOError("Invalid data in noise curve {}".format(filename))
+        freq, vals = data[:, 0], data[:, 1]
+        keep = freq > 0
+        freq, vals = freq[keep], vals[keep]
+        order = np.argsort(freq, kind="stable")
+        freq, vals = freq[order], vals[order]
+        if len(freq) < 2:
+            raise IOError("Noise curve {} has too few samples".format(filename))
+
+        table = np.zeros((5, len(freq)), dtype=np.float64)
+        table[_TABLE_FREQ] = freq
+        table[_TABLE_PSD] = vals ** 2 if is_asd else vals
+        table[_TABLE_LOGF] = np.log(freq)
+        with np.errstate(divide="ignore"):
+            table[_TABLE_LOGPSD] = np.log(table[_TABLE_PSD])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            table[_TABLE_SLOPE, :-1] = np.diff(table[_TABLE_LOGPSD]) / np.diff(
+                table[_TABLE_LOGF]
+            )
+        table[_TABLE_SLOPE, :-1][~np.isfinite(table[_TABLE_SLOPE, :-1])] = 0
+        return table
+
+    def table(self, name, is_asd=True):
+        """
+        Memory-mapped interpolation table for noise curve `name`, converting
+        its ASCII file first if needed. See `read_ascii_curve` for layout.
+        """
+        # {{{
+        key = (name, bool(is_asd))
+        if key in self._tables:
+            return self._tables[key]
+        filename, is_asd = self.source(name, is_asd=is_asd)
+        table_file = self.table_filename(filename, is_asd=is_asd)
+        if not os.path.exists(table_file):
+            table = self.read_ascii_curve(filename, is_asd=is_asd)
+            try:
+                if not os.path.exists(self.cache_dir):
+                    os.makedirs(self.cache_dir)
+                tmp_file = "{}.{}.tmp.npy".format(table_file[:-4], os.getpid())
+                np.save(tmp_file, table)
+                os.rename(tmp_file, table_file)
+                logging.info("Converted noise curve {} to {}".format(filename, table_file))
+            except (IOError, OSError) as exc:
+                # Read-only cache: keep the table in memory only
+                logging.warning(
+                    "Could not write noise curve cache {}: {}".format(table_file, exc)
+                )
+                self._tables[key] = table
+                return table
+        table = np.load(table_file, mmap_mode="r")
+        self._tables[key] = table
+        return table
+        # }}}
+
+    # }}}
+
+    # {{{ PSD on uniform grids
+    def interpolate(self, name, frequencies, is_asd=True):
+        """
+        Log-log interpolation of noise curve `name` to `frequencies`.
+        Outside the span of the curve, its end values are used.
+        """
+        table = self.table(name, is_asd=is_asd)
+        frequencies = np.asarray(frequencies, dtype=np.float64)
+        logf_data = table[_TABLE_LOGF]
+        with np.errstate(divide="ignore"):
+            logf = np.log(frequencies)
+        logf = np.clip(logf, logf_data[0], logf_data[-1])
+        idx = np.searchsorted(logf_data, logf, side="right") - 1
+        idx = np.clip(idx, 0, len(logf_data) - 1)
+        return np.exp(
+            table[_TABLE_LOGPSD][idx]
+            + table[_TABLE_SLOPE][idx] * (logf - logf_data[idx])
+        )
+
+    def _compute_grid(self, name, delta_f, length, f_lower, is_asd):
+        table = self.table(name, is_asd=is_asd)
+        f_data_min = table[_TABLE_FREQ][0]
+        f_data_max = table[_TABLE_FREQ][-1]
+        if f_lower is None:
+            f_lower = f_data_min
+        elif f_data_min > f_lower:
+            raise IOError(
+                "Lowest frequency in noise curve {} ({} Hz) is higher than"
+                " the requested f_lower ({} Hz)".format(name, f_data_min, f_lower)
+            )
+        # Same conventions as pycbc.psd.from_txt: zero below f_lower,
+        # and zero above the highest frequency in the curve
+        kmin = int(f_lower / delta_f)
+        kmax = min(length, int(f_data_max / delta_f + 1))
+        psd = np.zeros(length, dtype=np.float64)
+        if kmax > kmin:
+            psd[kmin:kmax] = self.interpolate(
+                name, np.arange(kmin, kmax) * delta_f, is_asd=is_asd
+            )
+        return psd
+
+    def psd(self, name, delta_f, length, f_lower=None, is_asd=True):
+        """
+        PSD of noise curve `name` on the frequency grid k * delta_f,
+        k = 0 ... length - 1, as a read-only numpy array.
+
+        Values below `f_lower` and above the highest frequency in the
+        curve are zero. Results are cached by grid signature.
+
+        Inputs:
+        -------
+        name : name of a known noise curve, or path to an ASCII file
+        delta_f : frequency spacing (Hz)
+        length : number of frequency samples
+        f_lower : low frequency cutoff (Hz). Defaults to the lowest
+            frequency in the curve.
+        is_asd : whether the second column of an unregistered file holds
+            the ASD (True) or the PSD (False)
+        """
+        # {{{
+        key = (name, float(delta_f), int(length),
+               None if f_lower is None else float(f_lower), bool(is_asd))
+        psd = self._grids.get(key)
+        if psd is not None:
+            return psd
+
+        grid_file = None
+        if self.persist_grids:
+            filename, file_is_asd = self.source(name, is_asd=is_asd)
+            grid_tag = hashlib.sha1(repr(key[1:]).encode("utf-8")).hexdigest()[:12]
+            grid_file = "{}-grid-{}.npy".format(
+                self.table_filename(filename, is_asd=file_is_asd)[:-4], grid_tag
+            )
+            if os.path.exists(grid_file):
+                psd = np.load(grid_file, mmap_mode="r")
+
+        if psd is None:
+            psd = self._compute_grid(name, delta_f, length, f_lower, is_asd)
+            psd.setflags(write=False)
+            if grid_file is not None:
+                try:
+                    tmp_file = "{}.{}.tmp.npy".format(grid_file[:-4], os.getpid())
+                    np.save(tmp_file, psd)
+                    os.rename(tmp_file, grid_file)
+                except (IOError, OSError) as exc:
+                    logging.warning(
+                        "Could not write PSD cache {}: {}".format(grid_file, exc)
+                    )
+
+        if len(self._grids) >= self.max_cached_grids:
+            self._grids.pop(next(iter(self._grids)))
+        self._grids[key] = psd
+        return psd
+        # }}}
+
+    def frequency_series(
+        self, name, delta_f, length, f_lower=None, is_asd=True, dtype=None
+    ):
+        """`psd` as a (writable) pycbc.types.FrequencySeries"""
+        from pycbc.types import FrequencySeries
+
+        psd = np.array(self.psd(name, delta_f, length, f_lower=f_lower, is_asd=is_asd))
+        if dtype is not None:
+            psd = psd.astype(dtype)
+        return FrequencySeries(psd, delta_f=delta_f)
+
+    # }}}
+
+
+_default_store = None
+
+
+def default_noise_curve_store():
+    """Process-wide `NoiseCurveStore`, using `noise_curve_cache_dir`"""
+    global _default_store
+    if _default_store is None:
+        _default_store = NoiseCurveStore()
+    return _default_store
+
+
+def register_noise_curve(name, filename, is_asd=True):
+    """Registers a local ASCII noise curve with the default store"""
+    default_noise_curve_store().register(name, filename, is_asd=is_asd)
+
+
+def noise_curve_psd(name, delta_f, length, f_lower=None, is_asd=True):
+    """PSD of a noise curve on a uniform grid, from the default store.
+    See `NoiseCurveStore.psd`.
+    """
+    return default_noise_curve_store().psd(
+        name, delta_f, length, f_lower=f_lower, is_asd=is_asd
+    )
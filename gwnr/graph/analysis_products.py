@@ -22,15 +22,25 @@
 #
 from __future__ import print_function
 
-from gwnr.nr.analysis.types import Overlaps, SimulationErrors, EffectualnessAndBias
+from gwnr.nr.analysis.types import (
+    Overlaps,
+    OverlapStore,
+    SimulationErrors,
+    EffectualnessAndBias,
+)
 import glob
 import h5py
+import json
+import logging
 import numpy as np
 import matplotlib.pyplot as plt
 import os
+import re
 import sys
 import subprocess
+import traceback
 import matplotlib as mp
+from multiprocessing import Pool
 
 mp.rc("text", usetex=True)
 plt.rcParams.update({"text.usetex": True})
@@ -47,13 +57,18 @@ class plot_mismatches_sim:
         plotdir="plots",
         verbose=True,
         debug=False,
+        store=None,
     ):
         self.verbose = verbose
         self.debug = debug
         self.simdir = simdir
         self.simtag = self.simdir.strip("/").split("/")[-1]
         self.data = SimulationErrors(
-            simdir=simdir, matchdirs=matchdirs, verbose=self.verbose, debug=self.debug
+            simdir=simdir,
+            matchdirs=matchdirs,
+            verbose=self.verbose,
+            debug=self.debug,
+            store=store,
         )
         for i in range(len(self.data.ccelevs)):
             self.data.ccelevs[i] = str(self.data.ccelevs[i])
@@ -523,7 +538,18 @@ class plot_mismatches_sim:
 class plot_mismatches_sims:
     """
     This class makes population plots. This is done to find patterns between
-    NR errors based on binary parameters."""
+    NR errors based on binary parameters.
+
+    All overlaps are read from one OverlapStore (in memory, or cached in one
+    file), which is refreshed only for simulations whose overlap files
+    changed. Per-simulation plotters are made on demand with `sim_plotter`.
+    """
+
+    error_labels = {
+        "ccelev": "NR resolution",
+        "ccer": "CCE radius",
+        "cceextrap": "Extraction",
+    }
 
     def __init__(
         self,
@@ -533,24 +559,34 @@ class plot_mismatches_sims:
         plotdir="plots",
         verbose=True,
         debug=False,
+        store=None,
+        prune=False,
     ):
+        """
+        store: OverlapStore, or name of its file, holding the overlaps of
+               all simulations. Simulations missing from it, or whose
+               overlap files changed, are (re-)read and the file updated,
+               so that later calls read one file only.
+        prune: remove simulations not in `simdirs` from the store
+        """
         self.verbose = verbose
         self.debug = debug
         self.basedir = basedir
         self.simdirs = simdirs
-        self.simtag = self.simdirs.strip("/").split("/")[-1]
+        self.matchdirs = matchdirs
+        self.simtag = self.basedir.strip("/").split("/")[-1]
+        if store is None:
+            store = OverlapStore(verbose=self.verbose)
+        elif isinstance(store, str):
+            store = OverlapStore(store, verbose=self.verbose)
+        self.store = store
+        updated = self.store.refresh(
+            [self.basedir + "/" + simdir for simdir in self.simdirs],
+            matchdir=matchdirs[-1],
+            prune=prune,
+        )
+        self.sims = [simdir.strip("/").split("/")[-1] for simdir in self.simdirs]
         self.data = {}
-        for simdir in self.simdirs:
-            self.data[simdir] = plot_mismatches_sim(
-                simdir=self.basedir + "/" + simdir,
-                matchdirs=matchdirs,
-                verbose=self.verbose,
-                debug=self.debug,
-            )
-            for i in range(len(self.data[simdir].ccelevs)):
-                self.data.ccelevs[i] = str(self.data.ccelevs[i])
-            for i in range(len(self.data[simdir].cceradii)):
-                self.data[simdir].cceradii[i] = str(self.data[simdir].cceradii[i])
         self.lines = ["-", "--", "-.", "-:"]
         self.markers = ["o", "x", "s", "^", "v", "*", ".", "<"]
         self.colors = [
@@ -565,219 +601,167 @@ class plot_mismatches_sims:
         ]
         self.taperlabels = ["None", "A", "B", "C", "D", "E"]
         self.plotdir = plotdir + matchdirs[0].lstrip("matches")
+        if len(updated) and self.store.filename is not None:
+            self.store.write()
+
+    #
+
+    def sim_plotter(self, simdir):
+        """plot_mismatches_sim for one simulation, read from the store"""
+        if simdir not in self.data:
+            self.data[simdir] = plot_mismatches_sim(
+                simdir=self.basedir + "/" + simdir,
+                matchdirs=self.matchdirs,
+                plotdir=self.plotdir,
+                verbose=self.verbose,
+                debug=self.debug,
+                store=self.store,
+            )
+        return self.data[simdir]
+
+    #
+
+    def outer_radius_mask(self, summary):
+        """
+        Mask over rows of OverlapStore.max_mismatch_per_pair output, that
+        keeps rows whose pair is at the largest CCE radius of its simulation
+        """
+        # {{{
+        radii = np.array(
+            [
+                max([int(r) for r in re.findall(r"CceR(\d+)", pair)] or [-1])
+                for pair in summary["pair"]
+            ],
+            dtype=np.int64,
+        )
+        sims, sim_codes = np.unique(
+            summary["sim"].astype(str), return_inverse=True
+        )
+        outer = np.full(len(sims), -1, dtype=np.int64)
+        np.maximum.at(outer, sim_codes, radii)
+        return (radii >= 0) & (radii == outer[sim_codes])
+        # }}}
+
+    #
+
+    def cce_mismatch_values(self, taper=None, mass_min=None, mass_max=None):
+        """
+        Largest mismatch over total mass of each (simulation, pair, taper),
+        for the error sources considered in `hist_cce_mismatch`, concatenated
+        across all simulations. Returns {error_type: array}.
+        """
+        # {{{
+        retval = {}
+        for error_type in self.error_labels:
+            summary = self.store.max_mismatch_per_pair(
+                error_type=error_type,
+                sim=self.sims,
+                taper=taper,
+                mass_min=mass_min,
+                mass_max=mass_max,
+            )
+            mismatch = summary["mismatch"]
+            if error_type in ["ccelev", "cceextrap"]:
+                mismatch = mismatch[self.outer_radius_mask(summary)]
+            retval[error_type] = mismatch
+        return retval
+        # }}}
 
     #
 
-    def hist_cce_mismatch(self):
+    def hist_cce_mismatch(
+        self,
+        bins=None,
+        taper=None,
+        mass_min=None,
+        mass_max=None,
+        savedir=None,
+        savefig=None,
+    ):
         """
         This function will make histograms of different sources of error, across
         the catalog. The catalog is given as a list of dir names. The errors considered here are:
-        1. NR Res: For R = OUTER: Lev4 vs Lev5, Lev3 vs Lev4
-        2. CCE Radius: For Lev = Lev5: R1 vs R2
-        3. Extraction: For Lev=Lev5, R = OUTER vs N2, N3, N4
+        1. NR Res: For R = OUTER: Lev pairs
+        2. CCE Radius: For each Lev: R1 vs R2
+        3. Extraction: For R = OUTER vs N2, N3, N4
+        Mismatches are maximized over total mass, and CONCATENATED over
+        pairs, tapers and simulations.
+        Returns {error_type: (counts, bin edges, mismatches)}.
         """
         # {{{
-        # Get all required information for each sim, and then combine the info
-        overlaps_all = {}
-        for d in self.simdirs:
-            overlaps_all[d] = []
-            spl_lev = "Lev5"
-            spl_extrap = ["N2", "N3", "N4"]
-            spl_ccer = "CceR%04d" % max([int(x[-4:]) for x in self.data[d].cceradii])
-            #
-            const_combinations = [
-                [[spl_ccer, "Lev4", "Lev5"], [spl_ccer, "Lev3", "Lev4"]],
-                [
-                    ["Lev3"] + self.data[d].cceradii,
-                    [["Lev4"] + self.data[d].cceradii],
-                    [["Lev5"] + self.data[d].cceradii],
-                ],
-                [
-                    ["Lev3", spl_ccer, "N2"],
-                    ["Lev3", spl_ccer, "N3"],
-                    ["Lev3", spl_ccer, "N4"],
-                    ["Lev4", spl_ccer, "N2"],
-                    ["Lev4", spl_ccer, "N3"],
-                    ["Lev4", spl_ccer, "N4"],
-                    ["Lev5", spl_ccer, "N2"],
-                    ["Lev5", spl_ccer, "N3"],
-                    ["Lev5", spl_ccer, "N4"],
-                ],
-            ]
-            const_funcs = [
-                [self.data[d].ccelev, self.data[d].ccelev],
-                [self.data[d].ccer, self.data[d].ccer, self.data[d].ccer],
-                [
-                    self.data[d].cceextrapolated,
-                    self.data[d].cceextrapolated,
-                    self.data[d].cceextrapolated,
-                    self.data[d].cceextrapolated,
-                    self.data[d].cceextrapolated,
-                    self.data[d].cceextrapolated,
-                    self.data[d].cceextrapolated,
-                    self.data[d].cceextrapolated,
-                    self.data[d].cceextrapolated,
-                ],
-            ]
-            for kdx, key_combos in enumerate(const_combinations):
-                overlaps_tmp = []
-                for idx, key_combo in enumerate(key_combos):
-                    overlaps = const_funcs[jdx][idx](key=key_combo, noduplicate=True)
-                    if len(overlaps.values()) > 1:
-                        raise RuntimeError(
-                            "keys %s gave %d resuls" % (key_combo, len(overlaps.keys()))
-                        )
-                    # proceed if only 1 dataset
-                    overlaps_tmp.append(overlaps.values()[0])
-                overlaps_all[d].append(overlaps_tmp)
+        if savedir is None:
+            savedir = self.plotdir
+        if bins is None:
+            bins = np.logspace(-6, 0, 31)
+        values = self.cce_mismatch_values(
+            taper=taper, mass_min=mass_min, mass_max=mass_max
+        )
+        retval = {}
+        fig = plt.figure(int(1e7 * np.random.random()))
+        fig.set_size_inches(6 * len(values), 5)
+        for idx, error_type in enumerate(self.error_labels):
+            counts, edges = np.histogram(values[error_type], bins=bins)
+            retval[error_type] = (counts, edges, values[error_type])
+            ax = plt.subplot(1, len(values), idx + 1)
+            ax.hist(edges[:-1], bins=edges, weights=counts, histtype="step", lw=2)
+            ax.set_xscale("log")
+            ax.grid(True, which="major")
+            ax.set_xlabel("Mismatch")
+            if idx == 0:
+                ax.set_ylabel("Count")
+            ax.set_title(
+                "%s (%d)" % (self.error_labels[error_type], len(values[error_type]))
+            )
         #
-        # Now combine info for all sims. CONCATENATE, NOT MAXIMIZE!!!
-        # TODO
+        savedir = self.basedir + "/" + savedir
+        if not os.path.exists(savedir):
+            os.makedirs(savedir)
+        if savefig is None:
+            savefig = self.simtag + "_CCEMismatchHistograms.png"
+        plt.savefig(savedir + "/" + savefig, dpi=400)
+        plt.close(fig)
+        return retval
         # }}}
 
     #
 
-    def plot_cce_mismatches_all(
-        self, nsubplotrows=2, nsubplotcols=2, savedir=None, savefig=None
-    ):
+    def plot_cce_mismatches_all(self, taper=None, savedir=None, savefig=None):
+        """
+        Largest mismatch vs total mass of each simulation, for each error
+        source, with one line per simulation.
+        """
         # {{{
         if savedir is None:
             savedir = self.plotdir
-        # panel1,2,3,4
-        # For each tapering: x5
-        #
-        # fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2,2,sharex='col',sharey='row')
         fig = plt.figure(int(1e7 * np.random.random()))
-        fig.set_size_inches(16, 12)
+        fig.set_size_inches(6 * len(self.error_labels), 5)
         fig.suptitle(self.simtag, fontsize=14)
-        self.data.ccelevs.sort()
-        self.data.cceradii.sort()
-        const_list = [
-            self.data.ccelevs,
-            self.data.cceradii,
-            self.data.ccelevs,
-            self.data.ccelevs,
-        ]
-        const_func = [
-            self.data.ccer,
-            self.data.ccelev,
-            self.data.cceextrapolated,
-            self.data.cceextrapolated,
-        ]
-        const_keys = [[], [], self.data.extraporders, self.data.cceradii]
-        const_addtn = [
-            [],
-            [],
-            [str(self.data.cceradii[0])],
-            [str(self.data.cceradii[1])],
-        ]
-        for idx in range(4):
-            print("idx = ", idx)
-            additional_constraint = const_addtn[idx]
-            print("additional constraing = ", additional_constraint)
-            ax = plt.subplot(nsubplotrows, nsubplotcols, idx + 1)  # <<
-            l_taper = self.taperlabels
-            l_lev = []
-            l_ccer = []
-            plot_lines_all = []
-            plot_lines_levs = []
-            # self.data.cceradii): #<<
-            for lidx, lev in enumerate(const_list[idx]):
-                lev = str(lev)
-                print("lev = ", lev)
-                l_lev.append(lev)
-                const_key = lev
-                # For each tapering: x6
-                plot_lines = [[], [], [], [], [], []]
-                if idx >= 4:
-                    overlaps = {}
-                    for l2 in const_keys[idx]:
-                        print("l2, lev = ", l2, lev)
-                        overlaps[l2] = const_func[idx](
-                            key=[l2] + [lev], noduplicate=True
-                        )
-                else:
-                    overlaps = const_func[idx](
-                        key=additional_constraint + [lev], noduplicate=True
-                    )
-                print(overlaps)
-                # self.data.ccelev(key=lev,noduplicate=True)#.values()[0] <<
-                for i in range(overlaps.values()[0].nWindows):
-                    for n in range(len(overlaps.keys())):
-                        print(
-                            "i = %d/%d, n = %d/%d"
-                            % (
-                                i,
-                                overlaps.values()[0].nWindows,
-                                n,
-                                len(overlaps.keys()),
-                            )
-                        )
-                        var_key = str(overlaps.keys()[n])
-                        print("var_key = ", var_key)
-                        olap = overlaps[var_key]
-                        mass = olap.X()
-                        mismatch = 1.0 - olap.Y(i)
-                        #
-                        if i == 0 and lidx == 0:
-                            l_ccer.append(var_key.split("/")[-1])
-                        (pl,) = plt.plot(
-                            mass,
-                            mismatch,
-                            linestyle=self.lines[lidx],
-                            lw=1,
-                            marker=self.markers[n],
-                            markersize=3,
-                            color=self.colors[i],
-                            alpha=0.65,
-                        )
-                        plot_lines[i].append(
-                            pl,
-                        )
-                plot_lines_all.append(plot_lines)
-                plot_lines_levs.append(plot_lines[0])
-            #
-            print("l_taper,lev,ccer = ", l_taper, l_lev, l_ccer)
-            #
-            if idx + 1 >= nsubplotcols * (nsubplotrows - 1):
-                ax.set_xlabel("mass (solar mass)")
-            if idx % nsubplotcols == 0:
-                ax.set_ylabel("Mismatches")
-            legend_1 = plt.legend(
-                zip(*plot_lines_levs)[0],
-                l_lev,
-                loc="upper left",
-                prop={"size": 8},
-                fancybox=True,
-            )
-            legend_2 = plt.legend(
-                zip(*plot_lines)[0],
-                l_taper,
-                ncol=2,
-                loc="lower right",
-                prop={"size": 8},
-                fancybox=True,
+        for idx, error_type in enumerate(self.error_labels):
+            ax = plt.subplot(1, len(self.error_labels), idx + 1)
+            curves = self.store.max_mismatch_vs_mass_per_simulation(
+                error_type=error_type, sim=self.sims, taper=taper
             )
-            legend_3 = plt.legend(
-                plot_lines[0],
-                l_ccer,
-                ncol=2,
-                loc="lower left",
-                prop={"size": 8},
-                fancybox=True,
+            for sim in self.sims:
+                if sim not in curves:
+                    continue
+                mass, mismatch = curves[sim]
+                ax.plot(mass, mismatch, lw=1, alpha=0.5)
+            ax.set_yscale("log")
+            ax.grid(True, which="major")
+            ax.set_xlabel("mass (solar mass)")
+            if idx == 0:
+                ax.set_ylabel("Mismatches")
+            ax.set_title(
+                "%s (%d simulations)" % (self.error_labels[error_type], len(curves))
             )
-            ax.legend()
-            ax.add_artist(legend_1)
-            ax.add_artist(legend_2)
-            ax.add_artist(legend_3)
-            ax.set_ylim([1.0e-5, 0.01])
         #
-        subprocess.getoutput("mkdir -p %s" % self.simdir + "/" + savedir)
-        savedir = self.simdir + "/" + savedir
-        if savefig is not None:
-            plt.savefig(savedir + "/" + savefig, dpi=500)
-        else:
-            plt.savefig(savedir + "/" + self.simtag + ".png", dpi=500)
+        savedir = self.basedir + "/" + savedir
+        if not os.path.exists(savedir):
+            os.makedirs(savedir)
+        if savefig is None:
+            savefig = self.simtag + "_CCEMismatches.png"
+        plt.savefig(savedir + "/" + savefig, dpi=400)
+        plt.close(fig)
         return
         # }}}
 
@@ -786,15 +770,48 @@ class plot_mismatches_sims:
 # EFFECTUALNESS
 
 
+# Plotter shared with the processes of plot_effectualness_vs_totalmass.render_all
+_batch_plotter = {}
+
+
+def _init_plot_worker(plotter):
+    """Keeps the plotter (with its data already read) for this process"""
+    _batch_plotter["plotter"] = plotter
+
+
+def _render_figure(task):
+    """Calls one plotting method of the shared plotter"""
+    method, kwargs = task
+    name = "{}({})".format(method, kwargs) if kwargs else method
+    try:
+        getattr(_batch_plotter["plotter"], method)(**kwargs)
+        return name, None
+    except Exception:
+        return name, traceback.format_exc()
+    finally:
+        plt.close("all")
+
+
 class plot_effectualness_vs_totalmass:
     # {{{
     def __init__(
-        self, outdir=".", infiles=["matches/match1.h5"], plotdir="plots", verbose=True
+        self,
+        outdir=".",
+        infiles=["matches/match1.h5"],
+        plotdir="plots",
+        cache_file=None,
+        verbose=True,
     ):
+        """
+        cache_file: if given, data read by `read_data_from_all_files` is
+            cached in this HDF5 file (relative to outdir), and read from it
+            as long as the input files are unchanged.
+        """
         self.verbose = verbose
         self.data = None
         self.outdir = outdir
         self.infiles = infiles
+        self.cache_file = cache_file
         self.plotdir = outdir + "/" + plotdir
         self.ApproxList = [
             "SEOBNRv1.dat",
@@ -850,18 +867,94 @@ class plot_effectualness_vs_totalmass:
             infiles = self.infiles
         else:
             raise IOError("Please specify which files to read, as a list OR tag")
-        # print "USING ONLY 10 DATA FILES -- FIXME!"
-        # infiles = infiles[:10] # FIXME
+        # Cached data is valid as long as the same files are unchanged
+        signature = json.dumps(
+            {
+                "files": [
+                    [f, os.path.getsize(f), os.path.getmtime(f)]
+                    for f in sorted(infiles)
+                ],
+                "simtags": list(simtags),
+            }
+        )
+        if self.cache_file is not None and self.data.read_cache(
+            self.cache_file, signature=signature
+        ):
+            os.chdir(pwd)
+            return
         if self.verbose:
             print("reading from >> ", infiles, file=sys.stderr)
         for f in infiles:
             self.data.read_data_from_file(filename=f, simtags=simtags)
+        if self.cache_file is not None:
+            self.data.write_cache(self.cache_file, signature=signature)
         os.chdir(pwd)
         return
         # }}}
 
     #
 
+    def render_all(self, figures, num_processes=1):
+        """
+        Makes many figures from a single read of the data. The data is read
+        (if not already) before worker processes are started, so they all
+        share it.
+
+        Parameters
+        ----------
+        figures: list
+            Names of plotting methods of this class, e.g.
+            "plot_effectualness_vs_parameters_multrow", or (name, kwargs)
+            tuples to call them with keyword arguments
+        num_processes: int
+            Number of processes to make figures in
+
+        Returns
+        -------
+        failed: dict
+            Traceback for each figure that could not be made
+        """
+        # {{{
+        tasks = []
+        for fig in figures:
+            if isinstance(fig, str):
+                fig = (fig, {})
+            if not hasattr(self, fig[0]):
+                raise IOError("Unknown figure type {}".format(fig[0]))
+            tasks.append((fig[0], dict(fig[1])))
+        if len(tasks) == 0:
+            return {}
+        if self.data is None:
+            self.read_data_from_all_files()
+
+        failed = {}
+        if num_processes > 1:
+            pool = Pool(
+                min(num_processes, len(tasks)),
+                initializer=_init_plot_worker,
+                initargs=(self,),
+            )
+            try:
+                results = pool.imap_unordered(_render_figure, tasks)
+                for name, error in results:
+                    if error is not None:
+                        failed[name] = error
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            _init_plot_worker(self)
+            for task in tasks:
+                name, error = _render_figure(task)
+                if error is not None:
+                    failed[name] = error
+        for name in failed:
+            logging.error("Could not make {}:\n{}".format(name, failed[name]))
+        return failed
+        # }}}
+
+    #
+
     def plot_effectualness_vs_totalmass(self, inkey=None, logy=True, figtype="pdf"):
         # {{{
         try:
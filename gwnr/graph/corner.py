@@ -31,6 +31,7 @@ from scipy.stats import gaussian_kde
 
 from gwnr.graph import make_filled_contour_plot, ParamLatexLabels
 from gwnr.stats import MultiDDistribution
+from gwnr.utils.support import area_inside_contour
 from matplotlib import cm
 
 import logging
@@ -66,6 +67,132 @@ def cornerplot_dataframe(df, cols=None):
     return g
 
 
+def binned_density_2d(x, y, npixels=50, xrange=None, yrange=None, smooth=1.0):
+    """
+    Estimates the 2D probability density of samples (x, y) on a regular grid.
+
+    Samples are binned onto an `npixels` x `npixels` histogram, which is then
+    smoothed with a Gaussian kernel via FFT convolution. The kernel covariance
+    follows Scott's rule from the sample covariance (scaled by `smooth`), so
+    the result approximates `scipy.stats.gaussian_kde` at O(N + npixels^2 log
+    npixels) cost instead of O(N^2). Set `smooth=0` for a plain histogram.
+
+    Inputs:
+    -------
+        - x, y    : 1-D arrays of samples
+        - npixels : number of grid points along each axis
+        - xrange, yrange : (min, max) of the grid. Default: sample extent
+        - smooth  : multiplicative factor on the KDE bandwidth
+
+    Returns:
+    --------
+        - xvals, yvals : grid points along X and Y axes
+        - density      : 2-D array of shape (npixels, npixels), indexed as
+                         [y, x] so that it can be passed to `ax.contour`
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if xrange is None:
+        xrange = (x.min(), x.max())
+    if yrange is None:
+        yrange = (y.min(), y.max())
+    xvals = np.linspace(xrange[0], xrange[1], npixels)
+    yvals = np.linspace(yrange[0], yrange[1], npixels)
+    dx = (xvals[1] - xvals[0]) or 1.0
+    dy = (yvals[1] - yvals[0]) or 1.0
+
+    # Bin samples such that bin centers coincide with grid points
+    xedges = np.linspace(xrange[0] - 0.5 * dx, xrange[1] + 0.5 * dx, npixels + 1)
+    yedges = np.linspace(yrange[0] - 0.5 * dy, yrange[1] + 0.5 * dy, npixels + 1)
+    hist, _, _ = np.histogram2d(y, x, bins=[yedges, xedges])
+
+    if smooth > 0 and len(x) > 1:
+        from scipy.signal import fftconvolve
+
+        # Scott's rule bandwidth, expressed in pixel units
+        cov = np.atleast_2d(np.cov(np.vstack([x, y])))
+        cov = cov * (len(x) ** (-1.0 / 3.0)) * smooth**2
+        cov[0, :] /= dx
+        cov[:, 0] /= dx
+        cov[1, :] /= dy
+        cov[:, 1] /= dy
+        # Regularize degenerate (e.g. constant) dimensions
+        cov[np.diag_indices(2)] = np.maximum(np.diag(cov), 0.25)
+        # Truncate kernel at 4 sigma (but no larger than the grid)
+        hx = min(int(np.ceil(4 * np.sqrt(cov[0, 0]))), npixels)
+        hy = min(int(np.ceil(4 * np.sqrt(cov[1, 1]))), npixels)
+        kx, ky = np.meshgrid(np.arange(-hx, hx + 1), np.arange(-hy, hy + 1))
+        icov = np.linalg.inv(cov)
+        kernel = np.exp(
+            -0.5 * (icov[0, 0] * kx**2 + 2 * icov[0, 1] * kx * ky + icov[1, 1] * ky**2)
+        )
+        hist = fftconvolve(hist, kernel / kernel.sum(), mode="same")
+        hist[hist < 0] = 0.0
+
+    norm = hist.sum() * dx * dy
+    if norm > 0:
+        hist /= norm
+    return xvals, yvals, hist
+
+
+def credible_level_thresholds(density, levels):
+    """
+    Computes density values that enclose given credible levels.
+
+    The gridded density is sorted once in descending order, and its
+    cumulative sum is used to locate the density threshold above which
+    `level` percent of the total probability lies, for each level.
+
+    Inputs:
+    -------
+        - density : N-D array of (possibly unnormalized) density values
+        - levels  : iterable of credible levels, in percent
+
+    Returns:
+    --------
+        - thresholds : array of density thresholds, one per level
+    """
+    flat = np.sort(np.ravel(density))[::-1]
+    cdf = np.cumsum(flat)
+    if cdf[-1] <= 0:
+        return np.zeros(len(levels))
+    cdf /= cdf[-1]
+    idx = np.searchsorted(cdf, np.asarray(levels, dtype=float) / 100.0)
+    idx = np.clip(idx, 0, len(flat) - 1)
+    return flat[idx]
+
+
+def _compute_contour_panel(args):
+    """Computes gridded density and contour thresholds for one 2D panel"""
+    d1, d2, npixels, method, smooth, levels = args
+    if method == "kde":
+        dd = np.column_stack([d1, d2])
+        pdf = gaussian_kde(dd.T)
+        zlevels = np.array([np.percentile(pdf(dd.T), 100.0 - lev) for lev in levels])
+        xvals = np.linspace(dd[:, 0].min(), dd[:, 0].max(), npixels)
+        yvals = np.linspace(dd[:, 1].min(), dd[:, 1].max(), npixels)
+        q, w = np.meshgrid(xvals, yvals)
+        density = pdf([q.flatten(), w.flatten()])
+        density.shape = q.shape
+    elif method in ["fft_kde", "histogram"]:
+        xvals, yvals, density = binned_density_2d(
+            d1, d2, npixels=npixels, smooth=smooth if method == "fft_kde" else 0.0
+        )
+        zlevels = credible_level_thresholds(density, levels)
+    else:
+        raise IOError(
+            "Density method {} not supported. Use kde / fft_kde / histogram.".format(
+                method
+            )
+        )
+    # Contour levels must be strictly increasing
+    zlevels = np.maximum.accumulate(zlevels)
+    for _i in range(1, len(zlevels)):
+        if zlevels[_i] <= zlevels[_i - 1]:
+            zlevels[_i] = np.nextafter(zlevels[_i - 1], np.inf)
+    return xvals, yvals, density, zlevels
+
+
 class CornerPlot(MultiDDistribution):
     """
     Inputs:
@@ -95,6 +222,72 @@ class CornerPlot(MultiDDistribution):
             super(CornerPlot, self).__init__(data, var_type, *args, **kwargs)
         except TypeError:
             MultiDDistribution.__init__(self, data, var_type, *args, **kwargs)
+        self._density_cache = {}
+
+    def clear_density_cache(self):
+        """Forget gridded 2D densities computed by previous calls to `draw`"""
+        self._density_cache = {}
+
+    def contour_densities(
+        self,
+        param_pairs,
+        npixels=50,
+        density_method="kde",
+        density_smooth=1.0,
+        contour_levels=[68.27, 90.0, 95.45],
+        num_processes=1,
+    ):
+        """
+        Computes (or retrieves from cache) gridded 2D densities and their
+        credible-level thresholds for a list of (p1, p2) parameter pairs.
+
+        Densities are cached on the object, keyed by parameter pair and all
+        settings that affect them, so that repeated calls to `draw` that only
+        change styling do not recompute them. Uncached panels are computed in a
+        process pool if `num_processes > 1`.
+
+        Returns:
+        --------
+            dict mapping (p1, p2) to (xvals, yvals, density, zlevels)
+        """
+        if not hasattr(self, "_density_cache"):
+            self._density_cache = {}
+        levels = tuple(sorted(contour_levels, reverse=True))
+
+        def cache_key(p1, p2):
+            return (p1, p2, npixels, density_method, density_smooth, levels)
+
+        todo = [
+            (p1, p2)
+            for (p1, p2) in param_pairs
+            if cache_key(p1, p2) not in self._density_cache
+        ]
+        tasks = [
+            (
+                self.sliced(p1).data(),
+                self.sliced(p2).data(),
+                npixels,
+                density_method,
+                density_smooth,
+                levels,
+            )
+            for (p1, p2) in todo
+        ]
+        if num_processes > 1 and len(tasks) > 1:
+            from multiprocessing import Pool
+
+            pool = Pool(processes=min(num_processes, len(tasks)))
+            try:
+                results = pool.map(_compute_contour_panel, tasks)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = [_compute_contour_panel(t) for t in tasks]
+
+        for pp, res in zip(todo, results):
+            self._density_cache[cache_key(*pp)] = res
+        return {pp: self._density_cache[cache_key(*pp)] for pp in param_pairs}
 
     def draw(
         self,
@@ -148,6 +341,10 @@ class CornerPlot(MultiDDistribution):
         show_oned_percentiles=90.0,
         grid_oned_on=False,
         figure_title="",
+        density_method="kde",
+        density_smooth=1.0,
+        num_processes=1,
+        rasterized=False,
         debug=False,
         verbose=None,
     ):
@@ -182,6 +379,16 @@ class CornerPlot(MultiDDistribution):
         (10)[OPTIONAL] nhbins=30 : NO OF BINS IN HISTOGRAMS
         (11)[OPTIONAL] params_oned_priors=None: PRIOR SAMPLES to be overplotted onto
                                                 1D histograms. Dictionary.
+        (12)[OPTIONAL] density_method="kde": Density estimator for "contour" plots.
+                       "kde" evaluates scipy's gaussian_kde at every sample,
+                       "fft_kde" smooths a binned histogram with a Gaussian
+                       kernel via FFT, and "histogram" uses the raw binned
+                       density. The latter two scale linearly with the number
+                       of samples and are cached across calls to `draw`.
+        (13)[OPTIONAL] density_smooth=1.0: Bandwidth scale factor for "fft_kde"
+        (14)[OPTIONAL] num_processes=1: No of processes to compute 2D densities with
+        (15)[OPTIONAL] rasterized=False: Rasterize histograms, scatter points and
+                                        contours when saving to vector formats
         """
         # Preliminary checks on inputs
         if len(contour_levels) > len(contour_lstyles):
@@ -263,6 +470,22 @@ class CornerPlot(MultiDDistribution):
             contour_areas = {}
         contour_levels = sorted(contour_levels, reverse=True)
 
+        # Pre-compute gridded densities for all 2D contour panels at once
+        contour_densities = {}
+        if plot_type == "contour" and param_color not in self.var_names:
+            contour_densities = self.contour_densities(
+                [
+                    (params_plot[nc], params_plot[nr])
+                    for nr in range(no_of_rows)
+                    for nc in range(nr)
+                ],
+                npixels=npixels,
+                density_method=density_method,
+                density_smooth=density_smooth,
+                contour_levels=contour_levels,
+                num_processes=num_processes,
+            )
+
         # Start drawing panels
         for nr in range(no_of_rows):
             for nc in range(no_of_cols):
@@ -304,6 +527,7 @@ class CornerPlot(MultiDDistribution):
                         alpha=hist_alpha,
                         color=rand_color,
                         label=label,
+                        rasterized=rasterized,
                     )
 
                     # Plot percentiles
@@ -447,6 +671,7 @@ class CornerPlot(MultiDDistribution):
                             vmax=color_max,
                             cmap=cmap,
                             label=label,
+                            rasterized=rasterized,
                         )
 
                         token_cb_ax = (im, ax)
@@ -486,9 +711,13 @@ class CornerPlot(MultiDDistribution):
                             _d2,
                             _d3,
                             ax=ax,
-                            interp_func="griddata",
+                            n_pixels=npixels,
+                            interp_func="griddata"
+                            if density_method == "kde"
+                            else "histogram",
                             interp_func_args=contour_args,
                             add_colorbar=False,
+                            rasterized=rasterized,
                         )
 
                         if nr == (no_of_rows - 1):
@@ -528,6 +757,7 @@ class CornerPlot(MultiDDistribution):
                         edgecolors=None,
                         linewidths=0,
                         label=label,
+                        rasterized=rasterized,
                     )
                     if nr == (no_of_rows - 1):
                         ax.set_xlabel(p1label)
@@ -558,17 +788,8 @@ class CornerPlot(MultiDDistribution):
                     # Get data
                     d1 = self.sliced(p1).data()
                     d2 = self.sliced(p2).data()
-                    dd = np.column_stack([d1, d2])
-                    pdf = gaussian_kde(dd.T)
-                    # Get contour levels
-                    zlevels = [
-                        np.percentile(pdf(dd.T), 100.0 - lev) for lev in contour_levels
-                    ]
-                    x11vals = np.linspace(dd[:, 0].min(), dd[:, 0].max(), npixels)
-                    x12vals = np.linspace(dd[:, 1].min(), dd[:, 1].max(), npixels)
-                    q, w = np.meshgrid(x11vals, x12vals)
-                    r1 = pdf([q.flatten(), w.flatten()])
-                    r1.shape = q.shape
+                    # Get gridded density and contour levels
+                    x11vals, x12vals, r1, zlevels = contour_densities[(p1, p2)]
                     # Draw contours
                     im = ax.contour(
                         x11vals,
@@ -579,6 +800,8 @@ class CornerPlot(MultiDDistribution):
                         linestyles=contour_lstyles[: len(contour_levels)],
                         label=label,
                     )
+                    if rasterized:
+                        im.set_rasterized(True)
 
                     # Get area inside contour
                     if return_areas_in_contours:
@@ -43,11 +43,13 @@ def make_filled_contour_plot(
     contour_levels=[1.0, 5.0, 10.0, 20.0, 30.0, 50.0, 60.0, 80.0, 90.0, 95.0, 99.99],
     cmap=None,
     add_colorbar=True,
+    rasterized=False,
     interp_func_args={},
     interp_func_default_args={
         "Rbf": {"function": "quintic", "smooth": 0.01},
         "griddata": {"method": "cubic", "fill_value": 0},
         "SmoothBivariateSpline": {"kx": 5, "ky": 5, "s": 0.00002},
+        "histogram": {"fill_value": np.nan},
     },
 ):
     """
@@ -62,12 +64,16 @@ def make_filled_contour_plot(
          If not provided, make a default figure and add an axis.
     n_pixels : number of pixels or grains along both X-Y axes. default: 50
     interp_func : Interpolation method to use to convert the 1-D input data
-                  to 2-D gridded data that can be plotted as contours
+                  to 2-D gridded data that can be plotted as contours.
+                  "histogram" averages Z within each pixel, and scales
+                  linearly with the number of points (unlike "Rbf", which
+                  scales as N^3).
     interp_func_args : Arguments to be passed to the interpolation method
     interp_func_default_args : Default arguments to be passed to the
                                interpolation method
     contour_levels : Percentage levels of Z at which to draw contours.
                      Default: many contours from 1% to 99%.
+    rasterized : Rasterize the filled contours when saving to vector formats
 
     Output:
     -------
@@ -113,6 +119,19 @@ def make_filled_contour_plot(
         z_int = SmoothBivariateSpline(x, y, z, **interp_kwargs)
         r1 = z_int.ev(q, w)
 
+    elif interp_func == "histogram":
+        x, y, z = np.ravel(x), np.ravel(y), np.ravel(z)
+        dx = (x1vals[-1] - x1vals[0]) / max(n_pixels - 1, 1) or 1.0
+        dy = (x2vals[-1] - x2vals[0]) / max(n_pixels - 1, 1) or 1.0
+        ix = np.clip(np.rint((x - x1vals[0]) / dx).astype(int), 0, n_pixels - 1)
+        iy = np.clip(np.rint((y - x2vals[0]) / dy).astype(int), 0, n_pixels - 1)
+        flat_idx = iy * n_pixels + ix
+        counts = np.bincount(flat_idx, minlength=n_pixels * n_pixels)
+        sums = np.bincount(flat_idx, weights=z, minlength=n_pixels * n_pixels)
+        r1 = np.full(n_pixels * n_pixels, interp_kwargs["fill_value"], dtype=float)
+        r1[counts > 0] = sums[counts > 0] / counts[counts > 0]
+        r1.shape = q.shape
+
     else:
         raise RuntimeError("How did we even get here?")
 
@@ -127,6 +146,8 @@ def make_filled_contour_plot(
 
     # Make contour plot
     im = ax.contourf(x1vals, x2vals, r1, zlevels, cmap=cmap)
+    if rasterized:
+        im.set_rasterized(True)
 
     # Beautify
     ax.grid(True)
@@ -140,4 +140,30 @@ class ParsePVD:
             for pl in self.pvdlines:
                 fout.write(pl)
 
+    def WriteChunkFiles(self, num_chunks, prefix):
+        """
+        Splits the unique time steps into `num_chunks` contiguous sets, and
+        writes one PVD file with each set, named prefix_%03d.pvd. Frames of
+        the different files can then be rendered by separate (pv)python
+        processes in parallel. Returns the names of the files written.
+        """
+        tsteps = self.RetrieveUniqueTimeSteps()
+        filenames = []
+        for idx, chunk in enumerate(np.array_split(tsteps, num_chunks)):
+            if len(chunk) == 0:
+                continue
+            chunklines = []
+            for tl in self.pvdlines:
+                if re.findall('timestep="\d+.\d+"', tl) != []:
+                    t_curr = float(re.findall('"\d+.\d+"', tl)[0].strip('"'))
+                    if t_curr < chunk[0] or t_curr > chunk[-1]:
+                        continue
+                chunklines.append(tl)
+            filename = "%s_%03d.pvd" % (prefix, idx)
+            with open(filename, "w") as fout:
+                for pl in chunklines:
+                    fout.write(pl)
+            filenames.append(filename)
+        return filenames
+
     # }}}
@@ -24,8 +24,13 @@ from __future__ import print_function
 
 from gwnr.utils.support import *
 from gwnr.waveform.condition import blend
+from gwnr.analysis.filter import overlap_between_waveforms
+import os
 import sys
 
+import numpy as np
+import h5py
+
 from glue.ligolw import lsctables
 from glue.ligolw import ligolw
 import lal
@@ -91,6 +96,250 @@ def overlaps_vs_totalmass(
     # }}}
 
 
+def lowest_total_mass_for_waveforms(waveforms, f_lower=14.5, t=2000):
+    """
+    Lowest total mass at which all given NR waveforms start below
+    `f_lower`, using the orbital frequency at time `t` (in M) as
+    `overlaps_vs_totalmass` does for each pair.
+    """
+    m_lower = 0.0
+    for wav in waveforms:
+        rescaled_mass, orbit_freq = wav.get_orbital_frequency(t=t)
+        m_lower = np.maximum(m_lower, orbit_freq * rescaled_mass / f_lower)
+    return m_lower
+
+
+def waveform_spectra_vs_totalmass(
+    wav, masses, sample_rate=None, time_length=None, t_option=None, blend_func=blend
+):
+    """
+    Rescales an NR waveform to each total mass, applies all blending
+    (tapering) windows of `blend_func`, and Fourier transforms the result.
+
+    Returns a complex array of shape (masses x tapers x frequencies), and
+    the time step of the tapered waveforms.
+    """
+    # {{{
+    if t_option is None:
+        t_option = [100, 1000, 2000, 50, 100]
+    if sample_rate is None:
+        sample_rate = wav.sample_rate
+    if time_length is None:
+        time_length = wav.time_length
+    spectra, delta_t = [], None
+    for mtot in masses:
+        tapered = blend_func(wav, mtot, sample_rate, time_length, t_option)
+        delta_t = tapered[0].delta_t
+        spectra.append(
+            [np.fft.rfft(np.asarray(hp, dtype=np.float64)) * delta_t for hp in tapered]
+        )
+    return np.array(spectra), delta_t
+    # }}}
+
+
+def pairwise_overlaps_from_spectra(
+    spectra, psd, delta_f, pairs, f_lower=15.0, max_pairs_per_batch=64
+):
+    """
+    Overlaps, maximized over time and phase shifts, between pairs of
+    waveforms from their one-sided spectra. This matches
+    pycbc.filter.match, but shares each waveform's FFT and norm between
+    all pairs it is part of.
+
+      spectra : complex array-(waveforms x frequencies), from np.fft.rfft
+                scaled by delta_t
+      psd     : array-PSD at the same frequencies
+      pairs   : array-(pairs x 2) indices into spectra
+    """
+    # {{{
+    spectra = np.asarray(spectra)
+    psd = np.asarray(psd, dtype=np.float64)
+    nfreq = np.shape(spectra)[-1]
+    if len(psd) != nfreq:
+        raise IOError("PSD length inconsistent with waveforms")
+    N = 2 * (nfreq - 1)
+    # Same frequency range as pycbc.filter.get_cutoff_indices
+    kmin, kmax = int(f_lower / delta_f), int((N + 1) / 2.0)
+    weighted = spectra[:, kmin:kmax] / psd[kmin:kmax]
+    norms = np.sqrt(
+        4.0 * delta_f * np.sum((spectra[:, kmin:kmax].conj() * weighted).real, axis=-1)
+    )
+    pairs = np.asarray(pairs, dtype=int).reshape(-1, 2)
+    overlaps = np.zeros(len(pairs))
+    qtilde = np.zeros((int(np.minimum(len(pairs), max_pairs_per_batch)), N), complex)
+    for start in range(0, len(pairs), max_pairs_per_batch):
+        idx1, idx2 = pairs[start : start + max_pairs_per_batch].T
+        num = len(idx1)
+        qtilde[:num, kmin:kmax] = spectra[idx1, kmin:kmax].conj() * weighted[idx2]
+        snr = np.abs(np.fft.ifft(qtilde[:num], axis=-1)).max(axis=-1) * N
+        overlaps[start : start + num] = 4.0 * delta_f * snr / (norms[idx1] * norms[idx2])
+    return overlaps
+    # }}}
+
+
+def overlap_matrix_vs_totalmass(
+    waveforms,
+    pairs,
+    psd,
+    masses=None,
+    m_lower=-1.0,
+    m_upper=100.0,
+    m_delta=5.0,
+    f_lower=15.0,
+    t_option=None,
+    blend_func=blend,
+    verbose=False,
+):
+    """
+    Overlaps between many pairs of NR waveforms, as functions of total mass
+    and blending (tapering) window. Equivalent to calling
+    `overlaps_vs_totalmass` for each pair, except that each waveform is
+    loaded, tapered and Fourier transformed only once per mass. Only the
+    spectra of one mass are kept in memory at a time.
+
+    Parameters
+    ----------
+    waveforms : dict
+        name -> NR waveform object (with rescale_to_totalmass,
+        blending_function, get_orbital_frequency, sample_rate, time_length)
+    pairs : list
+        (name1, name2) pairs of waveforms to compare
+    psd : pycbc.types.FrequencySeries
+        PSD, with length (sample_rate * time_length) / 2 + 1
+    masses : array, optional
+        Total masses, shared by all pairs. Default: each pair gets the mass
+        grid of `overlaps_vs_totalmass`, from the lowest total mass at which
+        both its waveforms are in band (or m_lower, if given) to m_upper, in
+        steps of m_delta. The returned masses are the union of these grids
+
+    Returns
+    -------
+    masses : array of total masses
+    overlaps : array of shape (pairs x masses x tapers). Masses that are not
+        on the grid of a pair have NaN overlaps for it (see
+        `legacy_overlaps_from_matrix`)
+    """
+    # {{{
+    names = []
+    for pair in pairs:
+        for name in pair:
+            if name not in waveforms:
+                raise IOError("Waveform {} not provided".format(name))
+            if name not in names:
+                names.append(name)
+    if masses is None:
+        if m_lower > 0:
+            lowers = dict((name, m_lower) for name in names)
+        else:
+            lowers = dict(
+                (name, lowest_total_mass_for_waveforms([waveforms[name]]))
+                for name in names
+            )
+        pair_masses = [
+            get_uniform_mass_range(
+                np.maximum(lowers[n1], lowers[n2]), m_upper, m_delta
+            )
+            for n1, n2 in pairs
+        ]
+        masses = np.unique(np.concatenate(pair_masses))
+        on_grid = np.array([np.isin(masses, pm) for pm in pair_masses])
+    else:
+        masses = np.asarray(masses)
+        on_grid = np.ones((len(pairs), len(masses)), dtype=bool)
+    #
+    # One FFT per waveform, mass and taper. Spectra of one mass at a time
+    # are held in memory, as (waveforms x tapers x freqs), for the waveforms
+    # of pairs that have this mass on their grid
+    wav0 = waveforms[names[0]]
+    overlaps = None
+    for im, mtot in enumerate(masses):
+        ip_mass = np.flatnonzero(on_grid[:, im])
+        names_mass = []
+        for ip in ip_mass:
+            for name in pairs[ip]:
+                if name not in names_mass:
+                    names_mass.append(name)
+        if verbose:
+            print(
+                "Tapering and transforming {} waveforms at M = {}".format(
+                    len(names_mass), mtot
+                ),
+                file=sys.stderr,
+            )
+        spectra = []
+        for name in names_mass:
+            spec, delta_t = waveform_spectra_vs_totalmass(
+                waveforms[name],
+                [mtot],
+                sample_rate=wav0.sample_rate,
+                time_length=wav0.time_length,
+                t_option=t_option,
+                blend_func=blend_func,
+            )
+            spectra.append(spec[0])
+        spectra = np.array(spectra)
+        num_tapers = np.shape(spectra)[1]
+        if overlaps is None:
+            overlaps = np.full((len(pairs), len(masses), num_tapers), np.nan)
+        index = dict((name, i) for i, name in enumerate(names_mass))
+        pair_idx = np.array([[index[n] for n in pairs[ip]] for ip in ip_mass])
+        for it in range(num_tapers):
+            overlaps[ip_mass, im, it] = pairwise_overlaps_from_spectra(
+                spectra[:, it, :],
+                psd,
+                psd.delta_f,
+                pair_idx,
+                f_lower=f_lower,
+            )
+        del spectra
+    if overlaps is None:
+        overlaps = np.zeros((len(pairs), 0, 0))
+    return masses, overlaps
+    # }}}
+
+
+def write_overlap_matrix_hdf5(
+    filename, group, pairs, masses, overlaps, attrs=None, replace=True
+):
+    """
+    Writes the output of `overlap_matrix_vs_totalmass` to `group` of an
+    HDF5 file, as datasets "pairs" (pairs x 2 names), "masses" and
+    "overlaps" (pairs x masses x tapers), with NaN overlaps at masses off
+    a pair's own grid.
+    """
+    # {{{
+    with h5py.File(filename, "a") as fout:
+        if group in fout:
+            if not replace:
+                raise IOError("{} exists in {}".format(group, filename))
+            del fout[group]
+        grp = fout.create_group(group)
+        grp.create_dataset(
+            "pairs",
+            data=np.array([[str(n1), str(n2)] for n1, n2 in pairs], dtype="S"),
+        )
+        grp.create_dataset("masses", data=masses)
+        grp.create_dataset("overlaps", data=overlaps)
+        grp.attrs["dimensions"] = "pair x mass x taper"
+        if attrs is not None:
+            for key in attrs:
+                grp.attrs[key] = attrs[key]
+    return
+    # }}}
+
+
+def legacy_overlaps_from_matrix(masses, overlaps):
+    """
+    Converts one pair's (masses x tapers) overlaps to the rows of
+    [mass, overlap_taper0, overlap_taper1, ...] written by
+    `overlaps_vs_totalmass`. Masses off the pair's own grid (with NaN
+    overlaps) are dropped.
+    """
+    overlaps = np.asarray(overlaps)
+    keep = ~np.all(np.isnan(overlaps), axis=-1)
+    return np.column_stack([np.asarray(masses)[keep], overlaps[keep]])
+
+
 def calculate_mismatch_between_levs_hdf5(
     self,
     wavefilename="rhOverM_CcePITT_Asymptotic_GeometricUnits.h5",
@@ -99,23 +348,22 @@ def calculate_mismatch_between_levs_hdf5(
     catalogfile=None,
     m_upper=100.0,
     m_delta=5.0,
+    matrixfile="OverlapsLevsMatrix.h5",
 ):
     # {{{
-    cmd.getoutput("mkdir -p %s/%s" % (self.outdir, outdir))
-    fout = h5py.File(self.outdir + "/" + outdir + "/" + outputfile, "a")
+    if not os.path.exists(os.path.join(self.outdir, outdir)):
+        os.makedirs(os.path.join(self.outdir, outdir))
     #
     # Get the waveforms for different levs
     self.read_waveforms_from_hdf5_files(wavefilename=wavefilename)
     # Get PSD
-    sample_rate, time_length = self.sample_rate, self.time_length
-    N = sample_rate * time_length
     self.psd = self.get_psd()
     #
     ccefiles = list(self.wavefiles[self.levs[0]].keys())
-    # ccefiles = list(np.sort( self.ccefiles[self.levs[0]] )[num_runs:])
     # Obtain the waveform files for given CceR, at Lev3,4,5
     # In pairs, compare Lev3,4,5
     self.levs.sort()
+    waveforms, pairs = {}, []
     for ccef in ccefiles:
         # choose a pair of levs
         for i1 in range(len(self.levs)):
@@ -127,28 +375,38 @@ def calculate_mismatch_between_levs_hdf5(
                 ):
                     print(ccef, " waveforms not found in both %s and %s" % (ld1, ld2))
                     continue
-                # Create a group in output file for this ccefile
-                if ccef not in list(fout.keys()):
-                    fout.create_group(ccef)
-                # Compute matches
-                if self.verbose:
-                    print(
-                        "\n\nOverlaps for %s Between %s and %s" % (ccef, ld1, ld2),
-                        file=sys.stderr,
-                    )
-                overlaps = overlaps_vs_totalmass(
-                    self.hwaveforms[ld1][ccef],
-                    self.hwaveforms[ld2][ccef],
-                    psd=self.psd,
-                    m_upper=m_upper,
-                    m_delta=m_delta,
-                )
-                # Add matches and masses as a dataset to the group
-                dsetname = ld1 + "_" + ld2 + ".dat"
-                fout[ccef].create_dataset(dsetname, data=overlaps)
+                waveforms[(ld1, ccef)] = self.hwaveforms[ld1][ccef]
+                waveforms[(ld2, ccef)] = self.hwaveforms[ld2][ccef]
+                pairs.append(((ld1, ccef), (ld2, ccef)))
+    if len(pairs) == 0:
+        return
+    #
+    # Each waveform is tapered and transformed once per mass
+    masses, overlaps = overlap_matrix_vs_totalmass(
+        waveforms,
+        pairs,
+        self.psd,
+        m_upper=m_upper,
+        m_delta=m_delta,
+        verbose=self.verbose,
+    )
     #
-    fout.flush()
-    fout.close()
+    # Add matches and masses as a dataset to the group of each ccefile
+    with h5py.File(os.path.join(self.outdir, outdir, outputfile), "a") as fout:
+        for ip, ((ld1, ccef), (ld2, _)) in enumerate(pairs):
+            if ccef not in list(fout.keys()):
+                fout.create_group(ccef)
+            dsetname = ld1 + "_" + ld2 + ".dat"
+            fout[ccef].create_dataset(
+                dsetname, data=legacy_overlaps_from_matrix(masses, overlaps[ip])
+            )
+    if matrixfile is not None:
+        write_overlap_matrix_hdf5(
+            os.path.join(self.outdir, outdir, matrixfile),
+            "Levs",
+            [("%s/%s" % p1, "%s/%s" % p2) for p1, p2 in pairs],
+            masses,
+            overlaps,
+        )
     return
     # }}}
-    #
@@ -28,6 +28,8 @@ import os
 import sys
 import subprocess as cmd
 
+from gwnr.utils.support import add_strings
+
 
 # Overlap storage classes
 class overlaps_vs_totalmass:
@@ -37,7 +39,7 @@ class overlaps_vs_totalmass:
         if dataset is None:
             raise IOError("Need a dataset to initialize")
         self.M, self.O = dataset[:, 0], dataset[:, 1:]
-        self.nWindows = len(self.O[0, :])
+        self.nWindows = np.shape(self.O)[1]
         # }}}
 
     #
@@ -55,17 +57,24 @@ class overlaps_vs_totalmass:
 
     def get_overlap_mass_taper(self, mass, taperid):
         # {{{
-        X = self.M
-        Y = self.O
         if taperid < 0 or taperid >= self.nWindows:
             raise IOError("only have %d(%d) taperwins" % (self.nWindows, taperid))
-        (idx,) = np.where(X == mass)
-        if len(idx) == 1:
-            return Y[idx, taperid]
-        for idx, mm in enumerate(X):
-            if (mm - mass) < 1.0e-12:
-                return Y[idx, taperid]
-        raise IOError("This mass value not found")
+        idx = self.mass_index(mass)
+        if idx < 0:
+            raise IOError("This mass value not found")
+        return self.O[idx, taperid]
+        # }}}
+
+    def mass_index(self, mass, tol=1.0e-12):
+        """Row of the given total mass, found by bisection, or -1"""
+        # {{{
+        if not hasattr(self, "_sorted_idx"):
+            self._sorted_idx = np.argsort(self.M, kind="stable")
+            self._sorted_M = self.M[self._sorted_idx]
+        pos = np.searchsorted(self._sorted_M, mass - tol)
+        if pos < len(self._sorted_M) and abs(self._sorted_M[pos] - mass) <= tol:
+            return self._sorted_idx[pos]
+        return -1
         # }}}
 
     # }}}
@@ -79,16 +88,34 @@ class Overlaps:
 
     # {{{
 
-    def __init__(self, filename=None, outdir=None, verbose=True, debug=False):
+    def __init__(
+        self,
+        filename=None,
+        outdir=None,
+        verbose=True,
+        debug=False,
+        store=None,
+        sim=None,
+        error_type=None,
+    ):
+        """
+        Reads overlaps from the HDF5 file outdir/filename, or, if an
+        OverlapStore is given, from its rows for simulation `sim` and
+        error source `error_type` without opening any per-simulation file.
+        """
         self.verbose = verbose
         self.debug = debug
         self.filename = filename
         self.outdir = outdir
-        self.fullfilename = self.outdir + "/" + self.filename
         self.data = {}
         self.filedirs = {}
         self.filekeys = {}
-        self.read_data()
+        if store is not None:
+            self.fullfilename = store.filename
+            self.read_data_from_store(store, sim, error_type)
+        else:
+            self.fullfilename = self.outdir + "/" + self.filename
+            self.read_data()
         self.keys = self.iterables()
 
     #
@@ -111,14 +138,13 @@ class Overlaps:
         if self.debug:
             print(dtmp)
         # Get index of first dir
-        for idx in range(len(dtmp)):
-            if ".dir" in dtmp[idx]:
-                break
+        idx = next((i for i, d in enumerate(dtmp) if ".dir" in d), len(dtmp) - 1)
         if idx == len(dtmp) - 1 and idx == 1:
             idx = 0
         d1, d2 = add_strings(dtmp[: idx + 1]), add_strings(dtmp[idx + 1 :])
         d1, d2 = self.string_from_dir(d1), self.string_from_dir(d2)
-        print("d1, d2 = ", d1, d2)
+        if self.debug:
+            print("d1, d2 = ", d1, d2)
         return d1 + "_" + d2
 
     #
@@ -132,7 +158,7 @@ class Overlaps:
             if ".dir" in dtmp[idx]:
                 break
         d1, d2 = add_strings(dtmp[: idx + 1]), add_strings(dtmp[idx + 1 :])
-        d1, d2 = string_from_dir(d1), string_from_dir(d2)
+        d1, d2 = self.string_from_dir(d1), self.string_from_dir(d2)
         return d1 + "_" + d2
 
     #
@@ -146,6 +172,20 @@ class Overlaps:
 
     #
 
+    def read_data_from_store(self, store, sim, error_type):
+        # {{{
+        for pair, dataset in store.overlaps_by_pair(sim, error_type).items():
+            l1dir, dset = pair.split("/", 1)
+            if l1dir not in self.filedirs:
+                self.filedirs[l1dir] = []
+            self.filedirs[l1dir].append(dset)
+            itr = self.get_iterable(l1dir=l1dir, dsetname=dset)
+            self.data[itr] = overlaps_vs_totalmass(dataset=dataset)
+        return
+        # }}}
+
+    #
+
     def read_dir(self, l1dir=None, openfile=True):
         # {{{
         if openfile:
@@ -172,7 +212,7 @@ class Overlaps:
         itr = self.get_iterable(l1dir=l1dir, dsetname=dset)
         if itr not in list(self.filekeys.keys()):
             self.filekeys[itr] = [l1dir, dset]
-        self.data[itr] = overlaps_vs_totalmass(dataset=self.fin[l1dir][dset].value)
+        self.data[itr] = overlaps_vs_totalmass(dataset=self.fin[l1dir][dset][()])
         self.keys = list(self.data.keys())
         return
         # }}}
@@ -196,8 +236,8 @@ class Overlaps:
             raise IOError("No dir name given for reading dset")
         try:
             itr = self.string_from_dir(l1dir) + "/" + self.string_from_dset(dsetname)
-        except:
-            raise "Problem with get_iterable for %s, %s"
+        except Exception:
+            raise IOError("Problem with get_iterable for %s, %s" % (l1dir, dsetname))
         self.filekeys[itr] = [l1dir, dsetname]
         return itr
         # }}}
@@ -234,6 +274,659 @@ class Overlaps:
     # }}}
 
 
+class OverlapStore:
+    """Columnar store of overlaps for many simulations and error sources.
+
+    Each row holds one (sim, error type, pair, mass, taper, overlap) value.
+    Simulation names, error types and pairs ("group/dataset" names of the
+    per-simulation overlap files) are stored once in string tables, and
+    rows refer to them by integer codes. The whole table is written to one
+    HDF5 file, as one dataset per column, so that it is read with a handful
+    of reads instead of one per tiny dataset.
+
+    Rows are kept sorted by (sim, error type, pair, taper, mass), so that
+    lookups by mass and taper are bisections, and aggregate queries over
+    simulations are vectorized numpy reductions.
+
+    Usage:
+    ------
+        store = OverlapStore("catalog_overlaps.h5")
+        store.refresh(simdirs)  # only re-reads new or changed simulations
+        store.write()
+        sims, worst, masses = store.worst_mismatch_per_simulation(taper=0)
+        counts, bins, _ = store.mismatch_histogram(error_type="ccelev")
+    """
+
+    # {{{
+
+    error_files = {
+        "ccer": "OverlapsExtractionRadii.h5",
+        "ccelev": "OverlapsLevs.h5",
+        "cceextrap": "OverlapsExtrapolated.h5",
+    }
+    string_tables = ["sims", "error_types", "pairs"]
+    code_columns = ["sim", "error_type", "pair"]
+    value_columns = ["mass", "taper", "overlap"]
+
+    def __init__(self, filename=None, verbose=False):
+        self.filename = filename
+        self.verbose = verbose
+        self.sims, self.error_types, self.pairs = [], [], []
+        self.columns = {
+            "sim": np.zeros(0, dtype=np.int32),
+            "error_type": np.zeros(0, dtype=np.int32),
+            "pair": np.zeros(0, dtype=np.int32),
+            "mass": np.zeros(0, dtype=np.float64),
+            "taper": np.zeros(0, dtype=np.int16),
+            "overlap": np.zeros(0, dtype=np.float64),
+        }
+        # Sizes and mtimes of the files each simulation was read from
+        self.signatures = {}
+        self._pending = []
+        if filename is not None and os.path.exists(filename):
+            self.read(filename)
+        else:
+            self._index()
+
+    #
+
+    def __len__(self):
+        self._flush()
+        return len(self.columns["mass"])
+
+    #
+
+    def read(self, filename=None):
+        # {{{
+        if filename is None:
+            filename = self.filename
+        with h5py.File(filename, "r") as fin:
+            grp = fin["overlaps"]
+            for table in self.string_tables:
+                setattr(
+                    self,
+                    table,
+                    [
+                        x.decode() if isinstance(x, bytes) else str(x)
+                        for x in grp[table][()]
+                    ],
+                )
+            for col in self.columns:
+                self.columns[col] = grp[col][()]
+            self.signatures = {}
+            if "signature_sims" in grp:
+                self.signatures = dict(
+                    (
+                        x.decode() if isinstance(x, bytes) else str(x),
+                        y.decode() if isinstance(y, bytes) else str(y),
+                    )
+                    for x, y in zip(grp["signature_sims"][()], grp["signatures"][()])
+                )
+        self._pending = []
+        self._index()
+        return
+        # }}}
+
+    #
+
+    def write(self, filename=None):
+        """Writes the whole table, replacing filename atomically"""
+        # {{{
+        self._flush()
+        if filename is None:
+            filename = self.filename
+        tmp_filename = filename + ".tmp"
+        with h5py.File(tmp_filename, "w") as fout:
+            grp = fout.create_group("overlaps")
+            for table in self.string_tables:
+                grp.create_dataset(
+                    table, data=np.array(getattr(self, table), dtype=h5py.string_dtype())
+                )
+            for col in self.columns:
+                grp.create_dataset(
+                    col,
+                    data=self.columns[col],
+                    chunks=True if len(self.columns[col]) else None,
+                    compression="gzip" if len(self.columns[col]) else None,
+                )
+            grp.attrs["columns"] = [str(c) for c in self.columns]
+            sig_sims = sorted(self.signatures)
+            grp.create_dataset(
+                "signature_sims", data=np.array(sig_sims, dtype=h5py.string_dtype())
+            )
+            grp.create_dataset(
+                "signatures",
+                data=np.array(
+                    [self.signatures[x] for x in sig_sims], dtype=h5py.string_dtype()
+                ),
+            )
+        os.rename(tmp_filename, filename)
+        return
+        # }}}
+
+    #
+
+    def _code(self, table, name):
+        names = getattr(self, table)
+        if not hasattr(self, "_codes"):
+            self._codes = {}
+        if table not in self._codes or len(self._codes[table]) != len(names):
+            self._codes[table] = dict((n, i) for i, n in enumerate(names))
+        if name not in self._codes[table]:
+            self._codes[table][name] = len(names)
+            names.append(name)
+        return self._codes[table][name]
+
+    #
+
+    def add_rows(self, sim, error_type, pair, masses, overlaps):
+        """
+        Adds the overlaps of one pair, as a function of total mass (rows)
+        and taper (columns), i.e. the layout of the per-simulation files.
+        """
+        # {{{
+        masses = np.asarray(masses, dtype=np.float64)
+        overlaps = np.asarray(overlaps, dtype=np.float64).reshape(len(masses), -1)
+        num_masses, num_tapers = np.shape(overlaps)
+        num = num_masses * num_tapers
+        codes = [
+            self._code("sims", sim),
+            self._code("error_types", error_type),
+            self._code("pairs", pair),
+        ]
+        rows = {
+            "sim": np.full(num, codes[0], dtype=np.int32),
+            "error_type": np.full(num, codes[1], dtype=np.int32),
+            "pair": np.full(num, codes[2], dtype=np.int32),
+            "mass": np.repeat(masses, num_tapers),
+            "taper": np.tile(np.arange(num_tapers, dtype=np.int16), num_masses),
+            "overlap": overlaps.ravel(),
+        }
+        self._pending.append(rows)
+        return
+        # }}}
+
+    #
+
+    def _flush(self):
+        """Merges rows added since the last query into the sorted table"""
+        if len(self._pending) == 0:
+            return
+        for col in self.columns:
+            self.columns[col] = np.concatenate(
+                [self.columns[col]] + [rows[col] for rows in self._pending]
+            ).astype(self.columns[col].dtype)
+        self._pending = []
+        self._index()
+
+    #
+
+    def _index(self):
+        order = np.lexsort(
+            (
+                self.columns["mass"],
+                self.columns["taper"],
+                self.columns["pair"],
+                self.columns["error_type"],
+                self.columns["sim"],
+            )
+        )
+        for col in self.columns:
+            self.columns[col] = self.columns[col][order]
+        self._group_keys = self._group_key(
+            self.columns["sim"],
+            self.columns["error_type"],
+            self.columns["pair"],
+            self.columns["taper"],
+        )
+        # Pairs of a waveform with itself, e.g. "Lev5.dir/CceR0100_CceR0100.dat"
+        self._self_pair = np.array(
+            [self.is_self_pair(pair) for pair in self.pairs], dtype=bool
+        )
+
+    #
+
+    @staticmethod
+    def pair_name(group, name1, name2):
+        """
+        "group/name1_name2.dat" name of a pair, as in the per-pair layout
+        of the per-simulation overlap files
+        """
+        return "%s/%s_%s.dat" % (group, name1, name2)
+
+    #
+
+    @staticmethod
+    def is_self_pair(pair):
+        """
+        Whether a "group/name1_name2.dat" pair compares a waveform with
+        itself. Names may themselves contain underscores, so the pair is
+        split in the middle rather than at every underscore.
+        """
+        name = pair.split("/")[-1]
+        if name.endswith(".dat"):
+            name = name[: -len(".dat")]
+        half = len(name) // 2
+        return (
+            len(name) % 2 == 1 and name[half] == "_" and name[:half] == name[half + 1 :]
+        )
+
+    #
+
+    def _group_key(self, sim, error_type, pair, taper):
+        num_err = max(len(self.error_types), 1)
+        num_pair = max(len(self.pairs), 1)
+        return (
+            (np.int64(sim) * num_err + error_type) * num_pair + pair
+        ) * 65536 + taper
+
+    #
+
+    def has_simulation(self, sim):
+        return sim in self.sims and np.any(
+            self.column("sim") == self.sims.index(sim)
+        )
+
+    #
+
+    def remove_simulation(self, sim):
+        # {{{
+        self._flush()
+        self.signatures.pop(sim, None)
+        if sim not in self.sims:
+            return
+        keep = self.columns["sim"] != self.sims.index(sim)
+        for col in self.columns:
+            self.columns[col] = self.columns[col][keep]
+        self._index()
+        return
+        # }}}
+
+    #
+
+    def add_overlaps_file(self, sim, error_type, filename):
+        """
+        Adds all overlaps in one per-simulation file. Both the per-pair
+        layout (group/name1_name2.dat datasets of [mass, overlaps...] rows)
+        and the pair x mass x taper layout of write_overlap_matrix_hdf5
+        are read.
+        """
+        # {{{
+        with h5py.File(filename, "r") as fin:
+            for group in fin:
+                grp = fin[group]
+                if "overlaps" in grp and "pairs" in grp and "masses" in grp:
+                    masses, overlaps = grp["masses"][()], grp["overlaps"][()]
+                    for idx, names in enumerate(grp["pairs"][()]):
+                        p1, p2 = [
+                            x.decode() if isinstance(x, bytes) else str(x)
+                            for x in names
+                        ]
+                        pair = self.pair_name(
+                            group, p1.replace("/", "_"), p2.replace("/", "_")
+                        )
+                        # Masses off the pair's own grid have NaN overlaps
+                        keep = ~np.all(np.isnan(overlaps[idx]), axis=-1)
+                        self.add_rows(
+                            sim, error_type, pair, masses[keep], overlaps[idx][keep]
+                        )
+                    continue
+                for dset in grp:
+                    data = grp[dset][()]
+                    self.add_rows(
+                        sim, error_type, group + "/" + dset, data[:, 0], data[:, 1:]
+                    )
+        return
+        # }}}
+
+    #
+
+    def add_simulation(self, simdir, matchdir="matches", sim=None, replace=False):
+        """
+        Adds the per-simulation overlap files of simdir/matchdir. Simulations
+        already in the store are skipped, unless replace is True.
+        """
+        # {{{
+        if sim is None:
+            sim = simdir.strip("/").split("/")[-1]
+        if self.has_simulation(sim):
+            if not replace:
+                return
+            self.remove_simulation(sim)
+        if self.verbose:
+            print("Adding overlaps of %s to store" % sim, file=sys.stderr)
+        for error_type, matchfile in self.error_files.items():
+            filename = os.path.join(simdir, matchdir, matchfile)
+            if os.path.exists(filename):
+                self.add_overlaps_file(sim, error_type, filename)
+        self.signatures[sim] = self.source_signature(simdir, matchdir=matchdir)
+        self._flush()
+        return
+        # }}}
+
+    #
+
+    def source_signature(self, simdir, matchdir="matches"):
+        """Sizes and modification times of a simulation's overlap files"""
+        parts = []
+        for error_type in sorted(self.error_files):
+            filename = os.path.join(simdir, matchdir, self.error_files[error_type])
+            if os.path.exists(filename):
+                stat = os.stat(filename)
+                parts.append(
+                    "%s:%d:%.6f" % (error_type, stat.st_size, stat.st_mtime)
+                )
+        return ";".join(parts)
+
+    #
+
+    def refresh(self, simdirs, matchdir="matches", prune=False):
+        """
+        Brings the store up to date with the overlap files of `simdirs`:
+        simulations that are new, or whose files changed since they were
+        added, are (re-)read, and all others are left alone. With `prune`,
+        simulations not in `simdirs` are removed. Returns the names of
+        simulations that were (re-)read.
+        """
+        # {{{
+        updated = []
+        names = []
+        for simdir in simdirs:
+            sim = simdir.strip("/").split("/")[-1]
+            names.append(sim)
+            signature = self.source_signature(simdir, matchdir=matchdir)
+            if self.has_simulation(sim) and self.signatures.get(sim) == signature:
+                continue
+            if not self.has_simulation(sim) and signature == "":
+                continue
+            self.add_simulation(simdir, matchdir=matchdir, sim=sim, replace=True)
+            updated.append(sim)
+        if prune:
+            for sim in list(self.sims):
+                if sim not in names and self.has_simulation(sim):
+                    self.remove_simulation(sim)
+        return updated
+        # }}}
+
+    #
+
+    def column(self, name):
+        self._flush()
+        return self.columns[name]
+
+    #
+
+    def select(
+        self,
+        sim=None,
+        error_type=None,
+        pair=None,
+        taper=None,
+        mass_min=None,
+        mass_max=None,
+        key=None,
+        noduplicate=False,
+    ):
+        """
+        Boolean mask of rows matching all given conditions. `sim`,
+        `error_type`, `pair` and `taper` can be single values or lists.
+        `key` (a string or list of strings) keeps pairs whose
+        "group/dataset" name contains all of them, as SimulationErrors does.
+        """
+        # {{{
+        self._flush()
+        mask = np.ones(len(self.columns["mass"]), dtype=bool)
+
+        def codes(table, values):
+            names = getattr(self, table)
+            if isinstance(values, str):
+                values = [values]
+            return [names.index(v) for v in values if v in names]
+
+        for table, col, values in [
+            ("sims", "sim", sim),
+            ("error_types", "error_type", error_type),
+            ("pairs", "pair", pair),
+        ]:
+            if values is not None:
+                mask &= np.isin(self.columns[col], codes(table, values))
+        if key is not None:
+            if isinstance(key, str):
+                key = [key]
+            ok = np.array(
+                [all(k in p for k in key) for p in self.pairs], dtype=bool
+            )
+            mask &= ok[self.columns["pair"]]
+        if noduplicate:
+            mask &= ~self._self_pair[self.columns["pair"]]
+        if taper is not None:
+            mask &= np.isin(self.columns["taper"], np.atleast_1d(taper))
+        if mass_min is not None:
+            mask &= self.columns["mass"] >= mass_min
+        if mass_max is not None:
+            mask &= self.columns["mass"] <= mass_max
+        return mask
+        # }}}
+
+    #
+
+    def get_overlap(self, sim, error_type, pair, mass, taper, tol=1.0e-9):
+        """Overlap of one pair at one total mass and taper, by bisection"""
+        # {{{
+        self._flush()
+        try:
+            gkey = self._group_key(
+                self.sims.index(sim),
+                self.error_types.index(error_type),
+                self.pairs.index(pair),
+                taper,
+            )
+        except ValueError:
+            raise IOError("No overlaps for %s %s %s" % (sim, error_type, pair))
+        lo = np.searchsorted(self._group_keys, gkey, side="left")
+        hi = np.searchsorted(self._group_keys, gkey, side="right")
+        masses = self.columns["mass"][lo:hi]
+        pos = np.searchsorted(masses, mass - tol)
+        if pos >= len(masses) or abs(masses[pos] - mass) > tol:
+            raise IOError("This mass value not found")
+        return self.columns["overlap"][lo + pos]
+        # }}}
+
+    #
+
+    def overlaps_by_pair(self, sim, error_type):
+        """
+        {pair: [mass, overlaps...] array} for one simulation and error
+        source, i.e. the datasets of the per-simulation file
+        """
+        # {{{
+        mask = self.select(sim=sim, error_type=error_type)
+        pair, mass = self.columns["pair"][mask], self.columns["mass"][mask]
+        taper, overlap = self.columns["taper"][mask], self.columns["overlap"][mask]
+        retval = {}
+        for code in np.unique(pair):
+            sel = pair == code
+            masses, midx = np.unique(mass[sel], return_inverse=True)
+            data = np.full((len(masses), 1 + taper[sel].max() + 1), np.nan)
+            data[:, 0] = masses
+            data[midx, 1 + taper[sel]] = overlap[sel]
+            retval[self.pairs[code]] = data
+        return retval
+        # }}}
+
+    #
+
+    def worst_mismatch_per_simulation(
+        self, error_type=None, taper=None, mass_min=None, mass_max=None, **kwargs
+    ):
+        """
+        Largest mismatch (1 - overlap) of each simulation, over all
+        selected pairs, tapers and masses (see `select` for the options).
+
+        Returns
+        -------
+        sims : names of simulations
+        mismatches : worst mismatch of each
+        masses : total mass at which it occurs
+        """
+        # {{{
+        mask = self.select(
+            error_type=error_type,
+            taper=taper,
+            mass_min=mass_min,
+            mass_max=mass_max,
+            noduplicate=kwargs.pop("noduplicate", True),
+            **kwargs
+        )
+        sim = self.columns["sim"][mask]
+        mismatch = 1.0 - self.columns["overlap"][mask]
+        mass = self.columns["mass"][mask]
+        if len(sim) == 0:
+            return [], np.zeros(0), np.zeros(0)
+        # Sort by sim, then by mismatch: the last row of each sim is its worst
+        order = np.lexsort((mismatch, sim))
+        sim, mismatch, mass = sim[order], mismatch[order], mass[order]
+        last = np.append(np.flatnonzero(np.diff(sim)), len(sim) - 1)
+        return [self.sims[i] for i in sim[last]], mismatch[last], mass[last]
+        # }}}
+
+    #
+
+    def max_mismatch_vs_mass(self, sim, error_type=None, **kwargs):
+        """
+        Largest mismatch over all selected pairs of one simulation, as a
+        function of total mass and taper. Returns an overlaps_vs_totalmass
+        object of the corresponding (smallest) overlaps, as used by
+        SimulationErrors.get_max_cce_mismatch. This has no masses or tapers
+        if nothing is selected (e.g. an unknown sim or error_type).
+        """
+        # {{{
+        mask = self.select(
+            sim=sim,
+            error_type=error_type,
+            noduplicate=kwargs.pop("noduplicate", True),
+            **kwargs
+        )
+        mass, taper = self.columns["mass"][mask], self.columns["taper"][mask]
+        overlap = self.columns["overlap"][mask]
+        if len(mass) == 0:
+            return overlaps_vs_totalmass(dataset=np.zeros((0, 1)))
+        masses, midx = np.unique(mass, return_inverse=True)
+        data = np.full((len(masses), 1 + taper.max() + 1), np.inf)
+        np.minimum.at(data, (midx, 1 + taper), overlap)
+        data[:, 0] = masses
+        data[np.isinf(data)] = np.nan
+        return overlaps_vs_totalmass(dataset=data)
+        # }}}
+
+    #
+
+    def max_mismatch_per_pair(
+        self, error_type=None, taper=None, mass_min=None, mass_max=None, **kwargs
+    ):
+        """
+        Largest mismatch over total mass, of every selected (simulation,
+        pair, taper), e.g. of each Lev pair at each CCE radius. See `select`
+        for the options.
+
+        Returns
+        -------
+        dict of arrays, one entry each:
+            sim, error_type, pair (names), group (pair's "group" part, i.e.
+            its Lev or radius), taper, mismatch, mass (where it is largest)
+        """
+        # {{{
+        mask = self.select(
+            error_type=error_type,
+            taper=taper,
+            mass_min=mass_min,
+            mass_max=mass_max,
+            noduplicate=kwargs.pop("noduplicate", True),
+            **kwargs
+        )
+        keys = self._group_keys[mask]
+        mismatch = 1.0 - self.columns["overlap"][mask]
+        # Sort by group, then by mismatch: the last row of each is its worst
+        order = np.lexsort((mismatch, keys))
+        keys = keys[order]
+        last = np.append(np.flatnonzero(np.diff(keys)), len(keys) - 1)
+        rows = np.flatnonzero(mask)[order][last[last >= 0]]
+        pairs = np.array(self.pairs, dtype=object)[self.columns["pair"][rows]]
+        return {
+            "sim": np.array(self.sims, dtype=object)[self.columns["sim"][rows]],
+            "error_type": np.array(self.error_types, dtype=object)[
+                self.columns["error_type"][rows]
+            ],
+            "pair": pairs,
+            "group": np.array([p.split("/")[0] for p in pairs], dtype=object),
+            "taper": self.columns["taper"][rows],
+            "mismatch": 1.0 - self.columns["overlap"][rows],
+            "mass": self.columns["mass"][rows],
+        }
+        # }}}
+
+    #
+
+    def max_mismatch_vs_mass_per_simulation(self, error_type=None, **kwargs):
+        """
+        Largest mismatch over all selected pairs and tapers, as a function
+        of total mass, for every simulation at once.
+        Returns {sim: (masses, mismatches)}.
+        """
+        # {{{
+        mask = self.select(
+            error_type=error_type,
+            noduplicate=kwargs.pop("noduplicate", True),
+            **kwargs
+        )
+        sim, mass = self.columns["sim"][mask], self.columns["mass"][mask]
+        mismatch = 1.0 - self.columns["overlap"][mask]
+        if len(sim) == 0:
+            return {}
+        order = np.lexsort((mismatch, mass, sim))
+        sim, mass, mismatch = sim[order], mass[order], mismatch[order]
+        last = np.flatnonzero(
+            np.append((np.diff(sim) != 0) | (np.diff(mass) != 0), True)
+        )
+        sim, mass, mismatch = sim[last], mass[last], mismatch[last]
+        starts = np.flatnonzero(np.append(True, np.diff(sim) != 0))
+        return dict(
+            (self.sims[sim[i0]], (m, mm))
+            for i0, m, mm in zip(
+                starts, np.split(mass, starts[1:]), np.split(mismatch, starts[1:])
+            )
+        )
+        # }}}
+
+    #
+
+    def mismatch_histogram(self, error_type=None, bins=None, per="simulation", **kwargs):
+        """
+        Histogram of largest mismatches, taken per simulation (`per` =
+        "simulation") or per (simulation, pair, taper) (`per` = "pair").
+        Default bins are 30 logarithmic bins between 1e-6 and 1.
+        Returns counts, bin edges, and the mismatch values.
+        """
+        # {{{
+        if bins is None:
+            bins = np.logspace(-6, 0, 31)
+        if per == "simulation":
+            _, values, _ = self.worst_mismatch_per_simulation(
+                error_type=error_type, **kwargs
+            )
+        elif per == "pair":
+            values = self.max_mismatch_per_pair(error_type=error_type, **kwargs)[
+                "mismatch"
+            ]
+        else:
+            raise IOError("Histograms can be per simulation or per pair, not %s" % per)
+        counts, bins = np.histogram(values, bins=bins)
+        return counts, bins, values
+        # }}}
+
+    # }}}
+
+
 # Classes to manipulate overlap data for one simulation
 class SimulationErrors:
     """Abstract the details of different error sources for each sim here
@@ -249,16 +942,32 @@ class SimulationErrors:
 
     # {{{
 
-    def __init__(self, simdir=None, matchdirs=["matches"], verbose=True, debug=False):
+    def __init__(
+        self, simdir=None, matchdirs=["matches"], verbose=True, debug=False, store=None
+    ):
+        """
+        If an OverlapStore is given, overlaps are read from it (and added to
+        it first if this simulation is not in it yet), instead of from the
+        per-simulation files.
+        """
         # {{{
         self.verbose = verbose
         self.debug = debug
         self.simdir = simdir
         self.matchdirs = matchdirs
+        self.store = store
+        self.simtag = self.simdir.strip("/").split("/")[-1]
+        if store is not None and store.has_simulation(self.simtag):
+            self.read_all_overlaps(matchdir=self.matchdirs[-1])
+            return
         if len(self.matchdirs):
             for d in self.matchdirs:
                 if not os.path.exists(self.simdir + "/" + d):
                     raise IOError("Match directories do not exist for %s" % self.simdir)
+        if store is not None:
+            store.add_simulation(self.simdir, matchdir=self.matchdirs[-1])
+            self.read_all_overlaps(matchdir=self.matchdirs[-1])
+            return
         for d in self.matchdirs:
             self.read_all_overlaps(matchdir=d)
         # }}}
@@ -272,6 +981,12 @@ class SimulationErrors:
                 matchdir = self.matchdirs[0]
         except IndexError:
             return
+        if self.store is not None:
+            # No files to open
+            self.read_ccer_overlaps(matchdir=matchdir)
+            self.read_ccelev_overlaps(matchdir=matchdir)
+            self.read_cceextrap_overlaps(matchdir=matchdir)
+            return
         pwd = cmd.getoutput("pwd")
         os.chdir(self.simdir)
         # Read in the matches
@@ -296,6 +1011,9 @@ class SimulationErrors:
             outdir=self.simdir + "/" + matchdir,
             verbose=self.verbose,
             debug=self.debug,
+            store=self.store,
+            sim=self.simtag,
+            error_type="ccer",
         )
         self.ccer_dirnames = list(self.ccer_overlaps.filedirs.keys())
         self.ccer_dsetnames = {}
@@ -318,6 +1036,9 @@ class SimulationErrors:
             outdir=self.simdir + "/" + matchdir,
             verbose=self.verbose,
             debug=self.debug,
+            store=self.store,
+            sim=self.simtag,
+            error_type="ccelev",
         )
         self.ccelev_dirnames = list(self.ccelev_overlaps.filedirs.keys())
         self.ccelev_dsetnames = {}
@@ -342,6 +1063,9 @@ class SimulationErrors:
             outdir=self.simdir + "/" + matchdir,
             verbose=self.verbose,
             debug=self.debug,
+            store=self.store,
+            sim=self.simtag,
+            error_type="cceextrap",
         )
         #
         self.cceextrap_dirnames = list(self.cceextrap_overlaps.filedirs.keys())
@@ -536,7 +1260,7 @@ class SimulationErrors:
                 max_min_mtotal = max(max_min_mtotal, olap.M[0])
                 min_masses = olap.X()
         num_taper_windows = olap.nWindows
-        max_overlaps = np.ones(len(min_masses), 1 + num_taper_windows) * -1.0
+        max_overlaps = np.ones((len(min_masses), 1 + num_taper_windows)) * -1.0
         for taperid in range(num_taper_windows):
             for mid, mass in enumerate(min_masses):
                 olaps = [
@@ -564,6 +1288,8 @@ class EffectualnessAndBias:
         self.verbose = verbose
         self.outdir = outdir
         self.data = {}
+        # Reductions of self.data, computed once per (sim, approx)
+        self._reductions = {}
         # }}}
 
     #
@@ -574,6 +1300,7 @@ class EffectualnessAndBias:
         as before when reading from different files
         """
         # {{{
+        self._reductions = {}
         if self.verbose:
             print("Reading ", filename, file=sys.stderr)
         f = h5py.File(os.path.join(self.outdir, filename), "r")
@@ -600,7 +1327,7 @@ class EffectualnessAndBias:
                 approx = str(approx)
                 if approx not in list(self.data[sim].keys()):
                     self.data[sim][approx] = {}
-                data = simdata[approx].value
+                data = simdata[approx][()]
                 for (
                     mtot,
                     nr_q,
@@ -648,6 +1375,7 @@ class EffectualnessAndBias:
         read, and nothing else is.
         """
         # {{{
+        self._reductions = {}
         if self.verbose:
             print("Reading ", filename, file=sys.stderr)
         num_of_aux_cols, num_of_data_cols = 10, 9
@@ -680,52 +1408,39 @@ class EffectualnessAndBias:
                 approx = str(approx)
                 if approx not in list(self.data[sim].keys()):
                     self.data[sim][approx] = {}
-                data = simdata[approx].value
-                rowidx = 0
-                for row in data:
-                    # print "\n\n RowID = ", rowidx
-                    rowidx += 1
-                    for midx in np.arange(num_of_aux_cols, len(row), 2):
-                        mtot = np.round(row[midx] * 100.0) / 100.0
-                        olap = row[midx + 1]
-                        if mtot < 0 or olap < 0:
-                            continue
-                        tmp_mc, tmp_et, tmp_s1, tmp_s2 = row[5:9]
-                        sig_et, sig_s1, sig_s2 = row[1:4]
-                        out_row = np.array(
-                            [
-                                mtot,
-                                sig_et,
-                                sig_s1,
-                                sig_s2,
-                                tmp_mc,
-                                tmp_et,
-                                tmp_s1,
-                                tmp_s2,
-                                olap,
-                            ]
+                data = simdata[approx][()]
+                if len(np.shape(data)) == 1:
+                    data = data.reshape(1, -1)
+                # Columns after the aux ones alternate between total mass
+                # and overlap. Unused slots are negative.
+                mtot = np.round(data[:, num_of_aux_cols::2] * 100.0) / 100.0
+                olap = data[:, num_of_aux_cols + 1 :: 2]
+                mtot = mtot[:, : np.shape(olap)[1]]
+                valid = (mtot >= 0) & (olap >= 0)
+                rowidx = np.nonzero(valid)[0]
+                out_rows = np.column_stack(
+                    [
+                        mtot[valid],
+                        data[rowidx, 1:4],  # sig_et, sig_s1, sig_s2
+                        data[rowidx, 5:9],  # tmp_mc, tmp_et, tmp_s1, tmp_s2
+                        olap[valid],
+                    ]
+                )
+                # Group rows by total mass, keeping the order they were read in
+                out_rows = out_rows[np.argsort(out_rows[:, 0], kind="stable")]
+                masses, starts = np.unique(out_rows[:, 0], return_index=True)
+                for mtot, rows in zip(masses, np.split(out_rows, starts[1:])):
+                    if mtot in self.data[sim][approx]:
+                        rows = np.append(
+                            np.atleast_2d(self.data[sim][approx][mtot]), rows, axis=0
                         )
-                        #
-                        if mtot not in list(self.data[sim][approx].keys()):
-                            self.data[sim][approx][mtot] = out_row
-                        else:
-                            try:
-                                nr, nc = np.shape(self.data[sim][approx][mtot])
-                                self.data[sim][approx][mtot] = np.append(
-                                    self.data[sim][approx][mtot], [out_row], axis=0
-                                )
-                            except:
-                                self.data[sim][approx][mtot] = np.append(
-                                    [self.data[sim][approx][mtot]], [out_row], axis=0
-                                )
+                    self.data[sim][approx][mtot] = rows
                 # Keep only the point with the maximum overlap
                 if not keepalldata:
                     for mtot in list(self.data[sim][approx].keys()):
                         tmp_data = self.data[sim][approx][mtot]
-                        max_idx = np.where(tmp_data[:, -1] == max(tmp_data[:, -1]))[0][
-                            0
-                        ]
-                        self.data[sim][approx][mtot] = np.array([tmp_data[max_idx, :]])
+                        max_idx = np.argmax(tmp_data[:, -1])
+                        self.data[sim][approx][mtot] = tmp_data[max_idx : max_idx + 1]
             #
         f.close()
         return
@@ -733,90 +1448,113 @@ class EffectualnessAndBias:
 
     #
 
-    def effectualness_vs_totalmass(self, inkey=None, approx=None):
+    def write_cache(self, filename, signature=""):
+        """Writes all data read so far to an HDF5 file, to be read back with
+        `read_cache`. `signature` identifies the inputs it was read from.
+        Rows for all total masses of a (sim, approx) pair are stacked in one
+        dataset, as the total mass is their first column.
+        """
         # {{{
+        tmp_filename = filename + ".tmp"
+        with h5py.File(tmp_filename, "w") as fout:
+            fout.attrs["signature"] = signature
+            for sim in self.data:
+                grp = fout.create_group(sim)
+                for approx in self.data[sim]:
+                    tables = self.data[sim][approx]
+                    grp.create_dataset(
+                        approx,
+                        data=np.vstack(
+                            [np.atleast_2d(tables[mm]) for mm in tables]
+                        ).astype(np.float64),
+                    )
+        os.rename(tmp_filename, filename)
+        # }}}
+
+    def read_cache(self, filename, signature=""):
+        """Reads data written by `write_cache`, if `filename` exists and was
+        written with the same `signature`. Returns True if it was read."""
+        # {{{
+        if not os.path.exists(filename):
+            return False
+        with h5py.File(filename, "r") as fin:
+            if fin.attrs.get("signature", "") != signature:
+                return False
+            if self.verbose:
+                print("Reading cached data from ", filename, file=sys.stderr)
+            self.data = {}
+            self._reductions = {}
+            for sim in fin:
+                self.data[str(sim)] = {}
+                for approx in fin[sim]:
+                    rows = fin[sim][approx][()]
+                    rows = rows[np.argsort(rows[:, 0], kind="stable")]
+                    masses, starts = np.unique(rows[:, 0], return_index=True)
+                    self.data[str(sim)][str(approx)] = dict(
+                        zip(masses, np.split(rows, starts[1:]))
+                    )
+        return True
+        # }}}
+
+    #
+
+    def _find_approx(self, inkey, approx):
+        """Name of the approximant stored for `inkey` that matches `approx`"""
         for kk in list(self.data.keys()):
             if inkey in kk:
                 break
         for app in list(self.data[kk].keys()):
             if approx in app:
                 break
-        masses = np.array(list(self.data[inkey][app].keys()))
-        masses.sort()
-        ff = np.array([max(self.data[inkey][app][mm][:, -1]) for mm in masses])
-        return masses, ff
+        return app
+
+    def best_match_table(self, inkey=None, approx=None):
+        """
+        For simulation `inkey` and approximant `approx`, returns the sorted
+        total masses, and for each of them the row with maximum overlap
+        (columns: mtot, nr_et, nr_s1, nr_s2, sig_mc, sig_et, sig_s1, sig_s2,
+        overlap). Also returns the NR (eta, spin1z, spin2z), which are fixed
+        for a simulation. Computed once and cached.
+        """
+        # {{{
+        app = self._find_approx(inkey, approx)
+        key = ("best", inkey, app)
+        if key not in self._reductions:
+            tables = self.data[inkey][app]
+            masses = np.array(list(tables.keys()))
+            masses.sort()
+            rows = np.array(
+                [
+                    tbl[np.argmax(tbl[:, -1])]
+                    for tbl in (np.atleast_2d(tables[mm]) for mm in masses)
+                ]
+            )
+            nr_params = np.atleast_2d(tables[masses[-1]])[0, 1:4]
+            self._reductions[key] = (masses, rows, nr_params)
+        return self._reductions[key]
+        # }}}
+
+    #
+
+    def effectualness_vs_totalmass(self, inkey=None, approx=None):
+        # {{{
+        masses, rows, _ = self.best_match_table(inkey=inkey, approx=approx)
+        return masses.copy(), rows[:, -1].copy()
         # }}}
 
     #
 
     def best_match_parameters(self, inkey=None, approx=None):
         # {{{
-        for kk in list(self.data.keys()):
-            if inkey in kk:
-                break
-        for app in list(self.data[kk].keys()):
-            if approx in app:
-                break
-        masses = np.array(list(self.data[inkey][app].keys()))
-        masses.sort()
-        ff = np.array([max(self.data[inkey][app][mm][:, -1]) for mm in masses])
-        sig_mc = np.array(
-            [
-                self.data[inkey][app][mm][
-                    np.where(
-                        self.data[inkey][app][mm][:, -1]
-                        == max(self.data[inkey][app][mm][:, -1])
-                    )[0][0],
-                    -5,
-                ]
-                for mm in masses
-            ]
-        )
-        sig_et = np.array(
-            [
-                self.data[inkey][app][mm][
-                    np.where(
-                        self.data[inkey][app][mm][:, -1]
-                        == max(self.data[inkey][app][mm][:, -1])
-                    )[0][0],
-                    -4,
-                ]
-                for mm in masses
-            ]
-        )
-        sig_s1 = np.array(
-            [
-                self.data[inkey][app][mm][
-                    np.where(
-                        self.data[inkey][app][mm][:, -1]
-                        == max(self.data[inkey][app][mm][:, -1])
-                    )[0][0],
-                    -3,
-                ]
-                for mm in masses
-            ]
-        )
-        sig_s2 = np.array(
-            [
-                self.data[inkey][app][mm][
-                    np.where(
-                        self.data[inkey][app][mm][:, -1]
-                        == max(self.data[inkey][app][mm][:, -1])
-                    )[0][0],
-                    -2,
-                ]
-                for mm in masses
-            ]
-        )
+        masses, rows, nr_params = self.best_match_table(inkey=inkey, approx=approx)
+        ff = rows[:, -1].copy()
+        sig_mc, sig_et, sig_s1, sig_s2 = [rows[:, c].copy() for c in range(-5, -1)]
         # NR parameters are fixed for a simulation, so they dont need to be
         # accumulated
-        nr_et = self.data[inkey][app][mm][0, 1]
-        nr_q = (1.0 + (1.0 - 4.0 * nr_et) ** 0.5 - 2.0 * nr_et) / (2.0 * nr_et)
-        nr_q = np.ones(len(ff)) * nr_q  # Its constant
-        nr_et = np.ones(len(ff)) * nr_et
+        nr_et = np.ones(len(ff)) * nr_params[0]
         nr_mc = masses * nr_et**0.6
-        nr_s1 = np.ones(len(ff)) * self.data[inkey][app][mm][0, 2]  # Its constant
-        nr_s2 = np.ones(len(ff)) * self.data[inkey][app][mm][0, 3]  # Its constant
+        nr_s1 = np.ones(len(ff)) * nr_params[1]  # Its constant
+        nr_s2 = np.ones(len(ff)) * nr_params[2]  # Its constant
         #
         return ff, nr_mc, nr_et, nr_s1, nr_s2, sig_mc, sig_et, sig_s1, sig_s2
         # }}}
@@ -836,93 +1574,50 @@ class EffectualnessAndBias:
         - spin2, but
         the following input flags alter this :
         - total_mass = true ==> instead of chirp mass, total mass diffs're returned
+
+        Results are cached for each set of inputs.
         """
+        # {{{
+        key = ("biases", inkey, self._find_approx(inkey, approx), chieff, total_mass)
+        if key not in self._reductions:
+            self._reductions[key] = self._parameterbiases_vs_parameters(
+                inkey=inkey, approx=approx, chieff=chieff, total_mass=total_mass
+            )
+        # Copies, so that callers may modify them
+        return tuple(np.array(a) for a in self._reductions[key])
+        # }}}
+
+    def _parameterbiases_vs_parameters(
+        self, inkey=None, approx=None, chieff=False, total_mass=False
+    ):
         # {{{
         if chieff:
             from pycbc import pnutils
-        else:
+        elif self.verbose:
             print("Not using effective spin", file=sys.stdout)
-        for kk in list(self.data.keys()):
-            if inkey in kk:
-                break
-        for app in list(self.data[kk].keys()):
-            if approx in app:
-                break
-        masses = np.array(list(self.data[inkey][app].keys()))
-        masses.sort()
-        ff = np.array([max(self.data[inkey][app][mm][:, -1]) for mm in masses])
-        sig_mc = np.array(
-            [
-                self.data[inkey][app][mm][
-                    np.where(
-                        self.data[inkey][app][mm][:, -1]
-                        == max(self.data[inkey][app][mm][:, -1])
-                    )[0][0],
-                    -5,
-                ]
-                for mm in masses
-            ]
-        )
-        sig_et = np.array(
-            [
-                self.data[inkey][app][mm][
-                    np.where(
-                        self.data[inkey][app][mm][:, -1]
-                        == max(self.data[inkey][app][mm][:, -1])
-                    )[0][0],
-                    -4,
-                ]
-                for mm in masses
-            ]
-        )
+        masses, rows, nr_params = self.best_match_table(inkey=inkey, approx=approx)
+        ff = rows[:, -1]
+        sig_mc, sig_et, sig_s1, sig_s2 = [rows[:, c] for c in range(-5, -1)]
         if chieff:
             sig_m1, sig_m2 = pnutils.mchirp_eta_to_mass1_mass2(sig_mc, sig_et)
         if total_mass:
             sig_mt = sig_mc * sig_et**-0.6
-        sig_s1 = np.array(
-            [
-                self.data[inkey][app][mm][
-                    np.where(
-                        self.data[inkey][app][mm][:, -1]
-                        == max(self.data[inkey][app][mm][:, -1])
-                    )[0][0],
-                    -3,
-                ]
-                for mm in masses
-            ]
-        )
-        sig_s2 = np.array(
-            [
-                self.data[inkey][app][mm][
-                    np.where(
-                        self.data[inkey][app][mm][:, -1]
-                        == max(self.data[inkey][app][mm][:, -1])
-                    )[0][0],
-                    -2,
-                ]
-                for mm in masses
-            ]
-        )
         # NR parameters are fixed for a simulation, so they dont need to be
         # accumulated
-        nr_et = self.data[inkey][app][mm][0, 1]
+        nr_et = nr_params[0]
         nr_q = (1.0 + (1.0 - 4.0 * nr_et) ** 0.5 - 2.0 * nr_et) / (2.0 * nr_et)
         nr_q = np.ones(len(ff)) * nr_q  # Its constant
         nr_et = np.ones(len(ff)) * nr_et
         nr_mc = masses * nr_et**0.6
         if chieff:
             nr_m1, nr_m2 = pnutils.mchirp_eta_to_mass1_mass2(nr_mc, nr_et)
-        nr_s1 = np.ones(len(ff)) * self.data[inkey][app][mm][0, 2]  # Its constant
-        nr_s2 = np.ones(len(ff)) * self.data[inkey][app][mm][0, 3]  # Its constant
+        nr_s1 = np.ones(len(ff)) * nr_params[1]  # Its constant
+        nr_s2 = np.ones(len(ff)) * nr_params[2]  # Its constant
         #
         if chieff:
             # Compute PN effective spins
-            # nr_seff = spins_to_PNeffective_spin(nr_m1, nr_m2, nr_s1, nr_s2)
-            # sig_seff= spins_to_PNeffective_spin(sig_m1, sig_m2, sig_s1, sig_s2)
             nr_seff = spins_to_massweighted_spin(nr_m1, nr_m2, nr_s1, nr_s2)
             sig_seff = spins_to_massweighted_spin(sig_m1, sig_m2, sig_s1, sig_s2)
-        # mc_diff = (nr_mc-sig_mc)/nr_mc
-        # eta_diff = (nr_et-sig_et)/nr_et
         #
         # NB: here 'mc_diff' really can contain either mchirp or mtotal differences,
         # please do not pay attention to the nomenclature 'mc'
@@ -939,23 +1634,14 @@ class EffectualnessAndBias:
                 s1_diff = sig_s1 - nr_s1  # nr_s1-sig_s1
             s2_diff = sig_s2 - nr_s2  # nr_s2-sig_s2
         else:
-            s1_diff, s2_diff = np.zeros(len(nr_s1)), np.zeros(len(nr_s2))
-            s11d, s12d = (
-                sig_s1 - nr_s1,
-                sig_s2 - nr_s1,
-            )  # nr_s1 - sig_s1, nr_s1 - sig_s2
-            s21d, s22d = (
-                sig_s1 - nr_s2,
-                sig_s2 - nr_s2,
-            )  # nr_s2 - sig_s1, nr_s2 - sig_s2
+            # Match each template spin to the closest NR spin
+            s11d, s12d = sig_s1 - nr_s1, sig_s2 - nr_s1
+            s21d, s22d = sig_s1 - nr_s2, sig_s2 - nr_s2
             s1122rms = (s11d**2 + s22d**2) ** 0.5
             s1221rms = (s12d**2 + s21d**2) ** 0.5
             mask = s1122rms < s1221rms
-            s1_diff[mask] = s11d[mask]
-            s2_diff[mask] = s22d[mask]
-            mask = s1122rms >= s1221rms
-            s1_diff[mask] = s12d[mask]
-            s2_diff[mask] = s21d[mask]
+            s1_diff = np.where(mask, s11d, s12d)
+            s2_diff = np.where(mask, s22d, s21d)
             if chieff:
                 s1_diff = sig_seff - nr_seff
         return masses, nr_q, nr_s1, nr_s2, mc_diff, eta_diff, s1_diff, s2_diff, ff
@@ -965,21 +1651,14 @@ class EffectualnessAndBias:
 
     def effectualness_vs_parameters(self, inkey=None, approx=None):
         # {{{
-        for kk in list(self.data.keys()):
-            if inkey in kk:
-                break
-        for app in list(self.data[kk].keys()):
-            if approx in app:
-                break
-        masses = np.array(list(self.data[inkey][app].keys()))
-        masses.sort()
-        ff = np.array([max(self.data[inkey][app][mm][:, -1]) for mm in masses])
-        nr_et = self.data[inkey][app][mm][0, 1]
+        masses, rows, nr_params = self.best_match_table(inkey=inkey, approx=approx)
+        ff = rows[:, -1].copy()
+        nr_et = nr_params[0]
         nr_q = (1.0 + (1.0 - 4.0 * nr_et) ** 0.5 - 2.0 * nr_et) / (2.0 * nr_et)
         nr_q = np.ones(len(ff)) * nr_q  # Its constant
-        nr_s1 = np.ones(len(ff)) * self.data[inkey][app][mm][0, 2]  # Its constant
-        nr_s2 = np.ones(len(ff)) * self.data[inkey][app][mm][0, 3]  # Its constant
-        return masses, nr_q, nr_s1, nr_s2, ff
+        nr_s1 = np.ones(len(ff)) * nr_params[1]  # Its constant
+        nr_s2 = np.ones(len(ff)) * nr_params[2]  # Its constant
+        return masses.copy(), nr_q, nr_s1, nr_s2, ff
         # }}}
 
     # }}}
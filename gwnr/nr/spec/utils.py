@@ -27,6 +27,8 @@ import h5py
 import glob
 import numpy as np
 import re
+from itertools import islice
+from multiprocessing import Pool
 from gwnr.utils import find_nearest
 
 verbose = False
@@ -139,16 +141,244 @@ def ParseHeaderForSpECTabularOutputASCII(
     # }}}
 
 
-def ReadH5DatasetWithLegend(tdset, downsample_by=1):
+def ReadH5DatasetWithLegend(tdset, downsample_by=1, columns=None, tmin=None, tmax=None):
+    """
+    Reads a SpEC HDF5 dataset into a dictionary of its columns, keyed by
+    the dataset's "Legend" attribute. The dataset is read from disk once,
+    and only the rows with tmin <= time (first column) <= tmax.
+
+    columns: list of legend entries to return. Default: all
+    """
+    legend = list(tdset.attrs["Legend"])
+    values = ReadH5DatasetColumns(tdset, tmin=tmin, tmax=tmax)
+    if columns is None:
+        columns = legend
     retval = {}
-    for idx, leg in enumerate(tdset.attrs["Legend"]):
-        if len(tdset.value[:, idx]) < downsample_by:
-            retval[leg] = tdset.value[0, idx]
+    for leg in columns:
+        idx = legend.index(leg)
+        if len(values[:, idx]) < downsample_by:
+            retval[leg] = values[0, idx]
         else:
-            retval[leg] = tdset.value[::downsample_by, idx]
+            retval[leg] = values[::downsample_by, idx]
     return retval
 
 
+def GetSpECTabularRowRange(times, tmin=None, tmax=None):
+    """
+    Returns (start, end) indices of the smallest contiguous range of rows
+    that contains all times with tmin <= time <= tmax.
+    """
+    mask = np.ones(len(times), dtype=bool)
+    if tmin is not None:
+        mask &= times >= tmin
+    if tmax is not None:
+        mask &= times <= tmax
+    idx = np.flatnonzero(mask)
+    if len(idx) == 0:
+        return 0, 0
+    return idx[0], idx[-1] + 1
+
+
+def SelectSpECTabularRows(data, tmin=None, tmax=None):
+    """Rows of 2D data with tmin <= data[:, 0] <= tmax"""
+    if tmin is None and tmax is None:
+        return data
+    mask = np.ones(len(data), dtype=bool)
+    if tmin is not None:
+        mask &= data[:, 0] >= tmin
+    if tmax is not None:
+        mask &= data[:, 0] <= tmax
+    return data[mask]
+
+
+def ReadH5DatasetColumns(tdset, usecols=None, tmin=None, tmax=None):
+    """
+    Reads a 2D SpEC HDF5 dataset (time in first column) as one array.
+
+    If a time range is given, only the time column and the block of rows
+    covering that range are read from disk. The requested columns are
+    sliced from that single read, instead of reading the dataset once per
+    column.
+    """
+    # {{{
+    if len(tdset.shape) == 1:
+        values = tdset[()].reshape(1, -1)
+        values = SelectSpECTabularRows(values, tmin=tmin, tmax=tmax)
+    elif tmin is None and tmax is None:
+        values = tdset[()]
+    else:
+        start, end = GetSpECTabularRowRange(tdset[:, 0], tmin=tmin, tmax=tmax)
+        values = SelectSpECTabularRows(tdset[start:end], tmin=tmin, tmax=tmax)
+    if usecols is not None:
+        values = values[:, usecols]
+    return values
+    # }}}
+
+
+def IterateSpECTabularASCIIChunks(
+    filename, usecols=None, chunk_rows=100000, tmin=None, tmax=None
+):
+    """
+    Reads a SpEC ASCII (.dat) file in chunks of at most `chunk_rows` rows,
+    so that memory use is bounded by the chunk size and not the file size.
+    Yields 2D float64 arrays, keeping only rows with
+    tmin <= time (first column) <= tmax, and the columns `usecols`.
+    """
+    # {{{
+    with open(filename, "r") as fp:
+        while True:
+            raw_lines = list(islice(fp, chunk_rows))
+            if len(raw_lines) == 0:
+                break
+            lines = [l for l in raw_lines if l.strip() and l.lstrip()[0] != "#"]
+            if len(lines) == 0:
+                # A chunk of only comments
+                continue
+            chunk = np.loadtxt(lines, dtype=np.float64, ndmin=2)
+            chunk = SelectSpECTabularRows(chunk, tmin=tmin, tmax=tmax)
+            if usecols is not None:
+                chunk = chunk[:, usecols]
+            yield chunk
+    # }}}
+
+
+def GetSpECTabularCacheFilename(filename):
+    """
+    Name of the binary (column-major .npy) copy of a SpEC ASCII file,
+    placed next to it as .<file name>.npy
+    """
+    dirname, basename = os.path.split(os.path.abspath(filename))
+    return os.path.join(dirname, "." + basename + ".npy")
+
+
+def WriteSpECTabularCache(filename, cache_file, chunk_rows=100000):
+    """
+    Converts a SpEC ASCII file into a column-major .npy file, chunk by
+    chunk. Returns a read-only memory map of the cached array.
+    """
+    # {{{
+    num_rows, num_cols = 0, None
+    with open(filename, "r") as fp:
+        for line in fp:
+            line = line.strip()
+            if len(line) == 0 or line[0] == "#":
+                continue
+            if num_cols is None:
+                num_cols = len(line.split())
+            num_rows += 1
+    if num_cols is None:
+        num_cols = 0
+    #
+    tmp_file = cache_file + ".tmp.npy"
+    cache = np.lib.format.open_memmap(
+        tmp_file,
+        mode="w+",
+        dtype=np.float64,
+        shape=(num_rows, num_cols),
+        fortran_order=True,
+    )
+    row = 0
+    for chunk in IterateSpECTabularASCIIChunks(filename, chunk_rows=chunk_rows):
+        cache[row : row + len(chunk)] = chunk
+        row += len(chunk)
+    cache.flush()
+    if row < num_rows:
+        # Fewer rows parsed than counted: keep only those
+        trimmed_file = cache_file + ".trim.npy"
+        trimmed = np.lib.format.open_memmap(
+            trimmed_file,
+            mode="w+",
+            dtype=np.float64,
+            shape=(row, num_cols),
+            fortran_order=True,
+        )
+        trimmed[:] = cache[:row]
+        trimmed.flush()
+        del trimmed, cache
+        os.rename(trimmed_file, cache_file)
+        os.remove(tmp_file)
+    else:
+        del cache
+        os.rename(tmp_file, cache_file)
+    return np.load(cache_file, mmap_mode="r")
+    # }}}
+
+
+def ReadSpECTabularFile(
+    filename,
+    usecols=None,
+    tmin=None,
+    tmax=None,
+    chunk_rows=100000,
+    cache=False,
+    verbose=False,
+):
+    """
+    Reads one SpEC ASCII (.dat) file into a 2D array, with time in the
+    first column.
+
+    Inputs:
+    -------
+    usecols   : list of column indices to return. Default: all
+    tmin, tmax: only return rows with tmin <= time <= tmax
+    chunk_rows: number of rows parsed at a time
+    cache     : if True, keep a binary column-major copy of the file next to
+                it (see GetSpECTabularCacheFilename), and read from that
+                copy for as long as it is newer than the ASCII file. Only
+                the requested columns of the copy are then touched.
+
+    Returns:
+    --------
+    2D numpy array (rows x columns)
+    """
+    # {{{
+    if not os.path.exists(filename):
+        raise IOError("%s does not exist" % filename)
+    if cache:
+        cache_file = GetSpECTabularCacheFilename(filename)
+        data = None
+        if os.path.exists(cache_file) and os.path.getmtime(
+            cache_file
+        ) >= os.path.getmtime(filename):
+            if verbose:
+                print("Reading cached %s" % cache_file)
+            data = np.load(cache_file, mmap_mode="r")
+        else:
+            try:
+                if verbose:
+                    print("Caching %s to %s" % (filename, cache_file))
+                data = WriteSpECTabularCache(
+                    filename, cache_file, chunk_rows=chunk_rows
+                )
+            except (IOError, OSError) as exc:
+                # e.g. a read-only run directory
+                if verbose:
+                    print("Could not cache %s: %s" % (filename, exc))
+        if data is not None:
+            if len(data) == 0 or data.shape[1] == 0:
+                return np.zeros((0, 0 if usecols is None else len(usecols)))
+            times = np.array(data[:, 0])
+            start, end = GetSpECTabularRowRange(times, tmin=tmin, tmax=tmax)
+            mask = np.ones(end - start, dtype=bool)
+            if tmin is not None:
+                mask &= times[start:end] >= tmin
+            if tmax is not None:
+                mask &= times[start:end] <= tmax
+            if usecols is None:
+                return np.array(data[start:end])[mask]
+            return np.array(data[start:end, usecols])[mask]
+    #
+    chunks = list(
+        IterateSpECTabularASCIIChunks(
+            filename, usecols=usecols, chunk_rows=chunk_rows, tmin=tmin, tmax=tmax
+        )
+    )
+    if len(chunks) == 0:
+        return np.zeros((0, 0 if usecols is None else len(usecols)))
+    return np.concatenate(chunks, axis=0)
+    # }}}
+
+
 def GetSegmentDirectories(
     DIR, LEV, use_non_standard_segments=False, non_standard_prefix="./", verbose=False
 ):
@@ -275,6 +505,11 @@ def ReadSpECTabularOutputFromASCII(
     FILE,
     use_non_standard_segments=False,
     non_standard_prefix="./",
+    usecols=None,
+    tmin=None,
+    tmax=None,
+    chunk_rows=100000,
+    cache=False,
     verbose=False,
     debug=False,
 ):
@@ -282,6 +517,11 @@ def ReadSpECTabularOutputFromASCII(
     Read in SpEC's .dat or .txt (ASCII) output files from all available
     segments and combine them. Provide file name with respect to Lev?_??/
     directory. Returns combined data in a numpy.array.
+
+    Each file is parsed in chunks of `chunk_rows` rows. Only columns
+    `usecols` and rows with tmin <= time <= tmax are kept. With
+    cache=True, a binary copy of each file is kept next to it and reused
+    until the file changes (see ReadSpECTabularFile).
     """
     # {{{
     if not os.path.exists(DIR):
@@ -295,14 +535,8 @@ def ReadSpECTabularOutputFromASCII(
         verbose=verbose,
     )
     #
-    MAX_NROW = 20000
-    MAX_NROW_DELTA = 10000
-    MAX_NCOL = 200
-    data = np.zeros([MAX_NROW, MAX_NCOL])
-    NROW = 0  # Running counter
-    NCOL = MAX_NCOL  # NCOL is fixed
-    #
-    get_NCOL = True
+    data = []
+    NCOL = None  # fixed by the first segment
     for jdx, _dir in enumerate(inspiral_dirs):
         filename = os.path.join(_dir, FILE)
         if not os.path.exists(filename):
@@ -311,37 +545,31 @@ def ReadSpECTabularOutputFromASCII(
             continue
         if debug:
             print("READING %s" % filename)
-        _data = np.loadtxt(filename)
-        #
-        if len(np.shape(_data)) == 1:
-            ncol = len(_data)
-            nrow = 1
-        else:
-            ncol = np.shape(_data)[1]
-            nrow = np.shape(_data)[0]
-        if debug:
-            print("shape of data = (%d,%d)" % (nrow, ncol))
-        ncol = min(NCOL, ncol)
-        if get_NCOL:
-            NCOL = ncol
-            get_NCOL = False
+        _data = ReadSpECTabularFile(
+            filename,
+            usecols=usecols,
+            tmin=tmin,
+            tmax=tmax,
+            chunk_rows=chunk_rows,
+            cache=cache,
+            verbose=debug,
+        )
         if debug:
-            print("nco, NCOL, MAX_NCOL = (%d, %d,%d)" % (ncol, NCOL, MAX_NCOL))
-        #
-        # Ensure new data can be accommodated
-        while (NROW + nrow) > MAX_NROW:
-            tmp_z2 = np.zeros([MAX_NROW_DELTA, MAX_NCOL])
-            data = np.append(data, tmp_z2, axis=0)
-            MAX_NROW += MAX_NROW_DELTA
-        #
-        if len(np.shape(_data)) == 1:
-            data[NROW, :ncol] = _data[:ncol]
-            NROW += 1
-        else:
-            data[NROW : NROW + nrow, :ncol] = _data[:, :ncol]
-            NROW += nrow
+            print("shape of data = (%d,%d)" % np.shape(_data))
+        if len(_data) == 0:
+            continue
+        if NCOL is None:
+            NCOL = np.shape(_data)[1]
+        if np.shape(_data)[1] < NCOL:
+            # Pad missing columns with zeros
+            _data = np.append(
+                _data, np.zeros((len(_data), NCOL - np.shape(_data)[1])), axis=1
+            )
+        data.append(_data[:, :NCOL])
     #
-    return data[:NROW, :NCOL]
+    if len(data) == 0:
+        return np.zeros((0, 0))
+    return np.concatenate(data, axis=0)
     # }}}
 
 
@@ -372,6 +600,7 @@ def ReadSpECTabularOutputWithColsFromASCII(
     downsample_by=1,
     use_non_standard_segments=False,
     non_standard_prefix="./",
+    cache=False,
     verbose=False,
     debug=False,
 ):
@@ -388,6 +617,9 @@ def ReadSpECTabularOutputWithColsFromASCII(
     This makes sure that if some segments are missing certain columns,
     those are smoothly glossed over. E.g. subdomain X may exist between t = 0-1000M
     but not between 1000-1500M and then again from 1500-\infty M.
+
+    With cache=True, binary copies of the ASCII files are kept next to them
+    and reused until the files change (see ReadSpECTabularFile).
     """
     # {{{
     if not os.path.exists(DIR):
@@ -412,8 +644,8 @@ def ReadSpECTabularOutputWithColsFromASCII(
             print("READING %s" % filename)
         #
         # Read in data
-        _data = np.loadtxt(filename)
-        if np.shape(_data) == (0,):
+        _data = ReadSpECTabularFile(filename, cache=cache, verbose=debug)
+        if np.size(_data) == 0:
             if debug:
                 print("No data found for %s" % filename)
             continue
@@ -477,6 +709,7 @@ def ReadSpECGlobalOutputWithColsFromASCII(
     downsample_by=1,
     use_non_standard_segments=False,
     non_standard_prefix="./",
+    cache=False,
     verbose=False,
     debug=False,
 ):
@@ -494,6 +727,9 @@ def ReadSpECGlobalOutputWithColsFromASCII(
     but not between 1000-1500M and then again from 1500-\infty M.
 
     Note 2: SEE SIMILAR FUNCTION ReadSpECTabularOutputFromASCII.
+
+    With cache=True, binary copies of the ASCII files are kept next to them
+    and reused until the files change (see ReadSpECTabularFile).
     """
     # {{{
     if not os.path.exists(DIR):
@@ -518,8 +754,8 @@ def ReadSpECGlobalOutputWithColsFromASCII(
             print("READING %s" % filename)
         #
         # Read in data
-        _data = np.loadtxt(filename)
-        if np.shape(_data) == (0,):
+        _data = ReadSpECTabularFile(filename, cache=cache, verbose=debug)
+        if np.size(_data) == 0:
             if debug:
                 print("No data found for %s" % filename)
             continue
@@ -612,16 +848,24 @@ def ReadSpECTabularOutputFromH5(
     DATASET="",
     use_non_standard_segments=False,
     non_standard_prefix="./",
+    usecols=None,
+    tmin=None,
+    tmax=None,
     verbose=False,
     debug=False,
 ):
     """
     Read in SpEC's HDF5 output files from all available segments and combine them.
     Provide file name with respect to Lev?_?? directory.
+
+    Each dataset is read from disk once; only columns `usecols` and rows
+    with tmin <= time <= tmax are kept.
     """
     # {{{
     if not os.path.exists(DIR):
         raise IOError("%s does not exist" % DIR)
+    if DATASET == "":
+        raise IOError("Please provide name of dataset to read")
     #
     inspiral_dirs = GetSegmentDirectories(
         DIR,
@@ -631,14 +875,8 @@ def ReadSpECTabularOutputFromH5(
         verbose=verbose,
     )
     #
-    MAX_NROW = 20000
-    MAX_NROW_DELTA = 10000
-    MAX_NCOL = 200
-    data = np.zeros([MAX_NROW, MAX_NCOL])
-    NROW = 0  # Running counter
-    NCOL = 0  # NCOL is fixed
-    #
-    get_NCOL = True
+    data = []
+    NCOL = 0
     for jdx, _dir in enumerate(inspiral_dirs):
         filename = os.path.join(_dir, FILE)
         if not os.path.exists(filename):
@@ -649,44 +887,29 @@ def ReadSpECTabularOutputFromH5(
             print("READING %s" % filename)
         with h5py.File(filename, "r") as fp:
             try:
-                if GROUP is not "":
-                    _data = fp[GROUP]
+                if GROUP != "":
+                    _data = fp[GROUP][DATASET]
                 else:
-                    _data = fp
-            except:
+                    _data = fp[DATASET]
+            except KeyError:
                 continue
-            if DATASET is not "":
-                _data = _data[DATASET]
-            else:
-                raise IOError("Please provide name of dataset to read")
             #
             if debug:
                 print("Shape of dataset = ", np.shape(_data))
-            if len(np.shape(_data)) == 1:
-                ncol = len(_data)
-                nrow = 1
-            else:
-                ncol = np.shape(_data)[1]
-                nrow = np.shape(_data)[0]
-            NCOL = max(NCOL, ncol)
-            if get_NCOL:
-                NCOL = ncol
-                get_NCOL = False
-            #
-            # Ensure new data can be accommodated
-            while (NROW + nrow) > MAX_NROW:
-                tmp_z2 = np.zeros([MAX_NROW_DELTA, MAX_NCOL])
-                data = np.append(data, tmp_z2, axis=0)
-                MAX_NROW += MAX_NROW_DELTA
-            #
-            if len(np.shape(_data)) == 1:
-                data[NROW, :ncol] = _data[:]
-                NROW += 1
-            else:
-                data[NROW : NROW + nrow, :ncol] = _data[:, :]
-                NROW += nrow
+            _data = ReadH5DatasetColumns(_data, usecols=usecols, tmin=tmin, tmax=tmax)
+        NCOL = max(NCOL, np.shape(_data)[1])
+        data.append(_data)
     #
-    return data[:NROW, :NCOL]
+    if len(data) == 0:
+        return np.zeros((0, NCOL))
+    # Segments with fewer columns are padded with zeros
+    return np.concatenate(
+        [
+            np.append(d, np.zeros((len(d), NCOL - np.shape(d)[1])), axis=1)
+            for d in data
+        ],
+        axis=0,
+    )
     # }}}
 
 
@@ -850,8 +1073,9 @@ from all subdomains and returns a single value Q_o. Q_o is returned.
 INPUTS:
 
 data_dict : (dictionary, with keys "SUBDOMAIN-NAME.dir")
-op_func   : (function) It takes in all {Q_i} together and maps
-            them to a single value Q_o
+op_func   : (function, or one of "min", "max", "mean", "norm", "rms")
+            It takes in all {Q_i} together and maps them to a single
+            value Q_o
     """
     )
 
@@ -860,7 +1084,209 @@ def DummyMin(vals, sds):
     return np.min(vals)
 
 
-def GetOpOfQuantityOverDomain(data_dict, op_func=DummyMin, verbose=True, debug=False):
+def DummyMax(vals, sds):
+    return np.max(vals)
+
+
+DOMAIN_REDUCTIONS = ["min", "max", "mean", "norm", "rms"]
+
+
+def SubdomainColumns(data_dict, subdomains, column=None):
+    """
+    2D data of each subdomain, as (time, quantity) columns, or with all
+    columns if `column` is None
+    """
+    retval = []
+    for sd in subdomains:
+        data = np.asarray(data_dict[sd])
+        if data.ndim == 1:
+            data = data.reshape(1, -1)
+        if column is not None:
+            data = data[:, [0, column]]
+        retval.append(data)
+    return retval
+
+
+def GetTimesOverDomain(data_dict):
+    """Sorted union of the times (first column) of all subdomains"""
+    return np.unique(
+        np.concatenate([np.atleast_2d(d)[:, 0] for d in data_dict.values()])
+    )
+
+
+def MapSubdomainsToTimeGrid(all_tseries, sd_data_list, num_points=None):
+    """
+    Places the data of several subdomains on a common time grid.
+
+    Inputs:
+    -------
+    all_tseries : sorted array of all times
+    sd_data_list: list of 2D arrays, with time in their first column and one
+                  value per point in the other columns
+
+    Returns:
+    --------
+    array of shape (times x subdomains x points), with NaN wherever a
+    subdomain has no data. If a subdomain lists a time more than once (e.g.
+    at segment boundaries), its first entry is used.
+    """
+    # {{{
+    if num_points is None:
+        num_points = max([np.shape(d)[1] - 1 for d in sd_data_list])
+    block = np.full((len(all_tseries), len(sd_data_list), num_points), np.nan)
+    for sdx, sd_data in enumerate(sd_data_list):
+        sd_data = np.asarray(sd_data)
+        sd_tseries, first = np.unique(sd_data[:, 0], return_index=True)
+        tdx = np.searchsorted(all_tseries, sd_tseries)
+        block[tdx, sdx, : np.shape(sd_data)[1] - 1] = sd_data[first, 1:]
+    return block
+    # }}}
+
+
+def _ReduceSubdomainBlock(args):
+    """
+    Partial reduction over a group of subdomains, that can be combined with
+    those of other groups. Returns, at each time, the largest "key" (-value
+    for min, value for max, |value| otherwise), the index of the subdomain
+    it is in, the value there, and the sum (or sum of squares) and number of
+    available values.
+    """
+    # {{{
+    all_tseries, sd_data_list, sd_offset, op = args
+    block = MapSubdomainsToTimeGrid(all_tseries, sd_data_list)
+    num_points = np.shape(block)[2]
+    block = block.reshape(len(all_tseries), -1)
+    avail = ~np.isnan(block)
+    if op == "min":
+        key = np.where(avail, -block, -np.inf)
+    elif op == "max":
+        key = np.where(avail, block, -np.inf)
+    else:
+        key = np.where(avail, np.abs(block), -np.inf)
+    flat_idx = np.argmax(key, axis=1)
+    rows = np.arange(len(all_tseries))
+    key_max = key[rows, flat_idx]
+    value = block[rows, flat_idx]
+    arg = sd_offset + flat_idx // num_points
+    arg[np.isneginf(key_max)] = -1
+    if op == "mean":
+        total = np.nansum(block, axis=1)
+    elif op in ["norm", "rms"]:
+        total = np.nansum(block**2, axis=1)
+    else:
+        total = np.zeros(len(all_tseries))
+    count = np.count_nonzero(avail, axis=1)
+    return key_max, arg, value, total, count
+    # }}}
+
+
+def ReduceQuantityOverDomain(
+    data_dict,
+    op="min",
+    column=1,
+    num_processes=1,
+    max_memory_mb=1024.0,
+    verbose=False,
+):
+    """
+    Reduces a quantity stored separately for each subdomain, to a single
+    value at each time, with vectorized numpy operations.
+
+    The data of each subdomain is placed on the union of all times, in a
+    (time x subdomain x point) array. If that does not fit within
+    `max_memory_mb`, subdomains are processed in groups, whose partial
+    reductions are then combined. Groups are processed in parallel when
+    num_processes > 1.
+
+    Inputs:
+    -------
+    data_dict : dictionary with keys "SUBDOMAIN-NAME.dir", and values that
+                are 2D arrays with time in the first column
+    op        : one of "min", "max", "mean", "norm" (square root of the sum
+                of squares) and "rms", taken over all available subdomains
+                and points at each time
+    column    : column of the quantity in each subdomain's data. If None,
+                every column after time is a point of the quantity, and
+                all of them are reduced together
+
+    Returns:
+    --------
+    all_tseries    : times
+    yseries        : reduced values at each time
+    subdomainseries: subdomain with the min/max value at each time, or with
+                     the largest absolute value for other reductions
+    """
+    # {{{
+    if op not in DOMAIN_REDUCTIONS:
+        raise IOError("Reduction {} not one of {}".format(op, DOMAIN_REDUCTIONS))
+    all_subdomains = list(data_dict.keys())
+    if len(all_subdomains) == 0:
+        raise RuntimeError("No subdomains found in input dictionary..")
+    sd_data_list = SubdomainColumns(data_dict, all_subdomains, column=column)
+    all_tseries = GetTimesOverDomain(data_dict)
+    num_times = len(all_tseries)
+    #
+    # Number of subdomains per group, so that a group's array fits in memory
+    num_points = max([np.shape(d)[1] - 1 for d in sd_data_list])
+    bytes_per_sd = 8.0 * 4 * num_times * num_points
+    group_size = int(max_memory_mb * 1024.0**2 / bytes_per_sd)
+    group_size = max(group_size, 1)
+    if num_processes > 1:
+        group_size = min(
+            group_size, int(np.ceil(len(all_subdomains) / float(num_processes)))
+        )
+    tasks = [
+        (all_tseries, sd_data_list[i : i + group_size], i, op)
+        for i in range(0, len(all_subdomains), group_size)
+    ]
+    if verbose:
+        print(
+            "Reducing %d subdomains over %d times in %d groups"
+            % (len(all_subdomains), num_times, len(tasks))
+        )
+    if num_processes > 1 and len(tasks) > 1:
+        pool = Pool(num_processes)
+        try:
+            partials = pool.map(_ReduceSubdomainBlock, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        partials = [_ReduceSubdomainBlock(task) for task in tasks]
+    #
+    # Combine partial reductions
+    key_max, arg, value, total, count = partials[0]
+    for _key, _arg, _value, _total, _count in partials[1:]:
+        better = _key > key_max
+        key_max = np.where(better, _key, key_max)
+        arg = np.where(better, _arg, arg)
+        value = np.where(better, _value, value)
+        total = total + _total
+        count = count + _count
+    #
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if op in ["min", "max"]:
+            yseries = value
+        elif op == "mean":
+            yseries = total / count
+        elif op == "norm":
+            yseries = np.sqrt(total)
+        else:
+            yseries = np.sqrt(total / count)
+    yseries = np.where(count > 0, yseries, np.nan)
+    subdomainseries = [all_subdomains[i] if i >= 0 else None for i in arg]
+    return all_tseries, yseries, subdomainseries
+    # }}}
+
+
+def GetOpOfQuantityOverDomain(
+    data_dict,
+    op_func=DummyMin,
+    verbose=True,
+    debug=False,
+    num_processes=1,
+    max_memory_mb=1024.0,
+):
     """
     Wrapper function that takes in a dataset that contains some quantity
     Q_i == Q_i(t) over each subdomain, as a function of time; and maps them all
@@ -870,9 +1296,31 @@ def GetOpOfQuantityOverDomain(data_dict, op_func=DummyMin, verbose=True, debug=F
     INPUTS:
 
     data_dict : (dictionary, with keys "SUBDOMAIN-NAME.dir")
-    op_func   : (function) It takes in all {Q_i} together and maps
-                them to a single value Q_o
+    op_func   : (function, or one of "min", "max", "mean", "norm", "rms")
+                It takes in all {Q_i} together and maps them to a single
+                value Q_o
+
+    Only the quantity in column 1 of each subdomain's data is reduced.
+    Named reductions (and DummyMin / DummyMax) are vectorized, see
+    ReduceQuantityOverDomain. Other functions are called once per time,
+    on the values from the subdomains that have data at that time.
+    Times are the union of the times of all subdomains.
     """
+    # {{{
+    if op_func is DummyMin:
+        op_func = "min"
+    elif op_func is DummyMax:
+        op_func = "max"
+    if op_func in DOMAIN_REDUCTIONS:
+        return ReduceQuantityOverDomain(
+            data_dict,
+            op=op_func,
+            column=1,
+            num_processes=num_processes,
+            max_memory_mb=max_memory_mb,
+            verbose=verbose,
+        )
+    #
     all_subdomains = list(data_dict.keys())
     if len(all_subdomains) == 0:
         raise RuntimeError("No subdomains found in input dictionary..")
@@ -882,40 +1330,23 @@ def GetOpOfQuantityOverDomain(data_dict, op_func=DummyMin, verbose=True, debug=F
     # Get time series from data
     if verbose:
         print("Extracting global times .. ")
+    all_tseries = GetTimesOverDomain(data_dict)
 
-    for idx, sd in enumerate(all_subdomains):
-        if idx != 0:
-            sd_tseries = data_dict[sd][:, 0]
-            if sd_tseries.min() < all_tseries.min():
-                mask = sd_tseries < all_tseries.min()
-                all_tseries = np.append(sd_tseries[mask], all_tseries)
-            if sd_tseries.max() > all_tseries.max():
-                mask = sd_tseries > all_tseries.max()
-                all_tseries = np.append(all_tseries, sd_tseries[mask])
-        else:
-            all_tseries = data_dict[sd][:, 0]
-
-    # Get min/max over *available* subdomains at all times
+    # Get op over *available* subdomains at all times
     if verbose:
-        print("Computing min/max data at those times .. ")
-
-    yseries = np.array([])
+        print("Computing op over data at those times .. ")
+    block = MapSubdomainsToTimeGrid(
+        all_tseries, SubdomainColumns(data_dict, all_subdomains, column=1)
+    )[:, :, 0]
+    all_subdomains = np.array(all_subdomains)
+    yseries = np.zeros(len(all_tseries))
     subdomainseries = []
-    for idx, tvalue in enumerate(all_tseries):
-        avail_values = np.array([])
-        avail_subdomains = []
-        for sd in all_subdomains:
-            sd_tseries = data_dict[sd][:, 0]
-            if tvalue not in sd_tseries:
-                continue
-            sd_yseries = data_dict[sd][:, 1]
-            idx_tvalue, _ = find_nearest(sd_tseries, tvalue)
-            avail_values = np.append(avail_values, sd_yseries[idx_tvalue])
-            avail_subdomains.append(sd)
-        yseries = np.append(yseries, op_func(avail_values, avail_subdomains))
-        subdomainseries.append(
-            avail_subdomains[
-                np.where(op_func(avail_values, avail_subdomains) == yseries[-1])[0][0]
-            ]
-        )
+    for idx in range(len(all_tseries)):
+        avail = ~np.isnan(block[idx])
+        avail_values = block[idx][avail]
+        avail_subdomains = list(all_subdomains[avail])
+        yseries[idx] = op_func(avail_values, avail_subdomains)
+        match = np.where(avail_values == yseries[idx])[0]
+        subdomainseries.append(avail_subdomains[match[0] if len(match) else 0])
     return all_tseries, yseries, subdomainseries
+    # }}}
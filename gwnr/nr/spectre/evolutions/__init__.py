@@ -4,4 +4,4 @@ from .configurations import *
 from .evolutions import *
 from .reduction_data import *
 
-# from .volume_data import *
+from .volume_data import *
@@ -15,21 +15,477 @@
 # 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 
 import os
+import glob
+import json
+import time
+import shutil
 import subprocess
 import logging
+from multiprocessing import Pool
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib
+from matplotlib.figure import Figure
 import h5py
 
-try:
-    import celluloid
-except ImportError:
-    pass
-
 ############################################################################
 
 
+class SpectreVolumeDataReader(object):
+    """
+    Lazy reader for spectre volume data files.
+
+    Observation IDs, their times, element groups and tensor names are
+    indexed from HDF5 metadata only. Data are read when requested, and then
+    only for the requested tensors, observations and (strided) points,
+    through h5py hyperslab selections. Both the current layout (one dataset
+    per tensor component under each observation) and the element-wise
+    layout (one group per element under each observation) are supported;
+    element-wise data are combined into one contiguous array per tensor.
+
+    Usage:
+    ------
+        with SpectreVolumeDataReader("Volume0.h5") as reader:
+            for t, frame in reader.iter_frames(["Psi"], dt=0.5):
+                ...
+    """
+
+    def __init__(self, volume_data_file, subfile="element_data.vol"):
+        if not os.path.exists(volume_data_file):
+            raise IOError("Cannot find data file: {0:s}".format(volume_data_file))
+        self.volume_data_file = volume_data_file
+        self.subfile = subfile
+        self.fp = h5py.File(volume_data_file, "r")
+        if subfile not in self.fp:
+            raise IOError("{} not found in {}".format(subfile, volume_data_file))
+        self.group = self.fp[subfile]
+
+        # Index observations by time, from attributes only
+        obs_ids = list(self.group.keys())
+        obs_times = np.array(
+            [self.group[o].attrs["observation_value"] for o in obs_ids]
+        )
+        order = np.argsort(obs_times, kind="stable")
+        self.observation_ids = [obs_ids[i] for i in order]
+        self.times = obs_times[order]
+
+        first_obs = self.group[self.observation_ids[0]] if obs_ids else {}
+        self.element_wise = any(
+            isinstance(first_obs[k], h5py.Group) for k in first_obs
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.fp.close()
+
+    def __len__(self):
+        return len(self.observation_ids)
+
+    def observation(self, obs):
+        """HDF5 group of an observation, given its index or ID"""
+        if not isinstance(obs, str):
+            obs = self.observation_ids[obs]
+        return self.group[obs]
+
+    def elements(self, obs=0):
+        """Names of element groups (element-wise layout only)"""
+        if not self.element_wise:
+            return []
+        return list(self.observation(obs).keys())
+
+    def available_fields(self, obs=0):
+        """Names of tensor components stored for an observation"""
+        group = self.observation(obs)
+        if self.element_wise:
+            group = group[list(group.keys())[0]]
+        return [k for k in group if isinstance(group[k], h5py.Dataset)]
+
+    def select_observations(self, tmin=None, tmax=None, dt=None, stride=1):
+        """
+        Indices of observations with tmin <= t <= tmax, keeping every
+        `stride`-th one, or one per `dt` when dt is given (which must be at
+        least the median time step)
+        """
+        # {{{
+        idx = np.arange(len(self.times))
+        mask = np.ones(len(idx), dtype=bool)
+        if tmin is not None:
+            mask &= self.times >= tmin
+        if tmax is not None:
+            mask &= self.times <= tmax
+        idx = idx[mask]
+        current_dt = np.median(np.diff(self.times[idx])) if len(idx) > 1 else 0
+        if dt is not None and current_dt > 0:
+            if dt < current_dt:
+                raise IOError(
+                    "Requested dt = {0:.4e} is not possible (MIN: {1:.4e})".format(
+                        dt, current_dt
+                    )
+                )
+            stride = max(int(np.round(dt / current_dt)), 1)
+            logging.info("Downsample by {}x".format(stride))
+        return idx[::stride]
+        # }}}
+
+    def read_field(self, field, obs, points=slice(None), elements=None):
+        """
+        Reads one tensor component at one observation.
+
+        Inputs:
+        -------
+        field   : str, name of the tensor component
+        obs     : int or str, observation index or ID
+        points  : slice of points to read (e.g. slice(None, None, 4) for
+                  every fourth point), applied to the combined points
+        elements: list of element names to read (element-wise layout only).
+                  Default: all
+
+        Returns:
+        --------
+        result : 1D numpy array
+        """
+        # {{{
+        group = self.observation(obs)
+        if not self.element_wise:
+            return group[field][points]
+        #
+        # Combine elements into one preallocated array. Only the points of
+        # each element that fall in the (global) slice are read.
+        if elements is None:
+            elements = list(group.keys())
+        sizes = np.array([group[e][field].shape[0] for e in elements], dtype=int)
+        offsets = np.append(0, np.cumsum(sizes))
+        start, stop, step = points.indices(int(offsets[-1]))
+        selected = np.arange(start, stop, step)
+        result = np.empty(len(selected), dtype=group[elements[0]][field].dtype)
+        bounds = np.searchsorted(selected, offsets)
+        for edx, e in enumerate(elements):
+            lo, hi = bounds[edx], bounds[edx + 1]
+            if hi <= lo:
+                continue
+            local = selected[lo:hi] - offsets[edx]
+            result[lo:hi] = group[e][field][local[0] : local[-1] + 1 : step]
+        return result
+        # }}}
+
+    def read_fields(self, fields, obs, points=slice(None), elements=None):
+        """Reads several tensor components at one observation, as a dict"""
+        return {
+            f: self.read_field(f, obs, points=points, elements=elements)
+            for f in fields
+        }
+
+    def iter_frames(
+        self,
+        fields,
+        tmin=None,
+        tmax=None,
+        dt=None,
+        stride=1,
+        points=slice(None),
+        elements=None,
+    ):
+        """
+        Yields (time, {field: data}) for the selected observations, reading
+        one observation at a time
+        """
+        for idx in self.select_observations(
+            tmin=tmin, tmax=tmax, dt=dt, stride=stride
+        ):
+            yield self.times[idx], self.read_fields(
+                fields, idx, points=points, elements=elements
+            )
+
+    def read_time_series(self, fields, obs_indices, points=slice(None), elements=None):
+        """
+        Reads tensor components at several observations, into one
+        (observations x points) array per component
+        """
+        # {{{
+        result = {}
+        for f in fields:
+            first = self.read_field(f, obs_indices[0], points=points, elements=elements)
+            data = np.empty((len(obs_indices), len(first)), dtype=first.dtype)
+            data[0] = first
+            for jdx, idx in enumerate(obs_indices[1:]):
+                data[jdx + 1] = self.read_field(
+                    f, idx, points=points, elements=elements
+                )
+            result[f] = data
+        return result
+        # }}}
+
+
+# Per-process state of movie frame rendering: an open reader, and a
+# figure / axes / colorbar that are reused for all frames of the process
+_movie_worker = {}
+
+
+def _init_movie_worker(volume_data_file, settings):
+    """Opens the volume data file and prepares the figure, once per process"""
+    # {{{
+    _movie_worker.clear()
+    _movie_worker["reader"] = SpectreVolumeDataReader(volume_data_file)
+    _movie_worker["settings"] = settings
+
+    fig = Figure(figsize=settings["figsize"])
+    ax = fig.add_axes([0.1, 0.1, 0.7, 0.8])
+    ax2 = fig.add_axes([0.8, 0.1, 0.03, 0.8])
+
+    # Prepare a colorbar
+    cmap = matplotlib.cm.jet
+    cmaplist = [cmap(i) for i in range(cmap.N)]
+    cmap = matplotlib.colors.LinearSegmentedColormap.from_list(
+        "CustomCmap", cmaplist, cmap.N
+    )
+    cmin, cmax = settings["cmin"], settings["cmax"]
+    cbar_bounds = np.linspace(cmin, cmax, settings["ncolors"] + 1)
+    norm = matplotlib.colors.BoundaryNorm(cbar_bounds, cmap.N)
+    matplotlib.colorbar.ColorbarBase(
+        ax2,
+        cmap=cmap,
+        norm=norm,
+        spacing="proportional",
+        ticks=cbar_bounds,
+        boundaries=cbar_bounds,
+        format="%3.1f",
+    )
+    ax2.set_ylabel(settings["field_name"])
+
+    # Draw an empty frame, whose artists are updated for each observation
+    # FIXME: Use `contourf`
+    sc = ax.scatter(
+        [],
+        [],
+        c=[],
+        s=50,
+        alpha=0.97,
+        marker="s",
+        cmap=cmap,
+        norm=norm,
+        edgecolors="none",
+    )
+    tx = ax.text(0, 0, "")
+    _movie_worker.update({"fig": fig, "ax": ax, "scatter": sc, "text": tx})
+    # }}}
+
+
+def _render_movie_frame(args):
+    """
+    Reads the slice of one observation, and saves it as one image.
+    Returns the frame index, and the time it took.
+    """
+    # {{{
+    frame_idx, obs_idx, frame_file = args
+    itime = time.time()
+    reader, settings = _movie_worker["reader"], _movie_worker["settings"]
+    xname, yname, field_name = settings["fields"]
+    frame = reader.read_fields(
+        [xname, yname, field_name], obs_idx, points=settings["points"]
+    )
+    x, y, z = frame[xname], frame[yname], frame[field_name]
+    t = reader.times[obs_idx]
+
+    sc, tx, ax = _movie_worker["scatter"], _movie_worker["text"], _movie_worker["ax"]
+    sc.set_offsets(np.column_stack([x, y]))
+    sc.set_array(np.asarray(z))
+    xmin, xmax, ymin, ymax = np.min(x), np.max(x), np.min(y), np.max(y)
+    xpad, ypad = 0.05 * (xmax - xmin), 0.05 * (ymax - ymin)
+    ax.set_xlim(xmin - xpad, xmax + xpad)
+    ax.set_ylim(ymin - ypad, ymax + 2 * ypad)
+    tx.set_position((xmin, ymax + ypad))
+    tx.set_text("Time: {0:06.03f}".format(t))
+
+    # Write to a temporary file first, so that interrupted renders never
+    # leave a partial frame behind
+    root, ext = os.path.splitext(frame_file)
+    tmp_file = root + ".tmp" + ext
+    _movie_worker["fig"].savefig(tmp_file, dpi=settings["dpi"])
+    os.rename(tmp_file, frame_file)
+    return frame_idx, time.time() - itime
+    # }}}
+
+
+def render_movie_frames(
+    volume_data_file,
+    obs_indices,
+    field_name,
+    frames_dir,
+    dim_to_coord_map=["InertialCoordinates_x", "InertialCoordinates_y"],
+    points=slice(None),
+    cmin=-1.0,
+    cmax=1.0,
+    ncolors=10,
+    figsize=(12, 6),
+    dpi=100,
+    frame_format="png",
+    num_processes=1,
+    resume=True,
+    report_every=10,
+):
+    """
+    Renders one image per observation of a spectre volume data file, in a
+    pool of processes. Each process opens the file and builds its figure
+    once, and then reads and draws one observation's slice at a time, so
+    that memory use does not grow with the number of frames.
+
+    Input:
+    ------
+    obs_indices : list, indices of observations to render (see
+                  SpectreVolumeDataReader.select_observations)
+    field_name  : str, name of field to color points by
+    frames_dir  : str, directory for frame_%05d images
+    resume      : bool, skip frames that already exist in frames_dir, e.g.
+                  from an interrupted earlier render. Frames are only reused
+                  if they were rendered from the same file, observations and
+                  settings, as recorded in frames_dir/frames.json; otherwise
+                  all frames are rendered again
+
+    Output:
+    -------
+    result : list, names of all frame files, in order
+    """
+    # {{{
+    if not os.path.exists(frames_dir):
+        os.makedirs(frames_dir)
+    frame_files = [
+        os.path.join(frames_dir, "frame_{0:05d}.{1}".format(i, frame_format))
+        for i in range(len(obs_indices))
+    ]
+    settings = {
+        "fields": list(dim_to_coord_map) + [field_name],
+        "field_name": field_name,
+        "points": points,
+        "cmin": cmin,
+        "cmax": cmax,
+        "ncolors": ncolors,
+        "figsize": figsize,
+        "dpi": dpi,
+    }
+
+    # Frames left by an earlier render are only reused if they show the
+    # same observations with the same settings. Frames beyond the last one
+    # would otherwise be picked up by the encoder
+    manifest = {
+        "volume_data_file": os.path.abspath(volume_data_file),
+        "obs_indices": [int(i) for i in obs_indices],
+        "frame_format": frame_format,
+        "settings": dict(settings, points=repr(points), figsize=list(figsize)),
+    }
+    manifest_file = os.path.join(frames_dir, "frames.json")
+    old_manifest = None
+    if os.path.exists(manifest_file):
+        with open(manifest_file, "r") as fp:
+            try:
+                old_manifest = json.load(fp)
+            except ValueError:
+                pass
+    keep = set(frame_files) if resume and old_manifest == manifest else set()
+    for frame_file in glob.glob(os.path.join(frames_dir, "frame_*")):
+        if frame_file not in keep:
+            os.remove(frame_file)
+    with open(manifest_file, "w") as fp:
+        json.dump(manifest, fp, indent=1)
+
+    tasks = [
+        (i, obs_idx, frame_files[i])
+        for i, obs_idx in enumerate(obs_indices)
+        if not (
+            resume
+            and os.path.exists(frame_files[i])
+            and os.path.getsize(frame_files[i]) > 0
+        )
+    ]
+    logging.info(
+        "Rendering {} of {} frames ({} already done) on {} processes".format(
+            len(tasks), len(frame_files), len(frame_files) - len(tasks), num_processes
+        )
+    )
+    if len(tasks) == 0:
+        return frame_files
+
+    itime = time.time()
+
+    def report(num_done):
+        elapsed = time.time() - itime
+        rate = num_done / elapsed if elapsed > 0 else 0.0
+        eta = (len(tasks) - num_done) / rate if rate > 0 else 0.0
+        logging.info(
+            " ... rendered {0:d}/{1:d} frames, {2:.2f} frames/s, ETA {3:.0f}s".format(
+                num_done, len(tasks), rate, eta
+            )
+        )
+
+    if num_processes > 1:
+        pool = Pool(
+            num_processes,
+            initializer=_init_movie_worker,
+            initargs=(volume_data_file, settings),
+        )
+        try:
+            for num_done, _ in enumerate(
+                pool.imap_unordered(_render_movie_frame, tasks), 1
+            ):
+                if num_done % report_every == 0:
+                    report(num_done)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        _init_movie_worker(volume_data_file, settings)
+        try:
+            for num_done, task in enumerate(tasks, 1):
+                _render_movie_frame(task)
+                if num_done % report_every == 0:
+                    report(num_done)
+        finally:
+            _movie_worker["reader"].close()
+    report(len(tasks))
+    return frame_files
+    # }}}
+
+
+def encode_movie_frames(frames_dir, name, fps=10, frame_format="png", ffmpeg="ffmpeg"):
+    """
+    Encodes frame_%05d images into a video with ffmpeg, which streams them
+    from disk. Returns True if the video was written, and False (leaving
+    the image sequence in place) if ffmpeg is not available.
+    """
+    # {{{
+    exe = shutil.which(ffmpeg)
+    if exe is None:
+        logging.info(
+            "{} not found, leaving frames in {} as an image sequence".format(
+                ffmpeg, frames_dir
+            )
+        )
+        return False
+    cmd = [
+        exe,
+        "-y",
+        "-loglevel",
+        "error",
+        "-framerate",
+        str(fps),
+        "-i",
+        os.path.join(frames_dir, "frame_%05d." + frame_format),
+        "-pix_fmt",
+        "yuv420p",
+        "-vf",
+        "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+        name,
+    ]
+    logging.info("Encoding {}".format(name))
+    subprocess.check_call(cmd)
+    return True
+    # }}}
+
+
 class HandleSpectreVolumeDatum(object):
     def __init__(
         self,
@@ -38,6 +494,7 @@ class HandleSpectreVolumeDatum(object):
         dt=0.5,
         read_fields=["Psi"],
         xdmf_converter=None,
+        point_stride=1,
         verbose=True,
     ):
         assert os.path.exists(volume_data_file), "Cannot find data file: {0:s}".format(
@@ -56,39 +513,50 @@ class HandleSpectreVolumeDatum(object):
         self.linestyles = ["-", "--", "--", "-.", ":"]
         self.linecolors = ["r", "g", "b", "k", "m", "y"]
 
-        self.read_fields = read_fields
-        self.data = self.read_data()
+        # Index the file, but only read data when it is needed
+        self.reader = SpectreVolumeDataReader(volume_data_file)
+        self.data = self.reader.group
+        self.points = slice(None, None, point_stride)
 
-        for f in self.data[list(self.data.keys())[0]]:
-            if "InertialCoordinate" in f:
+        self.read_fields = list(read_fields)
+        for f in self.available_fields():
+            if "InertialCoordinate" in f and f not in self.read_fields:
                 self.read_fields.append(f)
 
-        self.times, self.fields = self.get_data(read_fields)
-        self.times, self.fields = self.downsample_fields_data(
-            self.times, self.fields, dt=dt
-        )
+        self.obs_indices = self.reader.select_observations(dt=dt)
+        self.times = self.reader.times[self.obs_indices]
+        self._fields = None
 
     def read_data(self):
         logging.info("Reading in: {0:s}".format(self.volume_data_file))
-        fp = h5py.File(self.volume_data_file, "r")
-        self.data = fp["element_data.vol"]
-        logging.info(".. read in a dataset with shape: {}".format(np.shape(self.data)))
+        self.data = self.reader.group
         return self.data
 
     def available_fields(self):
-        return list(self.data[list(self.data.keys())[0]].keys())
+        return self.reader.available_fields()
+
+    @property
+    def fields(self):
+        """
+        {field: {time: data}} for read_fields at the selected times. This
+        reads all of them into memory; see fields_from_spectre_data and
+        make_movie for selective / streamed access.
+        """
+        if self._fields is None:
+            self.times, self._fields = self.get_data(self.read_fields)
+        return self._fields
 
     def get_data(self, fields=["Psi"]):
-        vol_dataset = self.data
-        times = []
+        times = self.reader.times[self.obs_indices]
         field_data = {f: {} for f in fields}
-        for obs_id in vol_dataset:
-            obs_data = vol_dataset[obs_id]
-            t = obs_data.attrs["observation_value"]
-            times.append(t)
+        for t, frame in zip(times, self._iter_frames(fields)):
             for f in fields:
-                field_data[f][t] = obs_data[f][()]
-        return np.sort(times), field_data
+                field_data[f][t] = frame[f]
+        return times, field_data
+
+    def _iter_frames(self, fields):
+        for idx in self.obs_indices:
+            yield self.reader.read_fields(fields, idx, points=self.points)
 
     def get_dt(self, times):
         dt_vals = [times[i + 1] - times[i] for i in range(len(times) - 1)]
@@ -117,14 +585,11 @@ class HandleSpectreVolumeDatum(object):
 
     def fields_from_spectre_data(self, field_names):
         """
-        Takes in a set of fields as a dictionary, as well as a list of times,
-        and separates out requested fields as a function of time.
+        Reads requested fields at all selected times, and separates them
+        out as a function of time.
 
         Input:
         ------
-        times       : list, series of evolution times
-        f_fields    : dict, maps spectre-names of coords to lists of the same
-                           coordinate as a function of evolution time
         field_names : list, list of spectre-names of desired fields
 
         Output:
@@ -132,14 +597,12 @@ class HandleSpectreVolumeDatum(object):
         result : list, set of arrays of all spatial fields as a function of
                  input times
         """
-        times = self.times
-        f_fields = self.fields
-
+        result = self.reader.read_time_series(
+            field_names, self.obs_indices, points=self.points
+        )
         if len(field_names) == 1:
-            fname = field_names[0]
-            return np.array([f_fields[fname][t] for t in times])
-
-        return [np.array([f_fields[fname][t] for t in times]) for fname in field_names]
+            return result[field_names[0]]
+        return [result[fname] for fname in field_names]
 
     def coords_from_spectre_data(
         self, dim_to_coord_map=["InertialCoordinates_x", "InertialCoordinates_y"]
@@ -191,93 +654,68 @@ class HandleSpectreVolumeDatum(object):
         cmax=1.0,
         ncolors=10,
         name="movie.mp4",
+        dim_to_coord_map=["InertialCoordinates_x", "InertialCoordinates_y"],
+        frames_dir=None,
+        num_processes=1,
+        resume=True,
+        fps=None,
+        keep_frames=True,
         **kwargs
     ):
         """
-        Make a movie
+        Make a movie. Frames are rendered in parallel as images, streaming
+        one observation at a time from the volume data file, and are then
+        encoded into a video.
 
         Input:
         ------
-        times      : list, series of evolution times
-        all_fields : dict, maps spectre-names of coords to lists of the same
-                           coordinate as a function of evolution time
         field_name : str, name of field to plot
-        dt         : time step
-        kwargs     : keyword arguments that are passed to `ArtistAnimation`
+        dt         : time step. Default: the one given at initialization
+        name       : str, name of the video file
+        dim_to_coord_map : list, spectre-names of the x and y coordinates
+        frames_dir : str, directory for frame images. Default: name + ".frames"
+        num_processes : int, number of processes that render frames
+        resume     : bool, reuse frames rendered by an earlier (interrupted) call
+                     with the same settings (see render_movie_frames)
+        fps        : frames per second. Default: 1000 / kwargs["interval"] (as
+                     for `ArtistAnimation`), or 10
+        keep_frames: bool, keep the frame images after encoding
 
         Output:
         -------
-        result : tuple, (camera object, animation object) that can be used to
-                        display or save movie animation
+        result : list, names of the frame images, in order. Empty if the
+                 images were removed after encoding (keep_frames=False).
+                 This replaces the (camera, animation) tuple returned when
+                 frames were drawn in memory with celluloid; the video is
+                 written to `name` instead
 
         """
-        times = self.times
-        all_fields = self.fields
-
-        # Data for frames
-        x_of_t, y_of_t = self.coords_from_spectre_data()
-        z_of_t = self.fields_from_spectre_data([field_name])
-
-        # Prepare figure and initialize Camera
-        fig = plt.figure(figsize=(12, 6))
-        ax = fig.add_axes([0.1, 0.1, 0.7, 0.8])
-        ax2 = fig.add_axes([0.8, 0.1, 0.03, 0.8])
-        camera = celluloid.Camera(fig)
-
-        # Prepare a colorbar
-        cmap = matplotlib.cm.jet
-        cmaplist = [cmap(i) for i in range(cmap.N)]
-        cmap = matplotlib.colors.LinearSegmentedColormap.from_list(
-            "CustomCmap", cmaplist, cmap.N
+        if dt is None:
+            obs_indices = self.obs_indices
+        else:
+            obs_indices = self.reader.select_observations(dt=dt)
+        if frames_dir is None:
+            frames_dir = os.path.splitext(name)[0] + ".frames"
+        if fps is None:
+            fps = 1000.0 / kwargs["interval"] if "interval" in kwargs else 10
+
+        frame_files = render_movie_frames(
+            self.volume_data_file,
+            obs_indices,
+            field_name,
+            frames_dir,
+            dim_to_coord_map=dim_to_coord_map,
+            points=self.points,
+            cmin=cmin,
+            cmax=cmax,
+            ncolors=ncolors,
+            num_processes=num_processes,
+            resume=resume,
         )
-
-        cbar_bounds = np.linspace(cmin, cmax, ncolors + 1)
-        norm = matplotlib.colors.BoundaryNorm(cbar_bounds, cmap.N)
-
-        # Make all frames
-        for idx in range(len(times)):
-            if idx % 5 == 0:
-                logging.info(" ... making frame {0:d}".format(idx + 1))
-
-            t = times[idx]
-            x, y, z = x_of_t[idx, :], y_of_t[idx, :], z_of_t[idx, :]
-
-            # Draw a frame: FIXME: Use `contourf`
-            sc = ax.scatter(
-                x,
-                y,
-                c=z,
-                s=50,
-                alpha=0.97,
-                marker="s",
-                cmap=cmap,
-                norm=norm,
-                edgecolors="none",
-                vmin=cmin,
-                vmax=cmax,
-            )
-            tx = ax.text(
-                min(x), max(y) + 0.05 * (max(y) - min(y)), "Time: {0:06.03f}".format(t)
-            )
-
-            if idx >= 0:
-                cb = matplotlib.colorbar.ColorbarBase(
-                    ax2,
-                    cmap=cmap,
-                    norm=norm,
-                    spacing="proportional",
-                    ticks=cbar_bounds,
-                    boundaries=cbar_bounds,
-                    format="%3.1f",
-                )
-                ax2.set_ylabel(field_name)
-                cb.set_clim(cmin, cmax)
-
-            camera.snap()
-
-        # Animate
-        anim = camera.animate(**kwargs)
-        anim.save(name)
+        if encode_movie_frames(frames_dir, name, fps=fps) and not keep_frames:
+            shutil.rmtree(frames_dir)
+            return []
+        return frame_files
 
 
 class HandleSpectreVolumeData(object):
@@ -325,7 +325,7 @@ class nr_data:
                     try:
                         if self.verbose > 2:
                             print("\t\tTrying to read: %d,%d mode" % (modeL, modeM))
-                        mdata = wavedata["Y_l{}_m{}.dat".format(modeL, modeM)].value
+                        mdata = wavedata["Y_l{}_m{}.dat".format(modeL, modeM)][()]
                         if self.verbose > 2:
                             print("\t\tShape of data read is ", np.shape(mdata))
                     except:
@@ -130,7 +130,7 @@ class nr_mode:
                 self.mode_real_interp(t_array) + self.mode_imag_interp(t_array) * 1.0j
             )
             self.mode_array = TimeSeries(mode_array, delta_t=delta_t, copy=True)
-            find_max_start = len(self.mode_array) * 4 / 5
+            find_max_start = len(self.mode_array) * 4 // 5
             max_idx = (
                 find_max_start + self.mode_array[find_max_start:].abs_max_loc()[-1]
             )
@@ -276,8 +276,7 @@ class nr_strain:
         self.time_length = time_length
         self.delta_t = 1.0 / self.sample_rate
         self.dimless_delta_t = 1.0 / dimless_sample_rate
-        self.df = 1.0 / self.time_length
-        self.n = int(self.sample_rate * self.time_length)
+        self.set_time_length(self.time_length)
         if self.verbose > 1:
             print("self.sample-rate & time_len = ", self.sample_rate, self.time_length)
             print("self.n = ", self.n)
@@ -324,6 +323,38 @@ class nr_strain:
                     self.which_modes.append((modeL, modeM))
         return self.which_modes
 
+    ##
+    def set_time_length(self, time_length):
+        """Sets the length (in seconds) of polarization arrays
+
+        [This function is agnostic to object's S1 state]"""
+        self.time_length = time_length
+        self.df = 1.0 / self.time_length
+        self.n = int(np.round(self.time_length / self.delta_t))
+
+    ##
+    def required_time_length(self, M=None, delta_t=None):
+        """
+        Shortest power-of-2 length (in seconds) of polarization arrays that
+        holds all modes, when rescaled to total mass M (in Solar Masses).
+        Computed from the time span of the mode data, without rescaling.
+
+        [This function is agnostic to object's S1 state]
+        """
+        if M is None:
+            M = self.totalmass
+        if delta_t is None:
+            delta_t = self.delta_t
+        if M is None:
+            raise IOError("Please provide total mass to compute length")
+        duration = max(
+            [
+                self.data.modes[modeL][modeM].data_duration()
+                for modeL, modeM in self.which_modes_to_read()
+            ]
+        )
+        return 2 ** np.ceil(np.log2(duration * M * lal.MTSUN_SI + 2 * delta_t))
+
     ##
     ####################################################################
     ####################################################################
@@ -743,6 +774,22 @@ class nr_strain:
         # First rescale all modes to required physical parameters
         self.rescale_modes(delta_t=delta_t, M=M, distance=distance)
 
+        # Grow polarization arrays if the rescaled modes do not fit in them
+        num_samples = max(
+            [
+                len(self.data.modes[modeL][modeM].data())
+                for modeL, modeM in self.which_modes_to_read()
+            ]
+        )
+        if num_samples > self.n:
+            if self.verbose > 1:
+                print(
+                    "\tGrowing polarizations from {} to {} samples".format(
+                        self.n, num_samples
+                    )
+                )
+            self.set_time_length(2 ** np.ceil(np.log2(num_samples * delta_t)))
+
         #########################################################
         #### ENSURE CORRECTNESS OF COALESCENCE-PHASE !!!!
         #########################################################
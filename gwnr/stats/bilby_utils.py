@@ -81,7 +81,7 @@ class InferenceConfigs(ConfigBase):
         # Add event configs
         if "event" not in self.configs:
             self.configs["event"] = {}
-        from pycbc.catalog import Catalog
+        from gwnr.analysis.gw_transient_catalog import Catalog
 
         self.event_names = Catalog().names
         for event_name in self.event_names:
@@ -21,7 +21,6 @@
 # =============================================================================
 #
 import logging
-from gwnr.graph.cbc import ParamLatexLabels
 from scipy.stats.kde import gaussian_kde
 from scipy.interpolate import UnivariateSpline
 
@@ -22,6 +22,10 @@
 #
 from __future__ import print_function
 
+import os
+from itertools import islice
+from multiprocessing import Pool
+
 from numpy import *
 import numpy as np
 import copy as cp
@@ -42,33 +46,183 @@ except:
 from pycbc.detector import *
 from pycbc.waveform import get_td_waveform, get_fd_waveform
 
+from gwnr.utils.types import (
+    extend_waveform_FrequencySeries,
+    extend_waveform_TimeSeries,
+)
+from gwnr.waveform.utils import get_detector_response
+
 ######################################################################
 #     POSTERIOR UTILITIES
 
 
 def get_param_idx(param_name, header):
     if param_name in header:
-        return np.where([param_name == x for x in header])[0][0]
+        return list(header).index(param_name)
     else:
         raise IOError("%s not found in header" % param_name)
 
 
+def _read_posterior_header(fp):
+    header = fp.readline().split()
+    # Allow for an initial hash = # in case the posterior is saved by
+    # numpy.savetxt()
+    if len(header) > 0 and header[0] == "#":
+        header = header[1:]
+    if len(header) == 0:
+        raise IOError("No header found in posterior samples file")
+    return header
+
+
+def _iterate_posterior_chunks(fp, usecols, chunk_size, no_of_samples=-1):
+    """Yields 2D float64 arrays of (at most) chunk_size rows each"""
+    num_read = 0
+    while no_of_samples <= 0 or num_read < no_of_samples:
+        num_lines = chunk_size
+        if no_of_samples > 0 and no_of_samples - num_read < chunk_size:
+            num_lines = no_of_samples - num_read
+        lines = [l for l in islice(fp, num_lines) if l.strip()]
+        if len(lines) == 0:
+            break
+        chunk = np.loadtxt(lines, dtype=np.float64, usecols=usecols, ndmin=2)
+        num_read += len(chunk)
+        yield chunk
+
+
+def iterate_posterior_samples(
+    filename, columns=None, chunk_size=100000, no_of_samples=-1
+):
+    """
+    Reads a LALInference posterior_samples.dat file in chunks.
+
+    All columns are returned as float64, as integer-valued columns (e.g.
+    "cycle") may be written as floats further down the file.
+
+    Inputs:
+    -------
+    filename : posterior samples file, with a header line of column names
+    columns : list of column names to read. Default: all columns
+    chunk_size : number of samples to parse at a time
+    no_of_samples : read at most these many samples. Default: all
+
+    Yields:
+    -------
+    numpy structured arrays with one field per (selected) column
+    """
+    # {{{
+    with open(filename, "r") as fp:
+        header = _read_posterior_header(fp)
+        if columns is None:
+            columns = header
+        usecols = [get_param_idx(c, header) for c in columns]
+
+        first_line = fp.readline()
+        first_tokens = first_line.split()
+        if len(first_tokens) == 0:
+            return
+        if len(first_tokens) != len(header):
+            raise IOError(
+                "Posterior samples file has %d columns, but %d names in header"
+                % (len(first_tokens), len(header))
+            )
+        dtype = np.dtype([(c, np.float64) for c in columns])
+
+        def to_structured(chunk):
+            out = np.empty(len(chunk), dtype=dtype)
+            for idx, c in enumerate(columns):
+                out[c] = chunk[:, idx]
+            return out
+
+        yield to_structured(
+            np.loadtxt([first_line], dtype=np.float64, usecols=usecols, ndmin=2)
+        )
+        if no_of_samples == 1:
+            return
+        for chunk in _iterate_posterior_chunks(
+            fp, usecols, chunk_size, no_of_samples=no_of_samples - 1
+        ):
+            yield to_structured(chunk)
+    # }}}
+
+
+def read_posterior_samples(
+    filename,
+    columns=None,
+    chunk_size=100000,
+    no_of_samples=-1,
+    cache=False,
+    cache_file=None,
+    mmap=True,
+    verbose=False,
+):
+    """
+    Reads a LALInference posterior_samples.dat file into a structured array.
+
+    Inputs:
+    -------
+    filename : posterior samples file, with a header line of column names
+    columns : list of column names to read. Default: all columns
+    chunk_size : number of samples to parse at a time
+    no_of_samples : keep only the first these many samples. Default: all
+    cache : if True, the parsed samples (all columns) are stored in a binary
+        .npy file, which is re-used as long as it is newer than `filename`
+    cache_file : name of the binary cache. Default: filename + ".npy"
+    mmap : memory-map the cache instead of reading it into memory
+
+    Returns:
+    --------
+    numpy structured array with one field per (selected) column. Columns
+    can be accessed by name, e.g. `samples["m1"]`.
+    """
+    # {{{
+    if not cache:
+        chunks = list(
+            iterate_posterior_samples(
+                filename,
+                columns=columns,
+                chunk_size=chunk_size,
+                no_of_samples=no_of_samples,
+            )
+        )
+        if len(chunks) == 0:
+            raise IOError("No samples found in %s" % filename)
+        return np.concatenate(chunks)
+
+    if cache_file is None:
+        cache_file = filename + ".npy"
+    if not os.path.exists(cache_file) or os.path.getmtime(
+        cache_file
+    ) < os.path.getmtime(filename):
+        if verbose:
+            print("Caching posterior samples from %s in %s" % (filename, cache_file))
+        np.save(
+            cache_file,
+            read_posterior_samples(filename, chunk_size=chunk_size, cache=False),
+        )
+    elif verbose:
+        print("Reading cached posterior samples from %s" % cache_file)
+    samples = np.load(cache_file, mmap_mode="r" if mmap else None)
+
+    if columns is not None:
+        samples = samples[list(columns)]
+    if no_of_samples > 0:
+        samples = samples[:no_of_samples]
+    return samples
+    # }}}
+
+
 def get_header_data_from_posterior_samples_file(filename, no_of_samples=-1):
     with open(filename, "r") as fp:
-        header = fp.readline()
-        header = header.split()
-        # Allow for an initial hash = # in case the posterior is saved by
-        # numpy.savetxt()
-        if header[0] == "#":
-            header = header[1:]
-        data = fp.readlines()
-        for idx in range(len(data)):
-            data[idx] = data[idx].split()
-        data = np.array(np.float64(np.array(data)))
-        if no_of_samples > 0 and no_of_samples <= np.shape(data)[0]:
-            if verbose:
-                print("Keeping only the first %d samples" % no_of_samples)
-            data = data[:no_of_samples]
+        header = _read_posterior_header(fp)
+        chunks = list(
+            _iterate_posterior_chunks(
+                fp, None, chunk_size=100000, no_of_samples=no_of_samples
+            )
+        )
+    if len(chunks) == 0:
+        data = np.zeros((0, len(header)))
+    else:
+        data = np.concatenate(chunks)
     return [header, data]
 
 
@@ -274,6 +428,99 @@ def get_h_from_posterior_line(
     # }}}
 
 
+def _get_h_from_posterior_line_star(args):
+    line, header, det_tag, kwargs = args
+    try:
+        return get_h_from_posterior_line(line, header, det_tag, **kwargs)
+    except RuntimeError as re:
+        print("WAVEFORM GENERATION FAILED WITH MESSAGE:\n ", re, "\n...")
+        return None
+
+
+def get_h_from_posterior_samples(
+    samples,
+    det_tag,
+    approx="IMRPhenomPv2",
+    delta_f=None,
+    delta_t=None,
+    filter_n=0,
+    filter_N=0,
+    indices=None,
+    num_draws=None,
+    seed=None,
+    return_polarizations=False,
+    num_processes=1,
+    debug=False,
+):
+    """
+    Generate waveforms for many LALInference posterior samples at once.
+    See `get_h_from_posterior_line` for how each waveform is generated.
+
+    Input:
+    1) [REQUIRED] samples: structured array from `read_posterior_samples`,
+       or [header, data] as returned by
+       `get_header_data_from_posterior_samples_file`
+    2) [REQUIRED] det_tag: detector, e.g. "H1"
+    3) indices: samples to use. If not given, `num_draws` samples are drawn
+       at random (without replacement) using `seed`. Default: all samples
+    4) num_processes: number of worker processes to generate waveforms with
+
+    Returns:
+    indices of the samples used, and the list of their waveforms. Waveforms
+    that failed to generate are returned as None.
+    """
+    # {{{
+    if isinstance(samples, np.ndarray) and samples.dtype.names is not None:
+        header = list(samples.dtype.names)
+        num_samples = len(samples)
+    else:
+        header, samples = samples
+        num_samples = np.shape(samples)[0]
+
+    if indices is None:
+        if num_draws is None or num_draws >= num_samples:
+            indices = np.arange(num_samples)
+        else:
+            rng = np.random.RandomState(seed)
+            indices = np.sort(rng.choice(num_samples, num_draws, replace=False))
+    indices = np.asarray(indices, dtype=int)
+
+    # Only the selected rows are converted to plain float arrays
+    if samples.dtype.names is not None:
+        from numpy.lib.recfunctions import structured_to_unstructured
+
+        lines = structured_to_unstructured(samples[indices], dtype=np.float64)
+    else:
+        lines = np.asarray(samples[indices], dtype=np.float64)
+
+    kwargs = dict(
+        approx=approx,
+        delta_f=delta_f,
+        delta_t=delta_t,
+        filter_n=filter_n,
+        filter_N=filter_N,
+        return_polarizations=return_polarizations,
+        debug=debug,
+    )
+    args = [(line, header, det_tag, kwargs) for line in lines]
+
+    if num_processes > 1 and len(args) > 1:
+        pool = Pool(num_processes)
+        try:
+            waveforms = pool.map(
+                _get_h_from_posterior_line_star,
+                args,
+                chunksize=(len(args) // (4 * num_processes)) or 1,
+            )
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        waveforms = [_get_h_from_posterior_line_star(a) for a in args]
+    return indices, waveforms
+    # }}}
+
+
 def shift_waveform_phase_time(orig_line, phase_shift, time_shift, sample_rate):
     """
     Generate waveform for a given point in LI posterior samples, with an additional
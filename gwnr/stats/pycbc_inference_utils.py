@@ -85,9 +85,9 @@ class InferenceConfigs(ConfigBase):
         self.add_data_configs()
 
         # Add data configs for events
-        import pycbc.catalog
+        from gwnr.analysis.gw_transient_catalog import Catalog
 
-        self.event_names = pycbc.catalog.Catalog().names
+        self.event_names = Catalog().names
         for event_name in self.event_names:
             self.add_data_configs(event_name)
 
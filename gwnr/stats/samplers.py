@@ -15,6 +15,7 @@
 # 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 
 import os
+import time
 from gwnr.stats import OneDRandom
 import numpy as np
 import emcee
@@ -23,6 +24,62 @@ import logging
 logging.getLogger().setLevel(logging.INFO)
 
 
+def emcee_major_version():
+    """Major version of the emcee package in use"""
+    return int(emcee.__version__.split(".")[0])
+
+
+def _backend_burn_in_complete(backend):
+    """
+    Whether the chain in an emcee HDF5 backend has finished burning in, as
+    recorded by `get_emcee_ensemble_sampler`. Backends written without this
+    record are taken to hold production samples.
+    """
+    with backend.open() as f:
+        attrs = f[backend.name].attrs
+        return bool(attrs.get("burn_in_complete", True))
+
+
+def _record_burn_in(backend, burn_in, complete, state=None):
+    """
+    Records the burn-in length, and whether it completed, in a backend.
+    The burned-in walker positions (and log-probabilities) in `state` are
+    also stored, as the backend is reset once burn-in completes
+    """
+    if backend is None:
+        return
+    with backend.open("a") as f:
+        g = f[backend.name]
+        g.attrs["burn_in"] = burn_in
+        g.attrs["burn_in_complete"] = complete
+        if state is None:
+            return
+        for name, value in [
+            ("burn_in_coords", state.coords),
+            ("burn_in_log_prob", state.log_prob),
+        ]:
+            if name in g:
+                del g[name]
+            if value is not None:
+                g.create_dataset(name, data=np.asarray(value))
+
+
+def _burned_in_state(backend):
+    """
+    Walker state at the end of burn-in, as recorded by `_record_burn_in`,
+    for a backend that holds no production samples yet. None if the
+    backend has no completed burn-in on record
+    """
+    if not _backend_burn_in_complete(backend):
+        return None
+    with backend.open() as f:
+        g = f[backend.name]
+        if "burn_in_coords" not in g:
+            return None
+        log_prob = g["burn_in_log_prob"][()] if "burn_in_log_prob" in g else None
+        return emcee.State(g["burn_in_coords"][()], log_prob=log_prob)
+
+
 def get_emcee_ensemble_sampler(
     log_probability,
     params_to_sample,
@@ -32,6 +89,8 @@ def get_emcee_ensemble_sampler(
     burn_in=100,
     backend_hdf=None,
     pool=None,
+    resume=False,
+    vectorize=False,
     verbose=False,
     debug=False,
 ):
@@ -59,54 +118,185 @@ def get_emcee_ensemble_sampler(
     nwalkers        : int
                       Number of ensemble sampling walkers
     pool            : mulitprocessing.pool object
+    resume          : bool
+                      If `backend_hdf` already holds samples for the same
+                      (nwalkers, ndim), continue from its last state instead
+                      of resetting it. A chain interrupted during burn-in
+                      first completes the remaining burn-in iterations; one
+                      interrupted after burn-in skips it
+    vectorize       : bool
+                      If True, `log_probability` receives the parameters of
+                      all walkers at once, as an array of shape
+                      (nwalkers, ndim), and returns an array of nwalkers
+                      log-probabilities. `pool` is not used in this case.
 
     Outputs:
     --------
     sampler         : emcee.EnsembleSampler object
-    state           : current state of sampler
-    p0              :
+    state           : current state of sampler (None if nothing was run)
+    p0              : positions of walkers to start sampling from
     """
     # Setup hyper-parameters for the sampler
     ndim = params_to_sample.shape[-1]
 
     # Arguments for ensembleSampler
     kws = {"pool": pool, "args": myarglist, "kwargs": kwargs}
+    if vectorize:
+        if emcee_major_version() < 3:
+            raise IOError("Vectorized log-probabilities need emcee v3+")
+        kws["vectorize"] = True
+        kws["pool"] = None
 
-    # HDF5 backend to save progress
-    if int(emcee.__version__.split(".")[0]) >= 3 and backend_hdf != None:
+    # HDF5 backend to save progress. It holds the burn-in chain until
+    # burn-in completes, and is then reset for production samples
+    backend = None
+    resume_state = None
+    burn_in_done = 0
+    if emcee_major_version() >= 3 and backend_hdf != None:
         logging.info("Initializing backend: {}".format(backend_hdf))
         backend = emcee.backends.HDFBackend(backend_hdf)
-        backend.reset(nwalkers, ndim)
+        if resume and os.path.exists(backend_hdf) and backend.initialized:
+            if backend.shape != (nwalkers, ndim):
+                raise IOError(
+                    "Backend {} holds chains for (nwalkers, ndim) = {}, not {}".format(
+                        backend_hdf, backend.shape, (nwalkers, ndim)
+                    )
+                )
+            if backend.iteration > 0:
+                resume_state = backend.get_last_sample()
+                if not _backend_burn_in_complete(backend):
+                    burn_in_done = backend.iteration
+                logging.info(
+                    "Resuming from {} iteration {} of backend {}".format(
+                        "burn-in" if burn_in_done else "production",
+                        backend.iteration,
+                        backend_hdf,
+                    )
+                )
+            else:
+                # Burn-in may have completed before the first production
+                # sample was written
+                resume_state = _burned_in_state(backend)
+                if resume_state is not None:
+                    logging.info(
+                        "Resuming after burn-in of backend {}".format(backend_hdf)
+                    )
+        if resume_state is None:
+            backend.reset(nwalkers, ndim)
+            _record_burn_in(backend, burn_in, burn_in <= 0)
         kws["backend"] = backend
     else:
         logging.info(
             "Ignoring backend because emcee major version: {} provided by: {}".format(
-                int(emcee.__version__.split(".")[0]), emcee.__file__
+                emcee_major_version(), emcee.__file__
             )
         )
 
     # Initialize emsemble sampler
     sampler = emcee.EnsembleSampler(nwalkers, ndim, log_probability, **kws)
 
-    # Run the sampler for a few steps to burn-in,
-    # ie erase memory of the starting locations
-    if burn_in > 0:
-        dist_sampler = OneDRandom(params_to_sample)
+    # A chain resumed after burn-in has already forgotten its starting
+    # locations
+    if resume_state is not None and burn_in_done == 0:
+        return sampler, resume_state, np.array(resume_state.coords)
 
+    if resume_state is not None:
+        state = resume_state
+        p0 = np.array(resume_state.coords)
+    else:
+        dist_sampler = OneDRandom(params_to_sample)
         initial_param_values = []
         for param in params_to_sample.columns:
             param_values = dist_sampler.sample(param, size=(nwalkers, 1))
             initial_param_values.append(param_values)
         p0 = np.hstack(initial_param_values)
+        state = None
+
+    # Run the sampler for a few steps to burn-in,
+    # ie erase memory of the starting locations
+    if burn_in > burn_in_done:
         if debug:
-            logging.info("DEBUG: will burn-in for {}".format(burn_in))
+            logging.info(
+                "DEBUG: will burn-in for {}".format(burn_in - burn_in_done)
+            )
             logging.info("DEBUG: initial point shape: {}".format(p0.shape))
             logging.info("DEBUG: Initial point p0: {}".format(p0))
-        state = sampler.run_mcmc(p0, burn_in)
+        state = sampler.run_mcmc(
+            state if state is not None else p0, burn_in - burn_in_done
+        )
+    if burn_in > 0 or burn_in_done > 0:
         sampler.reset()
+        _record_burn_in(backend, burn_in, True, state=state)
+        p0 = np.array(state.coords) if hasattr(state, "coords") else state[0]
     return sampler, state, p0
 
 
+def run_emcee_sampler(
+    sampler,
+    initial_state,
+    num_steps,
+    check_every=100,
+    tau_factor=50,
+    tau_rtol=0.01,
+    verbose=False,
+):
+    """
+    Runs an emcee (v3+) sampler for up to `num_steps` iterations in total,
+    counting iterations already stored in its backend (so that a resumed
+    sampler only runs the remaining ones). Every `check_every` iterations
+    the integrated autocorrelation time tau of each parameter is estimated,
+    and sampling stops early once the chain is longer than
+    `tau_factor` * tau and tau changed by less than `tau_rtol` (relative)
+    since the previous check.
+
+    Inputs:
+    -------
+    sampler         : emcee.EnsembleSampler object
+    initial_state   : state (or walker positions) to start from, e.g. the
+                      last two outputs of `get_emcee_ensemble_sampler`
+    num_steps       : int. Maximum total number of iterations
+    check_every     : int. Iterations between convergence checks. Set to
+                      None or 0 to never stop early.
+
+    Outputs:
+    --------
+    state           : last state of the sampler
+    autocorr        : list of (iteration, tau array) at each check
+    converged       : bool, whether the convergence criterion was met
+    """
+    # {{{
+    autocorr = []
+    converged = False
+    old_tau = np.inf
+    state = initial_state
+    num_remaining = num_steps - sampler.iteration
+    if num_remaining <= 0:
+        return state, autocorr, converged
+
+    for state in sampler.sample(initial_state, iterations=num_remaining):
+        if not check_every or sampler.iteration % check_every:
+            continue
+        tau = sampler.get_autocorr_time(tol=0)
+        autocorr.append((sampler.iteration, tau))
+        converged = np.all(tau * tau_factor < sampler.iteration) and np.all(
+            np.abs(old_tau - tau) < tau_rtol * tau
+        )
+        if verbose:
+            logging.info(
+                "... iteration {}: autocorrelation times {}".format(
+                    sampler.iteration, tau
+                )
+            )
+        if converged:
+            logging.info(
+                "MCMC converged after {} iterations".format(sampler.iteration)
+            )
+            break
+        old_tau = tau
+    return state, autocorr, converged
+    # }}}
+
+
 # Single-point entry to above methods
 get_sampler = {}
 get_sampler["emcee_ensemble"] = get_emcee_ensemble_sampler
@@ -145,13 +335,18 @@ def emcee_samples_to_dict(sampler, params_to_sample, burnin=1000, thin=10):
 
 
 def emcee_samples_from_checkpoint(
-    checkpoint_file, params_to_sample, burnin=1000, thin=10
+    checkpoint_file, params_to_sample, burnin=1000, thin=10, retries=5, wait=1.0
 ):
     """
     Retrieves a sampler object from emcee's checkpoint file,
     retrieves samples for all parameters from it. It returns
     a dictionary with parameter names as keys.
 
+    The checkpoint is opened read-only, so this can be used to look at
+    the (partial) chain while a sampler is still writing to it. If the
+    file is locked by a write in progress, reading is retried up to
+    `retries` times, `wait` seconds apart.
+
     Inputs:
     -------
     checkpoint_file  : full path to emcee sampler checkpoint file
@@ -163,7 +358,7 @@ def emcee_samples_from_checkpoint(
                         Dictionary containing samples for all parameters,
                         with param names as keys.
     """
-    if int(emcee.__version__.split(".")[0]) < 3:
+    if emcee_major_version() < 3:
         raise IOError(
             "Can only read checkpoints with emcee v3+. We are currently using {}".format(
                 emcee.__file__
@@ -171,10 +366,23 @@ def emcee_samples_from_checkpoint(
         )
     if not os.path.exists(checkpoint_file):
         raise IOError("Cannot locate checkpoint file: {}".format(checkpoint_file))
-    checkpoint_reader = emcee.backends.HDFBackend(checkpoint_file)
-    return emcee_samples_to_dict(
-        checkpoint_reader, params_to_sample, burnin=burnin, thin=thin
-    )
+    checkpoint_reader = emcee.backends.HDFBackend(checkpoint_file, read_only=True)
+    for attempt in range(retries + 1):
+        try:
+            num_iterations = checkpoint_reader.iteration
+            if num_iterations <= burnin:
+                logging.warning(
+                    "Checkpoint {} has only {} iterations, all within burn-in of {}".format(
+                        checkpoint_file, num_iterations, burnin
+                    )
+                )
+            return emcee_samples_to_dict(
+                checkpoint_reader, params_to_sample, burnin=burnin, thin=thin
+            )
+        except (IOError, OSError):
+            if attempt == retries:
+                raise
+            time.sleep(wait)
 
 
 def write_output_from_emcee_sampler(
@@ -1,8 +1,28 @@
 from __future__ import absolute_import
 
+import importlib
+
+from .instrumentation import *
 from .memory import *
 from .support import *
-from .types import *
+
+
+def __getattr__(name):
+    # LAL / PyCBC datatype utilities in `.types` are imported on first use,
+    # as importing them pulls in lal and pycbc
+    if name.startswith("__"):
+        raise AttributeError(
+            "module {!r} has no attribute {!r}".format(__name__, name)
+        )
+    types = importlib.import_module(".types", __name__)
+    if name == "types":
+        return types
+    try:
+        return getattr(types, name)
+    except AttributeError:
+        raise AttributeError(
+            "module {!r} has no attribute {!r}".format(__name__, name)
+        )
 
 
 def get_unique_hex_tag(N=1, num_digits=10):
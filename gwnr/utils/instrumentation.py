@@ -0,0 +1,282 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# =============================================================================
+#
+#                                   Preamble
+#
+# =============================================================================
+#
+"""Lightweight timers, counters and memory sampling for pipeline jobs"""
+
+from __future__ import absolute_import, print_function
+
+import json
+import os
+import socket
+import sys
+import time
+from contextlib import contextmanager
+
+from .memory import MemoryUsage
+
+__all__ = [
+    "INSTRUMENTATION_ENV_VARIABLE",
+    "Instrumentation",
+    "current_rss_mb",
+    "peak_rss_mb",
+    "insert_instrumentation_option_group",
+    "instrumentation_from_cli",
+    "instrumentation_from_environment",
+    "aggregate_instrumentation_summaries",
+]
+
+# Jobs without command-line options can be instrumented by pointing this
+# environment variable to the output JSON file
+INSTRUMENTATION_ENV_VARIABLE = "GWNR_INSTRUMENTATION_FILE"
+
+
+########################################
+# Memory sampling
+########################################
+def peak_rss_mb():
+    """Peak resident set size of this process so far (MB)"""
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, and in kilobytes elsewhere
+    if sys.platform == "darwin":
+        return peak / 1.0e6
+    return peak * 1.024e-3
+
+
+def current_rss_mb():
+    """Current resident set size of this process (MB), if available"""
+    try:
+        with open("/proc/self/statm", "r") as fin:
+            num_pages = int(fin.readline().split()[1])
+        return num_pages * os.sysconf("SC_PAGE_SIZE") / 1.0e6
+    except (IOError, OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+########################################
+# Instrumentation container
+########################################
+class Instrumentation(object):
+    """
+    Named timers, counters and memory samples for one job.
+
+    All methods are cheap no-ops when `enabled` is False, so that calls to
+    them can be left in production code paths.
+
+    Usage:
+    ------
+        instr = Instrumentation(name="banksim", enabled=True)
+        with instr.timer("generate_waveforms"):
+            ...
+        instr.increment("waveforms_generated")
+        instr.sample_memory()
+        instr.write_summary("banksim.json")
+    """
+
+    def __init__(self, name="", enabled=True):
+        self.name = name
+        self.enabled = enabled
+        self.timers = {}
+        self.counters = {}
+        self.object_sizes_mb = {}
+        self.memory_samples_mb = {}
+        self._running = {}
+        self._start_time = time.time()
+
+    def start_timer(self, name):
+        """Starts (or restarts) the named timer"""
+        if self.enabled:
+            self._running[name] = time.perf_counter()
+
+    def stop_timer(self, name):
+        """Stops the named timer, and accumulates the elapsed time"""
+        if not self.enabled or name not in self._running:
+            return
+        elapsed = time.perf_counter() - self._running.pop(name)
+        if name not in self.timers:
+            self.timers[name] = {"total": 0.0, "count": 0, "max": 0.0}
+        tmr = self.timers[name]
+        tmr["total"] += elapsed
+        tmr["count"] += 1
+        tmr["max"] = max(tmr["max"], elapsed)
+
+    @contextmanager
+    def timer(self, name):
+        """Context manager that times the enclosed block"""
+        self.start_timer(name)
+        try:
+            yield self
+        finally:
+            self.stop_timer(name)
+
+    def increment(self, name, value=1):
+        """Increments the named counter by `value`"""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def sample_memory(self, label=None):
+        """
+        Records the current resident set size, under `label` if given.
+        Returns the sample (MB), or None if disabled.
+        """
+        if not self.enabled:
+            return None
+        rss = current_rss_mb()
+        if label is not None:
+            self.memory_samples_mb[label] = max(
+                rss, self.memory_samples_mb.get(label, 0.0)
+            )
+        return rss
+
+    def record_size(self, name, obj):
+        """
+        Records the memory footprint of a Python object (MB), as computed
+        by `gwnr.utils.MemoryUsage`. This walks the whole object graph, so
+        call it sparingly.
+        """
+        if self.enabled:
+            self.object_sizes_mb[name] = MemoryUsage(obj) / 1.0e6
+
+    def summary(self):
+        """Returns a JSON-serializable dict summarizing this job"""
+        return {
+            "name": self.name,
+            "hostname": socket.gethostname(),
+            "start_time": self._start_time,
+            "wall_time": time.time() - self._start_time,
+            "peak_rss_mb": peak_rss_mb(),
+            "timers": self.timers,
+            "counters": self.counters,
+            "memory_samples_mb": self.memory_samples_mb,
+            "object_sizes_mb": self.object_sizes_mb,
+        }
+
+    def write_summary(self, filename):
+        """Writes `summary()` as JSON to `filename`, if enabled"""
+        if not self.enabled or not filename:
+            return
+        with open(filename, "w") as fout:
+            json.dump(self.summary(), fout, indent=2, sort_keys=True)
+
+
+########################################
+# Command-line handling
+########################################
+def insert_instrumentation_option_group(parser):
+    """Adds instrumentation options to an argparse parser"""
+    group = parser.add_argument_group(
+        "Instrumentation", "Options to record per-job timing and counters"
+    )
+    group.add_argument(
+        "--instrumentation-file",
+        metavar="FILE",
+        default=None,
+        help="Write timers, counters and peak memory usage of this job as "
+        "JSON to FILE. Instrumentation is disabled if not given, unless "
+        "${} is set.".format(INSTRUMENTATION_ENV_VARIABLE),
+    )
+    return group
+
+
+def instrumentation_from_environment(name=""):
+    """
+    Returns an `Instrumentation` object enabled iff the environment variable
+    `GWNR_INSTRUMENTATION_FILE` is set, along with the output filename.
+    """
+    filename = os.environ.get(INSTRUMENTATION_ENV_VARIABLE, None)
+    return Instrumentation(name=name, enabled=bool(filename)), filename
+
+
+def instrumentation_from_cli(opts, name=""):
+    """
+    Returns an `Instrumentation` object enabled iff --instrumentation-file
+    (or the `GWNR_INSTRUMENTATION_FILE` environment variable) was given, and
+    the file it is to be written to.
+    """
+    filename = getattr(opts, "instrumentation_file", None)
+    if not filename:
+        return instrumentation_from_environment(name=name)
+    return Instrumentation(name=name, enabled=True), filename
+
+
+########################################
+# Aggregation over jobs
+########################################
+def aggregate_instrumentation_summaries(summaries, output_file=None):
+    """
+    Combines per-job summaries, e.g. in workflow combine nodes.
+
+    Timer totals, counts and counters are summed over jobs; maximum timer
+    durations, wall times and memory usages are maximized over jobs.
+
+    Parameters
+    ----------
+    summaries : list
+        Summary dicts, or names of JSON files written by
+        `Instrumentation.write_summary`. Missing files are skipped.
+    output_file : str, optional
+        JSON file to write the aggregate to
+
+    Returns
+    -------
+    dict with the aggregate summary
+    """
+    agg = {
+        "num_jobs": 0,
+        "total_wall_time": 0.0,
+        "max_wall_time": 0.0,
+        "max_peak_rss_mb": 0.0,
+        "timers": {},
+        "counters": {},
+        "memory_samples_mb": {},
+    }
+    for summ in summaries:
+        if not isinstance(summ, dict):
+            if not os.path.exists(summ):
+                continue
+            with open(summ, "r") as fin:
+                summ = json.load(fin)
+        agg["num_jobs"] += 1
+        agg["total_wall_time"] += summ.get("wall_time", 0.0)
+        agg["max_wall_time"] = max(agg["max_wall_time"], summ.get("wall_time", 0.0))
+        agg["max_peak_rss_mb"] = max(
+            agg["max_peak_rss_mb"], summ.get("peak_rss_mb", 0.0)
+        )
+        for name, tmr in summ.get("timers", {}).items():
+            if name not in agg["timers"]:
+                agg["timers"][name] = {"total": 0.0, "count": 0, "max": 0.0}
+            agg["timers"][name]["total"] += tmr["total"]
+            agg["timers"][name]["count"] += tmr["count"]
+            agg["timers"][name]["max"] = max(agg["timers"][name]["max"], tmr["max"])
+        for name, val in summ.get("counters", {}).items():
+            agg["counters"][name] = agg["counters"].get(name, 0) + val
+        for name, val in summ.get("memory_samples_mb", {}).items():
+            agg["memory_samples_mb"][name] = max(
+                agg["memory_samples_mb"].get(name, 0.0), val
+            )
+    if output_file is not None:
+        with open(output_file, "w") as fout:
+            json.dump(agg, fout, indent=2, sort_keys=True)
+    return agg
@@ -1,6 +1,7 @@
 from __future__ import absolute_import
 
 from .align import *
+from .compression import *
 from .eccentric import *
 
 from . import esigma_utils
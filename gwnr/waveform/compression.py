@@ -0,0 +1,415 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+#
+# =============================================================================
+#
+#                                   Preamble
+#
+# =============================================================================
+#
+"""Reduced-order spline compression of waveform modes, and their storage"""
+
+from __future__ import absolute_import, print_function
+
+import os
+
+import h5py
+import numpy as np
+from scipy.interpolate import splev, splrep
+
+__all__ = [
+    "subsample_indices",
+    "mode_parts",
+    "compress_part",
+    "compress_modes",
+    "CompressedModesFile",
+]
+
+# Parts each mode is split into before compression, by representation
+REPRESENTATIONS = {
+    "modes": ("real", "imag"),
+    "amp_phase": ("amplitude", "phase"),
+}
+
+
+def subsample_indices(num_samples, peak_index, subsamp_low=1, subsamp_high=1, window=500):
+    """
+    Indices of a sub-sampled time grid: every `subsamp_low`-th sample
+    until `window` samples before the peak, and every `subsamp_high`-th
+    sample after (excluding the last sample).
+    """
+    split = int(np.clip(peak_index - window, 0, num_samples - 1))
+    return np.concatenate(
+        [
+            np.arange(0, split, subsamp_low),
+            np.arange(split, num_samples - 1, subsamp_high),
+        ]
+    )
+
+
+def mode_parts(mode, representation="modes"):
+    """
+    Splits a complex mode into the two real arrays that are compressed,
+    and the constant offsets subtracted from them.
+    "modes": real and imaginary parts;
+    "amp_phase": amplitude, and unwrapped phase minus its minimum.
+    """
+    if representation == "modes":
+        return (mode.real, mode.imag), (0.0, 0.0)
+    elif representation == "amp_phase":
+        phase = np.unwrap(np.angle(mode))
+        offset = phase.min()
+        return (np.abs(mode), phase - offset), (0.0, offset)
+    raise IOError(
+        "Representation {} not one of {}".format(representation, list(REPRESENTATIONS))
+    )
+
+
+def compress_part(x, y, tol=1.0e-4, deg=5):
+    """
+    Reduced-order spline of y(x) with romspline, returned as its B-spline
+    representation (knots, coefficients, degree). Coefficients are padded
+    with zeros to the length of knots, as from scipy's splrep.
+    """
+    import romspline
+
+    spline = romspline.ReducedOrderSpline(x, y, deg=deg, tol=tol)
+    return splrep(spline.X, spline.Y, k=deg, s=0)
+
+
+def _compress_part_task(args):
+    return compress_part(*args)
+
+
+def compress_modes(
+    times,
+    modes,
+    representation="modes",
+    tol=1.0e-4,
+    deg=5,
+    subsamp_low=1,
+    subsamp_high=1,
+    window=500,
+    peak_mode=(2, 2),
+    pool=None,
+):
+    """
+    Compresses all modes of one waveform, on one sub-sampled time grid
+    (see `subsample_indices`) placed around the amplitude peak of
+    `peak_mode` (or of the loudest mode if it is absent).
+
+    Parameters
+    ----------
+    times : numpy.array
+        times of the samples of all modes
+    modes : dict
+        {(l, m): complex numpy.array}
+    representation : str
+        "modes" or "amp_phase" (see `mode_parts`)
+    pool : multiprocessing.Pool, optional
+        distributes the parts of all modes across its processes
+
+    Returns
+    -------
+    dict of {(l, m): list of (part, (knots, coeffs, degree), offset, tmin,
+    tmax)}, in the order of REPRESENTATIONS[representation]
+    """
+    # {{{
+    if peak_mode not in modes:
+        peak_mode = max(modes, key=lambda lm: np.abs(modes[lm]).max())
+    peak_index = np.argmax(np.abs(modes[peak_mode]))
+    indices = subsample_indices(
+        len(times), peak_index, subsamp_low, subsamp_high, window=window
+    )
+    x = np.asarray(times)[indices]
+
+    keys, offsets, tasks = [], [], []
+    for lm in modes:
+        parts, part_offsets = mode_parts(np.asarray(modes[lm]), representation)
+        for name, part, offset in zip(REPRESENTATIONS[representation], parts, part_offsets):
+            keys.append((lm, name))
+            offsets.append(offset)
+            tasks.append((x, part[indices], tol, deg))
+    if pool is not None:
+        tcks = pool.map(_compress_part_task, tasks)
+    else:
+        tcks = [_compress_part_task(task) for task in tasks]
+
+    retval = dict((lm, []) for lm in modes)
+    for (lm, name), tck, offset in zip(keys, tcks, offsets):
+        retval[lm].append((name, tck, offset, x[0], x[-1]))
+    return retval
+    # }}}
+
+
+class CompressedModesFile(object):
+    """
+    Reduced-order spline compressed modes of many waveforms, in one HDF5
+    file.
+
+    Layout:
+        /waveforms : one row per waveform, with its name and parameters
+        /index     : one row per (waveform, mode, part), with the position
+                     of its spline in /knots and /coeffs, its degree, offset
+                     and time range
+        /knots, /coeffs : B-spline knots and coefficients of all splines,
+                     concatenated
+    All datasets are chunked and grow as waveforms are appended, so that
+    a catalog of many waveforms is written and read with a few large
+    reads and writes, instead of one group per mode and waveform.
+
+    Usage:
+    ------
+        with CompressedModesFile("modes.h5", "w", param_names=["m1", "m2"]) as fp:
+            fp.append("BBH_1", {"m1": 10., "m2": 5.}, compress_modes(t, modes))
+        with CompressedModesFile("modes.h5") as fp:
+            modes = fp.evaluate("BBH_1", times)
+    """
+
+    name_length = 256
+    index_dtype = np.dtype(
+        [
+            ("wave", np.int64),
+            ("l", np.int32),
+            ("m", np.int32),
+            ("part", np.int32),
+            ("degree", np.int32),
+            ("start", np.int64),
+            ("size", np.int64),
+            ("offset", np.float64),
+            ("tmin", np.float64),
+            ("tmax", np.float64),
+        ]
+    )
+
+    def __init__(
+        self,
+        filename,
+        mode="r",
+        representation="modes",
+        param_names=[],
+        chunk_size=1 << 16,
+    ):
+        if mode == "r" and not os.path.exists(filename):
+            raise IOError("Compressed modes file {} not found".format(filename))
+        self.filename = filename
+        self.fp = h5py.File(filename, mode)
+        if "index" not in self.fp:
+            if mode == "r":
+                raise IOError("{} has no compressed modes".format(filename))
+            self._create(representation, param_names, chunk_size)
+        self.representation = self.fp.attrs["representation"]
+        if isinstance(self.representation, bytes):
+            self.representation = self.representation.decode()
+        self.param_names = [
+            name for name in self.fp["waveforms"].dtype.names if name != "name"
+        ]
+        if mode != "r":
+            self._check_layout(representation, param_names)
+        self._index = None
+        self._names = None
+
+    def _create(self, representation, param_names, chunk_size):
+        if representation not in REPRESENTATIONS:
+            raise IOError(
+                "Representation {} not one of {}".format(
+                    representation, list(REPRESENTATIONS)
+                )
+            )
+        self.fp.attrs["representation"] = representation
+        wave_dtype = np.dtype(
+            [("name", "S{}".format(self.name_length))]
+            + [(str(name), np.float64) for name in param_names]
+        )
+        for name, dtype, chunks in [
+            ("waveforms", wave_dtype, 1024),
+            ("index", self.index_dtype, 4096),
+            ("knots", np.float64, chunk_size),
+            ("coeffs", np.float64, chunk_size),
+        ]:
+            self.fp.create_dataset(
+                name, shape=(0,), maxshape=(None,), dtype=dtype, chunks=(chunks,)
+            )
+
+    def _check_layout(self, representation, param_names):
+        """
+        Waveforms appended to an existing file must share its
+        representation and parameters
+        """
+        if representation != self.representation:
+            raise IOError(
+                "{} stores modes as {}, not {}".format(
+                    self.filename, self.representation, representation
+                )
+            )
+        if param_names and [str(name) for name in param_names] != self.param_names:
+            raise IOError(
+                "{} stores parameters {}, not {}".format(
+                    self.filename, self.param_names, list(param_names)
+                )
+            )
+
+    def close(self):
+        self.fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    #
+
+    @property
+    def index(self):
+        """Index table, read once"""
+        if self._index is None:
+            self._index = self.fp["index"][()]
+        return self._index
+
+    @property
+    def names(self):
+        """Names of all waveforms"""
+        if self._names is None:
+            self._names = [x.decode() for x in self.fp["waveforms"]["name"]]
+        return self._names
+
+    def waveform_index(self, name):
+        if isinstance(name, (int, np.integer)):
+            return int(name)
+        try:
+            return self.names.index(name)
+        except ValueError:
+            raise IOError("Waveform {} not in {}".format(name, self.filename))
+
+    def parameters(self, name=None):
+        """Parameters of one waveform as a dict, or of all as a table"""
+        if name is None:
+            return self.fp["waveforms"][()]
+        row = self.fp["waveforms"][self.waveform_index(name)]
+        return dict((key, row[key]) for key in self.param_names)
+
+    #
+
+    def append(self, name, params, compressed):
+        """Appends one waveform. See `append_many`."""
+        return self.append_many([(name, params, compressed)])[0]
+
+    def append_many(self, waveforms):
+        """
+        Appends many waveforms, each a (name, {param: value},
+        compress_modes output) tuple, with one resize and write of each
+        dataset. Names must be new to the file. Returns their waveform
+        indices.
+        """
+        # {{{
+        num_waves = self.fp["waveforms"].shape[0]
+        num_rows = self.fp["index"].shape[0]
+        num_knots = self.fp["knots"].shape[0]
+        parts = REPRESENTATIONS[self.representation]
+
+        seen = set(self.names)
+        for name, _, _ in waveforms:
+            if str(name) in seen:
+                raise IOError(
+                    "Waveform {} already in {}".format(name, self.filename)
+                )
+            seen.add(str(name))
+
+        waves = np.zeros(len(waveforms), dtype=self.fp["waveforms"].dtype)
+        rows, knots, coeffs = [], [], []
+        start = num_knots
+        for idx, (name, params, compressed) in enumerate(waveforms):
+            waves["name"][idx] = str(name).encode()
+            for key in self.param_names:
+                waves[key][idx] = params.get(key, np.nan)
+            for (l, m), splines in sorted(compressed.items()):
+                for part, (t, c, k), offset, tmin, tmax in splines:
+                    rows.append(
+                        (
+                            num_waves + idx,
+                            l,
+                            m,
+                            parts.index(part),
+                            k,
+                            start,
+                            len(t),
+                            offset,
+                            tmin,
+                            tmax,
+                        )
+                    )
+                    knots.append(np.asarray(t, dtype=np.float64))
+                    coeffs.append(np.append(c, np.zeros(len(t) - len(c))))
+                    start += len(t)
+
+        for dset, data in [
+            ("waveforms", waves),
+            ("index", np.array(rows, dtype=self.index_dtype)),
+            ("knots", np.concatenate(knots) if knots else np.zeros(0)),
+            ("coeffs", np.concatenate(coeffs) if coeffs else np.zeros(0)),
+        ]:
+            size = self.fp[dset].shape[0]
+            self.fp[dset].resize((size + len(data),))
+            self.fp[dset][size:] = data
+        self._index, self._names = None, None
+        return list(range(num_waves, num_waves + len(waveforms)))
+        # }}}
+
+    #
+
+    def evaluate(self, name, times, modes=None):
+        """
+        Reconstructs the modes of one waveform at `times` (zero outside
+        the compressed time range). Knots and coefficients of all its
+        splines are read with one read each.
+
+        Returns {(l, m): complex numpy.array}
+        """
+        # {{{
+        times = np.asarray(times, dtype=np.float64)
+        rows = self.index[self.index["wave"] == self.waveform_index(name)]
+        if modes is not None:
+            keep = np.zeros(len(rows), dtype=bool)
+            for l, m in modes:
+                keep |= (rows["l"] == l) & (rows["m"] == m)
+            rows = rows[keep]
+        if len(rows) == 0:
+            return {}
+        lo = rows["start"].min()
+        hi = (rows["start"] + rows["size"]).max()
+        knots = self.fp["knots"][lo:hi]
+        coeffs = self.fp["coeffs"][lo:hi]
+
+        parts = {}
+        for row in rows:
+            i0, i1 = row["start"] - lo, row["start"] - lo + row["size"]
+            values = splev(times, (knots[i0:i1], coeffs[i0:i1], row["degree"]), ext=1)
+            parts[(int(row["l"]), int(row["m"]), int(row["part"]))] = (
+                values + row["offset"]
+            )
+
+        retval = {}
+        for l, m, _ in parts:
+            if (l, m) in retval:
+                continue
+            one, two = parts[(l, m, 0)], parts[(l, m, 1)]
+            if self.representation == "amp_phase":
+                retval[(l, m)] = one * np.exp(1.0j * two)
+            else:
+                retval[(l, m)] = one + 1.0j * two
+        return retval
+        # }}}
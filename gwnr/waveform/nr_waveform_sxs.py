@@ -468,13 +468,6 @@ def get_hplus_hcross_from_sxs(
             )
         except:
             pass
-    #
-    # Figure out how much memory to allocate
-    #
-    estimated_length_pow2 = nextpow2(MAX_NR_LENGTH * total_mass * lal.MTSUN_SI)
-    if debug:
-        print("estimated length = ", estimated_length_pow2)
-
     ###########################################################################
     # Read in the waveform from file & rescale it
     ###########################################################################
@@ -484,61 +477,39 @@ def get_hplus_hcross_from_sxs(
                 "\tUsing nr_wave datastructure. Rescaling to {}Msun".format(total_mass)
             )
         nrwav = hdf5_file_name
+        # Size the polarizations for this mass, from the modes' time span
+        nrwav.set_time_length(nrwav.required_time_length(M=total_mass, delta_t=delta_t))
         nrwav.get_polarizations(
-            M=total_mass, distance=distance, inclination=theta, phi=phi
+            delta_t=delta_t,
+            M=total_mass,
+            distance=distance * 1e6,
+            inclination=theta,
+            phi=phi,
         )
         if verbose:
             print("\tRescaled to {} Msun".format(nrwav.totalmass))
     else:
         if verbose:
             print("\tReading in waveform from {}..".format(hdf5_file_name))
-        idx = 0
-        max_num_length_tries = 10
-        num_length_tries = max_num_length_tries
-        while True:
-            # this loop is to make sure that an under-estimation of the waveform's
-            # length does not lead to failure, and we scale up the length allocation
-            # till the whole NR waveform fits in it (in powers of 2)
-            try:
-                if debug:
-                    print("\n \t>>try %d at reading waveform" % (idx + 1))
-                    print(
-                        "\t[More than ONE try is required if estimated NR length is too short]"
-                    )
-                idx += 1
-                group_name = get_param("group_name")  # GROUP NAME
-                nrwav = gwnr.nr.nr_wave(
-                    filename=hdf5_file_name,
-                    sample_rate=1.0 / delta_t,
-                    time_length=estimated_length_pow2,
-                    totalmass=total_mass,
-                    inclination=theta,
-                    phi=phi,
-                    modeLmin=modeLmin,
-                    modeLmax=modeLmax,
-                    distance=distance * 1e6,
-                    group_name=group_name,
-                    verbose=debug,
-                )
-                break
-            except ValueError as ve:
-                estimated_length_pow2 *= 2
-                num_length_tries -= 1
-                if num_length_tries == 0:
-                    if verbose:
-                        print(
-                            "......................................................................"
-                        )
-                        print(
-                            "Max number of length retries exceeded: {}. Final length tried: {}".format(
-                                max_num_length_tries, estimated_length_pow2 / 2
-                            )
-                        )
-                        print("Final ERROR: {}".format(ve))
-                        print(
-                            "......................................................................"
-                        )
-                    break
+        # Initial guess for the length of polarizations. nr_wave grows it to
+        # fit the modes once they are read, so that the file is read once.
+        estimated_length_pow2 = nextpow2(MAX_NR_LENGTH * total_mass * lal.MTSUN_SI)
+        if debug:
+            print("estimated length = ", estimated_length_pow2)
+        group_name = get_param("group_name")  # GROUP NAME
+        nrwav = gwnr.nr.nr_wave(
+            filename=hdf5_file_name,
+            sample_rate=1.0 / delta_t,
+            time_length=estimated_length_pow2,
+            totalmass=total_mass,
+            inclination=theta,
+            phi=phi,
+            modeLmin=modeLmin,
+            modeLmax=modeLmax,
+            distance=distance * 1e6,
+            group_name=group_name,
+            verbose=debug,
+        )
     if debug and type(hdf5_file_name) == str:
         print("\t Waveform read from %s" % hdf5_file_name, file=sys.stdout)
         sys.stdout.flush()
@@ -722,6 +693,66 @@ def get_hplus_hcross_from_sxs(
     return hp, hc, nrwav
 
 
+class _TemplateParamsOverride(object):
+    """
+    Template parameters (a dict or a ligolw row) with some of them replaced,
+    in the form that get_hplus_hcross_from_sxs reads them
+    """
+
+    def __init__(self, template_params, **overrides):
+        self.template_params = template_params
+        self.overrides = overrides
+
+    def __getitem__(self, value):
+        if value in self.overrides:
+            return self.overrides[value]
+        if value == "end_time":
+            try:
+                return float(self.template_params.get_end())
+            except AttributeError:
+                return self.template_params["end_time"]
+        try:
+            return getattr(self.template_params, value)
+        except AttributeError:
+            return self.template_params[value]
+
+
+################################################################################
+# Return re-scaled NR waveforms for many masses / orientations
+################################################################################
+def get_hplus_hcross_from_sxs_batch(
+    hdf5_file_name, template_params, delta_t, samples, **kwargs
+):
+    """
+    Polarizations of one NR simulation for many (total mass, inclination,
+    coalescence phase) tuples, with the file read only once. The polarization
+    arrays are sized for each mass from the time span of the mode data.
+
+    INPUT ARGUMENTS:
+    1. hdf5_file_name : STRING-path of the NR data file, or an nr_wave object
+    2. template_params : DICT or ligolw row with the other parameters, as
+           for get_hplus_hcross_from_sxs
+    3. delta_t : FLOAT-sample spacing (s)
+    4. samples : LIST of (mtotal, inclination, coa_phase) tuples
+    5. kwargs : passed to get_hplus_hcross_from_sxs
+
+    Returns a list of (hp, hc) tuples, one for each sample, and the nr_wave
+    object holding the mode data.
+    """
+    nrwav = hdf5_file_name
+    retval = []
+    for total_mass, inclination, coa_phase in samples:
+        params = _TemplateParamsOverride(
+            template_params,
+            mtotal=total_mass,
+            inclination=inclination,
+            coa_phase=coa_phase,
+        )
+        hp, hc, nrwav = get_hplus_hcross_from_sxs(nrwav, params, delta_t, **kwargs)
+        retval.append((hp, hc))
+    return retval, nrwav
+
+
 ################################################################################
 # Wrapper function between 'get_td_waveform' and 'get_hplus_hcross_from_sxs'
 ################################################################################
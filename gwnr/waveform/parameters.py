@@ -24,15 +24,32 @@ from __future__ import absolute_import, print_function
 
 import numpy as np
 
+# Solar mass in seconds (G M_sun / c^3), as lal.MTSUN_SI
+MTSUN_SI = 4.925490947641267e-06
+
+
+def _as_float_arrays(*args):
+    """Broadcasts inputs against each other, as float arrays"""
+    return np.broadcast_arrays(*[np.asarray(x, dtype=np.float64) for x in args])
+
+
+def _unwrap_scalar(x):
+    """Returns 0-d results as python floats, and arrays unchanged"""
+    if np.ndim(x) == 0:
+        return float(x)
+    return x
+
 
 def spins_to_PNeffective_spin(m1, m2, chi1, chi2):
+    m1, m2, chi1, chi2 = _as_float_arrays(m1, m2, chi1, chi2)
     chieff = (
         113.0 * m1 * m1 * chi1 + 113.0 * m2 * m2 * chi2 + 75.0 * m1 * m2 * (chi1 + chi2)
     ) / (113.0 * (m1 + m2) ** 2)
-    return chieff
+    return _unwrap_scalar(chieff)
 
 
 def spins_to_2PNeffective_spin(m1, m2, chi1, chi2):
+    m1, m2, chi1, chi2 = _as_float_arrays(m1, m2, chi1, chi2)
     q1, q2 = 1, 1
     num = (
         (1.0 + 80.0 * q1) * m1**2 * chi1**2
@@ -40,26 +57,30 @@ def spins_to_2PNeffective_spin(m1, m2, chi1, chi2):
         + 158.0 * m1 * m2 * chi1 * chi2
     )
     den = 16.0 * (m1 + m2) ** 2
-    return num / den
+    return _unwrap_scalar(num / den)
 
 
 def spins_to_massweighted_spin(m1, m2, chi1, chi2):
+    m1, m2, chi1, chi2 = _as_float_arrays(m1, m2, chi1, chi2)
     chiwt = m1 * chi1 + m2 * chi2
-    return chiwt / (m1 + m2)
+    return _unwrap_scalar(chiwt / (m1 + m2))
 
 
 def spins_to_damoureffective_spin(m1, m2, chi1, chi2):
+    m1, m2, chi1, chi2 = _as_float_arrays(m1, m2, chi1, chi2)
     chiwt = 4 * m1**2 * chi1 + 4 * m2**2 * chi2 + 3.0 * m1 * m2 * (chi1 + chi2)
-    return chiwt / 4.0 / (m1 + m2) ** 2
+    return _unwrap_scalar(chiwt / 4.0 / (m1 + m2) ** 2)
 
 
 def chip_from_masses_spins(m1, m2, s1x, s1y, s1z, s2x, s2y, s2z):
     """
     Compute the IMRPhenomPv2 chi-precessing "chi_p" parameter, given
-    component masses and spins for a binary.
+    component masses and spins for a binary. Inputs may be scalars or
+    arrays, and are broadcast against each other.
 
-    NOTE: Assumes convention m1 > m2
+    NOTE: The denominator uses the larger of the two masses
     """
+    m1, m2, s1x, s1y, s2x, s2y = _as_float_arrays(m1, m2, s1x, s1y, s2x, s2y)
     m1_2, m2_2 = m1**2, m2**2
     # Magnitude of the spin projections in the orbital plane */
     S1_perp = m1_2 * np.sqrt(s1x * s1x + s1y * s1y)
@@ -69,38 +90,122 @@ def chip_from_masses_spins(m1, m2, s1x, s1y, s1z, s2x, s2y, s2z):
     A2 = 2.0 + (3.0 * m1) / (2 * m2)
     ASp1 = A1 * S1_perp
     ASp2 = A2 * S2_perp
-    if type(m1) != float and type(m1) != int:
-        num = np.zeros(len(m1))
-        den = np.zeros(len(m1))
-        #
-        mask = ASp2 > ASp1
-        num[mask] = ASp2[mask]
-        mask = ASp2 <= ASp1
-        num[mask] = ASp1[mask]
-        #
-        den = A1 * m1_2
-    else:
-        if ASp2 > ASp1:
-            num = ASp2
-        else:
-            num = ASp1
-        if m2 > m1:
-            den = A2 * m2_2
-        else:
-            den = A1 * m1_2
+    num = np.maximum(ASp1, ASp2)
+    den = np.where(m2 > m1, A2 * m2_2, A1 * m1_2)
     # chip = max(A1 Sp1, A2 Sp2) / (A_i m_i^2) for i index of larger BH (See Eqn. 32 in technical document)
     chip = num / den
-    return chip
+    return _unwrap_scalar(chip)
 
 
 def q_to_eta(q):
-    return q / (1.0 + q) ** 2
+    q = np.asarray(q, dtype=np.float64)
+    return _unwrap_scalar(q / (1.0 + q) ** 2)
 
 
 def eta_to_q(eta):
-    a = c = 1.0
-    b = 2.0 - 1.0 / np.array(eta)
-    D = (b**2 - 4.0 * a * c) ** 0.5
-    # print type(a), type(b), type(c), type(D)
-    roots = [(-b + D) / (2.0 * a), (-b - D) / (2.0 * a)]
-    return roots[0]
+    """Mass ratio q = m1 / m2 >= 1 for symmetric mass ratio eta"""
+    eta = np.asarray(eta, dtype=np.float64)
+    # Round-off can push eta just above 1/4
+    D = np.sqrt(np.maximum(1.0 - 4.0 * eta, 0.0))
+    return _unwrap_scalar((1.0 + D) / (2.0 * eta) - 1.0)
+
+
+def masses_to_mchirp_eta(m1, m2):
+    m1, m2 = _as_float_arrays(m1, m2)
+    mt = m1 + m2
+    eta = m1 * m2 / mt**2
+    return _unwrap_scalar(mt * eta**0.6), _unwrap_scalar(eta)
+
+
+def masses_to_tau0_tau3(m1, m2, f_lower):
+    """
+    Chirp times tau0 and tau3 (in seconds), for component masses in
+    solar masses and a reference frequency f_lower (Hz)
+    """
+    m1, m2, f_lower = _as_float_arrays(m1, m2, f_lower)
+    mt = (m1 + m2) * MTSUN_SI
+    eta = m1 * m2 / (m1 + m2) ** 2
+    piMf = np.pi * mt * f_lower
+    tau0 = 5.0 / (256.0 * np.pi * f_lower * eta) * piMf ** (-5.0 / 3.0)
+    tau3 = 1.0 / (8.0 * f_lower * eta) * piMf ** (-2.0 / 3.0)
+    return _unwrap_scalar(tau0), _unwrap_scalar(tau3)
+
+
+# Columns read from SimInspiral / SnglInspiral tables by `table_to_arrays`
+TABLE_COLUMNS = [
+    "mass1",
+    "mass2",
+    "spin1x",
+    "spin1y",
+    "spin1z",
+    "spin2x",
+    "spin2y",
+    "spin2z",
+]
+
+
+def table_to_arrays(table, columns=None, derived=True, f_lower=None):
+    """
+    Reads columns of a ligolw SimInspiral or SnglInspiral table once into
+    a dict of numpy arrays, and adds derived columns in one vectorized
+    pass over them.
+
+    Inputs:
+    -------
+    table : ligolw SimInspiral or SnglInspiral table
+    columns : names of columns to read, in addition to TABLE_COLUMNS
+        (if deriving). Columns the table does not have are skipped.
+    derived : add "mchirp", "eta", "q", "mtotal", "chi_eff" (mass-weighted
+        aligned spin), "chi_p", and, if a lower frequency is known, "tau0"
+        and "tau3". These replace stored columns of the same name.
+    f_lower : frequency for tau0 / tau3. Defaults to the table's f_lower
+        column, if it has one.
+
+    Returns
+    -------
+    dict of {column name: numpy.array}
+    """
+    # {{{
+    names = list(columns or [])
+    if derived:
+        names = TABLE_COLUMNS + [c for c in names if c not in TABLE_COLUMNS]
+        if f_lower is None and "f_lower" not in names:
+            names.append("f_lower")
+    names = [c for c in names if c in table.columnnames]
+
+    arrays = {}
+    for name in names:
+        values = table.getColumnByName(name)
+        try:
+            arrays[name] = np.asarray(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            arrays[name] = np.asarray(list(values))
+    if not derived:
+        return arrays
+
+    for name in TABLE_COLUMNS:
+        if name not in arrays:
+            arrays[name] = np.zeros(len(table))
+    m1, m2 = arrays["mass1"], arrays["mass2"]
+    arrays["mtotal"] = m1 + m2
+    arrays["mchirp"], arrays["eta"] = masses_to_mchirp_eta(m1, m2)
+    arrays["q"] = np.maximum(m1, m2) / np.minimum(m1, m2)
+    arrays["chi_eff"] = spins_to_massweighted_spin(
+        m1, m2, arrays["spin1z"], arrays["spin2z"]
+    )
+    arrays["chi_p"] = chip_from_masses_spins(
+        m1,
+        m2,
+        arrays["spin1x"],
+        arrays["spin1y"],
+        arrays["spin1z"],
+        arrays["spin2x"],
+        arrays["spin2y"],
+        arrays["spin2z"],
+    )
+    if f_lower is None:
+        f_lower = arrays.get("f_lower")
+    if f_lower is not None:
+        arrays["tau0"], arrays["tau3"] = masses_to_tau0_tau3(m1, m2, f_lower)
+    return arrays
+    # }}}
@@ -25,7 +25,17 @@ Script to
     
 """
 
+import glob
+import hashlib
+import json
 import os
+import shutil
+import subprocess
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool
 from pathlib import Path
 
 import numpy as np
@@ -68,11 +78,29 @@ class PrepareSXSWaveform:
     transform_to_com_frame
     upload_output_dir
     prepare_waveform
+    run_pipeline
 
 
+    Notes
+    -----
+    `run_pipeline` records, for each stage, a hash of the
+    contents of its input files and of its parameters in
+    <out_dir>/pipeline_state.json. On a rerun, stages whose
+    inputs and outputs are unchanged are skipped, and horizon
+    joining runs concurrently with waveform joining and
+    extrapolation. Use `prepare_sxs_waveforms` to run many
+    simulations through a process pool.
 
     """
 
+    pipeline_stages = [
+        "join_waveforms",
+        "join_horizons",
+        "extrapolate",
+        "transform_to_com_frame",
+    ]
+    pipeline_state_file_name = "pipeline_state.json"
+
     def __init__(
         self,
         sim_name,
@@ -82,6 +110,7 @@ class PrepareSXSWaveform:
         joined_horizons_outfile_name=None,
         lev=2,
         ecc=0,
+        exist_ok=False,
     ):
         if not os.path.isabs(sim_dir):
             raise ValueError("Please provide the full sim path!")
@@ -105,6 +134,7 @@ class PrepareSXSWaveform:
             # print(f"Creating out directory ({sim_name}_waveforms) in cwd...")
 
         else:
+            self._out_dir = str(out_dir)
             print(f"Out directory is set to {self.out_dir}")
 
         if os.path.isfile(self.out_dir):
@@ -115,7 +145,7 @@ class PrepareSXSWaveform:
         else:
             if not os.path.isdir(self.out_dir):
                 os.mkdir(self.out_dir)
-            else:
+            elif not exist_ok:
                 raise NameError(
                     f"A directory with the name {self.out_dir}"
                     " already exists. Please choose a different name"
@@ -133,9 +163,11 @@ class PrepareSXSWaveform:
         )
 
         if joined_horizons_outfile_name is None:
-            self._joined_horizons_outfile_name = (
-                sim_name + f"Lev{self.lev}JoinedHorizons.h5"
-            )
+            joined_horizons_outfile_name = sim_name + f"Lev{self.lev}JoinedHorizons.h5"
+
+        self._joined_horizons_outfile_name = joined_horizons_outfile_name
+
+        self._state_lock = threading.Lock()
 
     @property
     def sim_dir(self):
@@ -189,32 +221,76 @@ class PrepareSXSWaveform:
     def extrap_out_dir(self):
         return os.path.join(self.out_dir, Path("extrapolated"))
 
-    def join_waveform_h5_files(self, verbose=False):
+    @property
+    def pipeline_state_file(self):
+        return os.path.join(self.out_dir, self.pipeline_state_file_name)
+
+    def input_patterns(self, rel_path):
+        """Glob patterns of the inspiral and ringdown
+        segments of `rel_path` (relative to each segment's
+        Run directory)"""
+
+        data_paths_insp = os.path.join(
+            self.sim_dir,
+            Path(f"{self.sim_name}/Ecc{self.ecc}" f"/Ev/Lev{self.lev}*/Run/{rel_path}"),
+        )
+
+        data_paths_rdown = os.path.join(
+            self.sim_dir,
+            Path(
+                f"{self.sim_name}/Ecc{self.ecc}"
+                f"/Ev/Lev{self.lev}_Ringdown/"
+                f"Lev{self.lev}*/Run/{rel_path}"
+            ),
+        )
+
+        return data_paths_insp, data_paths_rdown
+
+    def input_files(self, rel_path):
+        """The segment files that match `input_patterns`"""
+
+        files = []
+
+        for pattern in self.input_patterns(rel_path):
+            files += sorted(glob.glob(pattern))
+
+        return files
+
+    def run_command(self, run_cmd):
+        """Run a shell command, print its output and
+        return its exit code. Raises RuntimeError if
+        the command fails"""
+
+        print(f"Running command\n {run_cmd}")
+
+        out = subprocess.run(
+            run_cmd,
+            shell=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True,
+        )
+
+        print("Command output \n", out.stdout)
+
+        if out.returncode != 0:
+            raise RuntimeError(
+                f"Command failed with exit code {out.returncode}: {run_cmd}"
+            )
+
+        return out.returncode
+
+    def join_waveform_h5_files(self, verbose=False, force=False):
         """Join the waveform h5 files"""
 
-        if Path(self.joined_horizons_outfile_path).exists():
+        if Path(self.joined_waveform_outfile_path).exists() and not force:
             print("File already exists. Skipping operation.")
 
         else:
             print("Joining waveform h5 files...")
 
-            data_paths_insp = os.path.join(
-                self.sim_dir,
-                Path(
-                    f"{self.sim_name}/Ecc{self.ecc}"
-                    f"/Ev/Lev{self.lev}*/Run/GW2/"
-                    "rh_FiniteRadii_CodeUnits.h5"
-                ),
-            )
-
-            data_paths_rdown = os.path.join(
-                self.sim_dir,
-                Path(
-                    f"{self.sim_name}/Ecc{self.ecc}"
-                    f"/Ev/Lev{self.lev}_Ringdown/"
-                    f"Lev{self.lev}*/Run/GW2/"
-                    "rh_FiniteRadii_CodeUnits.h5"
-                ),
+            data_paths_insp, data_paths_rdown = self.input_patterns(
+                "GW2/rh_FiniteRadii_CodeUnits.h5"
             )
 
             if verbose:
@@ -228,25 +304,11 @@ class PrepareSXSWaveform:
                 f" -l {data_paths_insp} {data_paths_rdown}"
             )
 
-            print(f"Running command\n {run_cmd}")
-
-            # with open('join_waveforms_output.txt', "wb") as fout:
-            # subprocess.check_call('dir',stdout=f)
-            # cmd_out = subprocess.Popen(run_cmd, stdout=subprocess.PIPE)
-
-            # for cline in iter(lambda: process.stdout.read(1), b""):
-            # sys.stdout.buffer.write(cline)
-            # f.buffer.write(cline)
-
-            cmd = os.popen(run_cmd)
-
-            out = cmd.read()
-
-            print("Command output \n", out)
+            self.run_command(run_cmd)
 
             print("Command completed. Please check Errors.txt for details")
 
-    def extrapolate(self, ch_mass=1.0, use_stupid_nrar_format=True):
+    def extrapolate(self, ch_mass=1.0, use_stupid_nrar_format=True, force=False):
         """Extrapolate the waveform"""
 
         try:
@@ -259,7 +321,7 @@ class PrepareSXSWaveform:
             print("No extrapolated files from previous run found")
             exists = []
 
-        if len(exists) > 0:
+        if len(exists) > 0 and not force:
             print("Skipping extrapolation")
 
         else:
@@ -275,32 +337,20 @@ class PrepareSXSWaveform:
                 PlotFormat="",
             )
 
-    def join_horizons(self, verbose=False):
+    def join_horizons(self, verbose=False, force=False):
         """Join horizons file and save to the joined
         file dir"""
 
-        if Path(self.joined_horizons_outfile_path).exists():
+        if Path(self.joined_horizons_outfile_path).exists() and not force:
             print("File already exists. Skipping join horizons operation.")
 
         else:
             print("Joining Horizon h5 files...")
 
-            input_insp_dat_rel_loc = Path(
-                f"{self.sim_name}/Ecc{self.ecc}"
-                f"/Ev/Lev{self.lev}*/Run/"
-                "ApparentHorizons/Horizons.h5"
-            )
-
-            input_rdown_dat_rel_loc = Path(
-                f"{self.sim_name}/Ecc{self.ecc}"
-                f"/Ev/Lev{self.lev}_Ringdown/"
-                f"Lev{self.lev}*/Run/"
+            data_paths_insp, data_paths_rdown = self.input_patterns(
                 "ApparentHorizons/Horizons.h5"
             )
 
-            data_paths_insp = os.path.join(self.sim_dir, input_insp_dat_rel_loc)
-
-            data_paths_rdown = os.path.join(self.sim_dir, input_rdown_dat_rel_loc)
             if verbose:
                 run_cmd = "JoinH5 -v"
 
@@ -312,13 +362,7 @@ class PrepareSXSWaveform:
                 f" -l {data_paths_insp} {data_paths_rdown}"
             )
 
-            print(f"Running command\n {run_cmd}")
-
-            cmd = os.popen(run_cmd)
-
-            out = cmd.read()
-
-            print("Command output \n", out)
+            self.run_command(run_cmd)
 
             print("Command completed. Please check Errors.txt for details.")
 
@@ -328,6 +372,7 @@ class PrepareSXSWaveform:
         skip_ending_fraction=0.10,
         file_format="NRAR",
         extrapolation_orders=[-1, 2, 3, 4, 5, 6],
+        force=False,
     ):
         from scri.SpEC.com_motion import remove_avg_com_motion
 
@@ -341,7 +386,7 @@ class PrepareSXSWaveform:
             print("Continuing with transformation")
             exists = []
 
-        if len(exists) > 0:
+        if len(exists) > 0 and not force:
             print("Skipping CoM transformation")
         else:
             print("Transforming to CoM frame...")
@@ -385,7 +430,7 @@ class PrepareSXSWaveform:
     ):
         self.join_waveform_h5_files(verbose=verbose)
 
-        self.extrapolate(ChMass=ChMass, UseStupidNRARFormat=UseStupidNRARFormat)
+        self.extrapolate(ch_mass=ChMass, use_stupid_nrar_format=UseStupidNRARFormat)
 
         self.join_horizons(verbose=verbose)
 
@@ -404,3 +449,373 @@ class PrepareSXSWaveform:
         print("\n--------------------------------------------------------\n")
 
         return True
+
+    def read_pipeline_state(self):
+        """The stage records of previous `run_pipeline` calls"""
+
+        if not os.path.isfile(self.pipeline_state_file):
+            return {"files": {}, "stages": {}}
+
+        with open(self.pipeline_state_file, "r") as fp:
+            return json.load(fp)
+
+    def write_pipeline_state(self):
+        with self._state_lock:
+            tmp_file = self.pipeline_state_file + ".tmp"
+
+            with open(tmp_file, "w") as fp:
+                json.dump(self._state, fp, indent=1, sort_keys=True)
+
+            os.rename(tmp_file, self.pipeline_state_file)
+
+    def file_hash(self, path):
+        """SHA-256 of the contents of a file. Hashes are
+        kept in the pipeline state, and only recomputed when
+        the file's size or modification time changes"""
+
+        stat = os.stat(path)
+
+        with self._state_lock:
+            entry = self._state["files"].get(path)
+
+        if (
+            entry is not None
+            and entry["size"] == stat.st_size
+            and entry["mtime_ns"] == stat.st_mtime_ns
+        ):
+            return entry["sha256"]
+
+        sha = hashlib.sha256()
+
+        with open(path, "rb") as fp:
+            for chunk in iter(lambda: fp.read(1 << 20), b""):
+                sha.update(chunk)
+
+        with self._state_lock:
+            self._state["files"][path] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": sha.hexdigest(),
+            }
+
+        return sha.hexdigest()
+
+    def stage_input_files(self, stage, extrapolation_orders=None):
+        """Files a pipeline stage reads"""
+
+        if stage == "join_waveforms":
+            return self.input_files("GW2/rh_FiniteRadii_CodeUnits.h5")
+
+        elif stage == "join_horizons":
+            return self.input_files("ApparentHorizons/Horizons.h5")
+
+        elif stage == "extrapolate":
+            return [self.joined_waveform_outfile_path]
+
+        elif stage == "transform_to_com_frame":
+            return [
+                os.path.join(
+                    self.extrap_out_dir,
+                    f"rhOverM_Extrapolated_N{extrapolation_order}.h5",
+                )
+                for extrapolation_order in extrapolation_orders
+            ] + [self.joined_horizons_outfile_path]
+
+        raise ValueError(f"Unknown pipeline stage {stage}")
+
+    def stage_output_files(self, stage):
+        """Files a pipeline stage has written"""
+
+        if stage == "join_waveforms":
+            files = [self.joined_waveform_outfile_path]
+
+        elif stage == "join_horizons":
+            files = [self.joined_horizons_outfile_path]
+
+        else:
+            try:
+                files = sorted(os.listdir(self.extrap_out_dir))
+            except OSError:
+                files = []
+
+            if stage == "extrapolate":
+                files = [item for item in files if "CoM" not in item]
+
+            else:
+                files = [item for item in files if "CoM" in item]
+
+            files = [os.path.join(self.extrap_out_dir, item) for item in files]
+
+        return [item for item in files if os.path.isfile(item)]
+
+    def stage_input_hash(self, stage, params, extrapolation_orders=None):
+        """Hash of the contents of a stage's input files,
+        and of its parameters"""
+
+        files = self.stage_input_files(stage, extrapolation_orders=extrapolation_orders)
+
+        if len(files) == 0:
+            raise IOError(f"No input files found for stage {stage}")
+
+        missing = [item for item in files if not os.path.isfile(item)]
+
+        if len(missing) > 0:
+            raise IOError(f"Missing input files for stage {stage}: {missing}")
+
+        sha = hashlib.sha256()
+
+        sha.update(json.dumps([stage, params], sort_keys=True).encode())
+
+        for item in files:
+            sha.update(os.path.basename(item).encode())
+            sha.update(self.file_hash(item).encode())
+
+        return sha.hexdigest()
+
+    def run_stage(
+        self,
+        stage,
+        func,
+        params,
+        force=False,
+        extrapolation_orders=None,
+        options=None,
+    ):
+        """Run one pipeline stage, unless its inputs and outputs
+        are unchanged since it was last run. Returns the stage
+        record, with its status ("ran" or "skipped") and
+        run time.
+
+        `params` are passed to `func` and are part of the
+        stage's input hash. `options` (e.g. verbosity) are
+        passed to `func` too, but do not affect its outputs
+        and are not hashed.
+
+        Outputs of an earlier run are moved aside while the
+        stage runs, and are restored if it fails"""
+
+        itime = time.time()
+
+        input_hash = self.stage_input_hash(
+            stage, params, extrapolation_orders=extrapolation_orders
+        )
+
+        with self._state_lock:
+            record = self._state["stages"].get(stage)
+
+        outputs = self.stage_output_files(stage)
+
+        if (
+            not force
+            and record is not None
+            and record["input_hash"] == input_hash
+            and sorted(record["outputs"]) == outputs
+            and all(
+                self.file_hash(item) == record["outputs"][item] for item in outputs
+            )
+        ):
+            print(f"{self.sim_name} Lev{self.lev}: inputs unchanged, skipping {stage}")
+
+            return {"status": "skipped", "seconds": time.time() - itime}
+
+        # Stale outputs would be taken for fresh ones, so they
+        # are moved out of the stage's output directories
+        backup_dir = os.path.join(self.out_dir, f".{stage}.previous")
+
+        if os.path.isdir(backup_dir):
+            shutil.rmtree(backup_dir)
+
+        os.mkdir(backup_dir)
+
+        backups = []
+
+        for idx, item in enumerate(outputs):
+            backup = os.path.join(backup_dir, f"{idx}_{os.path.basename(item)}")
+            os.replace(item, backup)
+            backups.append((item, backup))
+
+        try:
+            func(force=True, **dict(params, **(options or {})))
+
+            outputs = self.stage_output_files(stage)
+
+            if len(outputs) == 0:
+                raise RuntimeError(f"Stage {stage} wrote no output files")
+
+        except Exception:
+            for item in self.stage_output_files(stage):
+                os.remove(item)
+
+            for item, backup in backups:
+                os.replace(backup, item)
+
+            shutil.rmtree(backup_dir)
+
+            raise
+
+        shutil.rmtree(backup_dir)
+
+        record = {
+            "input_hash": input_hash,
+            "outputs": dict((item, self.file_hash(item)) for item in outputs),
+            "seconds": time.time() - itime,
+            "finished": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+
+        with self._state_lock:
+            self._state["stages"][stage] = record
+
+        self.write_pipeline_state()
+
+        return {"status": "ran", "seconds": record["seconds"]}
+
+    def run_pipeline(
+        self,
+        verbose=False,
+        ch_mass=1.0,
+        use_stupid_nrar_format=True,
+        skip_beginning_fraction=0.01,
+        skip_ending_fraction=0.10,
+        file_format="NRAR",
+        extrapolation_orders=[-1, 2, 3, 4, 5, 6],
+        force=False,
+        parallel_stages=True,
+    ):
+        """Run all stages of `prepare_waveform`, skipping
+        the ones whose inputs are unchanged since their last
+        run (unless `force`). Horizon joining runs
+        concurrently with waveform joining and extrapolation
+        if `parallel_stages`.
+
+        Returns
+        -------
+        timing : dict
+                 {stage: {"status": "ran" or "skipped",
+                 "seconds": time taken}}
+        """
+
+        self._state = self.read_pipeline_state()
+
+        timing = {}
+
+        def horizons():
+            return self.run_stage(
+                "join_horizons",
+                self.join_horizons,
+                {},
+                force=force,
+                options={"verbose": verbose},
+            )
+
+        with ThreadPoolExecutor(max_workers=2 if parallel_stages else 1) as executor:
+            if parallel_stages:
+                horizons_future = executor.submit(horizons)
+
+            timing["join_waveforms"] = self.run_stage(
+                "join_waveforms",
+                self.join_waveform_h5_files,
+                {},
+                force=force,
+                options={"verbose": verbose},
+            )
+
+            timing["extrapolate"] = self.run_stage(
+                "extrapolate",
+                self.extrapolate,
+                {
+                    "ch_mass": ch_mass,
+                    "use_stupid_nrar_format": use_stupid_nrar_format,
+                },
+                force=force,
+            )
+
+            if parallel_stages:
+                timing["join_horizons"] = horizons_future.result()
+
+            else:
+                timing["join_horizons"] = horizons()
+
+        timing["transform_to_com_frame"] = self.run_stage(
+            "transform_to_com_frame",
+            self.transform_to_com_frame,
+            {
+                "skip_beginning_fraction": skip_beginning_fraction,
+                "skip_ending_fraction": skip_ending_fraction,
+                "file_format": file_format,
+                "extrapolation_orders": list(extrapolation_orders),
+            },
+            force=force,
+            extrapolation_orders=extrapolation_orders,
+        )
+
+        for stage in self.pipeline_stages:
+            print(
+                f"{self.sim_name} Lev{self.lev} {stage}: "
+                f"{timing[stage]['status']} ({timing[stage]['seconds']:.1f}s)"
+            )
+
+        return timing
+
+
+def _run_pipeline_job(args):
+    """Run the pipeline of one simulation, in a pool worker"""
+
+    job, pipeline_kwargs = args
+
+    result = dict(job)
+
+    itime = time.time()
+
+    try:
+        wfp = PrepareSXSWaveform(exist_ok=True, **job)
+
+        result["stages"] = wfp.run_pipeline(**pipeline_kwargs)
+
+        result["status"] = "done"
+
+    except Exception:
+        result["status"] = "failed"
+
+        result["error"] = traceback.format_exc()
+
+        print(f"Failed to prepare {job}:\n{result['error']}")
+
+    result["seconds"] = time.time() - itime
+
+    return result
+
+
+def prepare_sxs_waveforms(jobs, num_processes=1, **pipeline_kwargs):
+    """Prepare the waveforms of many simulations through
+    a pool of `num_processes` processes
+
+    Parameters
+    ----------
+    jobs : list
+           dicts of arguments of `PrepareSXSWaveform`,
+           one per simulation and Lev
+    num_processes : int
+                    The number of simulations prepared
+                    at the same time
+    pipeline_kwargs : dict
+                      Options passed to `run_pipeline`
+
+    Returns
+    -------
+    results : list
+              One dict per job, with its arguments, its
+              "status" ("done" or "failed"), the traceback
+              of failed jobs ("error"), and the "seconds"
+              taken in total and in each of its "stages"
+    """
+
+    tasks = [(dict(job), pipeline_kwargs) for job in jobs]
+
+    if len(tasks) == 0:
+        return []
+
+    if num_processes <= 1:
+        return [_run_pipeline_job(task) for task in tasks]
+
+    with Pool(min(num_processes, len(tasks)), maxtasksperchild=1) as pool:
+        return pool.map(_run_pipeline_job, tasks, chunksize=1)
@@ -130,18 +130,49 @@ def get_freq_crossings(freq, f0, df_threshold=0.4):
         Array of precise crossing frequencies. These may be slightly different
         from f0 given that the `freq` is discretely sampled
     """
-    f0_crossing_times, f0_crossing_freqs = [], []
-    for idx, finst in enumerate(freq):
-        if idx == 0 or idx == len(freq) - 1:
-            continue
-        if (
-            (np.abs(freq[idx - 1] - f0) > np.abs(finst - f0))
-            and (np.abs(freq[idx + 1] - f0) > np.abs(finst - f0))
-            and (np.abs(finst - f0) < df_threshold)
-        ):
-            f0_crossing_freqs.append(finst)
-            f0_crossing_times.append(freq.sample_times[idx])
-    return (np.array(f0_crossing_times), np.array(f0_crossing_freqs))
+    fvals = np.asarray(freq)
+    dist = np.abs(fvals - f0)
+    idx = np.where(
+        (dist[:-2] > dist[1:-1]) & (dist[2:] > dist[1:-1]) & (dist[1:-1] < df_threshold)
+    )[0] + 1
+    return (np.asarray(freq.sample_times)[idx], fvals[idx])
+
+
+def get_freq_crossings_batch(freqs, f0, df_threshold=0.4):
+    """
+    `get_freq_crossings` for many frequency series (of any lengths) at
+    once. All series are scanned in a single pass over their concatenation.
+
+    Inputs
+    ------
+    freqs: list of TimeSeries of frequency values
+    f0:   Frequency value that one needs the crossing times for
+
+    Output
+    ------
+    List of (crossing_times, crossing_freqs) tuples, one for each series
+    """
+    # {{{
+    if len(freqs) == 0:
+        return []
+    lengths = np.array([len(f) for f in freqs])
+    ends = np.cumsum(lengths)
+    fvals = np.concatenate([np.asarray(f) for f in freqs])
+    times = np.concatenate([np.asarray(f.sample_times) for f in freqs])
+
+    dist = np.abs(fvals - f0)
+    is_crossing = np.zeros(len(fvals), dtype=bool)
+    is_crossing[1:-1] = (
+        (dist[:-2] > dist[1:-1]) & (dist[2:] > dist[1:-1]) & (dist[1:-1] < df_threshold)
+    )
+    # First and last samples of each series are never crossings
+    is_crossing[ends - lengths] = False
+    is_crossing[ends - 1] = False
+
+    idx = np.where(is_crossing)[0]
+    splits = np.searchsorted(idx, ends[:-1])
+    return [(times[i], fvals[i]) for i in np.split(idx, splits)]
+    # }}}
 
 
 def get_time_at_y(fr, fvalue):
@@ -157,10 +188,9 @@ def get_time_at_y(fr, fvalue):
         0
     ]  # Assume a properly aligned TimeSeries
     # Starting guess
-    obj_func = np.abs(np.abs(fr) - fvalue)[idx_first:idx_end]
-    id_start = np.where(obj_func == np.min(obj_func))[0][
-        int(np.ceil(len(np.where(obj_func == np.min(obj_func))[0]) / 2))
-    ]
+    obj_func = np.abs(np.abs(np.asarray(fr)) - fvalue)[idx_first:idx_end]
+    id_ties = np.where(obj_func == np.min(obj_func))[0]
+    id_start = idx_first + id_ties[len(id_ties) // 2]
     # Interpolate and find
     frI = InterpolatedUnivariateSpline(fr.sample_times[idx_first:idx_end], obj_func)
     tmp = minimize_scalar(
@@ -173,56 +203,105 @@ def get_time_at_y(fr, fvalue):
     return tmp["x"]
 
 
-def get_isco_x(mass1, mass2, spin1z, spin2z, show_figure=False):
-    def isco_eqn(
-        x,
-        mass1,
-        mass2,
-        spin1z,
-        spin2z,
-    ):
-        """ """
-        try:
-            if x <= 0:
-                return 1e99
-        except:
-            pass
-
-        dm = mass1 - mass2
-        total_mass = mass1 + mass2
-        dm_over_m = dm / total_mass
-        eta = mass1 * mass2 / total_mass / total_mass
-
-        # S^c_{1,2} = s{1,2}z * m{1,2} * m{1,2}
-        s_c_1 = spin1z * mass1 * mass1
-        s_c_2 = spin2z * mass2 * mass2
-
-        # s_c_l = ell.S^c = Z.S^c, with
-        # S^c = S^c_1 + S^c_2
-        s_c_l = s_c_1 + s_c_2
-
-        # sigma_c_l = ell.sigma^c = Z.sigma_c, with
-        # sigma^c = (M/m2) S^c_2 - (M/m1) S^c_1
-        sigma_c_l = (total_mass / mass2) * s_c_2 - (total_mass / mass1) * s_c_1
-
-        # s_c_0l = ell.S^c_0 = Z.S^c_0, with
-        # S^c_0 = (1 + m2/m1) S^c_1 + (1 + m1/m2) S^_2
-        s_c_0l = (1.0 + mass2 / mass1) * s_c_1 + (1.0 + mass1 / mass2) * s_c_2
-
-        # Now, normalize all spin combinations with total_mass^2
-        s_c_l /= total_mass**2
-        sigma_c_l /= total_mass**2
-        s_c_0l /= total_mass**2
+def get_times_at_y_batch(frs, fvalue):
+    """
+    Batched version of `get_time_at_y`, for many TimeSeries (of any
+    lengths) at once. The same search window is used for each series (from
+    20% of its length up to t = 0), but the crossing time is found by
+    linear interpolation of |fr| - fvalue around the closest sample,
+    instead of by minimizing a spline of each series.
+
+    Returns an array with one time per series.
+    """
+    # {{{
+    lengths = np.array([len(fr) for fr in frs])
+    starts = np.cumsum(lengths) - lengths
+    yvals = np.abs(np.concatenate([np.asarray(fr) for fr in frs])) - fvalue
+    times = np.concatenate([np.asarray(fr.sample_times) for fr in frs])
+    series = np.repeat(np.arange(len(frs)), lengths)
+
+    # Search window of each series, as in get_time_at_y
+    idx_first = starts + (lengths * 0.2).astype(int)
+    idx_end = starts + np.array(
+        [np.argmin(np.abs(np.asarray(fr.sample_times))) for fr in frs]
+    )
+    position = np.arange(len(yvals))
+    in_window = (position >= idx_first[series]) & (position < idx_end[series])
+
+    # Closest sample to fvalue in each window
+    obj_func = np.where(in_window, np.abs(yvals), np.inf)
+    order = np.lexsort((obj_func, series))
+    closest = order[starts]
+
+    # Linear interpolation to the sign change next to it
+    t_cross = times[closest].astype(float)
+    for side in [1, -1]:
+        other = np.clip(closest + side, starts, starts + lengths - 1)
+        y0, y1 = yvals[closest], yvals[other]
+        crosses = (np.sign(y0) != np.sign(y1)) & (other != closest)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t_lin = times[closest] + (times[other] - times[closest]) * y0 / (y0 - y1)
+        update = crosses & (t_cross == times[closest])
+        t_cross[update] = t_lin[update]
+    return t_cross
+    # }}}
+
 
+def isco_pn_coefficients(mass1, mass2, spin1z, spin2z, verbose=False):
+    """
+    Coefficients (pn1p5, pn2, pn2p5, pn3) of the PN ISCO equation
+    1 - 6 x + pn1p5 x^1.5 + pn2 x^2 + pn2p5 x^2.5 + pn3 x^3,
+    for (arrays of) aligned-spin binaries.
+    """
+    mass1 = np.asarray(mass1, dtype=float)
+    mass2 = np.asarray(mass2, dtype=float)
+    spin1z = np.asarray(spin1z, dtype=float)
+    spin2z = np.asarray(spin2z, dtype=float)
+
+    dm = mass1 - mass2
+    total_mass = mass1 + mass2
+    dm_over_m = dm / total_mass
+    eta = mass1 * mass2 / total_mass / total_mass
+
+    # S^c_{1,2} = s{1,2}z * m{1,2} * m{1,2}
+    s_c_1 = spin1z * mass1 * mass1
+    s_c_2 = spin2z * mass2 * mass2
+
+    # s_c_l = ell.S^c = Z.S^c, with
+    # S^c = S^c_1 + S^c_2
+    s_c_l = s_c_1 + s_c_2
+
+    # sigma_c_l = ell.sigma^c = Z.sigma_c, with
+    # sigma^c = (M/m2) S^c_2 - (M/m1) S^c_1
+    sigma_c_l = (total_mass / mass2) * s_c_2 - (total_mass / mass1) * s_c_1
+
+    # s_c_0l = ell.S^c_0 = Z.S^c_0, with
+    # S^c_0 = (1 + m2/m1) S^c_1 + (1 + m1/m2) S^_2
+    s_c_0l = (1.0 + mass2 / mass1) * s_c_1 + (1.0 + mass1 / mass2) * s_c_2
+
+    # Now, normalize all spin combinations with total_mass^2
+    s_c_l = s_c_l / total_mass**2
+    sigma_c_l = sigma_c_l / total_mass**2
+    s_c_0l = s_c_0l / total_mass**2
+
+    if verbose:
         print(f"Spin combos: {s_c_l}, {sigma_c_l}, {s_c_0l} for ({spin1z}, {spin2z})")
 
-        pn1p5 = 14 * s_c_l + 6.0 * dm_over_m * sigma_c_l
-        pn2 = 14.0 * eta - 3 * s_c_0l**2
-        pn2p5 = -(
-            (22.0 + 32.0 * eta) * s_c_l + dm_over_m * sigma_c_l * (18.0 + 15.0 * eta)
-        )
-        pn3 = (397.0 / 2.0 - 123.0 * np.pi * np.pi / 16.0) * eta - 14.0 * eta**2
-        return (
+    pn1p5 = 14 * s_c_l + 6.0 * dm_over_m * sigma_c_l
+    pn2 = 14.0 * eta - 3 * s_c_0l**2
+    pn2p5 = -(
+        (22.0 + 32.0 * eta) * s_c_l + dm_over_m * sigma_c_l * (18.0 + 15.0 * eta)
+    )
+    pn3 = (397.0 / 2.0 - 123.0 * np.pi * np.pi / 16.0) * eta - 14.0 * eta**2
+    return pn1p5, pn2, pn2p5, pn3
+
+
+def isco_eqn(x, mass1, mass2, spin1z, spin2z):
+    """Effective binary potential, whose minimum in x is the ISCO"""
+    pn1p5, pn2, pn2p5, pn3 = isco_pn_coefficients(mass1, mass2, spin1z, spin2z)
+    x = np.asarray(x, dtype=float)
+    with np.errstate(invalid="ignore"):
+        val = (
             1
             - 6.0 * x
             + pn1p5 * x**1.5
@@ -230,34 +309,150 @@ def get_isco_x(mass1, mass2, spin1z, spin2z, show_figure=False):
             + pn2p5 * x**2.5
             + pn3 * x**3
         )
+    return np.where(x <= 0, 1e99, val)
+
+
+def _solve_isco_x(coeffs, x_max=1.0, num_grid=32, tol=1e-12, max_iterations=100):
+    """
+    Minimizes the ISCO potential for each row of `coeffs` (one per binary),
+    i.e. finds the first root of its derivative with x > 0, by safeguarded
+    Newton iterations using the analytic second derivative. The root is
+    looked for in (0, x_max], then in successively wider ranges up to
+    64 * x_max. Returns NaN where the potential has no minimum there.
+    """
+    # {{{
+    pn1p5, pn2, pn2p5, pn3 = coeffs
+
+    def dpot(x):
+        sqrtx = np.sqrt(x)
+        return (
+            -6.0
+            + 1.5 * pn1p5 * sqrtx
+            + 2.0 * pn2 * x
+            + 2.5 * pn2p5 * x * sqrtx
+            + 3.0 * pn3 * x * x
+        )
 
-    res = minimize_scalar(
-        isco_eqn, method="brent", bracket=[0.01, 1], args=(mass1, mass2, spin1z, spin2z)
+    def ddpot(x):
+        sqrtx = np.sqrt(x)
+        return (
+            0.75 * pn1p5 / sqrtx
+            + 2.0 * pn2
+            + 3.75 * pn2p5 * sqrtx
+            + 6.0 * pn3 * x
+        )
+
+    # Bracket the first sign change of the derivative, from - to +,
+    # widening the search for binaries that have none below x_max
+    lo = np.zeros(len(pn1p5))
+    hi = np.full(len(pn1p5), np.nan)
+    for x_end in [x_max, 8 * x_max, 64 * x_max]:
+        todo = np.isnan(hi)
+        if not todo.any():
+            break
+        grid = np.linspace(0, x_end, num_grid + 1)[1:]
+        sqrtg = np.sqrt(grid)
+        dgrid = (
+            -6.0
+            + 1.5 * pn1p5[todo, None] * sqrtg
+            + 2.0 * pn2[todo, None] * grid
+            + 2.5 * pn2p5[todo, None] * grid * sqrtg
+            + 3.0 * pn3[todo, None] * grid**2
+        )
+        positive = dgrid > 0
+        first = np.argmax(positive, axis=1)
+        has_root = positive.any(axis=1)
+        hi[todo] = np.where(has_root, grid[first], np.nan)
+        lo[todo] = np.where(has_root & (first > 0), grid[np.maximum(first - 1, 0)], 0.0)
+    found = np.isfinite(hi)
+    hi[~found] = x_max
+
+    x = 0.5 * (lo + hi)
+    for _ in range(max_iterations):
+        g = dpot(x)
+        neg = g < 0
+        lo = np.where(neg, x, lo)
+        hi = np.where(neg, hi, x)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_new = x - g / ddpot(x)
+        bisect = ~((x_new > lo) & (x_new < hi))
+        x_new[bisect] = 0.5 * (lo[bisect] + hi[bisect])
+        converged = np.abs(x_new - x) <= tol * np.maximum(x, tol)
+        x = x_new
+        if converged[found].all():
+            break
+    x[~found] = np.nan
+    return x
+    # }}}
+
+
+def get_isco_x(
+    mass1,
+    mass2,
+    spin1z,
+    spin2z,
+    show_figure=False,
+    verbose=False,
+    chunk_size=100000,
+):
+    """
+    Value of the PN parameter x = (M omega)^(2/3) at the ISCO of
+    aligned-spin binaries, as the minimum of their PN effective potential
+    (see `isco_eqn`).
+
+    All inputs can be arrays (of the same shape), in which case all
+    binaries are solved together, `chunk_size` at a time. NaN is returned
+    for binaries whose potential has no minimum (with x < 64).
+    """
+    # {{{
+    coeffs = np.broadcast_arrays(
+        *isco_pn_coefficients(mass1, mass2, spin1z, spin2z, verbose=verbose)
     )
-    print(f"Value of x at ISCO: {res.x}")
+    shape = coeffs[0].shape
+    coeffs = [np.ravel(c) for c in coeffs]
+    x_isco = np.empty(len(coeffs[0]))
+    for start in range(0, len(x_isco), chunk_size):
+        x_isco[start : start + chunk_size] = _solve_isco_x(
+            [c[start : start + chunk_size] for c in coeffs]
+        )
+    x_isco = x_isco.reshape(shape)
+    if shape == ():
+        x_isco = float(x_isco)
+    if verbose:
+        print(f"Value of x at ISCO: {x_isco}")
+
     if show_figure:
         import matplotlib.pyplot as plt
 
+        xvals = np.arange(0, 1, 0.01)
         plt.figure(figsize=(12, 6))
-        plt.plot(
-            np.arange(0, 1, 0.01),
-            isco_eqn(np.arange(0, 1, 0.01), mass1, mass2, spin1z, spin2z),
+        plt.plot(xvals, isco_eqn(xvals, mass1, mass2, spin1z, spin2z))
+        plt.axvline(x_isco, color="g", label="ISCO x")
+        plt.axhline(
+            isco_eqn(x_isco, mass1, mass2, spin1z, spin2z),
+            color="r",
+            label="min potential",
         )
-        plt.axvline(res.x, color="g", label="ISCO x")
-        plt.axhline(res.fun, color="r", label="min potential")
         plt.axvline(1 / 6, color="k", label="r=6M")
         plt.legend()
         plt.ylim(0, 6)
         plt.xlabel("x")
         plt.ylabel("effective binary potential")
-    return res.x
+    return x_isco
+    # }}}
 
 
-def get_isco_frequency(mass1, mass2, spin1z, spin2z):
-    x_isco = get_isco_x(mass1, mass2, spin1z, spin2z)
+def get_isco_frequency(mass1, mass2, spin1z, spin2z, verbose=False):
+    """GW frequency (Hz) at the ISCO of (arrays of) aligned-spin binaries,
+    with component masses in solar masses. See `get_isco_x`.
+    """
+    x_isco = get_isco_x(mass1, mass2, spin1z, spin2z, verbose=verbose)
     m_omg_isco = x_isco**1.5
-    f_isco = m_omg_isco / (lal.PI * (mass1 + mass2) * lal.MTSUN_SI)
-    print(f"Value of f at ISCO: {f_isco}Hz")
+    f_isco = m_omg_isco / (
+        lal.PI * (np.asarray(mass1) + np.asarray(mass2)) * lal.MTSUN_SI
+    )
+    if verbose:
+        print(f"Value of f at ISCO: {f_isco}Hz")
     return f_isco
 
 
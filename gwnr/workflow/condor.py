@@ -61,12 +61,18 @@ class BanksimNode(CondorDAGNode):
         gpu=True,
         gpu_postscript=False,
         inj_per_job=None,
+        instrumentation_file=None,
     ):
         CondorDAGNode.__init__(self, job)
 
         self.add_file_opt("signal-file", inj_file)
         self.add_file_opt("template-file", tmplt_file)
 
+        if instrumentation_file is not None:
+            self.add_file_opt(
+                "instrumentation-file", instrumentation_file, file_is_output_file=True
+            )
+
         if gpu:
             self.add_var_opt("processing-scheme", "cuda")
 
@@ -98,7 +104,7 @@ class BanksimNode(CondorDAGNode):
 
 
 class BanksimCombineNode(CondorDAGNode):
-    def __init__(self, job, inj_num):
+    def __init__(self, job, inj_num, instrumentation_dir=None):
         CondorDAGNode.__init__(self, job)
 
         self.add_var_opt("inj-num", inj_num)
@@ -107,12 +113,21 @@ class BanksimCombineNode(CondorDAGNode):
 
         self.add_file_opt("output-file", outf)
 
+        if instrumentation_dir is not None:
+            self.add_var_opt("instrumentation-dir", instrumentation_dir)
+
 
 class FaithsimNode(CondorDAGNode):
-    def __init__(self, job, tmplt_file, match_file, inj_per_job=None):
+    def __init__(
+        self, job, tmplt_file, match_file, inj_per_job=None, instrumentation_file=None
+    ):
         CondorDAGNode.__init__(self, job)
         self.add_file_opt("param-file", tmplt_file)
         self.add_file_opt("match-file", match_file, file_is_output_file=True)
+        if instrumentation_file is not None:
+            self.add_file_opt(
+                "instrumentation-file", instrumentation_file, file_is_output_file=True
+            )
 
 
 class InferenceJob(CondorDAGJob, CondorJob):
@@ -19,7 +19,7 @@ import subprocess
 import numpy
 
 from gwnr.utils import mkdir
-from gwnr.analysis import Merger
+from gwnr.analysis import Merger, EventDataStore, default_event_data_store
 from gwnr.stats.pycbc_inference_utils import InferenceConfigs
 from gwnr.workflow.inference import OneInferenceAnalysis, BatchInferenceAnalyses
 
@@ -222,6 +222,7 @@ class PycbcInferenceEventAnalysis(OneInferenceAnalysis):
         event_name,
         inf_exe_name="inference",
         plt_exe_name="plot",
+        data_store=None,
         verbose=False,
     ):
         """
@@ -241,6 +242,8 @@ class PycbcInferenceEventAnalysis(OneInferenceAnalysis):
             Dictionary with names and locations of ini files needed
         inf_exe_name : string
             Name of the inference exe's options' section in opts
+        data_store : gwnr.analysis.EventDataStore object
+            Local store that event data is fetched through
         """
         super(PycbcInferenceEventAnalysis, self).__init__(
             opts,
@@ -266,7 +269,7 @@ class PycbcInferenceEventAnalysis(OneInferenceAnalysis):
         self.data_duration = int(opts.get("workflow", "data-duration"))
 
         self.event_name = event_name
-        self.merger = Merger(self.event_name)
+        self.merger = Merger(self.event_name, data_store=data_store)
 
         if opts.get("workflow", "psd-estimation") == "download":
             self.psd_options = """\
@@ -304,6 +307,12 @@ psd-segment-stride = 4
     def get_data_dir(self):
         return self.data_dir
 
+    def data_urls(self, psds=False):
+        """URLs of all data files needed for this event"""
+        return self.merger.data_urls(
+            self.data_duration, self.data_sample_rate, psds=psds
+        )
+
     def fetch_all_data(self, data_dir=None):
         if self.verbose:
             logging.info("Fetching GWOSC frame data")
@@ -441,6 +450,17 @@ class PycbcInferenceOnEventBatch(BatchInferenceAnalyses):
         )
         self.events = opts.get("workflow", "events").split()
 
+        # All events share one local store of event data
+        if opts.has_option("workflow", "event-data-store"):
+            source = None
+            if opts.has_option("workflow", "event-data-source"):
+                source = opts.get("workflow", "event-data-source")
+            self.data_store = EventDataStore(
+                opts.get("workflow", "event-data-store"), source=source
+            )
+        else:
+            self.data_store = default_event_data_store()
+
         self.sampler_configs = opts.get("workflow", "sampler").split()
         self.inf_configs = opts.get("workflow", "inference").split()
 
@@ -463,10 +483,27 @@ class PycbcInferenceOnEventBatch(BatchInferenceAnalyses):
                     event_name,
                     inf_exe_name=self.inf_exe_name,
                     plt_exe_name=self.plt_exe_name,
+                    data_store=self.data_store,
                     verbose=self.verbose,
                 )
 
+    def prefetch_data(self, psds=False, num_workers=None):
+        """
+        Fetches data files for all events into the local data store,
+        concurrently. Later calls to fetch_all_data / fetch_all_psds of
+        each run only copy them from the store.
+        """
+        urls = []
+        for r in self.runs:
+            for url in self.runs[r].data_urls(psds=psds):
+                if url not in urls:
+                    urls.append(url)
+        if self.verbose:
+            logging.info("Fetching {} event data files".format(len(urls)))
+        return self.data_store.fetch_many(urls, num_workers=num_workers)
+
     def setup_runs(self):
+        self.prefetch_data()
         for r in self.runs:
             self.runs[r].setup()
             self.runs[r].fetch_all_data()
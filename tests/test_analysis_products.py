@@ -0,0 +1,132 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""Cached effectualness data and batch rendering in gwnr.graph.analysis_products"""
+
+import os
+
+import numpy as np
+import pytest
+
+h5py = pytest.importorskip("h5py")
+analysis_products = pytest.importorskip("gwnr.graph.analysis_products")
+types = pytest.importorskip("gwnr.nr.analysis.types")
+
+
+def write_matches(filename, overlaps):
+    """One simulation, one approximant, with (mtotal, overlap) pairs after
+    the 10 auxiliary columns of each row"""
+    rows = []
+    for row_overlaps in overlaps:
+        aux = np.arange(10, dtype=np.float64) * 0.1
+        pairs = np.column_stack([[20.0, 40.0, 60.0], row_overlaps]).ravel()
+        rows.append(np.append(aux, pairs))
+    with h5py.File(filename, "w") as fout:
+        fout.create_group("SimA").create_dataset("SEOBNRv4.dat", data=np.array(rows))
+
+
+@pytest.fixture
+def outdir(tmp_path):
+    (tmp_path / "matches").mkdir()
+    write_matches(
+        str(tmp_path / "matches" / "match1.h5"), [[0.9, 0.95, 0.97], [0.92, 0.9, 0.99]]
+    )
+    return str(tmp_path)
+
+
+def plotter(outdir):
+    return analysis_products.plot_effectualness_vs_totalmass(
+        outdir=outdir, cache_file="cache.h5", verbose=False
+    )
+
+
+def test_cache_round_trip(outdir):
+    data = types.EffectualnessAndBias(outdir=outdir, verbose=False)
+    data.read_data_from_file(filename="matches/match1.h5")
+    filename = os.path.join(outdir, "cache.h5")
+    data.write_cache(filename, signature="inputs-1")
+
+    cached = types.EffectualnessAndBias(outdir=outdir, verbose=False)
+    assert not cached.read_cache(filename, signature="inputs-2")
+    assert cached.read_cache(filename, signature="inputs-1")
+    assert sorted(cached.data) == ["SimA"]
+    tables = cached.data["SimA"]["SEOBNRv4.dat"]
+    assert sorted(tables) == [20.0, 40.0, 60.0]
+    for mtot in tables:
+        assert np.array_equal(tables[mtot], data.data["SimA"]["SEOBNRv4.dat"][mtot])
+    # The best overlap at each mass is kept
+    assert [tables[m][0, -1] for m in sorted(tables)] == [0.92, 0.95, 0.99]
+
+
+def test_cache_is_used_while_inputs_are_unchanged(outdir, monkeypatch):
+    cwd = os.getcwd()
+    plotter(outdir).read_data_from_all_files()
+    assert os.getcwd() == cwd
+    assert os.path.exists(os.path.join(outdir, "cache.h5"))
+
+    reads = []
+    original = types.EffectualnessAndBias.read_data_from_file
+
+    def counting_read(self, **kwargs):
+        reads.append(kwargs["filename"])
+        return original(self, **kwargs)
+
+    monkeypatch.setattr(
+        analysis_products.EffectualnessAndBias, "read_data_from_file", counting_read
+    )
+    fresh = plotter(outdir)
+    fresh.read_data_from_all_files()
+    assert reads == []
+    assert sorted(fresh.data.data["SimA"]["SEOBNRv4.dat"]) == [20.0, 40.0, 60.0]
+
+    # A changed input file is read again, and the cache rewritten
+    write_matches(
+        os.path.join(outdir, "matches", "match1.h5"),
+        [[0.5, 0.6, 0.7], [0.5, 0.6, 0.7], [0.5, 0.6, 0.8]],
+    )
+    changed = plotter(outdir)
+    changed.read_data_from_all_files()
+    assert reads == ["./matches/match1.h5"]
+    assert changed.data.data["SimA"]["SEOBNRv4.dat"][60.0][0, -1] == 0.8
+    reads[:] = []
+    plotter(outdir).read_data_from_all_files()
+    assert reads == []
+
+
+class RecordingPlotter(analysis_products.plot_effectualness_vs_totalmass):
+    def plot_record(self, tag=""):
+        with open(os.path.join(self.outdir, "made-" + tag), "w") as fout:
+            fout.write(str(len(self.data.data)))
+
+    def plot_broken(self):
+        raise ValueError("broken figure")
+
+
+def test_render_all(outdir):
+    batch = RecordingPlotter(outdir=outdir, cache_file="cache.h5", verbose=False)
+    # Nothing to make: no data is read and no workers are started
+    assert batch.render_all([], num_processes=4) == {}
+    assert batch.data is None
+
+    failed = batch.render_all(
+        [("plot_record", {"tag": "a"}), ("plot_record", {"tag": "b"}), "plot_broken"]
+    )
+    assert list(failed) == ["plot_broken"]
+    assert "broken figure" in failed["plot_broken"]
+    for tag in ["a", "b"]:
+        with open(os.path.join(outdir, "made-" + tag)) as fin:
+            assert fin.read() == "1"
+    with pytest.raises(IOError):
+        batch.render_all(["plot_nothing"])
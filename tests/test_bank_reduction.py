@@ -0,0 +1,97 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""Greedy test-point selection in gwnr.analysis.bank_reduction"""
+
+import numpy as np
+import pytest
+
+bank_reduction = pytest.importorskip("gwnr.analysis.bank_reduction")
+
+
+def dense_greedy(adjacency):
+    """Selection by recomputing every G value at every iteration"""
+    adjacency = np.array(adjacency, dtype=bool)
+    np.fill_diagonal(adjacency, False)
+    alive = np.ones(len(adjacency), dtype=bool)
+    selected = []
+    while True:
+        gvals = (adjacency & alive[None, :]).sum(axis=1) * alive
+        if gvals.max() <= 0:
+            break
+        best = int(np.argmax(gvals))
+        selected.append(best)
+        alive[adjacency[best]] = False
+        alive[best] = False
+    return selected, np.where(alive)[0]
+
+
+def random_adjacency(num=200, density=0.03, seed=7):
+    rng = np.random.RandomState(seed)
+    adjacency = rng.uniform(size=(num, num)) < density
+    np.fill_diagonal(adjacency, False)
+    return adjacency
+
+
+def test_matches_dense_greedy():
+    adjacency = random_adjacency()
+    cover = bank_reduction.GreedyMatchCover(adjacency)
+    selected, remaining = dense_greedy(adjacency)
+    assert cover.run() == selected
+    assert np.array_equal(cover.remaining(), remaining)
+
+
+def test_checkpoint_resume(tmp_path):
+    adjacency = random_adjacency(seed=11)
+    checkpoint = str(tmp_path / "cover.npz")
+    full = bank_reduction.GreedyMatchCover(adjacency).run()
+
+    partial = bank_reduction.GreedyMatchCover(adjacency)
+    partial.run(max_iterations=5, checkpoint_file=checkpoint)
+    resumed = bank_reduction.GreedyMatchCover(adjacency)
+    resumed.load_checkpoint(checkpoint)
+    assert resumed.run() == full
+    with pytest.raises(IOError):
+        bank_reduction.GreedyMatchCover(adjacency[:10, :10]).load_checkpoint(checkpoint)
+
+
+def test_read_match_files(tmp_path):
+    lines = [
+        # bank_tag proposal_tag match
+        "p0 p1 0.99",
+        "p2 p1 0.90",
+        "p1 p1 1.00",
+        "p1 p0 0.98",
+        "bank_only p0 0.99",
+        "p2 p2 1.00",
+        "p0 p1 0.50",
+    ]
+    filename = tmp_path / "matches.dat"
+    filename.write_text("\n".join(lines) + "\n")
+    tags, adjacency = bank_reduction.read_match_files_as_adjacency(
+        [str(filename)], 0.97
+    )
+    assert tags == ["p1", "p0", "p2"]
+    assert adjacency.toarray().tolist() == [
+        [False, True, False],
+        [True, False, False],
+        [False, False, False],
+    ]
+    cover = bank_reduction.GreedyMatchCover(adjacency, tags=tags)
+    cover.run()
+    assert cover.selected_tags() == ["p1"]
+    assert cover.remaining_tags() == ["p2"]
+    with pytest.raises(IOError):
+        bank_reduction.read_match_files_as_adjacency([str(tmp_path / "none")], 0.97)
@@ -0,0 +1,100 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""Benchmark result files and their comparison in gwnr.benchmarks"""
+
+import math
+
+import pytest
+
+from gwnr.benchmarks.results import (
+    compare_benchmark_results,
+    read_benchmark_results,
+    write_benchmark_results,
+)
+
+
+def compare(old, new, **kwargs):
+    rows = compare_benchmark_results({"bench": old}, {"bench": new}, **kwargs)
+    return dict((qty, (change, regressed)) for _, qty, _, _, change, regressed in rows)
+
+
+def test_round_trip(tmp_path):
+    results = {"bench": {"seconds": 1.5, "num_modules": 10}}
+    filename = str(tmp_path / "results.json")
+    write_benchmark_results(results, filename, metadata={"host": "test"})
+    assert read_benchmark_results(filename) == results
+
+
+def test_regressions():
+    rows = compare(
+        {"seconds": 1.0, "throughput": 100.0, "label": "x", "ok": True},
+        {"seconds": 1.5, "throughput": 90.0, "label": "y", "ok": False},
+    )
+    assert sorted(rows) == ["seconds", "throughput"]
+    assert rows["seconds"] == (0.5, True)
+    assert rows["throughput"][1] is False
+    assert compare({"throughput": 100.0}, {"throughput": 50.0})["throughput"][1]
+
+
+def test_growth_from_zero_is_flagged():
+    rows = compare(
+        {"num_modules": 0, "seconds": 0.0, "throughput": 0.0},
+        {"num_modules": 3, "seconds": 0.0, "throughput": 5.0},
+    )
+    assert rows["num_modules"] == (math.inf, True)
+    assert rows["seconds"] == (0.0, False)
+    assert rows["throughput"] == (math.inf, False)
+    assert compare({"throughput": 0.0}, {"throughput": -1.0})["throughput"] == (
+        -math.inf,
+        True,
+    )
+
+
+def test_failing_and_missing_benchmarks_are_flagged():
+    baseline = {
+        "fit:5": {"size": 5, "wall_time_min": 1.0},
+        "align:8": {"size": 8, "wall_time_min": 1.0},
+        "load:100": {"size": 100, "error": "IOError: no file"},
+        "hybridize:64": {"size": 64, "wall_time_min": 1.0},
+    }
+    current = {
+        "fit:5": {"size": 5, "error": "ValueError: bad swarm"},
+        "load:100": {"size": 100, "error": "IOError: no file"},
+        "hybridize:64": {"size": 128, "wall_time_min": 1.0},
+    }
+    rows = compare_benchmark_results(baseline, current)
+    flagged = dict(((name, qty), regressed) for name, qty, _, _, _, regressed in rows)
+    assert flagged == {
+        ("align:8", "missing"): True,
+        ("fit:5", "error"): True,
+        ("load:100", "error"): False,
+        ("hybridize:64", "wall_time_min"): False,
+    }
+
+
+def test_failing_imports_are_flagged():
+    imports = pytest.importorskip("gwnr.benchmarks.imports")
+    res = imports.measure_import_time("gwnr_no_such_module", repeat=1)
+    assert res["error"].startswith("ModuleNotFoundError")
+
+    ok = {"wall_time_min": 0.5, "num_modules": 100, "heavy_modules": [], "error": None}
+    failing = dict(ok, wall_time_min=0.01, num_modules=2, error=res["error"])
+    rows = compare_benchmark_results(
+        {"import:gwnr": ok, "import:gwnr.waveform": ok},
+        {"import:gwnr": ok, "import:gwnr.waveform": failing},
+    )
+    regressions = [(name, qty) for name, qty, _, _, _, regressed in rows if regressed]
+    assert regressions == [("import:gwnr.waveform", "error")]
@@ -0,0 +1,87 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""Joining and resampling of CCE output segments in bin/nr/SetupCCERuns"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+h5py = pytest.importorskip("h5py")
+sys.path.insert(
+    0,
+    os.path.join(os.path.dirname(__file__), os.pardir, "bin", "nr", "SetupCCERuns"),
+)
+ccerun = pytest.importorskip("ccerun")
+
+
+def segment(t0, t1, dt=0.5):
+    t = np.arange(t0, t1 + 0.5 * dt, dt)
+    return np.column_stack([t, np.sin(t), np.cos(t)])
+
+
+def test_join_overlapping_segments():
+    segments = [segment(0, 10), segment(8, 20), segment(12, 18), segment(15, 30)]
+    joined = ccerun.join_cce_segments(segments)
+    assert np.all(np.diff(joined[:, 0]) > 0)
+    np.testing.assert_array_equal(joined, segment(0, 30))
+
+
+def test_join_skips_empty_segments():
+    empty = np.zeros((0, 3))
+    joined = ccerun.join_cce_segments([empty, segment(0, 5), empty, segment(3, 9)])
+    np.testing.assert_array_equal(joined, segment(0, 9))
+    with pytest.raises(IOError):
+        ccerun.join_cce_segments([empty, empty])
+
+
+def test_segments_from_files_with_trailing_garbage(tmp_path):
+    subdirs = []
+    for idx, (t0, t1) in enumerate([(0, 10), (8, 20)]):
+        sdir = tmp_path / "seg{}".format(idx)
+        sdir.mkdir()
+        np.savetxt(str(sdir / "Psi4.asc"), segment(t0, t1))
+        subdirs.append(str(sdir))
+    # A run that died while writing leaves a partial line behind
+    with open(os.path.join(subdirs[0], "Psi4.asc"), "ab") as fout:
+        fout.write(b"10.5 0.1\x00\x00")
+    fnam, joined, uniform = ccerun._join_one_cce_file((subdirs, "Psi4.asc", True))
+    np.testing.assert_allclose(joined, segment(0, 20))
+    np.testing.assert_allclose(uniform, segment(0, 19.5))
+
+
+def test_uniform_sampling():
+    data = segment(0, 4)
+    data = np.delete(data, [3, 5], axis=0)
+    uniform = ccerun.uniformly_sample_cce_data(data)
+    np.testing.assert_allclose(uniform[:, 0], np.arange(0, 4, 0.5))
+    np.testing.assert_allclose(
+        uniform[:, 1], np.interp(uniform[:, 0], data[:, 0], data[:, 1])
+    )
+    with pytest.raises(IOError):
+        ccerun.uniformly_sample_cce_data(segment(0, 0))
+    with pytest.raises(IOError):
+        ccerun.uniformly_sample_cce_data(np.zeros((2, 3)))
+
+
+def test_write_dataset(tmp_path):
+    with h5py.File(str(tmp_path / "joined.h5"), "w") as fout:
+        ccerun._write_cce_dataset(fout, "Psi4.asc", segment(0, 4))
+        ccerun._write_cce_dataset(fout, "Psi4.asc", segment(0, 2))
+        np.testing.assert_array_equal(fout["Psi4.asc"][()], segment(0, 2))
+        with pytest.raises(IOError):
+            ccerun._write_cce_dataset(fout, "News.asc", np.zeros((0, 3)))
@@ -0,0 +1,118 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""Compressed modes and their HDF5 store in gwnr.waveform.compression"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("h5py")
+from scipy.interpolate import splrep
+
+from gwnr.waveform.compression import CompressedModesFile, mode_parts
+
+PARAM_NAMES = ["m1", "m2"]
+
+
+def chirp_modes(num=4000):
+    times = np.linspace(-1.0, 0.0, num)
+    phase = -100.0 * (1.0 - times) ** 0.625
+    amp = 1.0 + times ** 2
+    return times, {(2, 2): amp * np.exp(2.0j * phase), (2, 1): 0.1 * amp * np.exp(1.0j * phase)}
+
+
+def exact_splines(times, modes, representation="modes"):
+    """compress_modes output, with full interpolating splines"""
+    names = {"modes": ("real", "imag"), "amp_phase": ("amplitude", "phase")}
+    retval = {}
+    for lm, mode in modes.items():
+        parts, offsets = mode_parts(mode, representation)
+        retval[lm] = [
+            (name, splrep(times, part, k=5, s=0), offset, times[0], times[-1])
+            for name, part, offset in zip(names[representation], parts, offsets)
+        ]
+    return retval
+
+
+@pytest.mark.parametrize("representation", ["modes", "amp_phase"])
+def test_round_trip(tmp_path, representation):
+    times, modes = chirp_modes()
+    filename = str(tmp_path / "modes.h5")
+    with CompressedModesFile(
+        filename, "w", representation=representation, param_names=PARAM_NAMES
+    ) as fp:
+        fp.append_many(
+            [
+                ("BBH_1", {"m1": 10.0, "m2": 5.0}, exact_splines(times, modes, representation)),
+                ("BBH_2", {"m1": 20.0}, exact_splines(times, modes, representation)),
+            ]
+        )
+    with CompressedModesFile(filename, "a", representation=representation) as fp:
+        fp.append("BBH_3", {"m1": 30.0, "m2": 1.0}, exact_splines(times, modes, representation))
+
+    with CompressedModesFile(filename) as fp:
+        assert fp.names == ["BBH_1", "BBH_2", "BBH_3"]
+        assert fp.representation == representation
+        assert fp.parameters("BBH_1") == {"m1": 10.0, "m2": 5.0}
+        assert np.isnan(fp.parameters("BBH_2")["m2"])
+        for name in fp.names:
+            evaluated = fp.evaluate(name, times)
+            assert sorted(evaluated) == sorted(modes)
+            for lm in modes:
+                assert np.allclose(evaluated[lm], modes[lm], rtol=0, atol=1.0e-8)
+        assert list(fp.evaluate("BBH_3", times, modes=[(2, 1)])) == [(2, 1)]
+
+
+def test_compress_modes_romspline():
+    pytest.importorskip("romspline")
+    from gwnr.waveform.compression import compress_modes
+
+    times, modes = chirp_modes()
+    compressed = compress_modes(times, modes, representation="amp_phase", tol=1.0e-6)
+    assert sorted(compressed) == sorted(modes)
+    assert [part[0] for part in compressed[(2, 2)]] == ["amplitude", "phase"]
+
+
+def test_append_rejects_mismatched_representation(tmp_path):
+    filename = str(tmp_path / "modes.h5")
+    with CompressedModesFile(filename, "w", representation="modes", param_names=PARAM_NAMES):
+        pass
+    with pytest.raises(IOError, match="stores modes as modes"):
+        CompressedModesFile(filename, "a", representation="amp_phase", param_names=PARAM_NAMES)
+
+
+def test_append_rejects_mismatched_parameters(tmp_path):
+    filename = str(tmp_path / "modes.h5")
+    with CompressedModesFile(filename, "w", param_names=PARAM_NAMES):
+        pass
+    with pytest.raises(IOError, match="stores parameters"):
+        CompressedModesFile(filename, "a", param_names=["m1", "m2", "s1z"])
+    # Reading does not check what the caller would have written
+    with CompressedModesFile(filename, representation="amp_phase") as fp:
+        assert fp.param_names == PARAM_NAMES
+
+
+def test_append_rejects_duplicate_names(tmp_path):
+    times, modes = chirp_modes(500)
+    filename = str(tmp_path / "modes.h5")
+    with CompressedModesFile(filename, "w", param_names=PARAM_NAMES) as fp:
+        fp.append("BBH_1", {}, exact_splines(times, modes))
+        with pytest.raises(IOError, match="already in"):
+            fp.append("BBH_1", {}, exact_splines(times, modes))
+        with pytest.raises(IOError, match="already in"):
+            fp.append_many(
+                [("BBH_2", {}, exact_splines(times, modes)), ("BBH_2", {}, {})]
+            )
+        assert fp.names == ["BBH_1"]
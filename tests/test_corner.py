@@ -0,0 +1,83 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""Binned density estimates of gwnr.graph.corner, against the KDE path"""
+
+import inspect
+
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy")
+corner = pytest.importorskip("gwnr.graph.corner")
+
+LEVELS = (95.45, 90.0, 68.27)
+COV = [[1.0, 0.6], [0.6, 2.0]]
+
+
+@pytest.fixture(scope="module")
+def samples():
+    rng = np.random.RandomState(1)
+    return rng.multivariate_normal([0.0, 1.0], COV, 5000).T
+
+
+def test_binned_density_matches_kde(samples):
+    x, y = samples
+    xk, yk, kde, _ = corner._compute_contour_panel((x, y, 50, "kde", 1.0, LEVELS))
+    xb, yb, binned = corner.binned_density_2d(x, y, npixels=50)
+    assert np.allclose(xb, xk) and np.allclose(yb, yk)
+    assert binned.shape == kde.shape == (50, 50)
+    # Normalized on the grid
+    dx, dy = xb[1] - xb[0], yb[1] - yb[0]
+    assert binned.sum() * dx * dy == pytest.approx(1.0)
+    assert np.abs(binned - kde).sum() / kde.sum() < 0.05
+    assert np.abs(binned - kde).max() / kde.max() < 0.05
+
+
+@pytest.mark.parametrize("method", ["fft_kde", "histogram"])
+def test_credible_level_thresholds_match_kde(samples, method):
+    x, y = samples
+    _, _, _, kde_levels = corner._compute_contour_panel(
+        (x, y, 50, "kde", 1.0, LEVELS)
+    )
+    _, _, density, levels = corner._compute_contour_panel(
+        (x, y, 50, method, 1.0, LEVELS)
+    )
+    assert np.all(np.diff(levels) > 0)
+    assert np.allclose(levels, kde_levels, rtol=0.2)
+    # Analytic thresholds of the Gaussian the samples are drawn from. The
+    # unsmoothed histogram is noisier in the tails
+    analytic = (1 - np.array(LEVELS) / 100.0) / (2 * np.pi * np.sqrt(np.linalg.det(COV)))
+    assert np.allclose(levels, analytic, rtol=0.15 if method == "fft_kde" else 0.25)
+    assert np.array_equal(levels, corner.credible_level_thresholds(density, LEVELS))
+
+
+def test_credible_level_thresholds():
+    density = np.array([[1.0, 4.0], [2.0, 3.0]])
+    assert list(corner.credible_level_thresholds(density, [40.0, 70.0, 100.0])) == [
+        4.0,
+        3.0,
+        1.0,
+    ]
+    assert list(corner.credible_level_thresholds(np.zeros((3, 3)), [50.0])) == [0.0]
+
+
+def test_default_density_methods_agree():
+    def default(func):
+        return inspect.signature(func).parameters["density_method"].default
+
+    assert default(corner.CornerPlot.contour_densities) == default(
+        corner.CornerPlot.draw
+    )
@@ -0,0 +1,174 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""Offline event data in gwnr.analysis.event_data and local GW catalogs"""
+
+import hashlib
+import json
+import os
+
+import pytest
+
+event_data = pytest.importorskip("gwnr.analysis.event_data")
+
+FRAME_URL = "https://gwosc.example.org/eventapi/GW150914/H-H1_GWOSC_4KHZ_R1-1126259447-32.gwf"
+PSD_URL = "https://dcc.example.org/public/GWTC1_GW150914_PSDs.dat"
+
+
+class CountingSource(event_data.LocalDirectoryDataSource):
+    """Local data source that counts the files it hands out"""
+
+    def __init__(self, root):
+        super(CountingSource, self).__init__(root)
+        self.opened = []
+
+    def open(self, url):
+        self.opened.append(url)
+        return super(CountingSource, self).open(url)
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    """Local mirror with one file at its URL path, and one by name only"""
+    root = tmp_path / "mirror"
+    frame = root / FRAME_URL.split("//", 1)[1].split("/", 1)[1]
+    frame.parent.mkdir(parents=True)
+    frame.write_bytes(b"frame data" * 1000)
+    (root / os.path.basename(PSD_URL)).write_bytes(b"1 2\n3 4\n")
+    return str(root)
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def test_get_data_source():
+    assert isinstance(event_data.get_data_source(None), event_data.HTTPDataSource)
+    mirror = event_data.get_data_source("http://mirror.local/gwosc/")
+    assert isinstance(mirror, event_data.MirrorHTTPDataSource)
+    assert mirror.resolve(FRAME_URL) == (
+        "http://mirror.local/gwosc" + FRAME_URL.split("example.org", 1)[1]
+    )
+    with pytest.raises(IOError):
+        event_data.get_data_source("file:///no/such/mirror")
+
+
+def test_fetch_once_and_export(tmp_path, mirror):
+    source = CountingSource(mirror)
+    store = event_data.EventDataStore(str(tmp_path / "store"), source=source)
+    filename = store.fetch(FRAME_URL)
+    with open(filename, "rb") as fp:
+        assert os.path.basename(filename) == sha256(fp.read())
+    assert store.fetch(FRAME_URL) == filename
+    assert source.opened == [FRAME_URL]
+
+    # The manifest is shared with later stores on the same directory
+    other = event_data.EventDataStore(str(tmp_path / "store"), source=source)
+    assert other.is_stored(FRAME_URL)
+    destination = str(tmp_path / "run" / "H1.gwf")
+    assert other.export(FRAME_URL, destination) == destination
+    with open(destination, "rb") as fp:
+        assert fp.read() == b"frame data" * 1000
+    assert source.opened == [FRAME_URL]
+
+    # Writing to an exported copy leaves the store intact
+    with open(destination, "r+b") as fp:
+        fp.write(b"FRAME")
+    assert other.verify_all() == []
+
+    # Unlike writing to a hard link
+    linked = str(tmp_path / "run" / "H1-linked.gwf")
+    other.export(FRAME_URL, linked, link=True)
+    with open(linked, "r+b") as fp:
+        fp.write(b"FRAME")
+    assert other.is_stored(FRAME_URL)
+    assert other.verify_all() == [FRAME_URL]
+
+
+def test_fetch_many_with_checksums(tmp_path, mirror):
+    store = event_data.EventDataStore(str(tmp_path / "store"), source=mirror)
+    filenames = store.fetch_many(
+        {FRAME_URL: sha256(b"frame data" * 1000), PSD_URL: None}, num_workers=2
+    )
+    assert sorted(filenames) == sorted([FRAME_URL, PSD_URL])
+    with open(store.manifest_file, "r") as fp:
+        assert sorted(json.load(fp)) == sorted([FRAME_URL, PSD_URL])
+    assert store.verify_all() == []
+    assert os.listdir(os.path.join(store.root, "tmp")) == []
+
+
+def test_checksum_mismatch_is_rejected(tmp_path, mirror):
+    store = event_data.EventDataStore(str(tmp_path / "store"), source=mirror)
+    with pytest.raises(IOError):
+        store.fetch(PSD_URL, sha256=sha256(b"something else"))
+    assert PSD_URL not in store.manifest
+    assert os.listdir(os.path.join(store.root, "tmp")) == []
+
+
+def test_corrupt_copy_is_fetched_again(tmp_path, mirror):
+    source = CountingSource(mirror)
+    store = event_data.EventDataStore(
+        str(tmp_path / "store"), source=source, verify=True
+    )
+    filename = store.fetch(PSD_URL)
+    with open(filename, "wb") as fp:
+        fp.write(b"5 6\n7 8\n")
+    assert store.verify_all() == [PSD_URL]
+    assert store.fetch(PSD_URL) == filename
+    assert store.verify_all() == []
+    assert source.opened == [PSD_URL, PSD_URL]
+
+
+def event_entry(name):
+    return {
+        "commonName": name,
+        "GPS": 1126259462.4,
+        "tc": {"best": 1126259462.4},
+        "mass_1_source": 35.6,
+        "mass_2_source": 30.6,
+        "files": {
+            "OperatingIFOs": "H1 L1 G1",
+            "H1": {"32sec": {"4KHz": {"GWF": FRAME_URL}}},
+        },
+    }
+
+
+def test_local_catalog(tmp_path, mirror):
+    catalogs = pytest.importorskip("gwnr.analysis.gw_transient_catalog")
+    catalog_dir = tmp_path / "catalogs"
+    catalog_dir.mkdir()
+    with open(str(catalog_dir / "gwtc-1.json"), "w") as fp:
+        json.dump({"events": {"GW150914-v3": event_entry("GW150914")}}, fp)
+
+    catalog = catalogs.Catalog(
+        source="gwtc-1",
+        catalog_file=str(catalog_dir),
+        data_store=event_data.EventDataStore(str(tmp_path / "store"), source=mirror),
+    )
+    assert list(catalog.names) == ["GW150914-v3"]
+    merger = catalogs.Merger("gw150914", catalog_file=str(catalog_dir))
+    assert merger.common_name == "GW150914"
+    assert merger.mass1 == 35.6
+    assert merger.operating_ifos() == ["H1", "L1"]
+
+    merger = catalog.mergers["GW150914-v3"]
+    filename = merger.fetch_data("H1", save_dir=str(tmp_path / "event"))
+    assert filename == str(tmp_path / "event" / os.path.basename(FRAME_URL))
+    assert os.path.isfile(filename)
+
+    with pytest.raises(ValueError):
+        catalogs.find_event("GW170817", catalog_file=str(catalog_dir))
+    with pytest.raises(IOError):
+        catalogs.load_catalog("gwtc-2", catalog_file=str(catalog_dir))
@@ -0,0 +1,58 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""Job timers and counters in gwnr.utils.instrumentation"""
+
+import pytest
+
+from gwnr.utils.instrumentation import (
+    Instrumentation,
+    aggregate_instrumentation_summaries,
+)
+
+
+def test_timer_stops_on_exceptions():
+    instr = Instrumentation(name="job")
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            with instr.timer("compute_match"):
+                raise RuntimeError("failed waveform")
+    with instr.timer("compute_match"):
+        pass
+    assert instr.timers["compute_match"]["count"] == 3
+    assert instr._running == {}
+
+
+def test_disabled_is_a_no_op(tmp_path):
+    instr = Instrumentation(enabled=False)
+    with instr.timer("generate_waveforms"):
+        instr.increment("waveforms_generated")
+    instr.write_summary(str(tmp_path / "summary.json"))
+    assert instr.timers == {} and instr.counters == {}
+    assert not (tmp_path / "summary.json").exists()
+
+
+def test_aggregate(tmp_path):
+    files = []
+    for idx in range(2):
+        instr = Instrumentation(name="job%d" % idx)
+        with instr.timer("compute_sigma"):
+            instr.increment("matches_computed", idx + 1)
+        files.append(str(tmp_path / ("job%d.json" % idx)))
+        instr.write_summary(files[-1])
+    agg = aggregate_instrumentation_summaries(files + [str(tmp_path / "missing.json")])
+    assert agg["num_jobs"] == 2
+    assert agg["counters"]["matches_computed"] == 3
+    assert agg["timers"]["compute_sigma"]["count"] == 2
@@ -0,0 +1,63 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""Posterior sample readers in gwnr.stats.lal_inference_utils"""
+
+import os
+
+import numpy as np
+import pytest
+
+li_utils = pytest.importorskip("gwnr.stats.lal_inference_utils")
+
+HEADER = ["cycle", "m1", "m2", "logl"]
+
+
+def write_samples(path, num=10):
+    rows = []
+    for idx in range(num):
+        # "cycle" looks like an integer on the first row only
+        cycle = "%d" % idx if idx == 0 else "%.1f" % (idx + 0.5)
+        rows.append("%s %.6f %.6f %.3f" % (cycle, 30.0 + idx, 20.0 - idx, -idx / 3.0))
+    with open(str(path), "w") as fp:
+        fp.write("# " + " ".join(HEADER) + "\n")
+        fp.write("\n".join(rows) + "\n")
+    return str(path), np.loadtxt(rows, ndmin=2)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 100])
+def test_columns_are_float64(tmp_path, chunk_size):
+    filename, data = write_samples(tmp_path / "posterior_samples.dat")
+    samples = li_utils.read_posterior_samples(filename, chunk_size=chunk_size)
+    assert samples.dtype.names == tuple(HEADER)
+    for idx, name in enumerate(HEADER):
+        assert samples[name].dtype == np.float64
+        assert np.array_equal(samples[name], data[:, idx])
+    assert samples["cycle"][3] == 3.5
+
+
+def test_selected_columns_and_cache(tmp_path):
+    filename, data = write_samples(tmp_path / "posterior_samples.dat")
+    samples = li_utils.read_posterior_samples(
+        filename, columns=["m2", "cycle"], no_of_samples=4, chunk_size=3
+    )
+    assert samples.dtype.names == ("m2", "cycle")
+    assert np.array_equal(samples["m2"], data[:4, 2])
+    for _ in range(2):
+        cached = li_utils.read_posterior_samples(
+            filename, columns=["m1"], no_of_samples=4, cache=True
+        )
+        assert np.array_equal(cached["m1"], data[:4, 1])
+    assert os.path.exists(filename + ".npy")
@@ -0,0 +1,125 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""Noise curves converted and cached by gwnr.data.noise_curves"""
+
+import os
+
+import numpy as np
+import pytest
+
+noise_curves = pytest.importorskip("gwnr.data.noise_curves")
+
+
+def write_curve(filename, freqs, vals):
+    np.savetxt(filename, np.column_stack([freqs, vals]))
+    return str(filename)
+
+
+@pytest.fixture
+def curve_file(tmp_path):
+    freqs = np.logspace(np.log10(5.0), np.log10(4096.0), 400)
+    asd = 1e-23 * (1 + (20.0 / freqs) ** 4 + (freqs / 300.0) ** 2)
+    return write_curve(tmp_path / "test_asd.txt", freqs, asd)
+
+
+def test_psd_matches_pycbc_from_txt(tmp_path, curve_file):
+    pycbc_psd = pytest.importorskip("pycbc.psd")
+    store = noise_curves.NoiseCurveStore(cache_dir=str(tmp_path / "cache"))
+    delta_f, length, f_lower = 1.0 / 8, 8 * 2048 + 1, 15.0
+    psd = store.psd(curve_file, delta_f, length, f_lower=f_lower, is_asd=True)
+    expected = pycbc_psd.from_txt(
+        curve_file, length, delta_f, f_lower, is_asd_file=True
+    ).numpy()
+    assert psd.shape == (length,)
+    assert not psd.flags.writeable
+    nonzero = expected > 0
+    np.testing.assert_array_equal(psd > 0, nonzero)
+    np.testing.assert_allclose(psd[nonzero], expected[nonzero], rtol=1e-10)
+
+
+def test_table_is_converted_once_and_reconverted_when_edited(tmp_path, curve_file):
+    cache_dir = str(tmp_path / "cache")
+    store = noise_curves.NoiseCurveStore(cache_dir=cache_dir)
+    table = store.table(curve_file)
+    assert isinstance(table, np.memmap)
+    assert len(os.listdir(cache_dir)) == 1
+
+    # A new store (or process) memory-maps the same converted file
+    other = noise_curves.NoiseCurveStore(cache_dir=cache_dir)
+    np.testing.assert_array_equal(other.table(curve_file), table)
+    assert len(os.listdir(cache_dir)) == 1
+
+    # Editing the source gives it a new converted file
+    freqs = np.array([10.0, 100.0, 1000.0])
+    write_curve(curve_file, freqs, 2e-23 * np.ones(3))
+    os.utime(curve_file, (0, 0))
+    edited = noise_curves.NoiseCurveStore(cache_dir=cache_dir).table(curve_file)
+    assert len(os.listdir(cache_dir)) == 2
+    np.testing.assert_array_equal(edited[0], freqs)
+
+
+def test_psd_and_asd_files_agree(tmp_path, curve_file):
+    freqs, asd = np.loadtxt(curve_file, unpack=True)
+    psd_file = write_curve(tmp_path / "test_psd.txt", freqs, asd ** 2)
+    store = noise_curves.NoiseCurveStore(cache_dir=str(tmp_path / "cache"))
+    store.register("h1", psd_file, is_asd=False)
+    assert "h1" in store.available()
+    from_asd = store.psd(curve_file, 0.25, 4097, f_lower=20.0)
+    from_psd = store.psd("h1", 0.25, 4097, f_lower=20.0)
+    np.testing.assert_allclose(from_psd, from_asd, rtol=1e-12)
+
+
+def test_interpolate_is_exact_at_samples_and_clamped_outside(tmp_path, curve_file):
+    store = noise_curves.NoiseCurveStore(cache_dir=str(tmp_path / "cache"))
+    freqs, asd = np.loadtxt(curve_file, unpack=True)
+    np.testing.assert_allclose(
+        store.interpolate(curve_file, freqs), asd ** 2, rtol=1e-12
+    )
+    np.testing.assert_allclose(
+        store.interpolate(curve_file, [1.0, 1e5]),
+        [asd[0] ** 2, asd[-1] ** 2],
+        rtol=1e-12,
+    )
+
+
+def test_f_lower_below_curve_raises(tmp_path, curve_file):
+    store = noise_curves.NoiseCurveStore(cache_dir=str(tmp_path / "cache"))
+    with pytest.raises(IOError):
+        store.psd(curve_file, 0.25, 4097, f_lower=1.0)
+    with pytest.raises(IOError):
+        store.psd(str(tmp_path / "missing.txt"), 0.25, 4097)
+
+
+def test_persisted_grids_are_reused(tmp_path, curve_file):
+    cache_dir = str(tmp_path / "cache")
+    store = noise_curves.NoiseCurveStore(cache_dir=cache_dir, persist_grids=True)
+    psd = store.psd(curve_file, 0.25, 4097, f_lower=20.0)
+    grid_files = [f for f in os.listdir(cache_dir) if "-grid-" in f]
+    assert len(grid_files) == 1
+
+    other = noise_curves.NoiseCurveStore(cache_dir=cache_dir, persist_grids=True)
+    reused = other.psd(curve_file, 0.25, 4097, f_lower=20.0)
+    assert isinstance(reused, np.memmap)
+    np.testing.assert_array_equal(reused, psd)
+
+
+def test_grid_cache_is_bounded(tmp_path, curve_file):
+    store = noise_curves.NoiseCurveStore(
+        cache_dir=str(tmp_path / "cache"), max_cached_grids=2
+    )
+    for f_lower in [10.0, 20.0, 30.0]:
+        store.psd(curve_file, 0.25, 4097, f_lower=f_lower)
+    assert len(store._grids) == 2
@@ -0,0 +1,101 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""Overlap matrices of NR waveforms in gwnr.nr.analysis.filter"""
+
+import numpy as np
+import pytest
+
+nr_filter = pytest.importorskip("gwnr.nr.analysis.filter")
+
+from pycbc.filter import match
+from pycbc.psd import aLIGOZeroDetHighPower
+from pycbc.types import TimeSeries
+
+SAMPLE_RATE = 1024
+TIME_LENGTH = 8
+
+
+class Chirp(object):
+    """Stand-in for an NR waveform: a chirp whose duration scales with mass"""
+
+    sample_rate = SAMPLE_RATE
+    time_length = TIME_LENGTH
+
+    def __init__(self, phase_offset, rate, m_lower=20.0):
+        self.phase_offset = phase_offset
+        self.rate = rate
+        self.m_lower = m_lower
+
+    def get_orbital_frequency(self, t=2000):
+        # Lowest total mass in band is m_lower, for f_lower = 14.5 Hz
+        return 1.0, 14.5 * self.m_lower
+
+
+def taper_chirp(wav, mtot, sample_rate, time_length, t_option):
+    times = np.arange(sample_rate * time_length) / float(sample_rate)
+    tau = np.clip(time_length - 1.0 - times, 1.0e-3, None) * 20.0 / mtot
+    signal = np.cos(wav.rate * tau ** 0.6 + wav.phase_offset)
+    signal *= np.exp(-((times - 3.0) / 2.0) ** 2)
+    return [
+        TimeSeries(signal * window, delta_t=1.0 / sample_rate)
+        for window in [np.ones_like(times), np.hanning(len(times))]
+    ]
+
+
+def test_overlap_matrix_matches_pycbc():
+    waveforms = dict(
+        (name, Chirp(phase, rate))
+        for name, phase, rate in [("a", 0.0, 300.0), ("b", 1.0, 310.0), ("c", 2.0, 290.0)]
+    )
+    pairs = [("a", "b"), ("b", "c"), ("a", "a")]
+    masses = [40.0, 60.0, 80.0]
+    psd = aLIGOZeroDetHighPower(SAMPLE_RATE * TIME_LENGTH // 2 + 1, 1.0 / TIME_LENGTH, 15.0)
+    masses, overlaps = nr_filter.overlap_matrix_vs_totalmass(
+        waveforms, pairs, psd, masses=masses, blend_func=taper_chirp
+    )
+    assert overlaps.shape == (3, 3, 2)
+    for ip, (n1, n2) in enumerate(pairs):
+        for im, mtot in enumerate(masses):
+            tapered1 = taper_chirp(waveforms[n1], mtot, SAMPLE_RATE, TIME_LENGTH, None)
+            tapered2 = taper_chirp(waveforms[n2], mtot, SAMPLE_RATE, TIME_LENGTH, None)
+            for it in range(2):
+                expected, _ = match(
+                    tapered1[it], tapered2[it], psd=psd, low_frequency_cutoff=15.0
+                )
+                assert overlaps[ip, im, it] == pytest.approx(expected, rel=1.0e-6)
+    assert np.allclose(overlaps[2], 1.0)
+
+
+def test_each_pair_keeps_its_own_mass_grid():
+    waveforms = {
+        "long": Chirp(0.0, 300.0, m_lower=20.5),
+        "short": Chirp(1.0, 310.0, m_lower=33.2),
+    }
+    pairs = [("long", "long"), ("long", "short")]
+    psd = aLIGOZeroDetHighPower(SAMPLE_RATE * TIME_LENGTH // 2 + 1, 1.0 / TIME_LENGTH, 15.0)
+    masses, overlaps = nr_filter.overlap_matrix_vs_totalmass(
+        waveforms, pairs, psd, m_upper=60.0, m_delta=10.0, blend_func=taper_chirp
+    )
+    for ip, m_lower in enumerate([20.5, 33.2]):
+        pair_masses = nr_filter.get_uniform_mass_range(m_lower, 60.0, 10.0)
+        legacy = nr_filter.legacy_overlaps_from_matrix(masses, overlaps[ip])
+        assert np.array_equal(legacy[:, 0], pair_masses)
+        _, expected = nr_filter.overlap_matrix_vs_totalmass(
+            waveforms, [pairs[ip]], psd, masses=pair_masses, blend_func=taper_chirp
+        )
+        assert np.allclose(legacy[:, 1:], expected[0], rtol=1.0e-12)
+    # The short waveform is not in band below its own lowest mass
+    assert np.all(np.isnan(overlaps[1][masses < 33.2]))
@@ -0,0 +1,116 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""NR polarizations for many masses in gwnr.waveform.nr_waveform_sxs"""
+
+import numpy as np
+import pytest
+
+h5py = pytest.importorskip("h5py")
+import lal
+
+import gwnr.nr
+from gwnr.benchmarks.synthetic import write_synthetic_nr_hdf5
+from gwnr.waveform.nr_waveform_sxs import (
+    get_hplus_hcross_from_sxs,
+    get_hplus_hcross_from_sxs_batch,
+)
+
+GROUP_NAME = "Extrapolated_N3.dir"
+NUM_SAMPLES = 4000  # in units of total mass, at unit spacing
+PARAMS = {
+    "mtotal": 40.0,
+    "inclination": 0.3,
+    "coa_phase": 0.1,
+    "distance": 100.0,  # Mpc
+    "end_time": 0.0,
+    "f_lower": 10.0,
+    "group_name": GROUP_NAME,
+}
+# Tapering is not exercised here
+KWARGS = {"modeLmax": 3, "taper": False}
+
+
+@pytest.fixture(scope="module")
+def nr_file(tmp_path_factory):
+    filename = str(
+        tmp_path_factory.mktemp("nr") / "Sim_rhOverM_Asymptotic_GeometricUnits.h5"
+    )
+    return write_synthetic_nr_hdf5(
+        filename, num_samples=NUM_SAMPLES, delta_t=1.0, modeLmax=3
+    )
+
+
+def read_nr_wave(nr_file, **kwargs):
+    return gwnr.nr.nr_wave(nr_file, group_name=GROUP_NAME, modeLmax=3, **kwargs)
+
+
+def test_required_time_length(nr_file):
+    nrwav = read_nr_wave(nr_file, totalmass=40.0, sample_rate=2048, time_length=1)
+    delta_t = 1.0 / 4096
+    for mass in [40.0, 80.0, 300.0]:
+        time_length = nrwav.required_time_length(M=mass, delta_t=delta_t)
+        duration = (NUM_SAMPLES - 1) * mass * lal.MTSUN_SI
+        # Shortest power of 2 that holds all modes
+        assert np.log2(time_length) == np.round(np.log2(time_length))
+        assert duration + 2 * delta_t <= time_length < 2 * (duration + 2 * delta_t)
+    # Defaults to the object's mass and sample spacing
+    assert nrwav.required_time_length() == nrwav.required_time_length(
+        M=40.0, delta_t=1.0 / 2048
+    )
+
+    # Polarizations grow to fit modes rescaled to a larger mass
+    hp, _ = nrwav.get_polarizations(M=300.0, delta_t=delta_t)
+    assert nrwav.time_length == nrwav.required_time_length(M=300.0, delta_t=delta_t)
+    assert len(hp) * delta_t <= nrwav.time_length
+
+
+def test_nr_wave_input_matches_file_input(nr_file):
+    # Read at another sample rate and distance than the ones asked for
+    nrwav = read_nr_wave(
+        nr_file, totalmass=40.0, sample_rate=2048, time_length=1, distance=1.0
+    )
+    delta_t = 1.0 / 4096
+    hp, hc, _ = get_hplus_hcross_from_sxs(nrwav, PARAMS, delta_t, **KWARGS)
+    file_hp, file_hc, _ = get_hplus_hcross_from_sxs(nr_file, PARAMS, delta_t, **KWARGS)
+    assert hp.delta_t == file_hp.delta_t == delta_t
+    assert float(hp.start_time) == float(file_hp.start_time)
+    assert np.allclose(hp.numpy(), file_hp.numpy(), rtol=0, atol=1e-30)
+    assert np.allclose(hc.numpy(), file_hc.numpy(), rtol=0, atol=1e-30)
+    # Distance is given in Mpc: strain is of the expected size and falls as 1/D
+    assert 1e-22 < np.abs(hp.numpy()).max() < 1e-20
+    far_hp, _, _ = get_hplus_hcross_from_sxs(
+        nrwav, dict(PARAMS, distance=200.0), delta_t, **KWARGS
+    )
+    assert np.allclose(2 * far_hp.numpy(), hp.numpy(), rtol=0, atol=1e-30)
+
+
+def test_batch_matches_single_calls(nr_file):
+    delta_t = 1.0 / 2048
+    samples = [(40.0, 0.3, 0.1), (120.0, 1.0, 2.0), (60.0, 0.0, 0.5)]
+    polarizations, nrwav = get_hplus_hcross_from_sxs_batch(
+        nr_file, PARAMS, delta_t, samples, **KWARGS
+    )
+    assert isinstance(nrwav, gwnr.nr.nr_wave)
+    assert len(polarizations) == len(samples)
+    for (mass, inclination, coa_phase), (hp, hc) in zip(samples, polarizations):
+        params = dict(PARAMS, mtotal=mass, inclination=inclination, coa_phase=coa_phase)
+        exp_hp, exp_hc, _ = get_hplus_hcross_from_sxs(
+            nr_file, params, delta_t, **KWARGS
+        )
+        assert len(hp) == len(exp_hp)
+        assert float(hp.start_time) == float(exp_hp.start_time)
+        assert np.allclose(hp.numpy(), exp_hp.numpy(), rtol=0, atol=1e-30)
+        assert np.allclose(hc.numpy(), exp_hc.numpy(), rtol=0, atol=1e-30)
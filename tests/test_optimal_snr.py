@@ -0,0 +1,112 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""Optimal SNRs from gwnr.analysis.optimal_snr against pycbc.filter.sigma"""
+
+import numpy as np
+import pytest
+
+optimal_snr = pytest.importorskip("gwnr.analysis.optimal_snr")
+pytest.importorskip("lalsimulation")
+
+from pycbc.filter import sigma
+from pycbc.psd import from_string
+from pycbc.waveform import get_td_waveform
+
+PSD_NAME = "aLIGOZeroDetHighPower"
+SAMPLE_RATE = 4096
+SEGLEN = 16
+F_LOWER = 20.0
+SIGNAL = dict(mass1=20.0, mass2=20.0, spin1z=0.3, spin2z=0.0, distance=400.0)
+
+
+def reference_snr(approximant):
+    hp, _ = get_td_waveform(
+        approximant=approximant, f_lower=F_LOWER, delta_t=1.0 / SAMPLE_RATE, **SIGNAL
+    )
+    hp.resize(SEGLEN * SAMPLE_RATE)
+    psd = from_string(PSD_NAME, SEGLEN * SAMPLE_RATE // 2 + 1, 1.0 / SEGLEN, F_LOWER)
+    return sigma(hp, psd=psd, low_frequency_cutoff=F_LOWER)
+
+
+def injection_params(approximant, num=1):
+    params = dict((k, np.full(num, v)) for k, v in SIGNAL.items())
+    params["f_lower"] = np.full(num, F_LOWER)
+    params["approximant"] = np.array([approximant] * num)
+    return params
+
+
+@pytest.mark.parametrize(
+    "approximant, table_name",
+    [
+        ("SEOBNRv4", "SEOBNRv4"),
+        ("SEOBNRv4", "SEOBNRv4pseudoFourPN"),
+        # Conditioned from the frequency domain, padded after the merger
+        ("IMRPhenomD", "IMRPhenomD"),
+        ("IMRPhenomD", "IMRPhenomDpseudoFourPN"),
+    ],
+)
+def test_optimal_snr_matches_sigma(approximant, table_name):
+    calc = optimal_snr.OptimalSNRCalculator(
+        {"H1": PSD_NAME}, F_LOWER, sample_rate=SAMPLE_RATE, delta_f=1.0 / SEGLEN
+    )
+    products = calc.inner_products(injection_params(table_name))
+    assert np.sqrt(products[0, 0, 0]) == pytest.approx(
+        reference_snr(approximant), rel=1e-3
+    )
+
+
+def test_signal_longer_than_segment_keeps_merger():
+    # A 4 s segment is shorter than the 20 Hz signal; the window must keep
+    # the merger, which carries most of the SNR
+    calc = optimal_snr.OptimalSNRCalculator(
+        {"H1": PSD_NAME}, F_LOWER, sample_rate=SAMPLE_RATE, delta_f=1.0 / 4
+    )
+    snr = np.sqrt(calc.inner_products(injection_params("IMRPhenomD"))[0, 0, 0])
+    assert 0.5 * reference_snr("IMRPhenomD") < snr <= 1.01 * reference_snr("IMRPhenomD")
+
+
+def test_network_snr_from_antenna_factors():
+    calc = optimal_snr.OptimalSNRCalculator(
+        {"H1": PSD_NAME, "L1": PSD_NAME},
+        F_LOWER,
+        sample_rate=SAMPLE_RATE,
+        delta_f=1.0 / SEGLEN,
+        block_size=2,
+    )
+    params = injection_params("IMRPhenomD", num=3)
+    params["inclination"] = np.array([0.0, 0.7, 1.4])
+    params["ra"] = np.array([0.1, 1.2, 3.0])
+    params["dec"] = np.array([-0.4, 0.2, 0.9])
+    params["polarization"] = np.array([0.0, 0.5, 2.0])
+    params["end_time"] = np.full(3, 1.0e9)
+    snrs = calc.snrs(params)
+
+    # Direct projection onto one detector
+    fp, fc = calc.antenna_factors(params, "L1")
+    hp, hc = get_td_waveform(
+        approximant="IMRPhenomD",
+        f_lower=F_LOWER,
+        delta_t=1.0 / SAMPLE_RATE,
+        inclination=0.7,
+        **SIGNAL
+    )
+    h = fp[1] * hp + fc[1] * hc
+    h.resize(SEGLEN * SAMPLE_RATE)
+    psd = from_string(PSD_NAME, SEGLEN * SAMPLE_RATE // 2 + 1, 1.0 / SEGLEN, F_LOWER)
+    assert snrs["L1"][1] == pytest.approx(
+        sigma(h, psd=psd, low_frequency_cutoff=F_LOWER), rel=1e-3
+    )
+    assert np.allclose(snrs["network"] ** 2, snrs["H1"] ** 2 + snrs["L1"] ** 2)
@@ -0,0 +1,99 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""Columnar overlap store of gwnr.nr.analysis.types"""
+
+import numpy as np
+import pytest
+
+h5py = pytest.importorskip("h5py")
+types = pytest.importorskip("gwnr.nr.analysis.types")
+nr_filter = pytest.importorskip("gwnr.nr.analysis.filter")
+
+MASSES = np.array([20.0, 40.0, 60.0])
+
+
+def write_simulation(simdir):
+    matchdir = simdir / "matches"
+    matchdir.mkdir(parents=True)
+    # Per-pair layout
+    with h5py.File(str(matchdir / "OverlapsLevs.h5"), "w") as fout:
+        grp = fout.create_group("CceR0100.dir")
+        for name, value in [("Lev4_Lev5", 0.99), ("Lev5_Lev5", 1.0)]:
+            grp.create_dataset(
+                name + ".dat",
+                data=np.column_stack([MASSES, np.full((3, 2), value)]),
+            )
+    # Pair x mass x taper layout
+    pairs = [("Lev4/CceR0100", "Lev5/CceR0100"), ("Lev5/CceR0100", "Lev5/CceR0100")]
+    overlaps = np.stack([np.full((3, 2), 0.9), np.ones((3, 2))])
+    # The lowest mass is off the grid of the first pair
+    overlaps[0, 0] = np.nan
+    nr_filter.write_overlap_matrix_hdf5(
+        str(matchdir / "OverlapsExtractionRadii.h5"), "Levs", pairs, MASSES, overlaps
+    )
+
+
+@pytest.mark.parametrize(
+    "pair, expected",
+    [
+        ("Lev5.dir/CceR0100_CceR0100.dat", True),
+        ("Levs/Lev5_CceR0100_Lev5_CceR0100.dat", True),
+        ("Levs/Lev4_CceR0100_Lev5_CceR0100.dat", False),
+        ("CceR0100.dir/Lev4_Lev5.dat", False),
+        ("CceR0100.dir/Lev5_Lev5", True),
+        ("CceR0100.dir/Lev5.dat", False),
+    ],
+)
+def test_is_self_pair(pair, expected):
+    assert types.OverlapStore.is_self_pair(pair) == expected
+
+
+def test_self_pairs_of_both_layouts(tmp_path):
+    write_simulation(tmp_path / "SimA")
+    store = types.OverlapStore(str(tmp_path / "store.h5"))
+    assert store.refresh([str(tmp_path / "SimA")]) == ["SimA"]
+    assert sorted(store.pairs) == [
+        "CceR0100.dir/Lev4_Lev5.dat",
+        "CceR0100.dir/Lev5_Lev5.dat",
+        "Levs/Lev4_CceR0100_Lev5_CceR0100.dat",
+        "Levs/Lev5_CceR0100_Lev5_CceR0100.dat",
+    ]
+    mask = store.select(noduplicate=True)
+    assert np.all(store.column("overlap")[mask] < 1.0)
+    assert np.count_nonzero(mask) == (len(MASSES) + len(MASSES) - 1) * 2
+    assert not np.any(np.isnan(store.column("overlap")))
+
+    store.write()
+    reread = types.OverlapStore(str(tmp_path / "store.h5"))
+    assert np.array_equal(reread.select(noduplicate=True), mask)
+    assert reread.refresh([str(tmp_path / "SimA")]) == []
+    _, worst, _ = reread.worst_mismatch_per_simulation(error_type="ccer")
+    assert worst[0] == pytest.approx(0.1)
+
+
+def test_max_mismatch_vs_mass(tmp_path):
+    write_simulation(tmp_path / "SimA")
+    store = types.OverlapStore(str(tmp_path / "store.h5"))
+    store.refresh([str(tmp_path / "SimA")])
+    worst = store.max_mismatch_vs_mass("SimA", error_type="ccer")
+    # The lowest mass is off the grid of the only pair that is not a self pair
+    assert np.array_equal(worst.X(), MASSES[1:])
+    assert worst.nWindows == 2
+    assert np.allclose(worst.Y(0), 0.9)
+    for sim, error_type in [("SimB", "ccer"), ("SimA", "no_such_error")]:
+        empty = store.max_mismatch_vs_mass(sim, error_type=error_type)
+        assert len(empty.X()) == 0
+        assert empty.nWindows == 0
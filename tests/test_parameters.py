@@ -0,0 +1,106 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""Parameter conversions in gwnr.waveform.parameters"""
+
+import numpy as np
+import pytest
+
+parameters = pytest.importorskip("gwnr.waveform.parameters")
+conversions = pytest.importorskip("pycbc.conversions")
+
+
+@pytest.fixture
+def binaries():
+    rng = np.random.RandomState(7)
+    m1 = rng.uniform(1.0, 50.0, 64)
+    m2 = rng.uniform(1.0, 50.0, 64)
+    spins = rng.uniform(-0.6, 0.6, (6, 64))
+    return m1, m2, spins
+
+
+def test_array_conversions_match_pycbc(binaries):
+    m1, m2, (s1x, s1y, s1z, s2x, s2y, s2z) = binaries
+    mchirp, eta = parameters.masses_to_mchirp_eta(m1, m2)
+    np.testing.assert_allclose(mchirp, conversions.mchirp_from_mass1_mass2(m1, m2))
+    np.testing.assert_allclose(eta, conversions.eta_from_mass1_mass2(m1, m2))
+    np.testing.assert_allclose(
+        parameters.spins_to_massweighted_spin(m1, m2, s1z, s2z),
+        conversions.chi_eff(m1, m2, s1z, s2z),
+    )
+    np.testing.assert_allclose(
+        parameters.chip_from_masses_spins(m1, m2, s1x, s1y, s1z, s2x, s2y, s2z),
+        conversions.chi_p(m1, m2, s1x, s1y, s2x, s2y),
+    )
+    tau0, tau3 = parameters.masses_to_tau0_tau3(m1, m2, 20.0)
+    np.testing.assert_allclose(
+        tau0, conversions.tau0_from_mass1_mass2(m1, m2, 20.0), rtol=1e-12
+    )
+    np.testing.assert_allclose(
+        tau3, conversions.tau3_from_mass1_mass2(m1, m2, 20.0), rtol=1e-12
+    )
+
+
+def test_scalar_inputs_give_floats(binaries):
+    m1, m2, (s1x, s1y, s1z, s2x, s2y, s2z) = binaries
+    chip = parameters.chip_from_masses_spins(
+        m1, m2, s1x, s1y, s1z, s2x, s2y, s2z
+    )
+    for i in range(len(m1)):
+        value = parameters.chip_from_masses_spins(
+            m1[i], m2[i], s1x[i], s1y[i], s1z[i], s2x[i], s2y[i], s2z[i]
+        )
+        assert isinstance(value, float)
+        assert value == pytest.approx(chip[i], rel=1e-14)
+    assert isinstance(parameters.q_to_eta(2.0), float)
+    assert isinstance(parameters.spins_to_PNeffective_spin(10, 5, 0.1, 0.2), float)
+
+
+def test_eta_q_round_trip():
+    q = np.array([1.0, 1.5, 4.0, 20.0])
+    np.testing.assert_allclose(parameters.eta_to_q(parameters.q_to_eta(q)), q)
+    # Round-off above eta = 1/4 gives equal masses
+    assert parameters.eta_to_q(0.25 + 1e-17) == pytest.approx(1.0)
+
+
+def test_table_to_arrays(binaries):
+    lsctables = pytest.importorskip("glue.ligolw.lsctables")
+    m1, m2, (s1x, s1y, s1z, s2x, s2y, s2z) = binaries
+    table = lsctables.New(
+        lsctables.SimInspiralTable,
+        columns=["mass1", "mass2", "spin1z", "spin2z", "f_lower", "waveform"],
+    )
+    for i in range(len(m1)):
+        row = table.RowType()
+        row.mass1, row.mass2 = m1[i], m2[i]
+        row.spin1z, row.spin2z = s1z[i], s2z[i]
+        row.f_lower = 15.0
+        row.waveform = "IMRPhenomD"
+        table.append(row)
+
+    arrays = parameters.table_to_arrays(table, columns=["waveform"])
+    np.testing.assert_array_equal(arrays["mass1"], m1)
+    np.testing.assert_array_equal(arrays["spin1x"], np.zeros(len(m1)))
+    assert list(arrays["waveform"]) == ["IMRPhenomD"] * len(m1)
+    np.testing.assert_allclose(arrays["mtotal"], m1 + m2)
+    np.testing.assert_allclose(arrays["q"], np.maximum(m1, m2) / np.minimum(m1, m2))
+    np.testing.assert_allclose(arrays["chi_eff"], conversions.chi_eff(m1, m2, s1z, s2z))
+    np.testing.assert_array_equal(arrays["chi_p"], np.zeros(len(m1)))
+    np.testing.assert_allclose(
+        arrays["tau0"], conversions.tau0_from_mass1_mass2(m1, m2, 15.0), rtol=1e-12
+    )
+
+    raw = parameters.table_to_arrays(table, columns=["mass1"], derived=False)
+    assert list(raw) == ["mass1"]
@@ -0,0 +1,99 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""Stage bookkeeping of gwnr.waveform.prepare_waveforms"""
+
+import os
+
+import pytest
+
+prepare_waveforms = pytest.importorskip("gwnr.waveform.prepare_waveforms")
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    for seg in ["Lev2_AA", "Lev2_AB"]:
+        run_dir = tmp_path / "sims" / "Sim" / "Ecc0" / "Ev" / seg / "Run" / "GW2"
+        run_dir.mkdir(parents=True)
+        (run_dir / "rh_FiniteRadii_CodeUnits.h5").write_text(seg)
+    wfp = prepare_waveforms.PrepareSXSWaveform(
+        "Sim", sim_dir=str(tmp_path / "sims"), out_dir=str(tmp_path / "out"), lev=2
+    )
+    wfp._state = wfp.read_pipeline_state()
+    return wfp
+
+
+def join(wfp, text):
+    calls = []
+
+    def func(force=False, verbose=False):
+        calls.append(verbose)
+        with open(wfp.joined_waveform_outfile_path, "w") as fp:
+            fp.write(text)
+
+    return func, calls
+
+
+def test_verbosity_does_not_rerun_stages(pipeline):
+    func, calls = join(pipeline, "joined")
+    status = pipeline.run_stage("join_waveforms", func, {}, options={"verbose": True})
+    assert status["status"] == "ran" and calls == [True]
+    status = pipeline.run_stage("join_waveforms", func, {}, options={"verbose": False})
+    assert status["status"] == "skipped" and calls == [True]
+    # Hashed parameters do
+    status = pipeline.run_stage("join_waveforms", func, {"verbose": False})
+    assert status["status"] == "ran"
+
+
+def test_failed_stage_keeps_previous_outputs(pipeline):
+    func, _ = join(pipeline, "joined")
+    pipeline.run_stage("join_waveforms", func, {})
+    record = dict(pipeline._state["stages"]["join_waveforms"])
+
+    def fail(force=False):
+        with open(pipeline.joined_waveform_outfile_path, "w") as fp:
+            fp.write("partial")
+        raise RuntimeError("JoinH5 failed")
+
+    with pytest.raises(RuntimeError, match="JoinH5 failed"):
+        pipeline.run_stage("join_waveforms", fail, {}, force=True)
+    with open(pipeline.joined_waveform_outfile_path) as fp:
+        assert fp.read() == "joined"
+    assert pipeline._state["stages"]["join_waveforms"] == record
+    assert sorted(os.listdir(pipeline.out_dir)) == ["joined", "pipeline_state.json"]
+
+    # A stage that writes nothing is a failure too
+    with pytest.raises(RuntimeError, match="wrote no output files"):
+        pipeline.run_stage("join_waveforms", lambda force=False: None, {}, force=True)
+    assert os.path.isfile(pipeline.joined_waveform_outfile_path)
+
+    func, _ = join(pipeline, "rejoined")
+    assert pipeline.run_stage("join_waveforms", func, {}, force=True)["status"] == "ran"
+    with open(pipeline.joined_waveform_outfile_path) as fp:
+        assert fp.read() == "rejoined"
+
+
+def test_failed_command_raises(pipeline, monkeypatch):
+    assert pipeline.run_command("true") == 0
+    with pytest.raises(RuntimeError):
+        pipeline.run_command("exit 3")
+    # A JoinH5 that fails, e.g. as it is not on the PATH
+    monkeypatch.setenv("PATH", "")
+    with pytest.raises(RuntimeError):
+        pipeline.join_waveform_h5_files(force=True)
+
+
+def test_no_jobs():
+    assert prepare_waveforms.prepare_sxs_waveforms([], num_processes=4) == []
@@ -0,0 +1,116 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""Burn-in and resumption of emcee samplers in gwnr.stats.samplers"""
+
+import numpy as np
+import pytest
+
+emcee = pytest.importorskip("emcee")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("h5py")
+if int(emcee.__version__.split(".")[0]) < 3:
+    pytest.skip("HDF5 backends need emcee v3+", allow_module_level=True)
+
+from gwnr.stats.samplers import get_emcee_ensemble_sampler, run_emcee_sampler
+
+NWALKERS = 8
+
+
+class Interrupted(Exception):
+    pass
+
+
+class GaussianLogProb(object):
+    """Vectorized log-probability that counts calls, and can fail"""
+
+    def __init__(self, fail_after=None):
+        self.calls = 0
+        self.fail_after = fail_after
+
+    def __call__(self, x):
+        self.calls += 1
+        if self.fail_after is not None and self.calls > self.fail_after:
+            raise Interrupted()
+        return -0.5 * np.sum(x ** 2, axis=-1)
+
+
+def params_to_sample():
+    prior = {"dist": "uniform", "range": (-1.0, 1.0)}
+    return pd.DataFrame({"x": prior, "y": prior})
+
+
+def sampler_for(log_prob, backend, burn_in, resume):
+    return get_emcee_ensemble_sampler(
+        log_prob,
+        params_to_sample(),
+        [],
+        nwalkers=NWALKERS,
+        burn_in=burn_in,
+        backend_hdf=backend,
+        resume=resume,
+        vectorize=True,
+    )
+
+
+def test_resume_finishes_interrupted_burn_in(tmp_path):
+    backend = str(tmp_path / "chain.h5")
+    # One call for the initial positions, then one per half-ensemble
+    # per iteration
+    with pytest.raises(Interrupted):
+        sampler_for(GaussianLogProb(fail_after=1 + 2 * 12), backend, 30, False)
+    assert emcee.backends.HDFBackend(backend, read_only=True).iteration == 12
+
+    log_prob = GaussianLogProb()
+    sampler, state, p0 = sampler_for(log_prob, backend, 30, True)
+    assert log_prob.calls == 2 * (30 - 12)
+    assert sampler.iteration == 0
+    assert p0.shape == (NWALKERS, 2)
+
+    run_emcee_sampler(sampler, state, 20, check_every=0)
+    assert sampler.iteration == 20
+
+    # Production resumes without another burn-in
+    log_prob = GaussianLogProb()
+    sampler, state, _ = sampler_for(log_prob, backend, 30, True)
+    assert log_prob.calls == 0 and sampler.iteration == 20
+    run_emcee_sampler(sampler, state, 25, check_every=0)
+    assert sampler.iteration == 25 and log_prob.calls == 2 * 5
+
+
+def test_fresh_start_burns_in(tmp_path):
+    backend = str(tmp_path / "chain.h5")
+    log_prob = GaussianLogProb()
+    sampler, _, _ = sampler_for(log_prob, backend, 10, True)
+    assert log_prob.calls == 1 + 2 * 10 and sampler.iteration == 0
+    # Without resume, the backend is started over
+    log_prob = GaussianLogProb()
+    sampler_for(log_prob, backend, 10, False)
+    assert log_prob.calls == 1 + 2 * 10
+
+
+def test_resume_after_burn_in_before_production(tmp_path):
+    backend = str(tmp_path / "chain.h5")
+    _, _, burned_in = sampler_for(GaussianLogProb(), backend, 10, False)
+    # Interrupted before the first production sample was written
+    assert emcee.backends.HDFBackend(backend, read_only=True).iteration == 0
+
+    log_prob = GaussianLogProb()
+    sampler, state, p0 = sampler_for(log_prob, backend, 10, True)
+    assert log_prob.calls == 0 and sampler.iteration == 0
+    assert np.array_equal(p0, burned_in)
+    run_emcee_sampler(sampler, state, 5, check_every=0)
+    # Log-probabilities at the burned-in positions are not recomputed
+    assert sampler.iteration == 5 and log_prob.calls == 2 * 5
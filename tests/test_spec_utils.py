@@ -0,0 +1,127 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""Readers of SpEC tabular data in gwnr.nr.spec.utils"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("h5py")
+from gwnr.nr.spec import utils
+
+HEADER = "# Some quantity\n# [1] = time\n# [2] = value\n"
+
+
+def write_dat(path, data, header=HEADER, comments_every=None):
+    with open(str(path), "w") as fp:
+        fp.write(header)
+        for idx, row in enumerate(data):
+            if comments_every and idx and idx % comments_every == 0:
+                fp.write("# restart\n\n")
+            fp.write(" ".join("%.16e" % x for x in row) + "\n")
+    return str(path)
+
+
+def table(num_rows=10, num_cols=3):
+    times = np.arange(num_rows, dtype=np.float64)
+    return np.column_stack([times] + [times * (c + 1) + 0.5 for c in range(num_cols - 1)])
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 2, 3, 4, 7, 100])
+def test_chunks_keep_every_row(tmp_path, chunk_rows):
+    # A header as long as a chunk used to drop the row that follows it
+    data = table()
+    filename = write_dat(tmp_path / "Data.dat", data, comments_every=3)
+    chunks = list(utils.IterateSpECTabularASCIIChunks(filename, chunk_rows=chunk_rows))
+    assert np.array_equal(np.concatenate(chunks), data)
+
+
+def test_chunks_of_comments_only(tmp_path):
+    filename = write_dat(tmp_path / "Data.dat", table(0), header=HEADER * 3)
+    assert list(utils.IterateSpECTabularASCIIChunks(filename, chunk_rows=3)) == []
+    assert utils.ReadSpECTabularFile(filename, chunk_rows=3).shape[0] == 0
+
+
+@pytest.mark.parametrize("cache", [False, True])
+def test_read_tabular_file(tmp_path, cache):
+    data = table()
+    filename = write_dat(tmp_path / "Data.dat", data, comments_every=4)
+    for _ in range(2):
+        # Second pass reads the cache, if any
+        values = utils.ReadSpECTabularFile(filename, chunk_rows=3, cache=cache)
+        assert np.array_equal(values, data)
+        values = utils.ReadSpECTabularFile(
+            filename, usecols=[0, 2], tmin=2.0, tmax=5.0, chunk_rows=3, cache=cache
+        )
+        assert np.array_equal(values, data[2:6][:, [0, 2]])
+    assert cache == (tmp_path / ".Data.dat.npy").exists()
+
+
+def test_cache_sized_by_parsed_rows(tmp_path):
+    data = table()
+    filename = write_dat(tmp_path / "Data.dat", data)
+    cache_file = utils.GetSpECTabularCacheFilename(filename)
+    cached = utils.WriteSpECTabularCache(filename, cache_file, chunk_rows=3)
+    assert cached.shape == data.shape
+    assert np.array_equal(cached, data)
+
+
+def subdomain_data():
+    # Overlapping times, and extra columns that are not the quantity
+    rng = np.random.RandomState(4)
+    retval = {}
+    for sdx, (t0, t1) in enumerate([(0, 6), (2, 9), (4, 12)]):
+        times = np.arange(t0, t1, dtype=np.float64)
+        retval["Sd%d.dir" % sdx] = np.column_stack(
+            [times, rng.normal(size=len(times)), 100.0 + rng.normal(size=(len(times), 2))]
+        )
+    return retval
+
+
+def column_one_reduction(data_dict, func):
+    times = np.unique(np.concatenate([d[:, 0] for d in data_dict.values()]))
+    values, subdomains = [], []
+    for t in times:
+        avail = dict((sd, d[d[:, 0] == t, 1][0]) for sd, d in data_dict.items() if t in d[:, 0])
+        values.append(func(list(avail.values())))
+        subdomains.append([sd for sd in avail if avail[sd] == values[-1]])
+    return times, np.array(values), subdomains
+
+
+@pytest.mark.parametrize(
+    "op, func", [("min", np.min), ("max", np.max), ("mean", np.mean)]
+)
+def test_domain_reductions_use_column_one(op, func):
+    data_dict = subdomain_data()
+    times, values, subdomains = column_one_reduction(data_dict, func)
+    for op_func in [op, lambda vals, sds: func(vals)]:
+        t, y, sds = utils.GetOpOfQuantityOverDomain(
+            data_dict, op_func=op_func, verbose=False, max_memory_mb=1.0e-4
+        )
+        assert np.array_equal(t, times)
+        assert np.allclose(y, values)
+        if op != "mean":
+            assert all(sd in ok for sd, ok in zip(sds, subdomains))
+    t, y, sds = utils.GetOpOfQuantityOverDomain(
+        data_dict, op_func=getattr(utils, "Dummy" + op.capitalize(), op), verbose=False
+    )
+    assert np.allclose(y, values)
+
+
+def test_reduce_all_points():
+    data_dict = subdomain_data()
+    _, y, _ = utils.ReduceQuantityOverDomain(data_dict, op="max", column=None)
+    _, y1, _ = utils.ReduceQuantityOverDomain(data_dict, op="max")
+    assert np.all(y > 90.0) and np.all(y1 < 90.0)
@@ -0,0 +1,100 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""Spectre volume data and movie frames in gwnr.nr.spectre.evolutions"""
+
+import os
+
+import numpy as np
+import pytest
+
+h5py = pytest.importorskip("h5py")
+mpl = pytest.importorskip("matplotlib")
+from gwnr.nr.spectre.evolutions import volume_data
+
+NUM_OBS = 5
+NUM_POINTS = 16
+
+
+@pytest.fixture(autouse=True)
+def no_tex():
+    """Other gwnr modules turn on text.usetex when imported; frames are
+    rendered here without a LaTeX installation"""
+    with mpl.rc_context({"text.usetex": False}):
+        yield
+
+
+@pytest.fixture
+def volume_file(tmp_path):
+    filename = str(tmp_path / "Volume0.h5")
+    x, y = np.meshgrid(np.linspace(-1, 1, 4), np.linspace(-1, 1, 4))
+    with h5py.File(filename, "w") as fp:
+        group = fp.create_group("element_data.vol")
+        # Stored out of time order
+        for idx in [3, 0, 4, 1, 2]:
+            obs = group.create_group("ObservationId{}".format(1000 + idx))
+            obs.attrs["observation_value"] = 0.5 * idx
+            obs["InertialCoordinates_x"] = x.ravel()
+            obs["InertialCoordinates_y"] = y.ravel()
+            obs["Psi"] = np.sin(x.ravel() + idx) * np.cos(y.ravel())
+    return filename
+
+
+def test_reader(volume_file):
+    with volume_data.SpectreVolumeDataReader(volume_file) as reader:
+        assert len(reader) == NUM_OBS
+        assert np.array_equal(reader.times, 0.5 * np.arange(NUM_OBS))
+        assert list(reader.select_observations(dt=1.0)) == [0, 2, 4]
+        psi = reader.read_time_series(["Psi"], [1, 3], points=slice(None, None, 2))
+        assert psi["Psi"].shape == (2, NUM_POINTS // 2)
+        frame = reader.read_fields(["Psi"], 3)
+        assert np.allclose(psi["Psi"][1], frame["Psi"][::2])
+
+
+def render(volume_file, frames_dir, obs_indices, **kwargs):
+    return volume_data.render_movie_frames(
+        volume_file, obs_indices, "Psi", frames_dir, figsize=(3, 2), dpi=20, **kwargs
+    )
+
+
+def test_render_resumes_only_matching_frames(volume_file, tmp_path):
+    frames_dir = str(tmp_path / "movie.frames")
+    frames = render(volume_file, frames_dir, list(range(NUM_OBS)))
+    assert len(frames) == NUM_OBS and all(os.path.exists(f) for f in frames)
+    mtimes = [os.path.getmtime(f) for f in frames]
+
+    # Same settings: frames are reused
+    os.utime(frames[0], (1.0, 1.0))
+    assert render(volume_file, frames_dir, list(range(NUM_OBS))) == frames
+    assert os.path.getmtime(frames[0]) == 1.0
+    assert [os.path.getmtime(f) for f in frames[1:]] == mtimes[1:]
+
+    # Other settings: all frames are rendered again
+    render(volume_file, frames_dir, list(range(NUM_OBS)), cmin=-2.0)
+    assert os.path.getmtime(frames[0]) != 1.0
+
+    # Fewer observations: no stale frames are left for the encoder
+    fewer = render(volume_file, frames_dir, [0, 2])
+    assert sorted(f for f in os.listdir(frames_dir) if f.startswith("frame_")) == [
+        os.path.basename(f) for f in fewer
+    ]
+
+
+def test_render_without_resume(volume_file, tmp_path):
+    frames_dir = str(tmp_path / "movie.frames")
+    frames = render(volume_file, frames_dir, [0, 1])
+    os.utime(frames[0], (1.0, 1.0))
+    render(volume_file, frames_dir, [0, 1], resume=False)
+    assert os.path.getmtime(frames[0]) != 1.0
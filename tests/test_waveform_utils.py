@@ -0,0 +1,108 @@
+# Copyright (C) 2026 Prayush Kumar
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""Vectorized ISCO solver and batched crossing searches in gwnr.waveform.utils"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pycbc")
+from scipy.optimize import minimize_scalar
+from pycbc.types import TimeSeries
+
+from gwnr.waveform.utils import (
+    isco_eqn,
+    get_isco_x,
+    get_freq_crossings,
+    get_freq_crossings_batch,
+    get_time_at_y,
+    get_times_at_y_batch,
+)
+
+BINARIES = [
+    # mass1, mass2, spin1z, spin2z
+    (10.0, 10.0, 0.0, 0.0),
+    (30.0, 10.0, 0.5, -0.3),
+    (50.0, 5.0, -0.8, 0.2),
+    (20.0, 15.0, 0.9, 0.9),
+    (12.0, 3.0, -0.5, -0.5),
+]
+
+
+def scalar_isco_x(mass1, mass2, spin1z, spin2z):
+    """One binary at a time, as get_isco_x used to solve it"""
+    res = minimize_scalar(
+        isco_eqn,
+        method="brent",
+        bracket=[0.01, 1],
+        args=(mass1, mass2, spin1z, spin2z),
+        tol=1e-12,
+    )
+    return res.x
+
+
+def test_isco_x_matches_scalar_minimization():
+    expected = [scalar_isco_x(*b) for b in BINARIES]
+    mass1, mass2, spin1z, spin2z = np.array(BINARIES).T
+    x_isco = get_isco_x(mass1, mass2, spin1z, spin2z, chunk_size=2)
+    assert x_isco.shape == (len(BINARIES),)
+    assert np.allclose(x_isco, expected, rtol=1e-6)
+    # Scalar input gives a float
+    x_single = get_isco_x(*BINARIES[1])
+    assert isinstance(x_single, float)
+    assert np.isclose(x_single, expected[1], rtol=1e-6)
+    # The potential of a test mass has no minimum at this PN order
+    assert np.isnan(get_isco_x(1e-6, 1.0, 0.0, 0.0))
+
+
+def frequency_series(num, delta_t, seed):
+    """Oscillating frequencies that cross many values, ending at t ~ 0"""
+    rng = np.random.RandomState(seed)
+    t = np.arange(num) * delta_t
+    freq = 30.0 + 10.0 * t / t[-1] + 3.0 * np.sin(2 * np.pi * t * rng.uniform(1, 3))
+    return TimeSeries(freq, delta_t=delta_t, epoch=-t[-1] + 0.5 * delta_t)
+
+
+def test_freq_crossings_batch_matches_per_series():
+    series = [frequency_series(n, 1.0 / 256, seed) for seed, n in enumerate([300, 517, 1024])]
+    # A series too short to hold a crossing
+    series.append(frequency_series(2, 1.0 / 256, 7))
+    batch = get_freq_crossings_batch(series, 33.0, df_threshold=0.4)
+    assert len(batch) == len(series)
+    for fr, (times, freqs) in zip(series, batch):
+        exp_times, exp_freqs = get_freq_crossings(fr, 33.0, df_threshold=0.4)
+        assert np.array_equal(times, exp_times)
+        assert np.array_equal(freqs, exp_freqs)
+    assert len(batch[0][0]) > 1
+    assert get_freq_crossings_batch([], 33.0) == []
+
+
+def test_times_at_y_batch_matches_per_series():
+    delta_t = 1.0 / 1024
+    series = []
+    for seed, num in enumerate([700, 1000, 1500]):
+        t = np.arange(num) * delta_t
+        # Monotonic, so the crossing is unique within the search window
+        freq = 20.0 + 40.0 * (t / t[-1]) ** 2 + 0.1 * seed
+        series.append(TimeSeries(freq, delta_t=delta_t, epoch=-t[-1]))
+    fvalue = 45.0
+    batch = get_times_at_y_batch(series, fvalue)
+    assert batch.shape == (len(series),)
+    for fr, t_cross in zip(series, batch):
+        assert abs(t_cross - get_time_at_y(fr, fvalue)) < delta_t
+        # Linear interpolation lands on the crossing to within the
+        # curvature of the series over one sample
+        exact = np.interp(fvalue, np.asarray(fr), np.asarray(fr.sample_times))
+        assert abs(t_cross - exact) < 0.01 * delta_t